@@ -0,0 +1,597 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Simulated devenv for the offline Squish stand-in. It models the parts of Visual Studio and the
+# Qt VS Tools the configuration suite talks to: the main menu, the Qt Versions page of the
+# Options dialog, MSVS' "New Project" dialog and the Qt project wizards. Everything that differs
+# between machines or VS versions is read from the scenario, see DEFAULT_SCENARIO.
+
+import os
+import re
+
+from simulator import CheckBox, ComboBox, Edit, MenuItem, SimObject
+
+DEFAULT_SCENARIO = {
+    "productLine": "2022",
+    "displayVersion": "17.11.5",
+    "installationPath": "C:\\Program Files\\Microsoft Visual Studio\\2022\\Professional",
+    "instanceId": "4f1e2d3c",
+    "qtDirs": ["C:\\Qt\\6.7.2\\msvc2019_64", "C:\\Qt\\5.15.2\\msvc2019_64"],
+    "validQtDirs": None,              # None: all of "qtDirs"
+    "extensionInstalled": True,
+    "initializingSeconds": 3.0,       # "Qt VS Tools" menu shows "Initializing..." this long
+    "wizardDelaySeconds": 1.5,        # time between clicking "Create" and the wizard appearing
+    "accountNag": False,              # VS 2022 shows the "Account Settings" window on start
+    "realizedTemplates": 6,           # list items accessible without scrolling the list
+    "projectsLocation": "C:\\Users\\qt\\source\\repos",
+    "templates": [
+        # name, default project name, has class page, class page has header
+        ["Qt ActiveQt Server", "ActiveQtServer", True, True],
+        ["Qt Class Library", "QtClassLibrary", True, True],
+        ["Qt Console Application", "QtConsoleApplication", False, False],
+        ["Qt Designer Custom Widget", "QtDesignerWidget", True, True],
+        ["Qt Empty Application", "QtApplication", False, False],
+        ["Qt Quick Application", "QtQuickApplication", False, False],
+        ["Qt Test Application", "QtTest", True, False],
+        ["Qt Widgets Application", "QtWidgetsApplication", True, True],
+    ],
+    "otherTemplates": ["Console App", "Empty Project", "Windows Desktop Application"],
+}
+
+BUILD_SYSTEMS = ["Qt Visual Studio Project (Qt/MSBuild)",
+                 "CMake Project for Qt (cmake-qt, Qt/CMake helper functions)"]
+
+TEMPLATE_VIEW_MODEL = "Microsoft.VisualStudio.NewProjectDialog.VsTemplateViewModel"
+
+
+def scenarioValue(simulation, key):
+    return simulation.scenario.get(key, DEFAULT_SCENARIO[key])
+
+
+def createDevenv(simulation, context):
+    Devenv(simulation, context)
+
+
+def _normalizePath(path):
+    return path.replace("/", "\\").rstrip("\\").lower()
+
+
+def isValidQtDir(simulation, path):
+    valid = scenarioValue(simulation, "validQtDirs")
+    if valid is None:
+        valid = scenarioValue(simulation, "qtDirs")
+    return _normalizePath(path) in map(_normalizePath, valid)
+
+
+class Devenv:
+
+    def __init__(self, simulation, context):
+        self.simulation = simulation
+        self.context = context
+        self.clock = simulation.clock
+        context.model = self
+        arguments = context.commandLine.split()
+        context.name = "devenv"
+        context.commandLine = '"%s\\Common7\\IDE\\devenv.exe" %s' % (
+            self.scenario("installationPath"), " ".join(arguments[1:]))
+        self.rootSuffix = self._argument(arguments, "/RootSuffix") or ""
+        self.settings = simulation.store.setdefault("settings", {}).setdefault(
+            self.rootSuffix, {"qtVersions": []})
+        command = self._argument(arguments, "/Command")
+        if command == "QtVSTools.ClearSettings" and self.scenario("extensionInstalled"):
+            self.settings["qtVersions"] = []
+        self.readyTime = self.clock.now + self.scenario("initializingSeconds")
+        # Wake up waits for the menu to change
+        self.clock.schedule(self.scenario("initializingSeconds"), lambda: None)
+        self.mainWindow = context.addWindow(SimObject("Window", id="VisualStudioMainWindow",
+                                                      text="Microsoft Visual Studio"))
+        self._createMenus()
+        selectQt = SimObject("Label", self.mainWindow,
+                             text="Qt VS Tools: You must select a Qt version to use for "
+                                  "development. Click here to open the Qt Versions page.")
+        selectQt.visibleWhen = lambda: self.isInitialized() and not self.settings["qtVersions"]
+        if not command:
+            self._createQuickStartWindow()
+        if self.scenario("accountNag") and self.scenario("productLine") == "2022":
+            self._createAccountWindow()
+        self.newProjectDialog = None
+        self.solution = None
+
+    def scenario(self, key):
+        return scenarioValue(self.simulation, key)
+
+    @staticmethod
+    def _argument(arguments, switch):
+        lowered = [argument.lower() for argument in arguments]
+        if switch.lower() in lowered:
+            index = lowered.index(switch.lower())
+            if index + 1 < len(arguments):
+                return arguments[index + 1]
+        return None
+
+    def isInitialized(self):
+        return self.clock.now >= self.readyTime
+
+    def qtVersions(self):
+        return self.settings["qtVersions"]
+
+    def isValidQtDir(self, path):
+        return isValidQtDir(self.simulation, path)
+
+    def templates(self):
+        return [{"name": name, "defaultName": defaultName, "classPage": classPage,
+                 "classHeader": classHeader, "qt": True}
+                for name, defaultName, classPage, classHeader in self.scenario("templates")]
+
+    # Main window
+
+    def _createMenus(self):
+        menuBar = SimObject("MenuBar", self.mainWindow)
+        fileMenu = MenuItem(menuBar, text="File")
+        newMenu = MenuItem(fileMenu, text="New")
+        MenuItem(newMenu, text="Project...", action=self.openNewProjectDialog)
+        hasSolution = lambda: self.solution is not None
+        MenuItem(fileMenu, text="Close Solution", action=self.closeSolution, enabled=hasSolution)
+        MenuItem(fileMenu, text="Close Folder", action=self.closeSolution, enabled=hasSolution)
+        MenuItem(fileMenu, text="Close")
+        MenuItem(fileMenu, text="Exit", action=self.exit)
+        viewMenu = MenuItem(menuBar, text="View")
+        MenuItem(viewMenu, text="Error List")
+        buildMenu = MenuItem(menuBar, text="Build")
+        MenuItem(buildMenu, text="Build Solution")
+        MenuItem(buildMenu, text="Build All")
+        extensionsMenu = MenuItem(menuBar, text="Extensions")
+        MenuItem(extensionsMenu, text="Manage Extensions")
+        if self.scenario("extensionInstalled"):
+            vsToolsMenu = MenuItem(extensionsMenu, text="Qt VS Tools")
+            initializing = MenuItem(vsToolsMenu, text="Initializing...")
+            initializing.visibleWhen = lambda: not self.isInitialized()
+            for text, action in [("Qt Versions", self.openQtVersions), ("qt.io", None)]:
+                item = MenuItem(vsToolsMenu, text=text, action=action)
+                item.visibleWhen = self.isInitialized
+        helpMenu = MenuItem(menuBar, text="Help")
+        MenuItem(helpMenu, text="About Microsoft Visual Studio")
+
+    def _createQuickStartWindow(self):
+        window = self.context.addWindow(SimObject(
+            "Window", text="Microsoft Visual Studio",
+            **{"class": "Microsoft.VisualStudio.PlatformUI.GetToCode.QuickStartWindow"}))
+        label = SimObject("Label", window, text="System.Windows.Controls.AccessText "
+                                                "Microsoft.VisualStudio.Imaging.CrispImage")
+        label.onClick = lambda: self.context.removeWindow(window)
+
+    def _createAccountWindow(self):
+        window = self.context.addWindow(SimObject(
+            "Window", text="Microsoft Visual Studio Account Settings"))
+        close = SimObject("Button", window, text="Close")
+        close.onClick = lambda: self.context.removeWindow(window)
+
+    def keyPress(self, key):
+        window = self.context.activeWindow()
+        if window is not None and window.onKey:
+            window.onKey(key)
+
+    def exit(self):
+        self.context.quit()
+
+    def closeSolution(self):
+        self.solution = None
+
+    # Dialogs
+
+    def openQtVersions(self):
+        QtVersionsOptions(self)
+
+    def openNewProjectDialog(self):
+        if self.newProjectDialog is None:
+            self.newProjectDialog = NewProjectDialog(self)
+        self.newProjectDialog.show()
+
+    def messageBox(self, text, onClose=None):
+        dialog = self.context.addWindow(SimObject("Dialog", text="Microsoft Visual Studio"))
+        SimObject("Label", dialog, id="65535", text=text)
+        ok = SimObject("Button", dialog, text="OK")
+
+        def close():
+            self.context.removeWindow(dialog)
+            if onClose:
+                onClose()
+
+        def onKey(key):
+            if key in ("Escape", "Return"):
+                close()
+                return True
+            return False
+
+        ok.onClick = close
+        dialog.onKey = onKey
+        return dialog
+
+    def projectCreated(self, templateName, projectName, solutionName, location):
+        created = self.simulation.store.setdefault("createdProjects", [])
+        created.append({"template": templateName, "project": projectName,
+                        "solution": solutionName, "location": location})
+        self.solution = solutionName
+
+    def nextProjectIndex(self, defaultName, location):
+        created = self.simulation.store.get("createdProjects", [])
+        used = {entry["project"].lower() for entry in created
+                if _normalizePath(entry["location"]) == _normalizePath(location)}
+        index = 1
+        while (defaultName + str(index)).lower() in used:
+            index += 1
+        return index
+
+
+class QtVersionsOptions:
+
+    def __init__(self, devenv):
+        self.devenv = devenv
+        self.context = devenv.context
+        self.rows = sorted((dict(version) for version in devenv.qtVersions()),
+                           key=lambda version: version["name"].lower())
+        self.selected = None
+        self.dialog = self.context.addWindow(SimObject("Dialog", text="Options"))
+        self.dialog.onKey = self._onKey
+        ok = SimObject("Button", self.dialog, text="OK")
+        ok.onClick = self.apply
+        cancel = SimObject("Button", self.dialog, text="Cancel")
+        cancel.onClick = self.close
+        content = SimObject("WPFControl", self.dialog,
+                            **{"class": "System.Windows.Documents.AdornerDecorator"})
+        self.grid = SimObject("Table", content, name="DataGrid",
+                              rowCount=lambda: len(self.rows), columnCount=3)
+        add = SimObject("Button", content, text="Add")
+        add.onClick = self.addRow
+        remove = SimObject("Button", content, text="Remove")
+        remove.onClick = self.removeRow
+        nameLabel = SimObject("Label", content, text="Name:")
+        self.nameEdit = Edit(content, onChange=lambda text: self._edited("name", text),
+                             enabled=lambda: self.selected is not None)
+        self.nameEdit.leftObject = nameLabel
+        locationLabel = SimObject("Label", content, text="Location:")
+        self.locationEdit = Edit(content, onChange=lambda text: self._edited("path", text),
+                                 enabled=lambda: self.selected is not None)
+        self.locationEdit.leftObject = locationLabel
+        self._rebuildGrid()
+
+    def _rebuildGrid(self):
+        self.grid.clear()
+        for i, row in enumerate(self.rows):
+            for column, key in ((1, "name"), (2, "path")):
+                cell = SimObject("TableCell", self.grid, row=i, column=column)
+                cell.onClick = lambda i=i: self.select(i)
+                # Squish reports the cell texts without underscores, they are taken as
+                # access keys.
+                SimObject("Label", cell, text=lambda row=row, key=key: row[key].replace("_", ""))
+
+    def select(self, index):
+        self.selected = index
+        row = self.rows[index] if index is not None else {"name": "", "path": ""}
+        self.nameEdit.setText(row["name"], notify=False)
+        self.locationEdit.setText(row["path"], notify=False)
+
+    def _edited(self, key, text):
+        if self.selected is not None:
+            self.rows[self.selected][key] = text
+
+    def addRow(self):
+        self.rows.append({"name": "", "path": ""})
+        self._rebuildGrid()
+        self.select(len(self.rows) - 1)
+
+    def removeRow(self):
+        if self.selected is None:
+            return
+        del self.rows[self.selected]
+        self._rebuildGrid()
+        self.select(min(self.selected, len(self.rows) - 1) if self.rows else None)
+
+    def apply(self):
+        errors = []
+        for row in self.rows:
+            if not row["name"].strip():
+                errors.append("Name cannot be empty")
+            if not self.devenv.isValidQtDir(row["path"]):
+                errors.append('Cannot find qtpaths or qmake in "%s"' % row["path"])
+        if errors:
+            self.devenv.messageBox("Qt VS Tools: Invalid Qt versions\n\n" + "\n".join(errors))
+            return
+        self.devenv.settings["qtVersions"] = [dict(row) for row in self.rows]
+        self.close()
+
+    def close(self):
+        self.context.removeWindow(self.dialog)
+
+    def _onKey(self, key):
+        if key == "Escape":
+            self.close()
+            return True
+        if key == "Return":
+            self.apply()
+            return True
+        return False
+
+
+class NewProjectDialog:
+
+    def __init__(self, devenv):
+        self.devenv = devenv
+        self.context = devenv.context
+        self.page = "create"
+        self.filter = "All project types"
+        self.scrolled = False
+        self.selected = None
+        self.solutionFollowsProject = True
+        self.location = devenv.scenario("projectsLocation")
+        self.templates = devenv.templates() + [
+            {"name": name, "defaultName": re.sub(r"\W", "", name), "classPage": False,
+             "classHeader": False, "qt": False}
+            for name in devenv.scenario("otherTemplates")]
+        self.window = SimObject("Window", id="WorkflowHostView", text="Microsoft Visual Studio")
+        self.window.onKey = self._onKey
+        close = SimObject("Button", self.window, id="button_Close")
+        close.onClick = self.close
+        self._createStartPage()
+        self._createTemplatePage()
+        self._createConfigurePage()
+
+    def _page(self, name):
+        page = SimObject("Pane", self.window)
+        page.visibleWhen = lambda: self.page == name
+        return page
+
+    def _createStartPage(self):
+        page = self._page("start")
+        create = SimObject("Label", page, text="Create a _new project")
+        create.onClick = lambda: self.showPage("create")
+
+    def _createTemplatePage(self):
+        page = self._page("create")
+        filterBox = ComboBox(page, id="ComboBox_3", text=self.filter, onSelect=self.setFilter)
+        for text in ["All project types", "Desktop", "Console", "Qt"]:
+            filterBox.addItem(text)
+        self.listView = SimObject("ListView", page, name="TemplateList",
+                                  itemCount=lambda: len(self.realizedTemplates()) + 2)
+        for template in self.templates:
+            item = SimObject("ListViewItem", self.listView, text=TEMPLATE_VIEW_MODEL)
+            SimObject("Label", item, text=template["name"])
+            item.visibleWhen = lambda template=template: template in self.realizedTemplates()
+            item.onClick = lambda template=template: self.selectTemplate(template)
+            item.onDoubleClick = lambda template=template: (self.selectTemplate(template),
+                                                            self.showPage("configure"))
+        scrollBar = SimObject("ScrollBar", self.listView, orientation="vertical",
+                              width=17, height=420)
+        scrollBar.clickAt = lambda x=0, y=0: self.scroll(y > scrollBar.height / 2)
+        scrollBar.onClick = lambda: self.scroll(True)
+        nextButton = SimObject("Button", page, text="Next",
+                               enabled=lambda: self.selected is not None)
+        nextButton.onClick = lambda: self.showPage("configure")
+
+    def _createConfigurePage(self):
+        page = self._page("configure")
+        SimObject("Label", page, id="TextBlock_1",
+                  text=lambda: self.selected["name"] if self.selected else "")
+        self.projectNameEdit = Edit(page, caretOnFocus="all", id="projectNameText",
+                                    onChange=self._projectNameChanged)
+        self.solutionNameEdit = Edit(page, caretOnFocus="all", id="solutionNameText",
+                                     onChange=self._solutionNameChanged)
+        locationBox = ComboBox(page, id="LocationComboBox")
+        self.locationEdit = Edit(locationBox, caretOnFocus="all", id="PART_EditableTextBox",
+                                 text=self.location)
+        outputPath = SimObject("Label", page, id="outputPathTextBlock",
+                               text=lambda: 'Project will be created in "%s"'
+                               % os.path.join(self.locationEdit.text, self.solutionNameEdit.text,
+                                              self.projectNameEdit.text, ""))
+        outputPath.visibleWhen = lambda: self.devenv.scenario("productLine") != "2019"
+        back = SimObject("Button", page, text="Back")
+        back.onClick = lambda: self.showPage("create")
+        create = SimObject("Button", page, text="Create",
+                           enabled=lambda: bool(self.projectNameEdit.text
+                                                and self.solutionNameEdit.text))
+        create.onClick = self.create
+
+    def realizedTemplates(self):
+        shown = [template for template in self.templates
+                 if self.filter != "Qt" or template["qt"]]
+        if self.scrolled:
+            return shown
+        return shown[:self.devenv.scenario("realizedTemplates")]
+
+    def setFilter(self, text):
+        self.filter = text
+        self.scrolled = False
+        if self.selected not in self.realizedTemplates():
+            self.selected = None
+
+    def scroll(self, lowerHalf):
+        self.scrolled = self.scrolled or lowerHalf
+
+    def selectTemplate(self, template):
+        self.selected = template
+
+    def showPage(self, page):
+        if page == "configure":
+            if self.selected is None:
+                return
+            self.location = self.locationEdit.text or self.location
+            index = self.devenv.nextProjectIndex(self.selected["defaultName"], self.location)
+            name = self.selected["defaultName"] + str(index)
+            self.solutionFollowsProject = True
+            self.projectNameEdit.setText(name, notify=False)
+            self.solutionNameEdit.setText(name, notify=False)
+            self.locationEdit.setText(self.location, notify=False)
+        self.page = page
+
+    def _projectNameChanged(self, text):
+        if self.solutionFollowsProject:
+            self.solutionNameEdit.setText(text, notify=False)
+
+    def _solutionNameChanged(self, text):
+        self.solutionFollowsProject = False
+
+    def show(self):
+        if self.window not in self.context.windows:
+            self.context.addWindow(self.window)
+        self.window.visible = True
+        if self.page == "start":
+            self.page = "create"
+
+    def close(self):
+        self.context.removeWindow(self.window)
+        self.devenv.newProjectDialog = None
+
+    def create(self):
+        self.window.visible = False
+        template = self.selected
+        projectName = self.projectNameEdit.text
+        solutionName = self.solutionNameEdit.text
+        location = self.locationEdit.text
+        if not template["qt"]:
+            self.devenv.projectCreated(template["name"], projectName, solutionName, location)
+            self.close()
+            return
+        self.devenv.clock.schedule(self.devenv.scenario("wizardDelaySeconds"),
+                                   lambda: QtWizard(self, template, projectName, solutionName,
+                                                    location))
+
+    def wizardCanceled(self):
+        self.window.visible = True
+
+    def wizardFinished(self, template, projectName, solutionName, location):
+        self.devenv.projectCreated(template["name"], projectName, solutionName, location)
+        self.close()
+
+    def _onKey(self, key):
+        if key == "Escape":
+            self.close()
+            return True
+        return False
+
+
+class QtWizard:
+
+    def __init__(self, dialog, template, projectName, solutionName, location):
+        self.dialog = dialog
+        self.devenv = dialog.devenv
+        self.context = dialog.context
+        self.template = template
+        self.projectName = projectName
+        self.solutionName = solutionName
+        self.location = location
+        self.qtVersions = list(self.devenv.qtVersions())
+        self.pages = ["intro", "settings"] + (["class"] if template["classPage"] else [])
+        self.pageIndex = 0
+        self.buildSystem = BUILD_SYSTEMS[0]
+        self.window = self.context.addWindow(SimObject(
+            "Window", text=template["name"] + " Wizard",
+            **{"class": "QtVsTools.Wizards.Common.WizardWindow"}))
+        self.window.onKey = self._onKey
+        SimObject("Label", self.window, text=self.welcomeText,
+                  **{"class": "System.Windows.Controls.TextBlock"})
+        self._createSettingsPage()
+        if template["classPage"]:
+            self._createClassPage()
+        nextButton = SimObject("Button", self.window, text="Next >",
+                               enabled=lambda: (self.pageIndex < len(self.pages) - 1
+                                                and (self.pageIndex == 0
+                                                     or bool(self.qtVersions))))
+        nextButton.onClick = self.next
+        finish = SimObject("Button", self.window, text="Finish", enabled=self.canFinish)
+        finish.onClick = self.finish
+        cancel = SimObject("Button", self.window, text="Cancel")
+        cancel.onClick = self.cancel
+
+    def _page(self, name):
+        page = SimObject("Pane", self.window)
+        page.visibleWhen = lambda: self.pages[self.pageIndex] == name
+        return page
+
+    def welcomeText(self):
+        descriptions = {
+            "intro": "This wizard generates a %s project." % self.template["name"],
+            "settings": "Setup the configurations you want to include in your project. The "
+                        "recommended settings for this project are selected by default.",
+            "class": "Specify the names of the class and files to be generated."}
+        return "Welcome to the %s Wizard\n\n%s" % (self.template["name"],
+                                                   descriptions[self.pages[self.pageIndex]])
+
+    def _createSettingsPage(self):
+        page = self._page("settings")
+        supportsCMake = self.template["name"] != "Qt ActiveQt Server"
+        model = ComboBox(page, id="ProjectModelSelection", text=self.buildSystem,
+                         enabled=supportsCMake, onSelect=self._selectBuildSystem)
+        for buildSystem in BUILD_SYSTEMS:
+            model.addItem(buildSystem)
+        table = SimObject("Table", page, name="ConfigTable",
+                          rowCount=lambda: 2 if self.qtVersions else 0, columnCount=6)
+        defaultQt = self.qtVersions[0]["name"] if self.qtVersions else ""
+        for row, configuration in enumerate(["Debug", "Release"]):
+            for column in range(6):
+                cell = SimObject("TableCell", table, row=row, column=column)
+                cell.visibleWhen = lambda: bool(self.qtVersions)
+                if column == 0:
+                    Edit(cell, text=configuration)
+                elif column == 1:
+                    Edit(ComboBox(cell), id="PART_EditableTextBox", text=defaultQt)
+        error = SimObject("Label", page, id="ErrorMsg",
+                          text="No registered Qt version found. "
+                               "Click here to browse for a Qt version.")
+        error.visibleWhen = lambda: not self.qtVersions
+
+    def _selectBuildSystem(self, text):
+        self.buildSystem = text
+
+    def _createClassPage(self):
+        page = self._page("class")
+        self.lowerCase = False
+        self.classNameEdit = Edit(page, caretOnFocus="start", id="ClassName",
+                                  text=self.projectName, onChange=self._deriveFileNames)
+        self.headerEdit = None
+        if self.template["classHeader"]:
+            self.headerEdit = Edit(page, caretOnFocus="start", id="ClassHeaderFile")
+        self.sourceEdit = Edit(page, caretOnFocus="start", id="ClassSourceFile")
+        CheckBox(page, text="Lower case file names", onToggle=self._toggleLowerCase)
+        self._deriveFileNames(self.projectName)
+
+    def _deriveFileNames(self, className):
+        baseName = className.lower() if self.lowerCase else className
+        if self.headerEdit is not None:
+            self.headerEdit.setText(baseName + ".h", notify=False)
+        self.sourceEdit.setText(baseName + ".cpp", notify=False)
+
+    def _toggleLowerCase(self, checked):
+        self.lowerCase = checked
+        self._deriveFileNames(self.classNameEdit.text)
+
+    def canFinish(self):
+        if not self.qtVersions:
+            return False
+        if self.template["classPage"]:
+            edits = [self.classNameEdit, self.sourceEdit] + (
+                [self.headerEdit] if self.headerEdit is not None else [])
+            return all(edit.text for edit in edits)
+        return True
+
+    def next(self):
+        if self.pageIndex < len(self.pages) - 1:
+            self.pageIndex += 1
+
+    def finish(self):
+        self.context.removeWindow(self.window)
+        self.dialog.wizardFinished(self.template, self.projectName, self.solutionName,
+                                   self.location)
+
+    def cancel(self):
+        self.context.removeWindow(self.window)
+        self.dialog.wizardCanceled()
+
+    def _onKey(self, key):
+        if key == "Escape":
+            self.cancel()
+            return True
+        return False
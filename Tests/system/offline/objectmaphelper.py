@@ -0,0 +1,51 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Stand-in for Squish's objectmaphelper module. Only the value matchers used by the object maps
+# in Tests/system are provided.
+
+import fnmatch
+import re
+
+__all__ = ["Wildcard", "RegularExpression"]
+
+
+class Wildcard:
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def matches(self, value):
+        return fnmatch.fnmatchcase(str(value), self.pattern)
+
+    def __eq__(self, other):
+        return isinstance(other, Wildcard) and other.pattern == self.pattern
+
+    def __hash__(self):
+        return hash(("Wildcard", self.pattern))
+
+    def __repr__(self):
+        return "Wildcard(%r)" % self.pattern
+
+
+class RegularExpression:
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+
+    def matches(self, value):
+        return self.regex.search(str(value)) is not None
+
+    def __eq__(self, other):
+        return isinstance(other, RegularExpression) and other.pattern == self.pattern
+
+    def __hash__(self):
+        return hash(("RegularExpression", self.pattern))
+
+    def __repr__(self):
+        return "RegularExpression(%r)" % self.pattern
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Stand-in for qtpaths and qmake, depending on the name it is copied to, e.g. "bin/qtpaths" in a
+# Qt directory. It answers -v and --query or -query with the properties of a Qt installation in
+# the parent directory of its own directory. The Qt version is the first directory name like
+# "6.7.2" in its path. Like qtpaths of Qt 5, the qtpaths of Qt versions before 6 report version
+# 1.0 and don't support queries. Each run is appended to SQUISH_VSTOOLS_QTTOOL_LOG if it is set.
+
+import os
+import re
+import sys
+
+DEFAULT_QT_VERSION = "6.7.2"
+
+
+def qtVersion(path):
+    for part in re.split(r"[\\/]", path):
+        if re.match(r"^\d+\.\d+\.\d+$", part):
+            return part
+    return DEFAULT_QT_VERSION
+
+
+def queryOutput(prefix, version):
+    prefix = prefix.replace("\\", "/")
+    properties = [("QT_SYSROOT", ""),
+                  ("QT_INSTALL_PREFIX", prefix),
+                  ("QT_INSTALL_ARCHDATA", prefix),
+                  ("QT_INSTALL_DATA", prefix),
+                  ("QT_INSTALL_DOCS", prefix + "/doc"),
+                  ("QT_INSTALL_HEADERS", prefix + "/include"),
+                  ("QT_INSTALL_LIBS", prefix + "/lib"),
+                  ("QT_INSTALL_LIBEXECS", prefix + "/bin"),
+                  ("QT_INSTALL_BINS", prefix + "/bin"),
+                  ("QT_INSTALL_PLUGINS", prefix + "/plugins"),
+                  ("QT_INSTALL_QML", prefix + "/qml"),
+                  ("QT_INSTALL_TRANSLATIONS", prefix + "/translations"),
+                  ("QT_HOST_PREFIX", prefix),
+                  ("QT_HOST_BINS", prefix + "/bin"),
+                  ("QT_HOST_LIBS", prefix + "/lib"),
+                  ("QMAKE_SPEC", "win32-msvc"),
+                  ("QMAKE_XSPEC", "win32-msvc"),
+                  ("QMAKE_VERSION", "3.1"),
+                  ("QT_VERSION", version)]
+    return "".join("%s:%s\n" % property for property in properties)
+
+
+def main(argv):
+    tool = os.path.splitext(os.path.basename(sys.argv[0]))[0].lower()
+    path = os.path.abspath(sys.argv[0])
+    prefix = os.path.dirname(os.path.dirname(path))
+    version = qtVersion(path)
+    if os.getenv("SQUISH_VSTOOLS_QTTOOL_LOG"):
+        with open(os.getenv("SQUISH_VSTOOLS_QTTOOL_LOG"), "a", encoding="utf-8") as f:
+            f.write("%s %s\n" % (path, " ".join(argv)))
+    if tool == "qtpaths":
+        if argv == ["-v"] or argv == ["--version"]:
+            print("qtpaths %s" % ("2.0" if int(version.split(".")[0]) >= 6 else "1.0"))
+            return 0
+        if argv[:1] == ["--query"] and int(version.split(".")[0]) >= 6:
+            sys.stdout.write(queryOutput(prefix, version))
+            return 0
+    elif tool == "qmake":
+        if argv == ["-v"]:
+            print("QMake version 3.1\nUsing Qt version %s in %s/lib"
+                  % (version, prefix.replace("\\", "/")))
+            return 0
+        if argv[:1] == ["-query"]:
+            sys.stdout.write(queryOutput(prefix, version))
+            return 0
+    print("Unknown option(s): %s" % " ".join(argv), file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,245 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Runs Squish test cases of Tests/system headless against the simulated devenv.
+#
+#   python runner.py [--scenario FILE] [--session] [--verbose] PATH [PATH ...]
+#
+# PATH is either a suite directory (all TEST_CASES from its suite.conf are run) or a test case
+# directory. The scenario is a JSON object overriding values of devenv.DEFAULT_SCENARIO.
+# --session lets the test cases of a suite share one devenv like SQUISH_VSTOOLS_SESSION does.
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+OFFLINE_DIR = os.path.dirname(os.path.abspath(__file__))
+SYSTEM_DIR = os.path.dirname(OFFLINE_DIR)
+GLOBAL_SCRIPTS_DIR = os.path.join(SYSTEM_DIR, "shared")
+
+if sys.path[0] != OFFLINE_DIR:
+    sys.path.insert(0, OFFLINE_DIR)
+
+import devenv
+import qttool
+import simulator
+import squish
+import test
+
+
+def readSuiteConf(suiteDir):
+    settings = {}
+    with open(os.path.join(suiteDir, "suite.conf"), encoding="utf-8") as f:
+        for line in f:
+            key, _, value = line.strip().partition("=")
+            if key:
+                settings[key] = value
+    return settings
+
+
+def listTestCases(path):
+    path = os.path.abspath(path)
+    if os.path.exists(os.path.join(path, "suite.conf")):
+        testCases = readSuiteConf(path).get("TEST_CASES", "").split()
+        return [(path, os.path.join(path, testCase)) for testCase in testCases]
+    return [(os.path.dirname(path), path)]
+
+
+def vswhereRecording(scenario):
+    value = lambda key: scenario.get(key, devenv.DEFAULT_SCENARIO[key])
+    installationPath = value("installationPath")
+    return [{"instanceId": value("instanceId"),
+             "installationName": "VisualStudio/%s" % value("displayVersion"),
+             "installationPath": installationPath,
+             "installationVersion": value("displayVersion"),
+             "productPath": installationPath + "\\Common7\\IDE\\devenv.exe",
+             "isPrerelease": False,
+             "displayName": "Visual Studio Professional %s" % value("productLine"),
+             "catalog": {"productDisplayVersion": value("displayVersion"),
+                         "productLineVersion": value("productLine")}}]
+
+
+def prepareEnvironment(scenario, workDir):
+    recording = os.path.join(workDir, "vswhere.json")
+    with open(recording, "w", encoding="utf-8") as f:
+        json.dump(vswhereRecording(scenario), f, indent=2)
+    os.environ["SQUISH_VSTOOLS_VSWHERE_JSON"] = recording
+    os.environ["SQUISH_VSTOOLS_VSWHERE"] = os.path.join(OFFLINE_DIR, "vswhere.py")
+    if not os.getenv("SQUISH_VSTOOLS_QTDIRS"):
+        qtDirs = scenario.get("qtDirs", devenv.DEFAULT_SCENARIO["qtDirs"])
+        os.environ["SQUISH_VSTOOLS_QTDIRS"] = ";".join(qtDirs)
+    if not os.getenv("SQUISH_VSTOOLS_CACHE_DIR"):
+        os.environ["SQUISH_VSTOOLS_CACHE_DIR"] = os.path.join(workDir, "cache")
+    if not os.getenv("SQUISH_VSTOOLS_WORKDIR"):
+        projects = os.path.join(workDir, "projects")
+        os.makedirs(projects, exist_ok=True)
+        os.environ["SQUISH_VSTOOLS_WORKDIR"] = projects
+
+
+def _purgeScriptModules():
+    # Object maps and shared scripts are per suite, e.g. both suites have a "names" module.
+    for name, module in list(sys.modules.items()):
+        fileName = getattr(module, "__file__", None)
+        if not fileName:
+            continue
+        fileName = os.path.abspath(fileName)
+        if fileName.startswith(SYSTEM_DIR) and not fileName.startswith(OFFLINE_DIR):
+            del sys.modules[name]
+
+
+def createSimulation(scenario):
+    return simulator.Simulation(devenv.createDevenv, scenario)
+
+
+def simulatedQtInstallations(simulation, qtinstallations):
+    # The Qt directories of the scenario exist in the simulation only, so their qtpaths is
+    # answered by the stand-in without running it
+    def locate(qtDir):
+        if devenv.isValidQtDir(simulation, qtDir):
+            return [qtDir.rstrip("\\") + "\\bin\\qtpaths.exe"]
+        return []
+
+    def query(tool):
+        return qttool.queryOutput(tool.rsplit("\\", 2)[0], qttool.qtVersion(tool))
+
+    cacheFile = os.path.join(os.environ["SQUISH_VSTOOLS_CACHE_DIR"],
+                             "qt_installations_offline.json")
+    return qtinstallations.Registry(cacheFile, locate, query)
+
+
+class SimulatedWatcher:
+    # Replaces the file watchers of filewatch.py. Files appear when the simulated devenv writes
+    # them, so waiting for them only advances the simulated clock instead of blocking.
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def wait(self, timeout):
+        self.simulation.clock.advance(timeout)
+        return False  # The whole pause passed
+
+    def close(self):
+        pass
+
+
+def runTestCase(suiteDir, testCaseDir, simulation):
+    scriptDirs = [os.path.join(suiteDir, "shared", "scripts"), GLOBAL_SCRIPTS_DIR]
+    savedPath = list(sys.path)
+    savedCwd = os.getcwd()
+    sys.path[1:1] = scriptDirs
+    _purgeScriptModules()
+    qtinstallations = importlib.import_module("qtinstallations")
+    qtinstallations.setRegistry(simulatedQtInstallations(simulation, qtinstallations))
+    filewatch = importlib.import_module("filewatch")
+    filewatch.watcherFactory = lambda root, paths: SimulatedWatcher(simulation)
+    if os.getenv("SQUISH_VSTOOLS_SESSION"):
+        session = importlib.import_module("session")
+        session.launcher = simulator.AttachableLauncher(simulation)
+    if os.getenv("SQUISH_VSTOOLS_PROFILE"):
+        # Spans measure simulated time, real time spent offline tells nothing about devenv
+        profiler = importlib.import_module("profiler")
+        profiler.enable(os.environ["SQUISH_VSTOOLS_PROFILE"], lambda: simulation.clock.now)
+    if os.getenv("SQUISH_VSTOOLS_RESULTS"):
+        resultsink = importlib.import_module("resultsink")
+        resultsink.enable(os.environ["SQUISH_VSTOOLS_RESULTS"], lambda: simulation.clock.now)
+    if os.getenv("SQUISH_VSTOOLS_FLAKINESS_DB"):
+        flakiness = importlib.import_module("flakiness")
+        flakiness.enable(os.environ["SQUISH_VSTOOLS_FLAKINESS_DB"], lambda: simulation.clock.now)
+    test.reset()
+    squish.setSimulation(simulation)
+    squish.setSourceRoot(testCaseDir)
+    scriptPath = os.path.join(testCaseDir, "test.py")
+    namespace = squish.scriptGlobals()
+    namespace.update({"__name__": "__main__", "__file__": scriptPath})
+    started = time.perf_counter()
+    simulatedStart = simulation.clock.now
+    try:
+        os.chdir(testCaseDir)
+        with open(scriptPath, encoding="utf-8") as f:
+            code = compile(f.read(), scriptPath, "exec")
+        exec(code, namespace)
+        for function in ("init", "main", "cleanup"):
+            if callable(namespace.get(function)):
+                try:
+                    namespace[function]()
+                except Exception:
+                    test.error("Script error in %s()" % function, traceback.format_exc())
+    except Exception:
+        test.error("Script error", traceback.format_exc())
+    finally:
+        if "resultsink" in sys.modules:
+            sys.modules["resultsink"].finish()
+        if "flakiness" in sys.modules:
+            sys.modules["flakiness"].close()
+        simulation.shutdown()
+        os.chdir(savedCwd)
+        sys.path[:] = savedPath
+    return {"name": os.path.basename(testCaseDir),
+            "suite": os.path.basename(suiteDir),
+            "results": list(test.results),
+            "counts": test.counts(),
+            "failures": test.failures(),
+            "duration": time.perf_counter() - started,
+            "simulatedDuration": simulation.clock.now - simulatedStart}
+
+
+def printReport(report, verbose=False, out=sys.stdout):
+    counts = report["counts"]
+    summary = "  ".join("%s %d" % (kind, counts[kind]) for kind in sorted(counts))
+    out.write("%s/%s: %s (%.3f s, %.1f s simulated)\n"
+              % (report["suite"], report["name"], summary or "no results",
+                 report["duration"], report["simulatedDuration"]))
+    for result in report["results"]:
+        if verbose or result in report["failures"]:
+            section = " / ".join(result.section)
+            out.write("    %-7s %s%s\n" % (result.kind, result.message,
+                                           " [%s]" % section if section else ""))
+            if result.detail:
+                detail = result.detail.strip().replace("\n", "\n" + " " * 12)
+                out.write("            %s\n" % detail)
+            if result.location:
+                out.write("            at %s\n" % result.location)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Squish test cases against a simulated "
+                                                 "devenv.")
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="suite or test case directory")
+    parser.add_argument("--scenario", help="JSON file overriding the default scenario")
+    parser.add_argument("--session", action="store_true",
+                        help="reuse one devenv for all test cases of a suite")
+    parser.add_argument("--verbose", action="store_true", help="print all results")
+    args = parser.parse_args(argv)
+    if args.session and not os.getenv("SQUISH_VSTOOLS_SESSION"):
+        os.environ["SQUISH_VSTOOLS_SESSION"] = "devenvSession"
+    scenario = {}
+    if args.scenario:
+        with open(args.scenario, encoding="utf-8") as f:
+            scenario = json.load(f)
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="squish_offline_") as workDir:
+        prepareEnvironment(scenario, workDir)
+        simulations = {}
+        for path in args.paths:
+            for suiteDir, testCaseDir in listTestCases(path):
+                simulation = simulations.setdefault(suiteDir, createSimulation(scenario))
+                report = runTestCase(suiteDir, testCaseDir, simulation)
+                printReport(report, args.verbose)
+                failed = failed or bool(report["failures"])
+        for simulation in simulations.values():
+            simulation.terminateAll()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,533 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Scriptable object tree used by the offline Squish stand-in. Objects carry the properties the
+# object maps look for ("type", "text", "id", "container", ...). Time is simulated: waiting for
+# an object or a condition advances a virtual clock to the next scheduled event instead of
+# sleeping, so timeouts of several seconds cost nothing.
+
+import builtins
+import heapq
+import itertools
+import re
+
+CONTAINER_KEYS = ("container", "window", "leftObject", "occurrence")
+
+
+class SimClock:
+
+    def __init__(self):
+        self.now = 0.0
+        self._events = []
+        self._sequence = itertools.count()
+
+    def schedule(self, delay, callback):
+        heapq.heappush(self._events, (self.now + delay, next(self._sequence), callback))
+
+    def nextEventTime(self):
+        return self._events[0][0] if self._events else None
+
+    def advanceTo(self, target):
+        while self._events and self._events[0][0] <= target:
+            when, _, callback = heapq.heappop(self._events)
+            self.now = max(self.now, when)
+            callback()
+        self.now = max(self.now, target)
+
+    def advance(self, seconds):
+        self.advanceTo(self.now + seconds)
+
+
+class SimObject:
+
+    def __init__(self, type, parent=None, **properties):
+        self.type = type
+        self.parent = None
+        self.children = []
+        self.properties = {"enabled": True}
+        self.properties.update(properties)
+        self.visible = True
+        self.visibleWhen = None
+        self.leftObject = None
+        self.onClick = None
+        self.onDoubleClick = None
+        self.onKey = None
+        self.nativeObject = NativeObject(self)
+        if parent is not None:
+            parent.add(self)
+
+    def add(self, child):
+        child.parent = self
+        self.children.append(child)
+        return child
+
+    def remove(self, child):
+        if child in self.children:
+            self.children.remove(child)
+            child.parent = None
+
+    def clear(self):
+        for child in list(self.children):
+            self.remove(child)
+
+    def getProperty(self, key):
+        if key == "type":
+            return self.type
+        value = self.properties.get(key)
+        return value() if callable(value) else value
+
+    def setProperty(self, key, value):
+        self.properties[key] = value
+
+    def __getattr__(self, key):
+        properties = self.__dict__.get("properties")
+        if properties is None or key not in properties:
+            raise AttributeError("%s has no property '%s'" % (self.describe(), key))
+        return self.getProperty(key)
+
+    def childShowing(self, child):
+        return True
+
+    def isShowing(self):
+        if not self.visible or (self.visibleWhen is not None and not self.visibleWhen()):
+            return False
+        if self.parent is None:
+            return True
+        return self.parent.childShowing(self) and self.parent.isShowing()
+
+    def isAccessible(self):
+        return self.isShowing() and bool(self.getProperty("enabled"))
+
+    def isDescendantOf(self, ancestor):
+        current = self.parent
+        while current is not None:
+            if current is ancestor:
+                return True
+            current = current.parent
+        return False
+
+    def topLevel(self):
+        current = self
+        while current.parent is not None:
+            current = current.parent
+        return current
+
+    def walk(self):
+        yield self
+        for child in list(self.children):
+            if child.isShowing():
+                yield from child.walk()
+
+    def walkAll(self):
+        yield self
+        for child in list(self.children):
+            yield from child.walkAll()
+
+    def click(self):
+        if self.onClick:
+            self.onClick()
+
+    def doubleClick(self):
+        if self.onDoubleClick:
+            self.onDoubleClick()
+        else:
+            self.click()
+
+    def focusIn(self):
+        pass
+
+    def keyPress(self, key):
+        current = self
+        while current is not None:
+            if current.onKey and current.onKey(key):
+                return True
+            current = current.parent
+        return False
+
+    def describe(self):
+        text = self.properties.get("text")
+        if text is not None and not callable(text):
+            return "%s '%s'" % (self.type, text)
+        return self.type
+
+    def __repr__(self):
+        return "<SimObject %s>" % self.describe()
+
+
+class NativeObject:
+    # Squish exposes the .NET object behind a WPF control as "nativeObject". The harness only
+    # reads its capitalized "Text" property.
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    def __getattr__(self, key):
+        return self._owner.getProperty(key[:1].lower() + key[1:])
+
+
+class Edit(SimObject):
+    # caretOnFocus decides what typing does after the edit got the focus: "end" appends,
+    # "start" prepends and "all" replaces the whole text.
+
+    def __init__(self, parent=None, caretOnFocus="end", onChange=None, **properties):
+        properties.setdefault("text", "")
+        SimObject.__init__(self, "Edit", parent, **properties)
+        self.caretOnFocus = caretOnFocus
+        self.onChange = onChange
+        self.selection = (0, 0)
+
+    def setText(self, text, notify=True):
+        if text == self.properties["text"]:
+            return
+        self.properties["text"] = text
+        self.selection = (len(text), len(text))
+        if notify and self.onChange:
+            self.onChange(text)
+
+    def focusIn(self):
+        length = len(self.text)
+        self.selection = {"start": (0, 0),
+                          "end": (length, length),
+                          "all": (0, length)}[self.caretOnFocus]
+
+    def _replaceSelection(self, insert):
+        text = self.text
+        start, end = self.selection
+        newText = text[:start] + insert + text[end:]
+        caret = start + len(insert)
+        self.properties["text"] = newText
+        self.selection = (caret, caret)
+        if newText != text and self.onChange:
+            self.onChange(newText)
+
+    def typeText(self, text):
+        self._replaceSelection(text)
+
+    def keyPress(self, key):
+        start, end = self.selection
+        length = len(self.text)
+        if key in ("Ctrl+a", "Ctrl+A"):
+            self.selection = (0, length)
+        elif key == "Delete":
+            if start == end:
+                end = min(end + 1, length)
+            self.selection = (start, end)
+            self._replaceSelection("")
+        elif key == "Backspace":
+            if start == end:
+                start = max(start - 1, 0)
+            self.selection = (start, end)
+            self._replaceSelection("")
+        elif key == "Home":
+            self.selection = (0, 0)
+        elif key == "End":
+            self.selection = (length, length)
+        elif key == "Left":
+            self.selection = (max(start - 1, 0),) * 2
+        elif key == "Right":
+            self.selection = (min(end + 1, length),) * 2
+        else:
+            return SimObject.keyPress(self, key)
+        return True
+
+
+class CheckBox(SimObject):
+
+    def __init__(self, parent=None, onToggle=None, **properties):
+        properties.setdefault("checked", False)
+        SimObject.__init__(self, "CheckBox", parent, **properties)
+        self.onToggle = onToggle
+
+    def click(self):
+        self.properties["checked"] = not self.properties["checked"]
+        if self.onToggle:
+            self.onToggle(self.properties["checked"])
+
+
+class MenuItem(SimObject):
+
+    def __init__(self, parent=None, action=None, **properties):
+        SimObject.__init__(self, "MenuItem", parent, **properties)
+        self.action = action
+        self.isOpen = False
+
+    def childShowing(self, child):
+        return child.type != "MenuItem" or self.isOpen
+
+    def menuRoot(self):
+        current = self
+        while isinstance(current.parent, MenuItem):
+            current = current.parent
+        return current.parent
+
+    def closeMenus(self):
+        for item in self.menuRoot().walkAll():
+            if isinstance(item, MenuItem):
+                item.isOpen = False
+
+    def click(self):
+        if any(child.type == "MenuItem" for child in self.children):
+            if self.isOpen:
+                self.closeMenus()
+                return
+            if not isinstance(self.parent, MenuItem):
+                self.closeMenus()
+            self.isOpen = True
+            return
+        self.closeMenus()
+        if self.action:
+            self.action()
+
+
+class ComboBox(SimObject):
+
+    def __init__(self, parent=None, onSelect=None, **properties):
+        SimObject.__init__(self, "ComboBox", parent, **properties)
+        self.expanded = False
+        self.onSelect = onSelect
+
+    def childShowing(self, child):
+        return child.type != "ComboBoxItem" or self.expanded
+
+    def addItem(self, text, **properties):
+        item = SimObject("ComboBoxItem", self, text=text, **properties)
+        item.onClick = lambda: self.select(item)
+        return item
+
+    def select(self, item):
+        self.expanded = False
+        self.properties["text"] = item.getProperty("text")
+        if self.onSelect:
+            self.onSelect(item.getProperty("text"))
+
+    def click(self):
+        self.expanded = not self.expanded
+
+
+class ApplicationContext:
+
+    def __init__(self, simulation, name, commandLine, pid):
+        self.simulation = simulation
+        self.name = name
+        self.commandLine = commandLine
+        self.pid = pid
+        self.isRunning = True
+        self.startTime = simulation.clock.now
+        self.windows = []
+        self.model = None
+
+    def addWindow(self, window):
+        self.windows.append(window)
+        return window
+
+    def removeWindow(self, window):
+        if window in self.windows:
+            self.windows.remove(window)
+
+    def activeWindow(self):
+        for window in reversed(self.windows):
+            if window.isShowing():
+                return window
+        return None
+
+    def quit(self):
+        self.isRunning = False
+        self.windows = []
+        self.simulation.contextQuit(self)
+
+    def detach(self):
+        self.simulation.detach(self)
+
+    def __repr__(self):
+        return "<ApplicationContext %s>" % self.name
+
+
+class Simulation:
+    # appFactory(simulation, commandLine) creates the application context for
+    # startApplication() and populates its windows.
+
+    def __init__(self, appFactory=None, scenario=None):
+        self.clock = SimClock()
+        self.appFactory = appFactory
+        self.scenario = dict(scenario or {})
+        self.contexts = []
+        # Applications started by a launcher which survive the end of a test case, by the name
+        # used to attach to them
+        self.attachable = {}
+        self.current = None
+        self.focused = None
+        self.store = {}
+        self._pids = itertools.count(4711)
+
+    # Application contexts
+
+    def startApplication(self, commandLine):
+        name = re.split(r"[\s\\/]", commandLine.strip().strip('"'))[0] or "app"
+        context = ApplicationContext(self, name, commandLine, next(self._pids))
+        self.contexts.append(context)
+        self.current = context
+        if self.appFactory:
+            self.appFactory(self, context)
+        return context
+
+    def launchAttachable(self, name, commandLine):
+        context = ApplicationContext(self, name, commandLine, next(self._pids))
+        self.attachable[name] = context
+        if self.appFactory:
+            self.appFactory(self, context)
+        return context
+
+    def attach(self, name):
+        context = self.attachable.get(name)
+        if context is None or not context.isRunning:
+            raise RuntimeError("Could not attach to '%s'" % name)
+        if context not in self.contexts:
+            self.contexts.append(context)
+        self.current = context
+        return context
+
+    def detach(self, context):
+        if context in self.attachable.values():
+            if context in self.contexts:
+                self.contexts.remove(context)
+        else:
+            context.quit()
+        if self.current is context:
+            self.current = None
+
+    def addContext(self, name, commandLine=""):
+        context = ApplicationContext(self, name, commandLine, next(self._pids))
+        self.contexts.append(context)
+        return context
+
+    def contextQuit(self, context):
+        if context in self.contexts:
+            self.contexts.remove(context)
+        for name, attachable in list(self.attachable.items()):
+            if attachable is context:
+                del self.attachable[name]
+        if self.focused is not None and self.focused.topLevel() not in self.allWindows():
+            self.focused = None
+
+    def runningContexts(self):
+        return [context for context in self.contexts if context.isRunning]
+
+    def allWindows(self):
+        return [window for context in self.contexts for window in context.windows]
+
+    def shutdown(self):
+        # Like Squish at the end of a test case: terminates started applications and detaches
+        # from attached ones
+        for context in list(self.contexts):
+            self.detach(context)
+        self.current = None
+
+    def terminateAll(self):
+        self.shutdown()
+        for context in list(self.attachable.values()):
+            context.quit()
+
+    # Object lookup
+
+    def candidates(self):
+        if self.current is None or not self.current.isRunning:
+            return
+        for window in list(self.current.windows):
+            if window.isShowing():
+                yield from window.walk()
+
+    def findAll(self, realName):
+        constraints = {}
+        container = realName.get("container", realName.get("window"))
+        if container is not None:
+            constraints["container"] = self.find(container)
+            if constraints["container"] is None:
+                return []
+        if "leftObject" in realName:
+            constraints["leftObject"] = self.find(realName["leftObject"])
+            if constraints["leftObject"] is None:
+                return []
+        return [obj for obj in self.candidates() if matches(obj, realName, constraints)]
+
+    def find(self, realName):
+        if isinstance(realName, SimObject):
+            return realName if realName.isShowing() else None
+        found = self.findAll(realName)
+        occurrence = builtins.int(realName.get("occurrence", 1))
+        if 0 < occurrence <= len(found):
+            return found[occurrence - 1]
+        return None
+
+    # Waiting
+
+    def waitUntil(self, predicate, timeoutMs=None):
+        deadline = None if timeoutMs is None else self.clock.now + timeoutMs / 1000.0
+        while True:
+            result = predicate()
+            if result:
+                return result
+            nextEvent = self.clock.nextEventTime()
+            if deadline is not None and self.clock.now >= deadline:
+                return result
+            if nextEvent is None or (deadline is not None and nextEvent > deadline):
+                # Nothing can change the simulated state before the timeout expires.
+                if deadline is not None:
+                    self.clock.advanceTo(deadline)
+                return predicate()
+            self.clock.advanceTo(nextEvent)
+
+    # Input
+
+    def setFocus(self, obj):
+        if self.focused is not obj:
+            self.focused = obj
+            obj.focusIn()
+
+    def sendKeys(self, target, text):
+        for token in re.findall(r"<[^<>]+>|.", text, re.S):
+            if len(token) > 2 and token.startswith("<") and token.endswith(">"):
+                if not target.keyPress(token[1:-1]) and self.current is not None:
+                    model = self.current.model
+                    if model is not None and hasattr(model, "keyPress"):
+                        model.keyPress(token[1:-1])
+            elif isinstance(target, Edit):
+                target.typeText(token)
+
+
+class AttachableLauncher:
+    # Replaces session.StartAutLauncher of Tests/system/shared to start devenv within the
+    # simulation. The first argument is the path of devenv.exe.
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def launch(self, name, arguments):
+        self.simulation.launchAttachable(name, " ".join(["devenv"] + list(arguments[1:])))
+
+    def terminate(self, context):
+        context.quit()
+
+
+def matches(obj, realName, constraints):
+    for key, expected in realName.items():
+        if key in CONTAINER_KEYS:
+            continue
+        value = obj.getProperty(key)
+        if value is None:
+            return False
+        if hasattr(expected, "matches"):
+            if not expected.matches(value):
+                return False
+        elif str(value) != str(expected):
+            return False
+    container = constraints.get("container")
+    if container is not None and not obj.isDescendantOf(container):
+        return False
+    leftObject = constraints.get("leftObject")
+    if leftObject is not None and obj.leftObject is not leftObject:
+        return False
+    return True
@@ -0,0 +1,242 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Stand-in for the parts of Squish's "squish" module used by the Tests/system suites. All calls
+# are answered by the Simulation set with setSimulation(). Like the real module, this one shadows
+# the builtins "type" and "object" when its names are copied into a test script's globals.
+
+import builtins
+import os
+import sys
+
+import test
+
+_simulation = None
+_sourceRoot = None
+
+DEFAULT_TIMEOUT = 20000
+
+__all__ = ["MouseButton", "applicationContextList", "attachToApplication", "clickButton",
+           "collapse", "currentApplicationContext", "doubleClick", "expand", "findObject",
+           "mouseClick", "mouseMove", "nativeType", "object", "setApplicationContext", "snooze",
+           "source", "startApplication", "type", "waitFor", "waitForObject",
+           "waitForObjectExists", "waitForObjectItem"]
+
+
+def setSimulation(simulation):
+    global _simulation
+    _simulation = simulation
+
+
+def simulation():
+    if _simulation is None:
+        raise RuntimeError("No offline simulation active. Use runner.py to run test scripts.")
+    return _simulation
+
+
+def setSourceRoot(directory):
+    global _sourceRoot
+    _sourceRoot = directory
+
+
+def scriptGlobals():
+    module = sys.modules[__name__]
+    namespace = {name: getattr(module, name) for name in __all__}
+    namespace["test"] = test
+    return namespace
+
+
+class MouseButton:
+    NoButton = 0
+    LeftButton = 1
+    RightButton = 2
+    MiddleButton = 4
+
+
+def _describe(realName):
+    return "{%s}" % " ".join("%s=%r" % item for item in sorted(realName.items(), key=str))
+
+
+def _resolve(objectOrName, timeout=DEFAULT_TIMEOUT):
+    if isinstance(objectOrName, dict):
+        return waitForObject(objectOrName, timeout)
+    if not objectOrName.isShowing():
+        raise RuntimeError("Object %r is not accessible anymore" % objectOrName)
+    return objectOrName
+
+
+def waitForObject(objectOrName, timeout=DEFAULT_TIMEOUT):
+    sim = simulation()
+
+    def accessible():
+        found = sim.find(objectOrName)
+        return found if found is not None and found.isAccessible() else None
+
+    found = sim.waitUntil(accessible, timeout)
+    if found is None:
+        raise LookupError("Object not ready: %s" % (_describe(objectOrName)
+                                                   if isinstance(objectOrName, dict)
+                                                   else objectOrName))
+    return found
+
+
+def waitForObjectExists(objectOrName, timeout=DEFAULT_TIMEOUT):
+    sim = simulation()
+    found = sim.waitUntil(lambda: sim.find(objectOrName), timeout)
+    if found is None:
+        raise LookupError("Object not found: %s" % (_describe(objectOrName)
+                                                   if isinstance(objectOrName, dict)
+                                                   else objectOrName))
+    return found
+
+
+def waitForObjectItem(objectOrName, itemText, timeout=DEFAULT_TIMEOUT):
+    sim = simulation()
+    container = waitForObject(objectOrName, timeout)
+
+    def item():
+        for candidate in container.walk():
+            if candidate is not container and candidate.getProperty("text") == itemText:
+                return candidate
+        return None
+
+    found = sim.waitUntil(item, timeout)
+    if found is None:
+        raise LookupError("Item '%s' not found in %r" % (itemText, container))
+    return found
+
+
+def findObject(objectOrName):
+    found = simulation().find(objectOrName)
+    if found is None:
+        raise LookupError("Object not found: %s" % (_describe(objectOrName)
+                                                   if isinstance(objectOrName, dict)
+                                                   else objectOrName))
+    return found
+
+
+class _ObjectApi:
+    # Replacement for Squish's "object" module
+
+    @staticmethod
+    def exists(objectOrName):
+        return simulation().find(objectOrName) is not None
+
+    @staticmethod
+    def children(obj):
+        return [child for child in obj.children if child.isShowing()]
+
+    @staticmethod
+    def parent(obj):
+        return obj.parent
+
+    @staticmethod
+    def properties(obj):
+        return {key: obj.getProperty(key) for key in obj.properties}
+
+
+object = _ObjectApi()
+
+
+def waitFor(condition, timeout=None):
+    if isinstance(condition, str):
+        frameGlobals = sys._getframe(1).f_globals
+        return bool(simulation().waitUntil(lambda: eval(condition, frameGlobals), timeout))
+    return bool(simulation().waitUntil(condition, timeout))
+
+
+def snooze(seconds):
+    simulation().clock.advance(float(seconds))
+
+
+def mouseClick(objectOrName, *args):
+    sim = simulation()
+    target = _resolve(objectOrName)
+    sim.setFocus(target)
+    if args and hasattr(target, "clickAt"):
+        target.clickAt(*args[:2])
+    else:
+        target.click()
+
+
+def clickButton(objectOrName):
+    target = _resolve(objectOrName)
+    if not target.getProperty("enabled"):
+        raise RuntimeError("Button %r is disabled" % target)
+    target.click()
+
+
+def doubleClick(objectOrName, *args):
+    sim = simulation()
+    target = _resolve(objectOrName)
+    sim.setFocus(target)
+    target.doubleClick()
+
+
+def mouseMove(objectOrName, *args):
+    _resolve(objectOrName)
+
+
+def expand(objectOrName):
+    target = _resolve(objectOrName)
+    if hasattr(target, "expanded"):
+        target.expanded = True
+
+
+def collapse(objectOrName):
+    target = _resolve(objectOrName)
+    if hasattr(target, "expanded"):
+        target.expanded = False
+
+
+def type(objectOrName, text):
+    sim = simulation()
+    target = _resolve(objectOrName)
+    sim.setFocus(target)
+    sim.sendKeys(target, builtins.str(text))
+
+
+def nativeType(text):
+    sim = simulation()
+    target = sim.focused
+    if target is None or not target.isShowing():
+        target = sim.current.activeWindow() if sim.current else None
+    if target is None:
+        raise RuntimeError("No window to send '%s' to" % text)
+    sim.sendKeys(target, builtins.str(text))
+
+
+def startApplication(commandLine):
+    return simulation().startApplication(commandLine)
+
+
+def attachToApplication(autName, *args):
+    return simulation().attach(autName)
+
+
+def applicationContextList():
+    return simulation().runningContexts()
+
+
+def currentApplicationContext():
+    return simulation().current
+
+
+def setApplicationContext(context):
+    simulation().current = context
+
+
+def source(filename):
+    # Squish resolves sourced paths relative to the directory of the running test case and
+    # executes the file in the namespace of the caller.
+    path = filename
+    if not os.path.isabs(path) and _sourceRoot:
+        path = os.path.join(_sourceRoot, path)
+    path = os.path.normpath(path)
+    with open(path, encoding="utf-8") as f:
+        code = compile(f.read(), path, "exec")
+    exec(code, sys._getframe(1).f_globals)
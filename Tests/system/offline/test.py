@@ -0,0 +1,156 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Stand-in for Squish's "test" module. Results are collected in memory and summarized by
+# runner.py.
+
+import os
+import sys
+
+_offlineDir = os.path.dirname(os.path.abspath(__file__))
+
+results = []
+_sections = []
+_contexts = []
+
+FAILURES = ("FAIL", "FATAL", "ERROR", "XPASS")
+
+
+class Result:
+
+    def __init__(self, kind, message, detail, section, location):
+        self.kind = kind
+        self.message = message
+        self.detail = detail
+        self.section = section
+        self.location = location
+
+    def __repr__(self):
+        return "%s: %s" % (self.kind, self.message)
+
+
+def reset():
+    del results[:]
+    del _sections[:]
+    del _contexts[:]
+
+
+def _location():
+    if _contexts:
+        return _contexts[-1]
+    frame = sys._getframe(1)
+    while frame is not None:
+        fileName = os.path.abspath(frame.f_code.co_filename)
+        if os.path.dirname(fileName) != _offlineDir:
+            return "%s:%d" % (fileName, frame.f_lineno)
+        frame = frame.f_back
+    return ""
+
+
+def _record(kind, message="", detail=""):
+    results.append(Result(kind, str(message), str(detail), tuple(_sections), _location()))
+
+
+def counts():
+    summary = {}
+    for result in results:
+        summary[result.kind] = summary.get(result.kind, 0) + 1
+    return summary
+
+
+def failures():
+    return [result for result in results if result.kind in FAILURES]
+
+
+def compare(actual, expected, message=""):
+    if actual == expected:
+        _record("PASS", message or "Comparison", "'%s' and '%s' are equal" % (actual, expected))
+        return True
+    _record("FAIL", message or "Comparison", "'%s' and '%s' are not equal" % (actual, expected))
+    return False
+
+
+def xcompare(actual, expected, message=""):
+    if actual == expected:
+        _record("XPASS", message or "Comparison", "'%s' and '%s' are equal" % (actual, expected))
+        return True
+    _record("XFAIL", message or "Comparison",
+            "'%s' and '%s' are not equal" % (actual, expected))
+    return False
+
+
+def verify(condition, message=""):
+    if condition:
+        _record("PASS", message or "Verified", "'True' expression")
+        return True
+    _record("FAIL", message or "Verification failed", "'False' expression")
+    return False
+
+
+def xverify(condition, message=""):
+    if condition:
+        _record("XPASS", message or "Verified", "'True' expression")
+        return True
+    _record("XFAIL", message or "Verification failed", "'False' expression")
+    return False
+
+
+def exception(code, message=""):
+    frameGlobals = sys._getframe(1).f_globals
+    try:
+        eval(code, frameGlobals)
+    except Exception as e:
+        _record("PASS", message or "Exception thrown", "%s: %s" % (e.__class__.__name__, e))
+        return True
+    _record("FAIL", message or "No exception thrown", code)
+    return False
+
+
+def passes(message="", detail=""):
+    _record("PASS", message, detail)
+
+
+def fail(message="", detail=""):
+    _record("FAIL", message, detail)
+
+
+def fatal(message="", detail=""):
+    _record("FATAL", message, detail)
+
+
+def warning(message="", detail=""):
+    _record("WARNING", message, detail)
+
+
+def log(message="", detail=""):
+    _record("LOG", message, detail)
+
+
+def error(message="", detail=""):
+    _record("ERROR", message, detail)
+
+
+# Reports the following results at the location of an ancestor of the calling function
+def fixateResultContext(ancestorFrameIndex=1):
+    frame = sys._getframe(1)
+    for _ in range(ancestorFrameIndex):
+        frame = frame.f_back or frame
+    _contexts.append("%s:%d" % (os.path.abspath(frame.f_code.co_filename), frame.f_lineno))
+
+
+def restoreResultContext():
+    if _contexts:
+        _contexts.pop()
+
+
+def startSection(title, description=""):
+    _sections.append(title)
+
+
+def endSection():
+    if _sections:
+        _sections.pop()
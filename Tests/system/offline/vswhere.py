@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Stand-in for vswhere.exe answering from a recorded "vswhere -all -format json" output. The path
+# of the recording is read from SQUISH_VSTOOLS_VSWHERE_JSON. Supported arguments: -path, -all,
+# -prerelease, -products, -format json|value|text and -property.
+
+import json
+import os
+import sys
+
+
+def instanceProperty(instance, name):
+    # vswhere treats property names case-insensitively and uses "_" to address nested objects,
+    # e.g. "catalog_productLineVersion".
+    value = instance
+    for part in name.split("_"):
+        if not isinstance(value, dict):
+            return None
+        keys = {key.lower(): key for key in value}
+        if part.lower() not in keys:
+            return None
+        value = value[keys[part.lower()]]
+    return value
+
+
+def formatValue(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+
+def main(argv):
+    options = {"format": "text"}
+    i = 0
+    while i < len(argv):
+        argument = argv[i].lstrip("-/").lower()
+        if argument in ("path", "property", "format", "products", "version"):
+            options[argument] = argv[i + 1] if i + 1 < len(argv) else ""
+            i += 2
+        else:
+            options[argument] = True
+            i += 1
+    with open(os.environ["SQUISH_VSTOOLS_VSWHERE_JSON"], encoding="utf-8") as f:
+        instances = json.load(f)
+    if "path" in options:
+        wanted = os.path.normcase(options["path"].replace("\\", "/").rstrip("/"))
+        instances = [instance for instance in instances
+                     if wanted.startswith(os.path.normcase(
+                         instance["installationPath"].replace("\\", "/").rstrip("/")))]
+    if not options.get("all") and "path" not in options:
+        instances = instances[:1]
+    if "property" in options:
+        for instance in instances:
+            value = instanceProperty(instance, options["property"])
+            if value is not None:
+                print(formatValue(value))
+        return 0
+    if options["format"] == "json":
+        print(json.dumps(instances, indent=2))
+    else:
+        for instance in instances:
+            for key, value in instance.items():
+                if not isinstance(value, dict):
+                    print("%s: %s" % (key, formatValue(value)))
+            print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
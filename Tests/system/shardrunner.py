@@ -0,0 +1,284 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Runs the test cases of Squish suites in parallel shards. Shard k uses its own experimental
+# instance of MSVS (/RootSuffix SquishTestInstance<k>) and its own subdirectory of
+# SQUISH_VSTOOLS_WORKDIR. Test cases are distributed longest first by the durations recorded in
+# a history file during previous runs, and the results of all shards are merged into one report.
+#
+#   python shardrunner.py [--shards N] [--history FILE] [--report FILE] [--offline] PATH [PATH ...]
+#
+# PATH is a suite directory (all TEST_CASES from its suite.conf are run) or a test case directory.
+# With --offline, test cases are run by offline/runner.py instead of squishrunner. The test cases
+# of UNSHARDED_SUITES depend on each other, they run one after another in one shard.
+
+import argparse
+import heapq
+import json
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+SYSTEM_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SYSTEM_DIR, "offline"))
+
+import runner
+
+ROOT_SUFFIX = "SquishTestInstance"
+DEFAULT_DURATION = 300.0
+# Suites whose test cases must run in the order of their suite.conf in the same instance
+UNSHARDED_SUITES = {"suite_installation"}
+
+
+def listTestCases(path):
+    path = os.path.abspath(path)
+    if os.path.exists(os.path.join(path, "suite.conf")):
+        testCases = runner.readSuiteConf(path).get("TEST_CASES", "").split()
+        return [(path, testCase) for testCase in testCases]
+    return [(os.path.dirname(path), os.path.basename(path))]
+
+
+def testKey(suiteDir, testCase):
+    return "%s/%s" % (os.path.basename(suiteDir), testCase)
+
+
+def loadHistory(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def saveHistory(path, history, results):
+    history = dict(history)
+    for result in results:
+        history[result["key"]] = round(result["duration"], 1)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    return history
+
+
+# Test cases without history are assumed to take as long as the known ones on average
+def estimateDurations(keys, history):
+    known = [history[key] for key in keys if key in history]
+    default = sum(known) / len(known) if known else DEFAULT_DURATION
+    return {key: history.get(key, default) for key in keys}
+
+
+# Keys of the test cases of UNSHARDED_SUITES, by suite in the order they were listed
+def unshardedGroups(keys):
+    groups = {}
+    for key in keys:
+        suite = key.partition("/")[0]
+        if suite in UNSHARDED_SUITES:
+            groups.setdefault(suite, []).append(key)
+    return list(groups.values())
+
+
+# Longest processing time first: each test case goes to the shard with the least expected work.
+# The keys of each of groups go to the same shard together, in their order. Returns one list of
+# keys per shard and the expected durations of the shards.
+def schedule(durations, shardCount, groups=()):
+    grouped = {key for group in groups for key in group}
+    units = [list(group) for group in groups]
+    units.extend([key] for key in durations if key not in grouped)
+    unitDuration = lambda unit: sum(durations[key] for key in unit)
+    shards = [[] for _ in range(shardCount)]
+    loads = [(0.0, index) for index in range(shardCount)]
+    for unit in sorted(units, key=lambda unit: (-unitDuration(unit), unit[0])):
+        load, index = heapq.heappop(loads)
+        shards[index].extend(unit)
+        heapq.heappush(loads, (load + unitDuration(unit), index))
+    expected = [0.0] * shardCount
+    for load, index in loads:
+        expected[index] = load
+    return shards, expected
+
+
+def shardEnvironment(index, baseEnvironment=None):
+    environment = dict(os.environ if baseEnvironment is None else baseEnvironment)
+    environment["SQUISH_VSTOOLS_ROOTSUFFIX"] = "%s%d" % (ROOT_SUFFIX, index + 1)
+    workDir = environment.get("SQUISH_VSTOOLS_WORKDIR")
+    if workDir:
+        environment["SQUISH_VSTOOLS_WORKDIR"] = os.path.join(workDir, "shard%d" % (index + 1))
+    session = environment.get("SQUISH_VSTOOLS_SESSION")
+    if session:
+        # Every shard needs its own attachable AUT, e.g. devenvSession1 on port 4445
+        environment["SQUISH_VSTOOLS_SESSION"] = "%s%d" % (session, index + 1)
+        port = int(environment.get("SQUISH_VSTOOLS_SESSION_PORT", "4444"))
+        environment["SQUISH_VSTOOLS_SESSION_PORT"] = str(port + index + 1)
+    return environment
+
+
+class SquishWorker:
+    # Runs a test case with squishrunner. Reports are written as JUnit XML to reportDir.
+
+    def __init__(self, reportDir, squishrunner=None, extraArguments=None):
+        if not squishrunner:
+            squishrunner = os.path.join(os.getenv("SQUISH_PREFIX", ""), "bin", "squishrunner")
+        self.squishrunner = squishrunner
+        self.reportDir = reportDir
+        self.extraArguments = extraArguments or []
+
+    def reportFile(self, suiteDir, testCase):
+        return os.path.join(self.reportDir, "%s_%s.xml" % (os.path.basename(suiteDir), testCase))
+
+    def run(self, suiteDir, testCase, environment):
+        os.makedirs(self.reportDir, exist_ok=True)
+        command = ([self.squishrunner] + self.extraArguments
+                   + ["--testsuite", suiteDir, "--testcase", testCase,
+                      "--reportgen", "junit,%s" % self.reportFile(suiteDir, testCase)])
+        process = subprocess.run(command, env=environment, stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT, universal_newlines=True)
+        return {"passed": process.returncode == 0, "returncode": process.returncode,
+                "log": process.stdout}
+
+
+class OfflineWorker:
+    # Runs a test case against the simulated devenv of offline/runner.py
+
+    def run(self, suiteDir, testCase, environment):
+        command = [sys.executable, os.path.join(SYSTEM_DIR, "offline", "runner.py"),
+                   os.path.join(suiteDir, testCase)]
+        process = subprocess.run(command, env=environment, stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT, universal_newlines=True)
+        return {"passed": process.returncode == 0, "returncode": process.returncode,
+                "log": process.stdout}
+
+
+# Runs the shards in parallel, the test cases of each shard one after another. Workers may
+# report a "duration" of their own, otherwise the elapsed time is used.
+def runShards(shards, testCases, worker, environments, clock=time.monotonic):
+    def runShard(index):
+        results = []
+        for key in shards[index]:
+            suiteDir, testCase = testCases[key]
+            started = clock()
+            try:
+                result = dict(worker.run(suiteDir, testCase, environments[index]))
+            except Exception as e:
+                result = {"passed": False, "returncode": None,
+                          "log": "%s: %s" % (e.__class__.__name__, e)}
+            result.setdefault("duration", clock() - started)
+            result.update({"key": key, "shard": index + 1})
+            results.append(result)
+        return results
+
+    if not shards:
+        return []
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        perShard = list(executor.map(runShard, range(len(shards))))
+    return [result for results in perShard for result in results]
+
+
+# Merges the results of all shards in the order the test cases were listed
+def mergeResults(results, order, expected=None, wallTime=None):
+    byKey = {result["key"]: result for result in results}
+    testCases = [byKey[key] for key in order if key in byKey]
+    shardCount = max([result["shard"] for result in results], default=0)
+    shards = []
+    for index in range(shardCount):
+        own = [result for result in testCases if result["shard"] == index + 1]
+        shards.append({"shard": index + 1,
+                       "testCases": [result["key"] for result in own],
+                       "duration": sum(result["duration"] for result in own),
+                       "expected": expected[index] if expected else None})
+    return {"testCases": testCases,
+            "passed": sum(1 for result in testCases if result["passed"]),
+            "failed": sum(1 for result in testCases if not result["passed"]),
+            "missing": [key for key in order if key not in byKey],
+            "totalDuration": sum(result["duration"] for result in testCases),
+            "wallTime": (wallTime if wallTime is not None
+                         else max([shard["duration"] for shard in shards], default=0.0)),
+            "shards": shards}
+
+
+def mergeJUnitReports(files, output):
+    root = ET.Element("testsuites")
+    for fileName in files:
+        if not os.path.exists(fileName):
+            continue
+        element = ET.parse(fileName).getroot()
+        suites = [element] if element.tag == "testsuite" else list(element)
+        root.extend(suites)
+    ET.ElementTree(root).write(output, encoding="utf-8", xml_declaration=True)
+
+
+def printReport(report, out=sys.stdout):
+    for shard in report["shards"]:
+        expected = ("" if shard["expected"] is None
+                    else " (expected %.1f s)" % shard["expected"])
+        out.write("Shard %d: %d test cases, %.1f s%s\n"
+                  % (shard["shard"], len(shard["testCases"]), shard["duration"], expected))
+    for result in report["testCases"]:
+        out.write("  %-4s %-55s shard %d %8.1f s\n"
+                  % ("PASS" if result["passed"] else "FAIL", result["key"], result["shard"],
+                     result["duration"]))
+    for key in report["missing"]:
+        out.write("  %-4s %s\n" % ("MISS", key))
+    out.write("%d passed, %d failed in %.1f s (%.1f s serial)\n"
+              % (report["passed"], report["failed"], report["wallTime"],
+                 report["totalDuration"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Squish test cases in parallel shards.")
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="suite or test case directory")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1,
+                        help="number of experimental instances to use")
+    parser.add_argument("--history", default="shard_durations.json",
+                        help="JSON file with the durations of previous runs")
+    parser.add_argument("--report", help="write the merged report as JSON to this file")
+    parser.add_argument("--junit", help="merge the JUnit reports of squishrunner to this file")
+    parser.add_argument("--squishrunner", help="path of squishrunner")
+    parser.add_argument("--offline", action="store_true",
+                        help="run test cases against the simulated devenv")
+    args = parser.parse_args(argv)
+
+    testCases = {}
+    for path in args.paths:
+        for suiteDir, testCase in listTestCases(path):
+            testCases[testKey(suiteDir, testCase)] = (suiteDir, testCase)
+    order = list(testCases)
+    history = loadHistory(args.history)
+    shardCount = max(1, min(args.shards, len(order)))
+    shards, expected = schedule(estimateDurations(order, history), shardCount,
+                                unshardedGroups(order))
+    environments = [shardEnvironment(index) for index in range(shardCount)]
+    for environment in environments:
+        workDir = environment.get("SQUISH_VSTOOLS_WORKDIR")
+        if workDir:
+            os.makedirs(workDir, exist_ok=True)
+
+    reportDir = os.path.join(os.getcwd(), "shard_reports")
+    if args.offline:
+        worker = OfflineWorker()
+    else:
+        worker = SquishWorker(reportDir, args.squishrunner)
+    started = time.monotonic()
+    results = runShards(shards, testCases, worker, environments)
+    report = mergeResults(results, order, expected, time.monotonic() - started)
+    printReport(report)
+    for result in report["testCases"]:
+        if not result["passed"]:
+            sys.stdout.write("\n%s (shard %d):\n%s\n"
+                             % (result["key"], result["shard"], result["log"].rstrip()))
+    saveHistory(args.history, history, results)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.junit and not args.offline:
+        mergeJUnitReports([worker.reportFile(*testCases[key]) for key in order], args.junit)
+    return 0 if report["failed"] == 0 and not report["missing"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Waiting for files to appear, e.g. files of new projects or build outputs. Instead of polling
+# all expected paths, a watcher subscribed to the directory tree containing them wakes up on
+# changes and only the paths still missing are checked again. Watchers use the native file
+# notifications where available (FindFirstChangeNotification on Windows, inotify on Linux) and
+# fall back to comparing listings of the directories the missing paths will be created in.
+# Timeouts are scaled, durations are measured and waits are recorded like in waiting.py. The
+# offline runner replaces watcherFactory, so waiting for files advances its simulated clock. This
+# module doesn't depend on Squish.
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+import waiting
+
+# Missing paths are checked at least this often, in case a notification was missed
+RECHECK_INTERVAL = 1.0
+
+
+def _existingAncestor(path):
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return path
+
+
+# The deepest existing directory containing all given paths
+def watchRoot(paths):
+    common = os.path.commonpath([os.path.abspath(path) for path in paths])
+    return _existingAncestor(common)
+
+
+class SnapshotWatcher:
+    # Compares listings of the directories the missing paths are expected in, or of their
+    # nearest existing ancestors
+
+    def __init__(self, root, paths, interval=0.05, maxInterval=RECHECK_INTERVAL):
+        self.root = root
+        self.paths = paths
+        self.interval = interval
+        self.maxInterval = maxInterval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        snapshot = {}
+        for path in self.paths:
+            directory = _existingAncestor(os.path.dirname(path))
+            if directory is not None and directory not in snapshot:
+                try:
+                    snapshot[directory] = (os.stat(directory).st_mtime_ns,
+                                           frozenset(os.listdir(directory)))
+                except OSError:
+                    snapshot[directory] = None
+        return snapshot
+
+    # Returns True if something changed before the timeout (in seconds)
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._snapshot()
+            if current != self.snapshot:
+                self.snapshot = current
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+            self.interval = min(self.interval * waiting.BACKOFF, self.maxInterval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    # Watches a directory tree with Linux' inotify, adding watches for new subdirectories
+
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, root, paths=None):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        try:
+            self._addTree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _addWatch(self, directory):
+        mask = self.IN_CREATE | self.IN_MOVED_TO | self.IN_CLOSE_WRITE | self.IN_MODIFY
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed", directory)
+        self.directories[wd] = directory
+
+    def _addTree(self, root):
+        for directory, _, _ in os.walk(root):
+            self._addWatch(directory)
+
+    def _readEvents(self):
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + self.EVENT.size <= len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            name = data[offset + self.EVENT.size:offset + self.EVENT.size + length]
+            offset += self.EVENT.size + length
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                directory = os.path.join(self.directories.get(wd, ""),
+                                         os.fsdecode(name.rstrip(b"\0")))
+                try:
+                    self._addTree(directory)
+                except OSError:
+                    pass  # Removed again, or the next recheck will find its contents
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return False
+        self._readEvents()
+        return True
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ChangeNotificationWatcher:
+    # Watches a directory tree with Windows' FindFirstChangeNotification
+
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x1
+    FILE_NOTIFY_CHANGE_DIR_NAME = 0x2
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x10
+    WAIT_OBJECT_0 = 0
+
+    def __init__(self, root, paths=None):
+        from ctypes import wintypes
+        self.kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self.kernel32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        self.kernel32.FindFirstChangeNotificationW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL,
+                                                               wintypes.DWORD]
+        for function in ("FindNextChangeNotification", "FindCloseChangeNotification"):
+            getattr(self.kernel32, function).argtypes = [wintypes.HANDLE]
+        self.kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        self.handle = self.kernel32.FindFirstChangeNotificationW(
+            root, True, self.FILE_NOTIFY_CHANGE_FILE_NAME | self.FILE_NOTIFY_CHANGE_DIR_NAME
+            | self.FILE_NOTIFY_CHANGE_LAST_WRITE)
+        if self.handle in (None, ctypes.c_void_p(-1).value):
+            self.handle = None
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def wait(self, timeout):
+        result = self.kernel32.WaitForSingleObject(self.handle, max(int(timeout * 1000), 0))
+        if result != self.WAIT_OBJECT_0:
+            return False
+        self.kernel32.FindNextChangeNotification(self.handle)
+        return True
+
+    def close(self):
+        if self.handle:
+            self.kernel32.FindCloseChangeNotification(self.handle)
+            self.handle = None
+
+
+def createWatcher(root, paths):
+    if sys.platform == "win32":
+        native = ChangeNotificationWatcher
+    elif sys.platform.startswith("linux"):
+        native = InotifyWatcher
+    else:
+        native = None
+    if native is not None:
+        try:
+            return native(root, paths)
+        except (OSError, AttributeError):
+            pass  # e.g. out of inotify watches
+    return SnapshotWatcher(root, paths)
+
+
+# Creates the watchers used by waitForPaths() for a root directory and the missing paths
+watcherFactory = createWatcher
+
+
+# Waits until all given paths exist. Returns the paths which are still missing after "timeout"
+# milliseconds (None: wait forever), i.e. an empty list on success. Like in waiting.py, the
+# duration is the larger of the elapsed wall-clock time and the sum of the pauses. Watchers'
+# wait() returns True when it woke up on a change, which may be early or unrelated, and False
+# when the whole pause passed. Only the latter counts as paused.
+def waitForPaths(paths, timeout=None, description=None, watcherFactory=None):
+    location = waiting.callerLocation((__file__,))
+    limit = waiting.scaledTimeout(timeout)
+    started = time.monotonic()
+    paused = 0.0
+    missing = [path for path in paths if not os.path.exists(path)]
+    checks = 1
+    watcher = None
+    try:
+        if missing:
+            root = watchRoot(missing)
+            factory = watcherFactory or globals()["watcherFactory"]
+            watcher = factory(root, missing) if root else None
+            # Paths created while subscribing were not notified
+            missing = [path for path in missing if not os.path.exists(path)]
+            checks += 1
+        while missing:
+            elapsed = max((time.monotonic() - started) * 1000, paused)
+            if limit is not None and elapsed >= limit:
+                break
+            pause = RECHECK_INTERVAL if limit is None else min(RECHECK_INTERVAL,
+                                                               (limit - elapsed) / 1000)
+            if watcher is None:
+                waiting.snooze(pause * 1000)  # Not even the drive exists yet
+                paused += pause * 1000
+            elif not watcher.wait(pause):
+                paused += pause * 1000
+            missing = [path for path in missing if not os.path.exists(path)]
+            checks += 1
+    finally:
+        if watcher is not None:
+            watcher.close()
+    waiting.recordWait(description, location, limit,
+                       max((time.monotonic() - started) * 1000, paused), not missing, checks)
+    return missing
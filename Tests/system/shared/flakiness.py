@@ -0,0 +1,239 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# History of the outcomes of waits, to retry the flaky ones. Enabled by setting
+# SQUISH_VSTOOLS_FLAKINESS_DB to an SQLite database file. Each attempt of waitForObject(),
+# waitForObjectExists(), waitForObjectItem() and of the waits of waiting.py is stored with the
+# test case, the step (the object's name, or the wait's description or location), its duration
+# and whether it succeeded.
+#
+# The flakiness score of a step in a test case is the share of timeouts among its last WINDOW
+# attempts, if it succeeded at least once; a step which always times out is broken rather than
+# flaky, and retrying it only wastes time. Steps whose score is at least RETRY_THRESHOLD are
+# attempted up to MAX_RETRIES more times before their timeout counts as a failure. The report lists
+# the steps wasting most time on timeouts:
+#
+#   python flakiness.py report DATABASE [--top N] [--json]
+#
+# This module doesn't depend on Squish.
+
+import functools
+import json
+import os
+import sqlite3
+import sys
+import time
+
+WINDOW = 50
+RETRY_THRESHOLD = 0.05
+MAX_RETRIES = 2
+# Functions of Squish's squish module which wait for objects
+GUARDED_FUNCTIONS = ["waitForObject", "waitForObjectExists", "waitForObjectItem"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    testCase TEXT NOT NULL,
+    step TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    time REAL NOT NULL,
+    duration REAL NOT NULL,
+    success INTEGER NOT NULL,
+    retry INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attemptsByStep ON attempts (testCase, step, id);
+"""
+
+_enabled = bool(os.getenv("SQUISH_VSTOOLS_FLAKINESS_DB"))
+_clock = time.monotonic
+_database = None
+
+
+def isEnabled():
+    return _enabled
+
+
+def enable(databaseFile, clock=None):
+    global _enabled, _clock, _database
+    os.environ["SQUISH_VSTOOLS_FLAKINESS_DB"] = databaseFile
+    _enabled = True
+    _database = None
+    if clock is not None:
+        _clock = clock
+
+
+def currentTestCase():
+    return "%s/%s" % (os.path.basename(os.path.dirname(os.getcwd())),
+                      os.path.basename(os.getcwd()))
+
+
+# Name of the step waiting for an object, the symbolic name or the real name as JSON
+def objectStep(objectOrName):
+    if isinstance(objectOrName, str):
+        return objectOrName
+    try:
+        return json.dumps(objectOrName, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return repr(objectOrName)
+
+
+class Database:
+
+    def __init__(self, fileName, testCase=None):
+        directory = os.path.dirname(os.path.abspath(fileName))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(fileName, timeout=30)
+        # Parallel shards write to the same database
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.testCase = testCase or currentTestCase()
+        self._scores = None
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, step, kind, duration, success, retry=0):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO attempts (testCase, step, kind, time, duration, success, retry)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.testCase, step, kind, time.time(), duration, int(bool(success)), retry))
+
+    # Flakiness scores of the steps of the test case, from the attempts before this run
+    def scores(self):
+        if self._scores is None:
+            rows = self.connection.execute(
+                "SELECT step, success FROM attempts WHERE testCase = ? ORDER BY id DESC",
+                (self.testCase,))
+            outcomes = {}
+            for step, success in rows:
+                recent = outcomes.setdefault(step, [])
+                if len(recent) < WINDOW:
+                    recent.append(success)
+            self._scores = {step: (recent.count(0) / len(recent) if 1 in recent else 0.0)
+                            for step, recent in outcomes.items()}
+        return self._scores
+
+    def retries(self, step):
+        return MAX_RETRIES if self.scores().get(step, 0.0) >= RETRY_THRESHOLD else 0
+
+    # Steps of all test cases by the seconds their timeouts took, largest first
+    def report(self):
+        rows = self.connection.execute(
+            "SELECT testCase, step, GROUP_CONCAT(DISTINCT kind), COUNT(*), SUM(1 - success),"
+            " SUM(success * (retry > 0)), SUM(duration * (1 - success)) FROM attempts"
+            " GROUP BY testCase, step")
+        entries = []
+        for testCase, step, kind, attempts, timeouts, recovered, wasted in rows:
+            recent = [success for success, in self.connection.execute(
+                "SELECT success FROM attempts WHERE testCase = ? AND step = ?"
+                " ORDER BY id DESC LIMIT ?", (testCase, step, WINDOW))]
+            entries.append({"testCase": testCase, "step": step, "kind": kind,
+                            "attempts": attempts, "timeouts": timeouts,
+                            "recovered": recovered, "wasted": wasted / 1000.0,
+                            "score": recent.count(0) / len(recent) if 1 in recent else 0.0})
+        return sorted(entries, key=lambda entry: entry["wasted"], reverse=True)
+
+
+def database():
+    global _database
+    if _database is None and _enabled:
+        _database = Database(os.environ["SQUISH_VSTOOLS_FLAKINESS_DB"])
+    return _database
+
+
+def close():
+    global _database
+    if _database is not None:
+        _database.close()
+        _database = None
+
+
+# Calls function() and records whether succeeded() holds for its result. Flaky steps are attempted
+# again while it doesn't. Returns the last result.
+def attempt(step, kind, function, succeeded=bool):
+    db = database()
+    retries = db.retries(step) if db else 0
+    for retry in range(retries + 1):
+        started = _clock()
+        result = function()
+        success = succeeded(result)
+        if db:
+            db.record(step, kind, (_clock() - started) * 1000, success, retry)
+        if success:
+            break
+    return result
+
+
+def _guard(name, function):
+    @functools.wraps(function)
+    def wrapper(objectOrName, *args, **kwargs):
+        def call():
+            try:
+                return function(objectOrName, *args, **kwargs)
+            except LookupError as e:
+                return e
+        result = attempt(objectStep(objectOrName), name, call,
+                         lambda result: not isinstance(result, LookupError))
+        if isinstance(result, LookupError):
+            raise result
+        return result
+    return wrapper
+
+
+# Wraps the functions of the squish module waiting for objects, and their names in the namespace of
+# a test script
+def install(squishModule, namespace=None):
+    if not _enabled:
+        return
+    # The originals are kept in the squish module, which may outlive this module
+    originals = getattr(squishModule, "_flakinessOriginals", None)
+    if originals is None:
+        originals = {}
+        setattr(squishModule, "_flakinessOriginals", originals)
+    for name in GUARDED_FUNCTIONS:
+        if name in originals or hasattr(squishModule, name):
+            function = originals.setdefault(name, getattr(squishModule, name))
+            guarded = _guard(name, function)
+            setattr(squishModule, name, guarded)
+            if namespace is not None and name in namespace:
+                namespace[name] = guarded
+
+
+def formatReport(entries, top=20):
+    lines = ["%10s %6s %8s %8s %9s  %s" % ("wasted [s]", "score", "attempts", "timeouts",
+                                          "recovered", "step")]
+    for entry in entries[:top]:
+        lines.append("%10.1f %6.2f %8d %8d %9d  %s: %s" % (
+            entry["wasted"], entry["score"], entry["attempts"], entry["timeouts"],
+            entry["recovered"], entry["testCase"], entry["step"]))
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Evaluate the history of waits of the system "
+                                                 "tests.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reportParser = commands.add_parser("report", help="list the steps wasting most time")
+    reportParser.add_argument("database", help="file set as SQUISH_VSTOOLS_FLAKINESS_DB")
+    reportParser.add_argument("--top", type=int, default=20, help="number of steps to list")
+    reportParser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    db = Database(args.database, "")
+    entries = db.report()
+    db.close()
+    if args.json:
+        print(json.dumps(entries[:args.top], indent=2))
+    else:
+        print(formatReport(entries, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
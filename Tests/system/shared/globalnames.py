@@ -16,6 +16,10 @@ continueWithoutCode_Label = {"container": quickStart_Window,
 microsoft_Visual_Studio_MenuBar = {"container": microsoft_Visual_Studio_Window, "type": "MenuBar"}
 file_MenuItem = {"container": microsoft_Visual_Studio_MenuBar, "text": "File", "type": "MenuItem"}
 file_Exit_MenuItem = {"container": file_MenuItem, "text": "Exit", "type": "MenuItem"}
+file_Close_Solution_MenuItem = {"container": file_MenuItem, "text": "Close Solution",
+                                "type": "MenuItem"}
+file_Close_Folder_MenuItem = {"container": file_MenuItem, "text": "Close Folder",
+                              "type": "MenuItem"}
 extensions_MenuItem = {"container": microsoft_Visual_Studio_MenuBar, "text": "Extensions", "type": "MenuItem"}
 extensions_Qt_VS_Tools_MenuItem = {"container": extensions_MenuItem, "text": "Qt VS Tools",
                                    "type": "MenuItem"}
@@ -36,3 +40,5 @@ microsoft_Visual_Studio_Dialog = {"text": "Microsoft Visual Studio", "type": "Di
 microsoft_Visual_Studio_OK_Button = {"container": microsoft_Visual_Studio_Dialog,
                                      "text": "OK", "type": "Button"}
 workflowHostView = {"id": "WorkflowHostView", "text": "Microsoft Visual Studio", "type": "Window"}
+options_Dialog = {"text": "Options", "type": "Dialog"}
+qt_Wizard_Window = {"class": "QtVsTools.Wizards.Common.WizardWindow", "type": "Window"}
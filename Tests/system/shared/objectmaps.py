@@ -0,0 +1,394 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Index of the object maps shared/globalnames.py and <suite>/shared/scripts/names.py. The maps are
+# read without running them, so Squish's objectmaphelper isn't needed. For each object name the
+# index holds its own properties, its container and the chain of containers up to the top level
+# window, with names like "names.X" in the suites' maps resolved to "globalnames.X" where they are
+# aliases. Wildcard() and RegularExpression() values are stored as {"wildcard": pattern} and
+# {"regex": pattern}. The index also lists problems: names defined twice in a map, names of a
+# suite's map shadowing a different object of globalnames.py, objects defined under several names
+# and names not used by any script. It is cached in SQUISH_VSTOOLS_CACHE_DIR, keyed by a hash of
+# the maps and scripts.
+#
+# ContainerCache resolves the containers of real names once and passes the found objects as
+# containers to Squish, so the chains aren't searched from the top level window on every call.
+# Found containers are forgotten when their test section ends, see testsection.py, and when the
+# helper closing their top level window calls invalidate().
+#
+#   python objectmaps.py check      # Prints the problems, returns 1 if there are any
+#   python objectmaps.py table      # Prints the flattened object maps as JSON
+
+import ast
+import hashlib
+import json
+import os
+import sys
+import warnings
+
+import vsinstances
+
+CACHE_FORMAT = 1
+SYSTEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GLOBAL_MAP = "globalnames"
+# Properties referring to other objects
+CONTAINER_KEYS = ("container", "window")
+# Directories of Tests/system which don't contain scripts run by Squish
+IGNORED_DIRS = {"offline", "tests", "__pycache__"}
+MATCHERS = {"Wildcard": "wildcard", "RegularExpression": "regex"}
+
+
+# Object maps by their name in the index, e.g. "globalnames" and "suite_configuration/names"
+def mapFiles(systemDir=SYSTEM_DIR):
+    files = {GLOBAL_MAP: os.path.join(systemDir, "shared", "globalnames.py")}
+    for suite in sorted(os.listdir(systemDir)):
+        path = os.path.join(systemDir, suite, "shared", "scripts", "names.py")
+        if suite.startswith("suite_") and os.path.exists(path):
+            files[suite + "/names"] = path
+    return files
+
+
+def scriptFiles(systemDir=SYSTEM_DIR):
+    mapPaths = set(mapFiles(systemDir).values())
+    scripts = []
+    for directory, subdirectories, fileNames in os.walk(systemDir):
+        subdirectories[:] = sorted(subdirectory for subdirectory in subdirectories
+                                   if subdirectory not in IGNORED_DIRS)
+        if directory == systemDir:
+            continue  # Tools like shardrunner.py
+        scripts.extend(os.path.join(directory, fileName) for fileName in sorted(fileNames)
+                       if fileName.endswith(".py")
+                       and os.path.join(directory, fileName) not in mapPaths)
+    return scripts
+
+
+def contentHash(files):
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(path.replace("\\", "/").encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _parse(path):
+    with open(path, encoding="utf-8-sig") as f:
+        source = f.read()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # e.g. invalid escape sequences in regular expressions
+        return ast.parse(source, path)
+
+
+def _suiteOf(mapName):
+    return mapName.partition("/")[0] if "/" in mapName else None
+
+
+class _Evaluator:
+    # Evaluates the expressions of an object map: dicts, matchers, references to other names and
+    # merges with "|". References are ("ref", qualified name) tuples.
+
+    def __init__(self, mapName):
+        self.mapName = mapName
+
+    def qualified(self, name):
+        return "%s.%s" % (self.mapName, name)
+
+    def evaluate(self, node):
+        if isinstance(node, ast.Dict):
+            return {key.value: self.evaluate(value) for key, value in zip(node.keys, node.values)
+                    if isinstance(key, ast.Constant)}
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            return ("ref", self.qualified(node.id))
+        if (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+                and node.value.id == GLOBAL_MAP):
+            return ("ref", "%s.%s" % (GLOBAL_MAP, node.attr))
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in MATCHERS and node.args
+                and isinstance(node.args[0], ast.Constant)):
+            return {MATCHERS[node.func.id]: node.args[0].value}
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+            return ("merge", self.evaluate(node.left), self.evaluate(node.right))
+        return {"expression": ast.unparse(node)}
+
+
+def _references(value):
+    if isinstance(value, tuple) and value[0] == "ref":
+        return [value[1]]
+    if isinstance(value, tuple) and value[0] == "merge":
+        return _references(value[1]) + _references(value[2])
+    if isinstance(value, dict):
+        return [name for item in value.values() for name in _references(item)]
+    return []
+
+
+def readMap(mapName, path):
+    # Returns the definitions of a map by qualified name and the names defined more than once
+    evaluator = _Evaluator(mapName)
+    definitions = {}
+    redefined = []
+    for node in _parse(path).body:
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    name = evaluator.qualified(target.id)
+                    if name in definitions:
+                        redefined.append((name, node.lineno))
+                    definitions[name] = {"value": evaluator.evaluate(node.value),
+                                         "file": path, "line": node.lineno}
+    return definitions, redefined
+
+
+def usedNames(scripts, maps, systemDir=SYSTEM_DIR):
+    # Names used as names.X or globalnames.X by the scripts. "names" is the map of the script's
+    # suite, or of all suites for scripts in Tests/system/shared.
+    used = set()
+    for path in scripts:
+        relative = os.path.relpath(path, systemDir).replace(os.sep, "/")
+        suite = relative.partition("/")[0]
+        suiteMaps = ([suite + "/names"] if suite + "/names" in maps
+                     else [mapName for mapName in maps if mapName != GLOBAL_MAP])
+        try:
+            tree = _parse(path)
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+                if node.value.id == GLOBAL_MAP:
+                    used.add("%s.%s" % (GLOBAL_MAP, node.attr))
+                elif node.value.id == "names":
+                    used.update("%s.%s" % (mapName, node.attr) for mapName in suiteMaps)
+    return used
+
+
+def buildIndex(systemDir=SYSTEM_DIR):
+    maps = mapFiles(systemDir)
+    definitions = {}
+    problems = []
+    for mapName, path in maps.items():
+        mapDefinitions, redefined = readMap(mapName, path)
+        definitions.update(mapDefinitions)
+        problems.extend({"kind": "redefined", "name": name, "line": line,
+                         "message": "%s is defined again in line %d" % (name, line)}
+                        for name, line in redefined)
+
+    def canonical(name, seen=()):
+        # The name an alias refers to, e.g. "globalnames.X" for "names.X = globalnames.X"
+        value = definitions.get(name, {}).get("value")
+        if isinstance(value, tuple) and value[0] == "ref" and value[1] not in seen:
+            return canonical(value[1], seen + (name,))
+        return name
+
+    def resolve(value):
+        if isinstance(value, tuple) and value[0] == "ref":
+            target = canonical(value[1])
+            if target not in definitions:
+                return {"missing": target}
+            return resolve(definitions[target]["value"])
+        if isinstance(value, tuple) and value[0] == "merge":
+            return dict(resolve(value[1]), **resolve(value[2]))
+        if isinstance(value, dict):
+            return {key: ("ref", canonical(item[1])) if isinstance(item, tuple) else item
+                    for key, item in value.items()}
+        return value
+
+    objects = {}
+    for name, definition in definitions.items():
+        target = canonical(name)
+        realName = resolve(definition["value"])
+        properties = {key: value for key, value in realName.items() if key not in CONTAINER_KEYS}
+        container = next((realName[key][1] for key in CONTAINER_KEYS
+                          if isinstance(realName.get(key), tuple)), None)
+        objects[name] = {"file": os.path.relpath(definition["file"], systemDir).replace(os.sep,
+                                                                                      "/"),
+                         "line": definition["line"], "aliasOf": target if target != name else None,
+                         "properties": properties, "container": container}
+    for entry in objects.values():
+        chain = []
+        container = entry["container"]
+        while container is not None and container not in chain and container in objects:
+            chain.append(container)
+            container = objects[container]["container"]
+        if container is not None and container not in objects:
+            problems.append({"kind": "missing", "name": container,
+                             "message": "Container %s is not defined" % container})
+        entry["chain"] = chain
+        entry["depth"] = len(chain)
+
+    # Objects defined under several names, in the scope of a suite including globalnames.py
+    byRealName = {}
+    for name, entry in objects.items():
+        if entry["aliasOf"] is None:
+            key = json.dumps([entry["properties"], entry["container"]], sort_keys=True,
+                             default=str)
+            byRealName.setdefault(key, []).append(name)
+    reported = set()
+    for names in byRealName.values():
+        for suite in {_suiteOf(name.partition(".")[0]) for name in names}:
+            inScope = tuple(name for name in names
+                            if _suiteOf(name.partition(".")[0]) in (suite, None))
+            if len(inScope) > 1 and inScope not in reported:
+                reported.add(inScope)
+                problems.append({"kind": "duplicate", "name": inScope[0], "names": inScope,
+                                 "message": "%s define the same object" % ", ".join(inScope)})
+    for name, entry in objects.items():
+        mapName, _, shortName = name.partition(".")
+        globalName = "%s.%s" % (GLOBAL_MAP, shortName)
+        if mapName != GLOBAL_MAP and globalName in objects and entry["aliasOf"] != globalName:
+            problems.append({"kind": "shadowed", "name": name,
+                             "message": "%s shadows %s" % (name, globalName)})
+
+    # Unused names: neither used by a script nor referred to by the definition of a used name
+    used = set()
+    pending = list(usedNames(scriptFiles(systemDir), maps, systemDir))
+    while pending:
+        name = pending.pop()
+        if name in definitions and name not in used:
+            used.add(name)
+            pending.extend(_references(definitions[name]["value"]))
+    problems.extend({"kind": "unused", "name": name, "message": "%s is not used" % name}
+                    for name in objects if name not in used)
+    problems.sort(key=lambda problem: (problem["kind"], problem["name"]))
+    return {"objects": objects, "problems": problems}
+
+
+class ObjectMapIndex:
+
+    def __init__(self, systemDir=SYSTEM_DIR, cacheFile=None):
+        self.systemDir = systemDir
+        self.cacheFile = cacheFile or os.path.join(vsinstances.cacheDir(), "object_maps.json")
+        self.built = False
+        index = self._load()
+        self.objects = index["objects"]
+        self.problems = index["problems"]
+
+    def _load(self):
+        digest = contentHash(list(mapFiles(self.systemDir).values())
+                             + scriptFiles(self.systemDir))
+        cache = vsinstances.loadCache(self.cacheFile, CACHE_FORMAT)
+        if isinstance(cache, dict) and cache.get("hash") == digest:
+            return cache["index"]
+        # Tuples become lists like in the cache
+        index = json.loads(json.dumps(buildIndex(self.systemDir)))
+        self.built = True
+        vsinstances.saveCache(self.cacheFile, CACHE_FORMAT, {"hash": digest, "index": index})
+        return index
+
+    def __contains__(self, name):
+        return name in self.objects
+
+    def object(self, name):
+        return self.objects[name]
+
+    # Containers of an object, from its direct container up to the top level window
+    def chain(self, name):
+        return self.objects[name]["chain"]
+
+    def problemsOfKind(self, kind):
+        return [problem for problem in self.problems if problem["kind"] == kind]
+
+
+_index = None
+
+
+def index():
+    global _index
+    if _index is None:
+        _index = ObjectMapIndex()
+    return _index
+
+
+def _key(realName):
+    return json.dumps(realName, sort_keys=True, default=repr)
+
+
+def _root(realName):
+    while isinstance(realName, dict) and isinstance(realName.get("container"), dict):
+        realName = realName["container"]
+    return realName
+
+
+class ContainerCache:
+    # Objects found for the containers of real names. "find" looks up a real name, it defaults
+    # to Squish's waitForObjectExists().
+
+    def __init__(self, find=None):
+        self.find = find or self._squishFind
+        # Found objects and the keys of their top level windows by the keys of their real names
+        self.found = {}
+        self.sections = [set()]
+        self.lookups = 0
+
+    @staticmethod
+    def _squishFind(realName):
+        # Imported here, so the index can be used outside of Squish
+        import squish
+        return squish.waitForObjectExists(realName)
+
+    # Returns the real name with its container replaced by the object found for it
+    def realName(self, realName):
+        container = realName.get("container") if isinstance(realName, dict) else None
+        if not isinstance(container, dict):
+            return realName
+        return dict(realName, container=self.container(container))
+
+    def container(self, realName):
+        key = _key(realName)
+        if key in self.found:
+            return self.found[key][0]
+        self.lookups += 1
+        found = self.find(self.realName(realName))
+        self.found[key] = (found, _key(_root(realName)))
+        self.sections[-1].add(key)
+        return found
+
+    # Forgets the objects found in the top level window "root", or all objects
+    def invalidate(self, root=None):
+        rootKey = None if root is None else _key(root)
+        for key, (_, foundRootKey) in list(self.found.items()):
+            if rootKey is None or foundRootKey == rootKey:
+                del self.found[key]
+
+    def startSection(self):
+        self.sections.append(set())
+
+    # Forgets the objects found since the innermost section started
+    def endSection(self):
+        keys = self.sections.pop() if len(self.sections) > 1 else self.sections[0]
+        for key in keys:
+            self.found.pop(key, None)
+        keys.clear()
+
+
+_containers = None
+
+
+def containers():
+    global _containers
+    if _containers is None:
+        _containers = ContainerCache()
+    return _containers
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Index the object maps of the system tests.")
+    parser.add_argument("command", choices=["check", "table"])
+    args = parser.parse_args(argv)
+    index = buildIndex()
+    if args.command == "table":
+        print(json.dumps(index["objects"], indent=2, default=list))
+        return 0
+    for problem in index["problems"]:
+        print("%s: %s" % (problem["kind"], problem["message"]))
+    return 1 if index["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,456 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Snapshots of the object tree of devenv, to check the object maps against several versions of
+# Visual Studio without running them. Enabled by setting SQUISH_VSTOOLS_SNAPSHOTS to a directory.
+# When waitForObject() or waitForObjectExists() find an object by a real name which no snapshot of
+# the test case contains yet, the tree of the object's top level window is written to
+# <directory>/<version of Visual Studio>/<suite>_<test case>_<n>.json.gz.
+#
+# A snapshot holds the objects of the types used in the object maps, with the properties used in
+# the maps, their nearest recorded ancestor and their leftObject. It also holds the names of the
+# index of objectmaps.py which matched an object when it was recorded. Checking a snapshot
+# matches these names again, with the object maps as they are now, and reports the names which
+# don't match any object anymore or match another one. The snapshots of the same window of a
+# test case are compared across versions, too: all names of the maps are matched in each of them,
+# and a name which matches an object in one version but none in another is reported:
+#
+#   python objectsnapshots.py check [DIRECTORY]     # Returns 1 if any name broke
+#   python objectsnapshots.py show FILE             # Prints the tree of a snapshot
+#
+# DIRECTORY defaults to Tests/system/snapshots, which test_objectsnapshots.py checks as well.
+
+import fnmatch
+import functools
+import glob
+import gzip
+import json
+import os
+import re
+import sys
+
+import flakiness
+import objectmaps
+import vsinstances
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_DIR = os.path.join(objectmaps.SYSTEM_DIR, "snapshots")
+# Functions of Squish's squish module whose found objects are recorded
+RECORDED_FUNCTIONS = ["waitForObject", "waitForObjectExists"]
+# Properties matched against other objects instead of their own values
+RELATIONS = ("container", "window", "leftObject")
+
+_enabled = bool(os.getenv("SQUISH_VSTOOLS_SNAPSHOTS"))
+_snapshots = []
+_testCase = None
+
+
+def isEnabled():
+    return _enabled
+
+
+def enable(directory):
+    global _enabled
+    os.environ["SQUISH_VSTOOLS_SNAPSHOTS"] = directory
+    _enabled = True
+
+
+def _isReference(value):
+    return isinstance(value, (tuple, list)) and len(value) == 2 and value[0] == "ref"
+
+
+def _checkValue(name, key, value):
+    if isinstance(value, dict) and set(value) - set(objectmaps.MATCHERS.values()):
+        raise ValueError("%s.%s cannot be evaluated offline: %s" % (name, key, value))
+    return value
+
+
+# The real name of an object of the index of objectmaps.py, with the objects it refers to nested
+def realName(objects, name, seen=()):
+    if name not in objects or name in seen:
+        raise ValueError("%s is not defined" % name)
+    entry = objects[name]
+    result = {}
+    for key, value in entry["properties"].items():
+        if _isReference(value):
+            result[key] = realName(objects, value[1], seen + (name,))
+        elif key in ("missing", "expression"):
+            raise ValueError("%s cannot be evaluated offline" % name)
+        else:
+            result[key] = _checkValue(name, key, value)
+    if entry["container"] is not None:
+        result["container"] = realName(objects, entry["container"], seen + (name,))
+    return result
+
+
+# A real name as passed to Squish, with matchers stored like in the index of objectmaps.py
+def normalize(value):
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    kind = objectmaps.MATCHERS.get(type(value).__name__)
+    if kind is None or not hasattr(value, "pattern"):
+        raise ValueError("%r cannot be matched offline" % (value,))
+    return {kind: value.pattern}
+
+
+def _matchesValue(expected, value):
+    if isinstance(expected, dict):
+        if "wildcard" in expected:
+            return fnmatch.fnmatchcase(str(value), expected["wildcard"])
+        return re.search(expected["regex"], str(value)) is not None
+    return str(value) == str(expected)
+
+
+def _jsonValue(value):
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
+
+
+class Snapshot:
+    # objects holds [parent, type, properties, leftObject] per object, parents before their
+    # children and siblings in the order of the tree. expected maps names to the objects they
+    # matched when the snapshot was recorded.
+
+    def __init__(self, objects, version="", testCase="", expected=None, path=None):
+        self.objects = objects
+        self.version = version
+        self.testCase = testCase
+        self.expected = dict(expected or {})
+        self.path = path
+        self._found = {}
+
+    @staticmethod
+    def load(path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError("%s has an unknown format" % path)
+        return Snapshot(data["objects"], data["version"], data["testCase"], data["expected"],
+                        path)
+
+    def save(self, path):
+        data = {"format": SNAPSHOT_FORMAT, "version": self.version, "testCase": self.testCase,
+                "expected": self.expected, "objects": self.objects}
+
+        def write(f):
+            with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as compressed:
+                compressed.write(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        vsinstances.replaceFile(path, write, "wb")
+        self.path = path
+
+    def isDescendant(self, index, ancestor):
+        parent = self.objects[index][0]
+        while parent is not None:
+            if parent == ancestor:
+                return True
+            parent = self.objects[parent][0]
+        return False
+
+    def _matches(self, index, realName, container, leftObject):
+        _, objectType, properties, left = self.objects[index]
+        for key, expected in realName.items():
+            if key in RELATIONS or key == "occurrence":
+                continue
+            value = objectType if key == "type" else properties.get(key)
+            if value is None or not _matchesValue(expected, value):
+                return False
+        if container is not None and not self.isDescendant(index, container):
+            return False
+        return leftObject is None or left == leftObject
+
+    def findAll(self, realName):
+        container = realName.get("container", realName.get("window"))
+        if container is not None:
+            container = self.find(container)
+            if container is None:
+                return []
+        leftObject = None
+        if "leftObject" in realName:
+            leftObject = self.find(realName["leftObject"])
+            if leftObject is None:
+                return []
+        return [index for index in range(len(self.objects))
+                if self._matches(index, realName, container, leftObject)]
+
+    # The index of the object Squish would find by the real name, or None
+    def find(self, realName):
+        key = json.dumps(realName, sort_keys=True)
+        if key not in self._found:
+            found = self.findAll(realName)
+            occurrence = int(realName.get("occurrence", 1))
+            self._found[key] = found[occurrence - 1] if 0 < occurrence <= len(found) else None
+        return self._found[key]
+
+    # Remembers which names of the index match an object of the snapshot
+    def expect(self, objects):
+        self.expected = {}
+        for name, entry in objects.items():
+            if entry["aliasOf"] is not None:
+                continue
+            try:
+                found = self.find(realName(objects, name))
+            except ValueError:
+                continue
+            if found is not None:
+                self.expected[name] = found
+
+    # The index of the object matched by a name of the index, None if the name can't be evaluated
+    def findName(self, objects, name):
+        try:
+            return self.find(realName(objects, name))
+        except ValueError:
+            return None
+
+    def check(self, objects):
+        problems = []
+        for name, recorded in sorted(self.expected.items()):
+            if name not in objects:
+                continue  # Removed from the maps, scripts using it fail in objectmaps.py
+            try:
+                found = self.find(realName(objects, name))
+            except ValueError as e:
+                problems.append({"kind": "unresolved", "name": name, "message": str(e)})
+                continue
+            if found is None:
+                problems.append({"kind": "missing", "name": name,
+                                 "message": "%s doesn't match any object" % name})
+            elif found != recorded:
+                problems.append({"kind": "moved", "name": name,
+                                 "message": "%s matches %s instead of %s"
+                                 % (name, self.describe(found), self.describe(recorded))})
+        for problem in problems:
+            problem.update(version=self.version, snapshot=self.path)
+        return problems
+
+    def describe(self, index):
+        _, objectType, properties, _ = self.objects[index]
+        text = properties.get("text")
+        return "%s '%s'" % (objectType, text) if text is not None else objectType
+
+    def format(self):
+        lines = []
+        depths = []
+        for index, (parent, _, properties, left) in enumerate(self.objects):
+            depths.append(0 if parent is None else depths[parent] + 1)
+            details = ", ".join("%s=%r" % item for item in sorted(properties.items())
+                                if item[0] != "text")
+            if left is not None:
+                details += "%sleftObject=%d" % (", " if details else "", left)
+            lines.append("%s%d %s%s" % ("  " * depths[index], index, self.describe(index),
+                                        " (%s)" % details if details else ""))
+        return "\n".join(lines)
+
+
+# The types and properties the object maps look for. Objects of other types are left out of the
+# snapshots, unless a name doesn't give a type.
+def recordedProperties(objects):
+    types = set()
+    keys = set()
+    for entry in objects.values():
+        if "type" not in entry["properties"]:
+            types = None
+        elif types is not None:
+            types.add(entry["properties"]["type"])
+        keys.update(key for key in entry["properties"]
+                    if key not in RELATIONS and key not in ("type", "occurrence"))
+    return types, sorted(keys)
+
+
+def _bounds(api, obj):
+    try:
+        bounds = api.globalBounds(obj)
+        return (bounds.x, bounds.y, bounds.x + bounds.width, bounds.y + bounds.height)
+    except (AttributeError, LookupError, RuntimeError):
+        return None
+
+
+# Squish's leftObject is the nearest object to the left of an object on the same line
+def _leftObjectByBounds(bounds, index):
+    left, top, _, bottom = bounds[index]
+    found = None
+    for other, candidate in enumerate(bounds):
+        if (candidate is not None and other != index and candidate[2] <= left
+                and candidate[1] < bottom and top < candidate[3]
+                and (found is None or candidate[2] > bounds[found][2])):
+            found = other
+    return found
+
+
+def record(root, objects, version="", testCase="", squishModule=None):
+    if squishModule is None:
+        import squish as squishModule
+    api = squishModule.object
+    types, keys = recordedProperties(objects)
+    nodes = []
+    recorded = []
+    indices = {}
+    stack = [(root, None)]
+    while stack:
+        obj, parent = stack.pop()
+        properties = api.properties(obj)
+        objectType = properties.get("type", getattr(obj, "type", None))
+        if obj is root or types is None or objectType in types:
+            indices[id(obj)] = len(nodes)
+            nodes.append([parent, _jsonValue(objectType),
+                          {key: _jsonValue(properties[key]) for key in keys
+                           if properties.get(key) is not None}, None])
+            recorded.append(obj)
+            parent = len(nodes) - 1
+        stack.extend((child, parent) for child in reversed(list(api.children(obj))))
+
+    bounds = [_bounds(api, obj) for obj in recorded]
+    for index, obj in enumerate(recorded):
+        # The offline simulation links objects to their leftObject explicitly
+        leftObject = getattr(obj, "leftObject", None)
+        if leftObject is not None and id(leftObject) in indices:
+            nodes[index][3] = indices[id(leftObject)]
+        elif bounds[index] is not None:
+            nodes[index][3] = _leftObjectByBounds(bounds, index)
+    snapshot = Snapshot(nodes, version, testCase)
+    snapshot.expect(objects)
+    return snapshot
+
+
+def _recordWindowOf(found, objectOrName, version, squishModule):
+    global _testCase
+    testCase = flakiness.currentTestCase()
+    if testCase != _testCase:
+        _testCase = testCase
+        del _snapshots[:]
+    try:
+        name = normalize(objectOrName)
+    except ValueError:
+        return  # A real name containing objects found before, e.g. by objectmaps.containers()
+    if any(snapshot.find(name) is not None for snapshot in _snapshots):
+        return
+    root = found
+    while squishModule.object.parent(root) is not None:
+        root = squishModule.object.parent(root)
+    snapshot = record(root, objectmaps.index().objects, version(), testCase, squishModule)
+    fileName = "%s_%d.json.gz" % (testCase.replace("/", "_"), len(_snapshots) + 1)
+    snapshot.save(os.path.join(os.environ["SQUISH_VSTOOLS_SNAPSHOTS"], snapshot.version,
+                               fileName))
+    _snapshots.append(snapshot)
+
+
+def _recording(function, version, squishModule):
+    @functools.wraps(function)
+    def wrapper(objectOrName, *args, **kwargs):
+        found = function(objectOrName, *args, **kwargs)
+        if isinstance(objectOrName, dict):
+            try:
+                _recordWindowOf(found, objectOrName, version, squishModule)
+            except (OSError, LookupError, RuntimeError) as e:
+                import test
+                test.warning("Could not record a snapshot of the object tree.", str(e))
+        return found
+    return wrapper
+
+
+# Wraps the functions of the squish module finding objects, and their names in the namespace of a
+# test script. version() returns the version of Visual Studio the snapshots are stored for.
+def install(squishModule, namespace=None, version=lambda: "unknown"):
+    if not _enabled:
+        return
+    # The originals are kept in the squish module, which may outlive this module
+    originals = getattr(squishModule, "_snapshotOriginals", None)
+    if originals is None:
+        originals = {}
+        setattr(squishModule, "_snapshotOriginals", originals)
+    for name in RECORDED_FUNCTIONS:
+        if name in originals or hasattr(squishModule, name):
+            function = originals.setdefault(name, getattr(squishModule, name))
+            recording = _recording(function, version, squishModule)
+            setattr(squishModule, name, recording)
+            if namespace is not None and name in namespace:
+                namespace[name] = recording
+
+
+# Snapshots by version of Visual Studio, from the subdirectories of directory
+def loadSnapshots(directory=SNAPSHOT_DIR):
+    snapshots = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*", "*.json.gz"))):
+        snapshot = Snapshot.load(path)
+        snapshots.setdefault(snapshot.version, []).append(snapshot)
+    return snapshots
+
+
+# Snapshots of the same window of a test case in several versions, the n-th snapshot of a test
+# case being recorded for the n-th window it used
+def _windows(snapshots):
+    windows = {}
+    for versionSnapshots in snapshots.values():
+        counts = {}
+        for snapshot in versionSnapshots:
+            counts[snapshot.testCase] = counts.get(snapshot.testCase, 0) + 1
+            windows.setdefault((snapshot.testCase, counts[snapshot.testCase]), []).append(snapshot)
+    return [windowSnapshots for _, windowSnapshots in sorted(windows.items())
+            if len(windowSnapshots) > 1]
+
+
+# Reports the names of the maps which match an object in the snapshot of a window in one version,
+# but none in the snapshot of the window in another version
+def checkVersions(snapshots, objects):
+    problems = []
+    names = sorted(name for name, entry in objects.items() if entry["aliasOf"] is None)
+    for windowSnapshots in _windows(snapshots):
+        for name in names:
+            found = [(snapshot, snapshot.findName(objects, name)) for snapshot in windowSnapshots]
+            matching = [(snapshot, index) for snapshot, index in found if index is not None]
+            if not matching:
+                continue
+            other, otherIndex = matching[0]
+            for snapshot, index in found:
+                # Names matched when recording are checked by Snapshot.check()
+                if index is None and name not in snapshot.expected:
+                    problems.append({"kind": "version", "name": name, "version": snapshot.version,
+                                     "snapshot": snapshot.path,
+                                     "message": "%s matches %s in %s, but no object in %s"
+                                     % (name, other.describe(otherIndex), other.version,
+                                        snapshot.version)})
+    return problems
+
+
+def checkSnapshots(snapshots, objects):
+    return ([problem for versionSnapshots in snapshots.values()
+             for snapshot in versionSnapshots for problem in snapshot.check(objects)]
+            + checkVersions(snapshots, objects))
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the object maps against snapshots of "
+                                                 "the object tree of devenv.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    checkParser = commands.add_parser("check", help="match the object maps to the snapshots")
+    checkParser.add_argument("directory", nargs="?", default=SNAPSHOT_DIR,
+                             help="directory set as SQUISH_VSTOOLS_SNAPSHOTS")
+    showParser = commands.add_parser("show", help="print the tree of a snapshot")
+    showParser.add_argument("file")
+    args = parser.parse_args(argv)
+    if args.command == "show":
+        snapshot = Snapshot.load(args.file)
+        print("%s, Visual Studio %s" % (snapshot.testCase, snapshot.version))
+        print(snapshot.format())
+        return 0
+    objects = objectmaps.index().objects
+    snapshots = loadSnapshots(args.directory)
+    problems = checkSnapshots(snapshots, objects)
+    for problem in problems:
+        print("%s: %s: %s (%s)" % (problem["version"], problem["kind"], problem["message"],
+                                   os.path.basename(problem["snapshot"])))
+    for version, versionSnapshots in sorted(snapshots.items()):
+        covered = set().union(*(snapshot.expected for snapshot in versionSnapshots))
+        print("Visual Studio %s: %d snapshots cover %d of %d object names"
+              % (version, len(versionSnapshots), len(covered),
+                 sum(1 for entry in objects.values() if entry["aliasOf"] is None)))
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,205 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Records nested wall-clock spans of test sections and shared helpers. Profiling is enabled by
+# setting SQUISH_VSTOOLS_PROFILE to a directory. Each run of a test case writes a trace file in
+# Chrome's trace event format there, which can be opened in chrome://tracing,
+# https://ui.perfetto.dev or https://www.speedscope.app. The file is rewritten whenever a top-level
+# span ends, so it is complete even if the run is aborted later. Without SQUISH_VSTOOLS_PROFILE,
+# spans do nothing.
+#
+#   python profiler.py summary TRACE [TRACE ...] [--top N]   # Spans taking most time in total
+#   python profiler.py merge OUTPUT TRACE [TRACE ...]        # One trace from several runs
+#
+# This module doesn't depend on Squish.
+
+import functools
+import json
+import os
+import sys
+import time
+
+_enabled = bool(os.getenv("SQUISH_VSTOOLS_PROFILE"))
+_events = []
+_stack = []
+_traceFile = None
+_clock = time.perf_counter
+_origin = _clock()
+
+
+def isEnabled():
+    return _enabled
+
+
+def enable(directory, clock=None):
+    global _enabled, _traceFile, _clock, _origin
+    os.environ["SQUISH_VSTOOLS_PROFILE"] = directory
+    _enabled = True
+    _traceFile = None
+    if clock is not None:
+        _clock = clock
+    _origin = _clock()
+    del _events[:]
+    del _stack[:]
+
+
+def traceFile():
+    global _traceFile
+    if _traceFile is None:
+        directory = os.environ["SQUISH_VSTOOLS_PROFILE"]
+        os.makedirs(directory, exist_ok=True)
+        _traceFile = os.path.join(directory, "profile_%s_%s_%d.json"
+                                  % (os.path.basename(os.getcwd()),
+                                     time.strftime("%Y%m%d-%H%M%S"), os.getpid()))
+    return _traceFile
+
+
+def _microseconds(seconds):
+    return round(seconds * 1000000)
+
+
+def begin(name, category="section"):
+    if _enabled:
+        # name, category, start, time spent in children
+        _stack.append([name, category, _clock() - _origin, 0.0])
+
+
+def end():
+    if not _enabled or not _stack:
+        return
+    name, category, start, childTime = _stack.pop()
+    duration = _clock() - _origin - start
+    if _stack:
+        _stack[-1][3] += duration
+    _events.append({"name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": 1,
+                    "ts": _microseconds(start), "dur": _microseconds(duration),
+                    "args": {"self": _microseconds(duration - childTime)}})
+    if not _stack:
+        write()
+
+
+class _Span:
+
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        begin(self.name, self.category)
+        return self
+
+    def __exit__(self, _, __, ___):
+        end()
+
+
+class _NoSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _, __, ___):
+        pass
+
+
+_noSpan = _NoSpan()
+
+
+def span(name, category="section"):
+    return _Span(name, category) if _enabled else _noSpan
+
+
+# Decorator recording a span for each call of a function
+def profiled(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return function(*args, **kwargs)
+        begin(function.__name__, "helper")
+        try:
+            return function(*args, **kwargs)
+        finally:
+            end()
+    return wrapper
+
+
+def events():
+    return list(_events)
+
+
+def write(fileName=None):
+    fileName = fileName or traceFile()
+    metadata = {"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 1,
+                "args": {"name": os.path.basename(os.getcwd())}}
+    temporary = fileName + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": [metadata] + _events, "displayTimeUnit": "ms"}, f)
+    os.replace(temporary, fileName)
+
+
+def readTrace(fileName):
+    with open(fileName, encoding="utf-8") as f:
+        trace = json.load(f)
+    return trace["traceEvents"] if isinstance(trace, dict) else trace
+
+
+# Events of several traces, each trace shown as a process of its own
+def merge(fileNames):
+    merged = []
+    for index, fileName in enumerate(fileNames):
+        merged.extend(dict(event, pid=index + 1) for event in readTrace(fileName))
+    return merged
+
+
+# Total and self time per span name in seconds, largest total first
+def summarize(events):
+    summary = {}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        entry = summary.setdefault(event["name"], {"name": event["name"],
+                                                   "category": event.get("cat", ""),
+                                                   "count": 0, "total": 0.0, "self": 0.0,
+                                                   "max": 0.0})
+        duration = event["dur"] / 1000000.0
+        entry["count"] += 1
+        entry["total"] += duration
+        entry["self"] += event.get("args", {}).get("self", event["dur"]) / 1000000.0
+        entry["max"] = max(entry["max"], duration)
+    return sorted(summary.values(), key=lambda entry: entry["total"], reverse=True)
+
+
+def formatSummary(summary, top=20):
+    lines = ["%10s %10s %10s %6s  %s" % ("total [s]", "self [s]", "max [s]", "count", "span")]
+    for entry in summary[:top]:
+        lines.append("%10.1f %10.1f %10.1f %6d  %s" % (entry["total"], entry["self"],
+                                                       entry["max"], entry["count"],
+                                                       entry["name"]))
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Evaluate traces written by the system tests.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summaryParser = commands.add_parser("summary", help="list the spans taking most time")
+    summaryParser.add_argument("traces", nargs="+")
+    summaryParser.add_argument("--top", type=int, default=20, help="number of spans to list")
+    mergeParser = commands.add_parser("merge", help="merge traces into one file")
+    mergeParser.add_argument("output")
+    mergeParser.add_argument("traces", nargs="+")
+    args = parser.parse_args(argv)
+    if args.command == "summary":
+        events = [event for fileName in args.traces for event in readTrace(fileName)]
+        print(formatSummary(summarize(events), args.top))
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": merge(args.traces), "displayTimeUnit": "ms"}, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,289 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Properties of Qt installations as reported by "qtpaths --query" or "qmake -query". Like
+# QtBuildToolQuery in QtVsTools.Core, qtpaths is used if it is at least version 2.0, qmake
+# otherwise, and both are looked for in the Qt directory itself and in its "bin" directory. Qt
+# directories are probed in parallel. The properties are cached in memory and on disk together
+# with the path and modification time of the tool they were queried from, so later lookups only
+# check the modification time and updating Qt invalidates the cache. The cache file is stored in
+# SQUISH_VSTOOLS_CACHE_DIR. This module doesn't depend on Squish.
+#
+# The cache can also be kept by a daemon, so that test cases running one after the other don't
+# query the tools again. If SQUISH_VSTOOLS_QT_CACHE_PORT is set, probe() asks the daemon listening
+# on that port of localhost, and probes itself if it cannot be reached.
+#
+#   python qtinstallations.py probe QTDIR [QTDIR ...] [--json]
+#   python qtinstallations.py serve [--port PORT]
+
+import concurrent.futures
+import json
+import os
+import re
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+
+import vsinstances
+
+CACHE_FORMAT = 1
+DEFAULT_PORT = 4445
+TOOLS = ["qtpaths", "qmake"]
+TOOL_EXTENSIONS = [".exe", ".bat", ""]
+# Like MSVS' Qt Versions page
+NOT_FOUND = 'Cannot find qtpaths or qmake in "%s"'
+NOT_QUERIED = 'Cannot query qtpaths or qmake in "%s"'
+
+_PROPERTY = re.compile(r"^([^:\r\n]+):(.*)$", re.MULTILINE)
+_QTPATHS_VERSION = re.compile(r"^\S+\s+(\d+)\.\d+")
+
+
+def normalizePath(path):
+    return vsinstances.normalizePath(path)
+
+
+def _modificationTime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _toolName(path):
+    return os.path.splitext(os.path.basename(path))[0].lower()
+
+
+# Returns the paths of qtpaths and qmake in a Qt directory, in the order in which they are tried.
+# The directory may also be the path of one of the tools.
+def findQueryTools(qtDir):
+    if os.path.isfile(qtDir) and _toolName(qtDir) in TOOLS:
+        return [qtDir]
+    found = []
+    for tool in TOOLS:
+        for directory in [qtDir, os.path.join(qtDir, "bin")]:
+            for extension in TOOL_EXTENSIONS:
+                path = os.path.join(directory, tool + extension)
+                if os.path.isfile(path):
+                    found.append(path)
+    return found
+
+
+# Returns the output of the query of a tool, or None if it cannot answer queries
+def runQuery(tool):
+    if _toolName(tool) == "qtpaths":
+        version = subprocess.run([tool, "-v"], stdout=subprocess.PIPE,
+                                 stderr=subprocess.DEVNULL, timeout=60)
+        match = _QTPATHS_VERSION.match(version.stdout.decode("utf-8", "replace").strip())
+        # qtpaths before 2.0 does not support queries
+        if version.returncode != 0 or not match or int(match.group(1)) < 2:
+            return None
+        arguments = ["--query"]
+    else:
+        arguments = ["-query"]
+    completed = subprocess.run([tool] + arguments, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, timeout=60)
+    if completed.returncode != 0:
+        return None
+    return completed.stdout.decode("utf-8", "replace")
+
+
+# Returns the properties in the output of a query, e.g. "QT_VERSION:6.7.2"
+def parseQuery(output):
+    return {name: value.rstrip("\r") for name, value in _PROPERTY.findall(output or "")}
+
+
+class Registry:
+    # locate(qtDir) returns the paths of the tools to query, query(tool) the output of a query.
+    # Both can be replaced, e.g. to answer for simulated Qt installations.
+
+    def __init__(self, cacheFile=None, locate=findQueryTools, query=runQuery, workers=None):
+        self.cacheFile = cacheFile or os.path.join(vsinstances.cacheDir(), "qt_installations.json")
+        self.locate = locate
+        self.query = query
+        self.workers = workers
+        self.queries = 0
+        self._tools = None
+        self._qtDirs = {}
+        self._lock = threading.Lock()
+
+    def _readCache(self):
+        tools = vsinstances.loadCache(self.cacheFile, CACHE_FORMAT)
+        return tools if isinstance(tools, dict) else {}
+
+    def _writeCache(self):
+        vsinstances.saveCache(self.cacheFile, CACHE_FORMAT, self._tools)
+
+    # Returns the cache entry of a tool if the tool is unchanged
+    def _cached(self, tool):
+        entry = self._tools.get(normalizePath(tool))
+        if entry is not None and entry["mtime"] == _modificationTime(tool):
+            return entry
+        return None
+
+    # Runs in a worker thread, so it only reads the cache. Returns the tool answering the query
+    # and the new cache entries.
+    def _probe(self, qtDir):
+        entries = []
+        tools = self.locate(qtDir)
+        for tool in tools:
+            entry = self._cached(tool)
+            if entry is None:
+                mtime = _modificationTime(tool)
+                try:
+                    output = self.query(tool)
+                except (OSError, subprocess.SubprocessError):
+                    output = None
+                entry = {"mtime": mtime, "properties": parseQuery(output) or None}
+                entries.append((tool, entry))
+            if entry["properties"]:
+                return tool, entries
+        return (None if tools else False), entries
+
+    def _result(self, qtDir, tool):
+        if tool is None:
+            return NOT_QUERIED % qtDir
+        if tool is False:
+            return NOT_FOUND % qtDir
+        return {"qtDir": qtDir, "tool": tool,
+                "properties": self._tools[normalizePath(tool)]["properties"]}
+
+    # Returns for each Qt directory the tool queried and its properties, or a problem
+    def probe(self, qtDirs):
+        with self._lock:
+            if self._tools is None:
+                self._tools = self._readCache()
+            results = {}
+            pending = []
+            for qtDir in qtDirs:
+                tool = self._qtDirs.get(normalizePath(qtDir))
+                if tool and self._cached(tool):
+                    results[qtDir] = self._result(qtDir, tool)
+                else:
+                    pending.append(qtDir)
+            if pending:
+                workers = self.workers or min(32, len(pending))
+                with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                    probed = list(executor.map(self._probe, pending))
+                for qtDir, (tool, entries) in zip(pending, probed):
+                    for path, entry in entries:
+                        self._tools[normalizePath(path)] = entry
+                    self.queries += len(entries)
+                    self._qtDirs[normalizePath(qtDir)] = tool
+                    results[qtDir] = self._result(qtDir, tool)
+                if any(entries for _, entries in probed):
+                    self._writeCache()
+            return {qtDir: results[qtDir] for qtDir in qtDirs}
+
+    def properties(self, qtDir):
+        result = self.probe([qtDir])[qtDir]
+        if isinstance(result, str):
+            raise LookupError(result)
+        return result["properties"]
+
+    def property(self, qtDir, name):
+        return self.properties(qtDir).get(name)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    # Answers lines like {"qtDirs": [...]} with lines like {"results": {...}}
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                results = self.server.registry.probe(json.loads(line.decode("utf-8"))["qtDirs"])
+                response = {"results": results}
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, registry, port=DEFAULT_PORT):
+        self.registry = registry
+        super().__init__(("127.0.0.1", port), _RequestHandler)
+
+
+def queryServer(port, qtDirs, timeout=60):
+    with socket.create_connection(("127.0.0.1", port), timeout=timeout) as connection:
+        connection.sendall(json.dumps({"qtDirs": list(qtDirs)}).encode("utf-8") + b"\n")
+        with connection.makefile("rb") as f:
+            response = json.loads(f.readline().decode("utf-8"))
+    if "error" in response:
+        raise ValueError(response["error"])
+    return response["results"]
+
+
+_registry = None
+
+
+def registry():
+    global _registry
+    if _registry is None:
+        _registry = Registry()
+    return _registry
+
+
+def setRegistry(newRegistry):
+    global _registry
+    _registry = newRegistry
+
+
+def probe(qtDirs):
+    port = os.getenv("SQUISH_VSTOOLS_QT_CACHE_PORT")
+    if port:
+        try:
+            return queryServer(int(port), qtDirs)
+        except (OSError, ValueError):
+            pass  # Without the daemon, the tools are queried here
+    return registry().probe(qtDirs)
+
+
+# Returns the problems of the given Qt directories, e.g. to check them before starting devenv
+def problems(qtDirs):
+    return [result for result in probe(qtDirs).values() if isinstance(result, str)]
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Query and cache the properties of Qt "
+                                                 "installations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    probeParser = commands.add_parser("probe", help="print the properties of Qt installations")
+    probeParser.add_argument("qtDirs", nargs="+", metavar="QTDIR")
+    probeParser.add_argument("--json", action="store_true", help="print all properties as JSON")
+    serveParser = commands.add_parser("serve", help="keep the cache in a daemon")
+    serveParser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        with Server(registry(), args.port) as server:
+            print("Listening on port %d" % server.server_address[1])
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return 0
+    results = probe(args.qtDirs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for qtDir, result in results.items():
+            if isinstance(result, str):
+                print("error: %s" % result)
+            else:
+                print("%s: Qt %s (%s)" % (qtDir, result["properties"].get("QT_VERSION", "?"),
+                                          result["tool"]))
+    return 1 if any(isinstance(result, str) for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
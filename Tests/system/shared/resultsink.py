@@ -0,0 +1,280 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Streams the results of test.compare(), test.verify(), test.fail() and the other verifications,
+# and the test sections they are in, to a file while a test case runs. Enabled by setting
+# SQUISH_VSTOOLS_RESULTS to a directory. Each run of a test case appends JSON lines to
+# results_<test case>_<time>_<pid>.jsonl there, one per result with its section path, time and
+# the seconds since the previous result, and writes a JUnit XML file next to it when it ends. Lines
+# are buffered and written and synced to disk in batches, at the latest after BATCH_SECONDS or
+# when a test section or the test case ends, and right away for errors. A crashed run still leaves
+# the lines written so far, which the "junit" command turns into a report.
+#
+#   python resultsink.py junit OUTPUT.xml RESULTS.jsonl [RESULTS.jsonl ...]
+#
+# This module doesn't depend on Squish.
+
+import atexit
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+
+BATCH_SIZE = 100
+BATCH_SECONDS = 2.0
+# Results written without waiting for a batch
+URGENT_KINDS = {"FATAL", "ERROR"}
+FAILURE_KINDS = {"FAIL", "XPASS"}
+ERROR_KINDS = {"FATAL", "ERROR"}
+# Functions of Squish's test module which report results: the kinds of result if they return True
+# and False, or one kind if they don't verify anything, and the position of the message argument
+VERIFICATIONS = {"compare": ("PASS", "FAIL", 2), "verify": ("PASS", "FAIL", 1),
+                 "xcompare": ("XPASS", "XFAIL", 2), "xverify": ("XPASS", "XFAIL", 1),
+                 "exception": ("PASS", "FAIL", 1), "vp": ("PASS", "FAIL", 0),
+                 "passes": ("PASS", None, 0), "fail": ("FAIL", None, 0),
+                 "fatal": ("FATAL", None, 0), "warning": ("WARNING", None, 0),
+                 "error": ("ERROR", None, 0)}
+# Messages of verifications without one
+DEFAULT_MESSAGES = {"compare": "Comparison", "xcompare": "Comparison", "verify": "Verification",
+                    "xverify": "Verification", "exception": "Exception"}
+
+_enabled = bool(os.getenv("SQUISH_VSTOOLS_RESULTS"))
+_clock = time.perf_counter
+_sink = None
+
+
+def isEnabled():
+    return _enabled
+
+
+def enable(directory, clock=None):
+    global _enabled, _clock
+    os.environ["SQUISH_VSTOOLS_RESULTS"] = directory
+    _enabled = True
+    if clock is not None:
+        _clock = clock
+
+
+def resultsFile(testCase):
+    directory = os.environ["SQUISH_VSTOOLS_RESULTS"]
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, "results_%s_%s_%d.jsonl"
+                        % (testCase.replace("/", "_"), time.strftime("%Y%m%d-%H%M%S"),
+                           os.getpid()))
+
+
+class Sink:
+
+    def __init__(self, fileName, testCase, clock=None, batchSize=BATCH_SIZE,
+                 batchSeconds=BATCH_SECONDS):
+        self.fileName = fileName
+        self.testCase = testCase
+        self.clock = clock or time.perf_counter
+        self.batchSize = batchSize
+        self.batchSeconds = batchSeconds
+        self.file = open(fileName, "a", encoding="utf-8")
+        self.pending = []
+        self.sections = []
+        self.started = self.lastResult = self.lastFlush = self.clock()
+        self.counts = {}
+        self._write({"type": "start", "testCase": testCase})
+        self.flush()
+
+    def _write(self, record, urgent=False):
+        record["time"] = round(time.time(), 3)
+        self.pending.append(json.dumps(record) + "\n")
+        if (urgent or len(self.pending) >= self.batchSize
+                or self.clock() - self.lastFlush >= self.batchSeconds):
+            self.flush()
+
+    def flush(self):
+        if self.pending and not self.file.closed:
+            self.file.write("".join(self.pending))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            del self.pending[:]
+        self.lastFlush = self.clock()
+
+    def result(self, kind, message, detail=""):
+        now = self.clock()
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        self._write({"type": "result", "kind": kind, "message": str(message),
+                     "detail": str(detail), "section": list(title for title, _ in self.sections),
+                     "duration": now - self.lastResult}, kind in URGENT_KINDS)
+        self.lastResult = now
+
+    def startSection(self, title):
+        self.sections.append((str(title), self.clock()))
+
+    def endSection(self):
+        if not self.sections:
+            return
+        path = [title for title, _ in self.sections]
+        _, started = self.sections.pop()
+        self._write({"type": "section", "section": path, "duration": self.clock() - started})
+        self.flush()
+
+    # Writes the remaining lines and the JUnit report
+    def finish(self):
+        if self.file.closed:
+            return
+        self._write({"type": "end", "counts": self.counts,
+                     "duration": self.clock() - self.started})
+        self.flush()
+        self.file.close()
+        writeJUnit(os.path.splitext(self.fileName)[0] + ".xml", [self.fileName])
+
+
+def _argument(args, kwargs, index, name):
+    return args[index] if len(args) > index else kwargs.get(name, "")
+
+
+def _wrap(name, function, testModule):
+    passKind, failKind, messageIndex = VERIFICATIONS[name]
+
+    def wrapper(*args, **kwargs):
+        # Squish reports the result at the caller, not in this wrapper
+        testModule.fixateResultContext(1)
+        try:
+            outcome = function(*args, **kwargs)
+        finally:
+            testModule.restoreResultContext()
+        if _sink is not None:
+            if failKind is None:
+                kind, detail = passKind, _argument(args, kwargs, 1, "detail")
+            else:
+                kind, detail = passKind if outcome else failKind, ""
+                if name in ("compare", "xcompare") and len(args) > 1:
+                    detail = "'%s' and '%s'" % (args[0], args[1])
+            message = _argument(args, kwargs, messageIndex, "message")
+            _sink.result(kind, message or DEFAULT_MESSAGES.get(name, name), detail)
+        return outcome
+    wrapper.__name__ = name
+    return wrapper
+
+
+def _wrapSection(name, function, testModule):
+    def wrapper(*args, **kwargs):
+        if _sink is not None:
+            getattr(_sink, name)(*args[:1])
+        return function(*args, **kwargs)
+    wrapper.__name__ = name
+    return wrapper
+
+
+# Wraps the functions of the test module reporting results and starts streaming the results of a
+# test case. Installing for another test case finishes the previous one.
+def install(testModule, testCase=None):
+    global _sink
+    if not _enabled:
+        return
+    if testCase is None:
+        testCase = "%s/%s" % (os.path.basename(os.path.dirname(os.getcwd())),
+                              os.path.basename(os.getcwd()))
+    if _sink is not None and _sink.testCase == testCase:
+        return
+    finish()
+    # The originals are kept in the test module, which may outlive this module
+    originals = getattr(testModule, "_resultSinkOriginals", None)
+    if originals is None:
+        originals = {}
+        setattr(testModule, "_resultSinkOriginals", originals)
+    for name in list(VERIFICATIONS) + ["startSection", "endSection"]:
+        if name in originals or hasattr(testModule, name):
+            function = originals.setdefault(name, getattr(testModule, name))
+            wrap = _wrapSection if name.endswith("Section") else _wrap
+            setattr(testModule, name, wrap(name, function, testModule))
+    _sink = Sink(resultsFile(testCase), testCase, _clock)
+
+
+def finish():
+    global _sink
+    if _sink is not None:
+        _sink.finish()
+        _sink = None
+
+
+atexit.register(finish)
+
+
+def readResults(fileName):
+    records = []
+    with open(fileName, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break  # The last line of a crashed run may be incomplete
+    return records
+
+
+# Returns a <testsuite> element for the records of a run of a test case, with a <testcase> for
+# each result
+def junitSuite(records):
+    start = records[0] if records and records[0].get("type") == "start" else {}
+    testSuite = ElementTree.Element("testsuite", name=start.get("testCase", "unknown"))
+    if "time" in start:
+        testSuite.set("timestamp", time.strftime("%Y-%m-%dT%H:%M:%S",
+                                                 time.localtime(start["time"])))
+    counts = {"tests": 0, "failures": 0, "errors": 0}
+    total = 0.0
+    for record in records:
+        if record.get("type") != "result":
+            continue
+        counts["tests"] += 1
+        total += record["duration"]
+        testCase = ElementTree.SubElement(
+            testSuite, "testcase", classname=testSuite.get("name"),
+            name=" / ".join(record["section"] + [record["message"]]),
+            time="%.3f" % record["duration"])
+        if record["kind"] in FAILURE_KINDS or record["kind"] in ERROR_KINDS:
+            isError = record["kind"] in ERROR_KINDS
+            counts["errors" if isError else "failures"] += 1
+            failure = ElementTree.SubElement(testCase, "error" if isError else "failure",
+                                             message=record["message"], type=record["kind"])
+            failure.text = record["detail"]
+        elif record["kind"] not in ("PASS", "XFAIL"):
+            ElementTree.SubElement(testCase, "system-out").text = "%s: %s" % (
+                record["kind"], record["detail"] or record["message"])
+    end = records[-1] if records and records[-1].get("type") == "end" else None
+    if end is None:
+        counts["tests"] += 1
+        counts["errors"] += 1
+        testCase = ElementTree.SubElement(testSuite, "testcase",
+                                          classname=testSuite.get("name"), name="Test run")
+        ElementTree.SubElement(testCase, "error", message="The run did not finish",
+                               type="INCOMPLETE")
+    for name, count in counts.items():
+        testSuite.set(name, str(count))
+    testSuite.set("time", "%.3f" % (end["duration"] if end else total))
+    return testSuite
+
+
+def writeJUnit(output, fileNames):
+    testSuites = ElementTree.Element("testsuites")
+    for fileName in fileNames:
+        testSuites.append(junitSuite(readResults(fileName)))
+    temporary = output + ".tmp"
+    ElementTree.ElementTree(testSuites).write(temporary, encoding="utf-8", xml_declaration=True)
+    os.replace(temporary, output)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert results written by the system tests.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    junitParser = commands.add_parser("junit", help="write a JUnit report of results")
+    junitParser.add_argument("output")
+    junitParser.add_argument("results", nargs="+")
+    args = parser.parse_args(argv)
+    writeJUnit(args.output, args.results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,149 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Opt-in reuse of one devenv instance by all test cases of a suite. Set SQUISH_VSTOOLS_SESSION
+# to the name of an attachable AUT registered in the squishserver settings, e.g.
+#
+#   squishserver --config addAttachableAUT devenvSession localhost:4444
+#
+# and SQUISH_VSTOOLS_SESSION_PORT to its port (default: 4444). The first test case starts devenv
+# using Squish's "startaut", so it keeps running when the test case ends. Following test cases
+# attach to it and reset it to a known state: no dialogs, no open solution and the results of
+# all registered reset handlers, e.g. no Qt versions. If that fails, devenv is restarted.
+
+import os
+import subprocess
+
+import squish
+import test
+
+import globalnames
+import waiting
+
+DEFAULT_PORT = 4444
+
+# Functions called after attaching to restore suite specific settings, keyed by name so test
+# cases sourcing the same script don't add them twice
+resetHandlers = {}
+
+_attachedContext = None
+
+
+def autName():
+    return os.getenv("SQUISH_VSTOOLS_SESSION")
+
+
+def isEnabled():
+    return bool(autName())
+
+
+def port():
+    try:
+        return int(os.getenv("SQUISH_VSTOOLS_SESSION_PORT", DEFAULT_PORT))
+    except ValueError:
+        return DEFAULT_PORT
+
+
+def isAttached():
+    return (_attachedContext is not None
+            and squish.currentApplicationContext() is _attachedContext)
+
+
+def addResetHandler(handler):
+    resetHandlers[handler.__name__] = handler
+
+
+class StartAutLauncher:
+    # Starts devenv via Squish's "startaut" so Squish doesn't terminate it at the end of a test
+    # case. SQUISH_PREFIX is set by squishrunner.
+
+    def launch(self, name, arguments):
+        startaut = os.path.join(os.environ["SQUISH_PREFIX"], "bin", "startaut")
+        subprocess.Popen([startaut, "--port=%d" % port()] + arguments)
+
+    def terminate(self, context):
+        subprocess.call(["taskkill", "/F", "/T", "/PID", str(context.pid)])
+
+
+launcher = StartAutLauncher()
+
+
+def attach():
+    global _attachedContext
+    try:
+        _attachedContext = squish.attachToApplication(autName())
+    except RuntimeError:
+        _attachedContext = None
+    return _attachedContext is not None
+
+
+def _dismissWindows():
+    windows = [globalnames.qt_Wizard_Window, globalnames.options_Dialog,
+               globalnames.microsoft_Visual_Studio_Dialog, globalnames.workflowHostView,
+               globalnames.msvs_Account_Settings_Window]
+    for _ in range(5):
+        shown = [window for window in windows if squish.object.exists(window)]
+        if not shown:
+            return True
+        squish.nativeType("<Escape>")
+        waiting.waitFor(lambda: not squish.object.exists(shown[0]), 2000)
+    return False
+
+
+def _closeSolution():
+    squish.mouseClick(squish.waitForObject(globalnames.file_MenuItem))
+    squish.waitForObjectExists(globalnames.file_Close_Solution_MenuItem, 5000)
+    for item in (globalnames.file_Close_Solution_MenuItem,
+                 globalnames.file_Close_Folder_MenuItem):
+        if squish.object.exists(item) and squish.findObject(item).enabled:
+            squish.mouseClick(squish.findObject(item))
+            return
+    squish.mouseClick(squish.waitForObject(globalnames.file_MenuItem))  # close menu
+
+
+# Brings the attached devenv back to the state of a fresh start. Returns False if that failed.
+def restore():
+    try:
+        if not _dismissWindows():
+            test.log("Could not close the open dialogs of the devenv session.")
+            return False
+        _closeSolution()
+        # Closing a solution shows the start window
+        if not _dismissWindows():
+            test.log("Could not close the start window of the devenv session.")
+            return False
+        for handler in resetHandlers.values():
+            handler()
+    except Exception as e:
+        test.log("Could not reset the devenv session.", "%s: %s" % (e.__class__.__name__, e))
+        return False
+    return True
+
+
+# Terminates an attached devenv which couldn't be restored, starts a new one with the given
+# command line and attaches to it.
+def launch(arguments):
+    global _attachedContext
+    if _attachedContext is not None:
+        launcher.terminate(_attachedContext)
+        _attachedContext = None
+    launcher.launch(autName(), arguments)
+    if not waiting.waitUntil(attach, 60000, "devenv session attachable", interval=500):
+        raise RuntimeError("Could not attach to '%s' on port %d." % (autName(), port()))
+
+
+# Leaves the devenv running for the next test case. Closes the solution first, so the test
+# case's cleanup can remove the projects it created.
+def release():
+    global _attachedContext
+    try:
+        _dismissWindows()
+        _closeSolution()
+        _dismissWindows()
+    finally:
+        _attachedContext.detach()
+        _attachedContext = None
@@ -0,0 +1,255 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# What the Qt VS Tools' project templates in Templates/ create, so tests don't need to know it
+# per template. For each project template the index holds its display name, the default project
+# name, the files created with Qt/MSBuild and with CMake, the file opened in the editor and the
+# kind of binary built. The index is derived from the templates' .vstemplate files,
+# CMakeLists.txt and .qrc files and cached in SQUISH_VSTOOLS_CACHE_DIR, keyed by a hash of these
+# files. File names are stored with the templates' parameters (e.g. "$sourcefilename$") and are
+# resolved for a project name with the wizards' default values. This module doesn't depend on
+# Squish.
+#
+#   python templateindex.py [TEMPLATES_DIR]   # Prints the index
+
+import hashlib
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ElementTree
+
+import vsinstances
+
+CACHE_FORMAT = 1
+TEMPLATES_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                              os.pardir, os.pardir, os.pardir, "Templates"))
+NAMESPACE = {"vs": "http://schemas.microsoft.com/developer/vstemplate/2005"}
+
+MSBUILD = "msbuild"
+CMAKE = "cmake"
+
+# Created by the wizards or MSVS in addition to the template's items, relative to the solution
+# directory. The project directory is "$projectname$".
+SOLUTION_FILES = {MSBUILD: ["$projectname$.sln",
+                            "$projectname$/$projectname$.vcxproj.user"],
+                  CMAKE: ["CMakeLists.txt", "CMakePresets.json", "CMakeUserPresets.json"]}
+# Items only added to CMake projects, see ProjectTemplateWizard.IsCMakeFile()
+CMAKE_ITEMS = ["CMakeLists.txt", "CMakeUserPresets.json", "qt.cmake"]
+# Items moved from the project to the solution directory of CMake projects
+MOVED_CMAKE_ITEMS = ["CMakeUserPresets.json"]
+SOURCE_EXTENSIONS = (".c", ".cpp", ".cxx")
+
+
+# The values the wizards use for the templates' parameters unless changed on their pages
+def parameterValues(projectName):
+    return {"$projectname$": projectName,
+            "$safeprojectname$": projectName,
+            "$classname$": projectName,
+            "$sourcefilename$": projectName + ".cpp",
+            "$headerfilename$": projectName + ".h",
+            "$uifilename$": projectName + ".ui",
+            "$qrcfilename$": projectName + ".qrc",
+            "$pluginsourcefilename$": projectName + "Plugin.cpp",
+            "$pluginheaderfilename$": projectName + "Plugin.h",
+            "$plugin_json$": projectName.lower() + "plugin.json",
+            "$saveglobal$": projectName.lower(),
+            "$pro_name$": projectName,
+            "$cmake_static$": "SHARED"}
+
+
+def resolve(fileName, projectName):
+    values = parameterValues(projectName)
+    return re.sub(r"\$\w+\$", lambda match: values.get(match.group(0), match.group(0)),
+                  fileName)
+
+
+# A file name for checking its extension
+def _resolvedName(fileName):
+    return resolve(fileName, "Project")
+
+
+def _manifests(templatesDir):
+    manifests = []
+    for directory in sorted(os.listdir(templatesDir)):
+        path = os.path.join(templatesDir, directory)
+        if os.path.isdir(path):
+            manifests.extend(os.path.join(directory, fileName)
+                             for fileName in sorted(os.listdir(path))
+                             if fileName.endswith((".vstemplate", ".vstemplate_TT"))
+                             or fileName == "CMakeLists.txt" or fileName.endswith(".qrc"))
+    return manifests
+
+
+def contentHash(templatesDir):
+    digest = hashlib.sha256()
+    for manifest in _manifests(templatesDir):
+        digest.update(manifest.replace("\\", "/").encode("utf-8") + b"\0")
+        with open(os.path.join(templatesDir, manifest), "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _artifact(cmakeLists, items):
+    # The binary built by the project's first target, None if there is nothing to compile
+    if not any(_resolvedName(item).endswith(SOURCE_EXTENSIONS) for item in items):
+        return None
+    if cmakeLists is None:
+        # ActiveQt servers are DLLs exporting the functions listed in a module definition file
+        return "dll" if any(_resolvedName(item).endswith(".def") for item in items) else "exe"
+    target = re.search(r"\b(qt_add_executable|add_executable|qt_add_library|add_library)"
+                       r"\s*\(\s*\S+\s*(\S*)", cmakeLists)
+    if target is None or "executable" in target.group(1):
+        return "exe"
+    return "lib" if resolve(target.group(2), "") == "STATIC" else "dll"
+
+
+def _qrcFiles(path):
+    try:
+        root = ElementTree.parse(path).getroot()
+    except (OSError, ElementTree.ParseError):
+        return []
+    return [element.text.strip() for element in root.iter("file") if element.text]
+
+
+def parseTemplate(templatesDir, directory, manifest):
+    root = ElementTree.parse(os.path.join(templatesDir, directory, manifest)).getroot()
+    if root.get("Type") != "Project":
+        return None
+    data = root.find("vs:TemplateData", NAMESPACE)
+    project = root.find("vs:TemplateContent/vs:Project", NAMESPACE)
+    items = []
+    optional = []
+    openedFile = None
+    for item in project.findall("vs:ProjectItem", NAMESPACE):
+        source = item.text.strip()
+        target = item.get("TargetFileName", source)
+        # Files copied as they are under their own name depend on the wizard's options,
+        # e.g. precompiled headers, icons and run settings
+        if item.get("ReplaceParameters") != "true" and "TargetFileName" not in item.attrib:
+            optional.append(target)
+            continue
+        items.append(target)
+        if item.get("OpenInEditor") == "true":
+            openedFile = target
+        if source.endswith(".qrc"):
+            items.extend(resource for resource in
+                         _qrcFiles(os.path.join(templatesDir, directory, source))
+                         if resource not in items)
+
+    cmakeLists = None
+    if "CMakeLists.txt" in items:
+        with open(os.path.join(templatesDir, directory, "CMakeLists.txt"),
+                  encoding="utf-8-sig") as f:
+            cmakeLists = f.read()
+    projectFile = project.get("TargetFileName")
+    files = {MSBUILD: list(SOLUTION_FILES[MSBUILD])
+                      + ["$projectname$/" + projectFile, "$projectname$/%s.filters" % projectFile]
+                      + ["$projectname$/" + item for item in items if item not in CMAKE_ITEMS]}
+    if cmakeLists is not None:
+        # The wizards delete the .vcxproj files of CMake projects. Only Qt 6.2 and later are
+        # tested, with which they don't add .qrc files to CMake projects.
+        files[CMAKE] = list(SOLUTION_FILES[CMAKE]) + [
+            "$projectname$/" + item for item in items
+            if not _resolvedName(item).endswith((".vcxproj.filters", ".qrc"))
+            and item not in MOVED_CMAKE_ITEMS]
+    for fileList in files.values():
+        fileList[:] = list(dict.fromkeys(fileList))
+    return {"directory": directory,
+            "name": data.findtext("vs:Name", namespaces=NAMESPACE),
+            "defaultName": data.findtext("vs:DefaultName", namespaces=NAMESPACE),
+            "files": files,
+            "optionalFiles": optional,
+            "openedFile": openedFile,
+            "artifact": _artifact(cmakeLists, items),
+            # The wizards show a page for the class only if the template creates one
+            "hasClassPage": "$sourcefilename$" in items,
+            "hasHeader": "$headerfilename$" in items}
+
+
+def buildIndex(templatesDir):
+    templates = {}
+    for manifest in _manifests(templatesDir):
+        directory, fileName = os.path.split(manifest)
+        if fileName.endswith((".vstemplate", ".vstemplate_TT")):
+            template = parseTemplate(templatesDir, directory, fileName)
+            if template is not None:
+                templates[template["name"]] = template
+    return templates
+
+
+class TemplateIndex:
+
+    def __init__(self, templatesDir=TEMPLATES_DIR, cacheFile=None):
+        self.templatesDir = templatesDir
+        self.cacheFile = cacheFile or os.path.join(vsinstances.cacheDir(), "template_index.json")
+        self.built = False
+        self.templates = self._load()
+
+    def _load(self):
+        digest = contentHash(self.templatesDir)
+        cache = vsinstances.loadCache(self.cacheFile, CACHE_FORMAT)
+        if isinstance(cache, dict) and cache.get("hash") == digest:
+            return cache["templates"]
+        templates = buildIndex(self.templatesDir)
+        self.built = True
+        vsinstances.saveCache(self.cacheFile, CACHE_FORMAT,
+                              {"hash": digest, "templates": templates})
+        return templates
+
+    def __contains__(self, templateName):
+        return templateName in self.templates
+
+    def template(self, templateName):
+        return self.templates[templateName]
+
+    def defaultName(self, templateName):
+        return self.templates[templateName]["defaultName"]
+
+    def supportsCMake(self, templateName):
+        return CMAKE in self.templates[templateName]["files"]
+
+    def hasClassPage(self, templateName):
+        return self.templates[templateName]["hasClassPage"]
+
+    def hasHeader(self, templateName):
+        return self.templates[templateName]["hasHeader"]
+
+    # Paths of the files created for a new project, relative to its solution directory
+    def expectedFiles(self, templateName, projectName, cmakeBased):
+        files = self.templates[templateName]["files"][CMAKE if cmakeBased else MSBUILD]
+        return [os.path.normpath(resolve(fileName, projectName)) for fileName in files]
+
+    def openedFile(self, templateName, projectName):
+        openedFile = self.templates[templateName]["openedFile"]
+        return None if openedFile is None else resolve(openedFile, projectName)
+
+    # File name of the binary built from a new project, None if nothing is built
+    def builtFile(self, templateName, projectName):
+        artifact = self.templates[templateName]["artifact"]
+        return None if artifact is None else "%s.%s" % (projectName, artifact)
+
+
+_index = None
+
+
+def index():
+    global _index
+    if _index is None:
+        _index = TemplateIndex()
+    return _index
+
+
+def main(argv):
+    templatesDir = argv[0] if argv else TEMPLATES_DIR
+    print(json.dumps(buildIndex(templatesDir), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -5,6 +5,8 @@
 
 # -*- coding: utf-8 -*-
 
+import objectmaps
+import profiler
 import test
 
 class TestSection:
@@ -14,6 +16,10 @@ class TestSection:
 
     def __enter__(self):
         test.startSection(self.description)
+        profiler.begin(self.description)
+        objectmaps.containers().startSection()
 
     def __exit__(self, _, __, ___):
+        objectmaps.containers().endSection()
+        profiler.end()
         test.endSection()
@@ -9,18 +9,49 @@ import builtins
 import os
 import subprocess
 
+import flakiness
 import globalnames
-
-rootSuffix = "SquishTestInstance"
+import objectsnapshots
+import profiler
+import resultsink
+import session
+import squish
+import vsinstances
+import waiting
+
+# shardrunner.py runs test cases in parallel, each shard in its own experimental instance
+rootSuffix = os.getenv("SQUISH_VSTOOLS_ROOTSUFFIX", "SquishTestInstance")
+
+# With SQUISH_VSTOOLS_RESULTS set, results are also streamed to a file while the test case runs
+resultsink.install(test)
+# With SQUISH_VSTOOLS_FLAKINESS_DB set, waits for objects which timed out before are retried
+flakiness.install(squish, globals())
+# With SQUISH_VSTOOLS_SNAPSHOTS set, the object trees of the windows found are recorded
+objectsnapshots.install(squish, globals(),
+                        lambda: getAppProperty("catalog_productDisplayVersion"))
+
+
+def getVswherePath():
+    # SQUISH_VSTOOLS_VSWHERE allows using another vswhere, e.g. the stand-in used by the
+    # offline runner in Tests/system/offline.
+    vswhere = os.getenv("SQUISH_VSTOOLS_VSWHERE")
+    if vswhere:
+        return vswhere
+    return ("%s/Microsoft Visual Studio/Installer/vswhere.exe"
+            % os.getenv("ProgramFiles(x86)"))
 
 
 def getAppProperty(property):
     vsDirectory = currentApplicationContext().commandLine.strip('"').partition("\\Common7")[0]
-    programFilesDir = os.getenv("ProgramFiles(x86)")
-    plv = subprocess.check_output('"%s/Microsoft Visual Studio/Installer/vswhere.exe" '
-                                  '-path "%s" -property %s'
-                                  % (programFilesDir, vsDirectory, property))
-    return plv.decode().strip()
+    return vsinstances.getProperty(getVswherePath(), vsDirectory, property) or ""
+
+
+def getDevenvPath():
+    devenv = os.getenv("SQUISH_VSTOOLS_DEVENV")
+    if devenv:
+        return devenv
+    path = subprocess.check_output([getVswherePath(), "-latest", "-property", "productPath"])
+    return path.decode().strip()
 
 
 msvsProductLine = None
@@ -43,7 +74,7 @@ def getMsvsVersionAsList():
 
 
 def fixAppContext(wantedName="devenv"):
-    waitFor(lambda: len(applicationContextList()) > 1, 30000)
+    waiting.waitFor(lambda: len(applicationContextList()) > 1, 30000)
     appContexts = applicationContextList()
     if len(appContexts) == 1:  # Might have changed after waitFor()
         if appContexts[0].name != wantedName:
@@ -56,11 +87,19 @@ def fixAppContext(wantedName="devenv"):
         test.fatal("There's no %s application context, only: %s" % (wantedName, appContexts))
 
 
+@profiler.profiled
 def startApp(waitForInitialDialogs=False, clearSettings=True):
     command = "devenv /LCID 1033 /RootSuffix %s"
     if clearSettings:
         command += " /Command QtVSTools.ClearSettings"
-    startApplication(command % rootSuffix)
+    if session.isEnabled() and clearSettings and not waitForInitialDialogs:
+        if session.attach():
+            if session.restore():
+                return
+            test.warning("Could not reset the devenv session, restarting devenv.")
+        session.launch([getDevenvPath()] + (command % rootSuffix).split()[1:])
+    else:
+        startApplication(command % rootSuffix)
     version = getMsvsProductLine()
     if waitForInitialDialogs:
         try:
@@ -96,15 +135,22 @@ def startApp(waitForInitialDialogs=False, clearSettings=True):
 
 
 def openVsToolsMenu():
-    while True:
+    def menuInitialized():
         mouseClick(waitForObject(globalnames.extensions_MenuItem))
         mouseClick(waitForObject(globalnames.extensions_Qt_VS_Tools_MenuItem, 5000))
-        if not waitFor(lambda: object.exists(globalnames.Initializing_MenuItem), 500):
-            break
+        if not waiting.waitFor(lambda: object.exists(globalnames.Initializing_MenuItem), 500):
+            return True
         mouseClick(waitForObject(globalnames.extensions_MenuItem))  # close menu
-        snooze(4)
+        return False
+
+    # Retry after 0.5s, growing up to the 4s the menu used to be given
+    waiting.waitUntil(menuInitialized, description="Qt VS Tools menu initialized",
+                      interval=500, maxInterval=4000)
 
 
 def closeMainWindow():
+    if session.isAttached():
+        session.release()
+        return
     mouseClick(waitForObject(globalnames.file_MenuItem))
     mouseClick(waitForObject(globalnames.file_Exit_MenuItem))
@@ -0,0 +1,178 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Properties of the installed MSVS instances as reported by vswhere. vswhere is run once with
+# "-all -prerelease -format json" and the result is cached in memory and on disk together with the
+# modification times of the instances' devenv.exe files. An entry is used only while its
+# devenv.exe is unchanged, so updating MSVS invalidates the cache. The cache file is stored in
+# SQUISH_VSTOOLS_CACHE_DIR (default: a directory in the system's temporary directory).
+
+import json
+import os
+import subprocess
+import tempfile
+
+CACHE_FORMAT = 1
+
+
+def cacheDir():
+    directory = os.getenv("SQUISH_VSTOOLS_CACHE_DIR")
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), "squish_vstools")
+    return directory
+
+
+# Replaces fileName by a file written by write(f). The file is written to a temporary file
+# first, so parallel test runs never read half a file.
+def replaceFile(fileName, write, mode="w"):
+    directory = os.path.dirname(os.path.abspath(fileName))
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as f:
+            write(f)
+        os.replace(temporary, fileName)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+# Returns the data of a cache written by saveCache(), or None if there is no cache of the format
+def loadCache(fileName, cacheFormat):
+    try:
+        with open(fileName, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get("format") != cacheFormat:
+        return None
+    return cache.get("data")
+
+
+# Returns False if the cache could not be written, its data will be computed again next time
+def saveCache(fileName, cacheFormat, data):
+    try:
+        replaceFile(fileName, lambda f: json.dump({"format": cacheFormat, "data": data}, f))
+        return True
+    except OSError:
+        return False
+
+
+def normalizePath(path):
+    return path.replace("\\", "/").rstrip("/").lower()
+
+
+def devenvPath(installationPath):
+    return os.path.join(installationPath, "Common7", "IDE", "devenv.exe")
+
+
+# vswhere treats property names case-insensitively and uses "_" to address nested objects, e.g.
+# "catalog_productLineVersion". Values are formatted like "vswhere -property" does.
+def instanceProperty(instance, name):
+    value = instance
+    for part in name.split("_"):
+        if not isinstance(value, dict):
+            return None
+        keys = {key.lower(): key for key in value}
+        if part.lower() not in keys:
+            return None
+        value = value[keys[part.lower()]]
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return None if value is None else str(value)
+
+
+def runVswhere(vswhere):
+    output = subprocess.check_output([vswhere, "-all", "-prerelease", "-format", "json",
+                                      "-utf8"])
+    return json.loads(output.decode("utf-8"))
+
+
+def _modificationTime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class Resolver:
+    # query(vswhere) returns the parsed JSON output of vswhere. It can be replaced to answer
+    # from recorded output.
+
+    def __init__(self, vswhere, cacheFile=None, query=runVswhere):
+        self.vswhere = vswhere
+        self.cacheFile = cacheFile or os.path.join(cacheDir(), "vswhere.json")
+        self.query = query
+        self.queries = 0
+        self._snapshot = None
+
+    def _query(self):
+        self.queries += 1
+        instances = [instance for instance in self.query(self.vswhere)
+                     if "installationPath" in instance]
+        devenvs = {}
+        for instance in instances:
+            devenv = devenvPath(instance["installationPath"])
+            devenvs[normalizePath(devenv)] = _modificationTime(devenv)
+        return {"instances": instances, "devenv": devenvs}
+
+    @staticmethod
+    def _contains(instance, installationPath):
+        # Like "vswhere -path", accept paths within an installation
+        wanted = normalizePath(installationPath)
+        path = normalizePath(instance["installationPath"])
+        return wanted == path or wanted.startswith(path + "/")
+
+    # Returns the instance containing the given path if its devenv.exe is unchanged since the
+    # snapshot was taken. Instances without devenv.exe can only be taken from memory.
+    def _find(self, snapshot, installationPath, fromDisk):
+        for instance in snapshot["instances"]:
+            if self._contains(instance, installationPath):
+                devenv = devenvPath(instance["installationPath"])
+                recorded = snapshot["devenv"].get(normalizePath(devenv))
+                if recorded == _modificationTime(devenv) and not (fromDisk and recorded is None):
+                    return instance
+                return None
+        return None
+
+    def instance(self, installationPath):
+        if self._snapshot is not None:
+            found = self._find(self._snapshot, installationPath, False)
+            if found is not None:
+                return found
+        cached = loadCache(self.cacheFile, CACHE_FORMAT)
+        if isinstance(cached, dict):
+            found = self._find(cached, installationPath, True)
+            if found is not None:
+                self._snapshot = cached
+                return found
+        self._snapshot = self._query()
+        saveCache(self.cacheFile, CACHE_FORMAT, self._snapshot)
+        for instance in self._snapshot["instances"]:
+            if self._contains(instance, installationPath):
+                return instance
+        return None
+
+    def property(self, installationPath, name):
+        instance = self.instance(installationPath)
+        if instance is None:
+            raise LookupError("vswhere does not know an installation at '%s'"
+                              % installationPath)
+        return instanceProperty(instance, name)
+
+
+_resolvers = {}
+
+
+def resolver(vswhere):
+    if vswhere not in _resolvers:
+        _resolvers[vswhere] = Resolver(vswhere)
+    return _resolvers[vswhere]
+
+
+def getProperty(vswhere, installationPath, name):
+    return resolver(vswhere).property(installationPath, name)
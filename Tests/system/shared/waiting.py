@@ -0,0 +1,152 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Waiting for conditions without fixed sleeps. A condition is checked right away and then again
+# after pauses growing from "interval" up to "maxInterval" milliseconds, so short waits return
+# almost immediately while long waits don't hammer the AUT. Timeouts are multiplied with the
+# machine's calibration factor, read from SQUISH_VSTOOLS_TIMEOUT_FACTOR (default: 1.0).
+#
+# Every wait is recorded with its actual duration. If SQUISH_VSTOOLS_WAIT_LOG names a file, the
+# records are also appended to it as JSON lines. Run this file with such a log as argument to
+# list the waits which took the most time:
+#
+#   python waiting.py wait_log.jsonl [--top N]
+
+import json
+import os
+import sys
+import time
+
+import flakiness
+
+DEFAULT_INTERVAL = 50
+DEFAULT_MAX_INTERVAL = 1000
+BACKOFF = 1.5
+
+records = []
+
+
+def timeoutFactor():
+    try:
+        return max(float(os.getenv("SQUISH_VSTOOLS_TIMEOUT_FACTOR", "1")), 0.1)
+    except ValueError:
+        return 1.0
+
+
+def scaledTimeout(timeout):
+    return None if timeout is None else timeout * timeoutFactor()
+
+
+# Location of the test script calling the wait. Frames in this file and in "internalFiles"
+# are skipped.
+def callerLocation(internalFiles=()):
+    frame = sys._getframe(1)
+    while frame is not None and (frame.f_code.co_filename == __file__
+                                 or frame.f_code.co_filename in internalFiles):
+        frame = frame.f_back
+    if frame is None:
+        return ""
+    return "%s:%d" % (os.path.basename(os.path.dirname(frame.f_code.co_filename)) + "/"
+                      + os.path.basename(frame.f_code.co_filename), frame.f_lineno)
+
+
+# Pauses a wait. Squish's snooze() keeps processing the AUT's events, the offline runner's
+# advances the simulated clock.
+def snooze(milliseconds):
+    # Imported here, so the log can be summarized outside of Squish
+    import squish
+    squish.snooze(milliseconds / 1000.0)
+
+
+def recordWait(description, location, timeout, duration, success, attempts):
+    record = {"description": description or location, "location": location,
+              "timeout": timeout, "duration": round(duration, 1), "success": success,
+              "attempts": attempts}
+    records.append(record)
+    logFile = os.getenv("SQUISH_VSTOOLS_WAIT_LOG")
+    if logFile:
+        with open(logFile, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+# Waits until condition() returns a true value and returns that value. Returns the last false
+# value if the condition wasn't met after "timeout" milliseconds (None: wait forever).
+# Durations are measured in milliseconds as the larger of the elapsed wall-clock time and the
+# sum of pauses, so they are meaningful with a simulated clock as well. Waits which timed out now
+# and then are retried, see flakiness.py.
+def waitUntil(condition, timeout=None, description=None, interval=DEFAULT_INTERVAL,
+              maxInterval=DEFAULT_MAX_INTERVAL):
+    location = callerLocation()
+    limit = scaledTimeout(timeout)
+
+    def wait():
+        return _waitUntil(condition, limit, description, location, interval, maxInterval)
+    if flakiness.isEnabled():
+        return flakiness.attempt(description or location, "waitFor", wait)
+    return wait()
+
+
+def _waitUntil(condition, limit, description, location, interval, maxInterval):
+    started = time.monotonic()
+    paused = 0.0
+    attempts = 0
+    while True:
+        attempts += 1
+        result = condition()
+        elapsed = max((time.monotonic() - started) * 1000, paused)
+        if result or (limit is not None and elapsed >= limit):
+            recordWait(description, location, limit, elapsed, bool(result), attempts)
+            return result
+        pause = interval if limit is None else max(min(interval, limit - elapsed), 1)
+        snooze(pause)
+        paused += pause
+        interval = min(interval * BACKOFF, maxInterval)
+
+
+# Drop-in replacement for Squish's waitFor() returning a bool
+def waitFor(condition, timeout=None, description=None):
+    return bool(waitUntil(condition, timeout, description))
+
+
+def slowestWaits(count=10, waits=None):
+    return sorted(records if waits is None else waits,
+                  key=lambda record: record["duration"], reverse=True)[:count]
+
+
+def summarize(waits):
+    summary = {}
+    for record in waits:
+        entry = summary.setdefault(record["location"], {"location": record["location"],
+                                                        "description": record["description"],
+                                                        "count": 0, "total": 0.0, "max": 0.0,
+                                                        "timeouts": 0})
+        entry["count"] += 1
+        entry["total"] += record["duration"]
+        entry["max"] = max(entry["max"], record["duration"])
+        entry["timeouts"] += 0 if record["success"] else 1
+    return sorted(summary.values(), key=lambda entry: entry["total"], reverse=True)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize a log of waits written by "
+                                                 "the system tests.")
+    parser.add_argument("log", help="file set as SQUISH_VSTOOLS_WAIT_LOG")
+    parser.add_argument("--top", type=int, default=20, help="number of locations to list")
+    args = parser.parse_args(argv)
+    with open(args.log, encoding="utf-8") as f:
+        waits = [json.loads(line) for line in f if line.strip()]
+    print("%10s %10s %6s %8s  %s" % ("total [s]", "max [s]", "count", "timeouts", "location"))
+    for entry in summarize(waits)[:args.top]:
+        print("%10.1f %10.1f %6d %8d  %s" % (entry["total"] / 1000, entry["max"] / 1000,
+                                             entry["count"], entry["timeouts"],
+                                             entry["description"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -7,12 +7,18 @@
 
 source("../../shared/utils.py")
 
+import builtins
 import os
 import sys
 
 from newprojectdialog import NewProjectDialog
 from testsection import TestSection
 import names
+import profiler
+import qtinstallations
+import session
+import templateindex
+import waiting
 
 
 def readQtDirs():
@@ -28,15 +34,18 @@ def readQtDirs():
         uniquePaths.add(loweredPath)
         qtDirs.append({"path": current,
                        "name": current.rsplit(":")[-1].strip("\\").replace("\\", "_")})
-    return qtDirs
+    # Fail before starting devenv instead of when adding the Qt versions
+    problems = qtinstallations.problems([qtDir["path"] for qtDir in qtDirs])
+    for problem in problems:
+        test.fatal("Invalid entry in SQUISH_VSTOOLS_QTDIRS", problem)
+    return [] if problems else qtDirs
 
 
 def typeToEdit(editId, text):
     edit = waitForObject(editId)
     mouseClick(edit)
     type(edit, text)
-    snooze(1)
-    waitFor(lambda: waitForObject(editId).text == text)
+    waiting.waitFor(lambda: waitForObject(editId).text == text)
 
 
 def tableCell(col, row):
@@ -47,6 +56,7 @@ def tableCellEdit(col, row):
     return {"container": tableCell(col, row), "type": "Label"}
 
 
+@profiler.profiled
 def configureQtVersions(qtDirs, withTests=False):
     openVsToolsMenu()
     mouseClick(waitForObject(names.pART_Popup_Qt_Versions_MenuItem))
@@ -69,7 +79,7 @@ def configureQtVersions(qtDirs, withTests=False):
                          "The table should have %d lines after adding %d Qt versions."
                          % (dirsAdded, dirsAdded))
     clickButton(waitForObject(names.options_OK_Button))
-    waitFor(lambda: not object.exists(names.options_Dialog))
+    waiting.waitFor(lambda: not object.exists(names.options_Dialog))
     return True
 
 
@@ -82,109 +92,198 @@ def clearQtVersions():
         mouseClick(waitForObject(tableCell(1, 1)))
     for _ in range(qtVersionCount):
         clickButton(waitForObject(names.remove_Button))
-    snooze(1)
+    waiting.waitFor(lambda: waitForObjectExists(names.dataGrid_Table).rowCount == 0, 5000)
     clickButton(waitForObject(names.options_OK_Button))
-    waitFor(lambda: not object.exists(names.options_Dialog))
+    waiting.waitFor(lambda: not object.exists(names.options_Dialog))
+
+
+# A reused devenv session needs to start without Qt versions like a freshly started devenv
+session.addResetHandler(clearQtVersions)
 
 
 def getExpectedName(templateName):
-    if templateName == "Qt ActiveQt Server":
-        return "ActiveQtServer"
-    elif templateName == "Qt Designer Custom Widget":
-        return "QtDesignerWidget"
-    elif templateName == "Qt Empty Application":
-        return "QtApplication"
-    elif templateName == "Qt Test Application":
-        return "QtTest"
-    else:
-        return templateName.replace(" ", "")
-
-
-# Function which opens all "New Project" wizards from Qt VS Tools, one after the other. It doesn't
-# run any tests itself, but it runs a callback function for each page of all the wizards. These
-# functions should contain tests for the respective page.
-# funcNewProjectDialog: Function run on MSVS' own "New Project" dialog. Parameters are strings:
-#                       - the project template, e.g. "Qt Empty Application"
-#                       - the expected name of the new project, without index, e.g. "QtApplication"
-# funcPage1: Function run on the first page of the Qt VS Tools' wizard. Parameters are strings:
-#            - the expected greeting text on top of the page
-#            - the project template, e.g. "Qt Empty Application"
-# funcPage2: Function run on the second page of the Qt VS Tools' wizard. Parameters are:
-#            - a string containing the expected greeting text on top of the page
-#            - a list of the configured Qt versions. Each Qt version is a dict containing two
-#              values: "path" is the file system path to the Qt version, "name" is the name
-#              configured for it
-# funcPage3: Function run on the third page of the Qt VS Tools' wizard, in case it has one.
-#            Parameters are strings:
-#            - the project's template name
-#            - the expected greeting text on top of the page
-#            - the name of the project
-# setupQtVersions: Optional boolean value whether the function shall configure Qt versions read
-#                  from the environment in the VS Tools' settings before opening any wizard and
-#                  clear them after the tests (True, default) or not change Qt version settings
-#                  at all (False)
-
-
-def testAllQtWizards(funcNewProjectDialog=None, funcPage1=None, funcPage2=None, funcPage3=None,
-                     setupQtVersions=True):
-    qtDirs = readQtDirs()
-    if not qtDirs:
-        test.fatal("No Qt versions known", "Did you set SQUISH_VSTOOLS_QTDIRS correctly?")
-        return
-    startApp()
-    if setupQtVersions and not configureQtVersions(qtDirs):
-        closeMainWindow()
-        return
-
-    with NewProjectDialog() as dialog:
-        dialog.filterForQtProjects()
-        for listItem, templateName in dialog.getListedTemplates():
-            with TestSection(templateName):
-                mouseClick(waitForObject(listItem))
-                expectedName = getExpectedName(templateName)
-                clickButton(waitForObject(names.microsoft_Visual_Studio_Next_Button))
-                if funcNewProjectDialog:
-                    funcNewProjectDialog(templateName, expectedName)
-                projectName = waitForObjectExists(names.msvs_Project_name_Edit).text
-                devEnvContext = currentApplicationContext()
-                clickButton(waitForObject(names.microsoft_Visual_Studio_Create_Button))
-                if not waitFor(lambda: object.exists(names.qt_Wizard_Window), 10000):
-                    # Sometimes, a "Creating project..." dialog appears and creates
-                    # a second app context. Explicitly set the wanted context.
-                    setApplicationContext(devEnvContext)
-                try:
-                    expectedText = "Welcome to the %s Wizard" % templateName
-                    if funcPage1:
-                        funcPage1(expectedText, templateName)
-                    clickButton(waitForObject(names.qt_Wizard_Next_Button))
-                    if funcPage2:
-                        funcPage2(expectedText, qtDirs)
-                    if setupQtVersions:
-                        if templateName in ["Qt ActiveQt Server",
-                                            "Qt Class Library",
-                                            "Qt Designer Custom Widget",
-                                            "Qt Test Application",
-                                            "Qt Widgets Application"]:
-                            clickButton(waitForObject(names.qt_Wizard_Next_Button))
-                            if funcPage3:
-                                funcPage3(templateName, expectedText, projectName)
-                        test.verify(findObject(names.qt_Wizard_Finish_Button).enabled)
-                    else:
-                        test.verify(not findObject(names.qt_Wizard_Finish_Button).enabled)
-                    test.verify(not findObject(names.qt_Wizard_Next_Button).enabled)
-                except:
-                    eInfo = sys.exc_info()
-                    test.fatal("Exception caught", "%s: %s" % (eInfo[0].__name__, eInfo[1]))
-                finally:
-                    # Cannot finish because of SQUISH-15876
-                    try:
-                        clickButton(waitForObject(names.qt_Wizard_Cancel_Button, 2000))
-                    except:
-                        test.warning("Could not click wizard's 'Cancel' button. "
-                                     "Falling back to using Escape key.")
-                        nativeType("<Escape>")
-            dialog.goBack()
-
-    if setupQtVersions:
-        clearQtVersions()
-    closeMainWindow()
+    templates = templateindex.index()
+    if templateName in templates:
+        return templates.defaultName(templateName)
+    return templateName.replace(" ", "")
+
+
+# Pages of MSVS' "New Project" dialog and the Qt VS Tools' wizards visited by WizardCrawler
+NEW_PROJECT_DIALOG = "newProjectDialog"
+WIZARD_PAGE1 = "wizardPage1"
+WIZARD_PAGE2 = "wizardPage2"
+WIZARD_PAGE3 = "wizardPage3"
+WIZARD_PAGES = [NEW_PROJECT_DIALOG, WIZARD_PAGE1, WIZARD_PAGE2, WIZARD_PAGE3]
+
+
+# What checkers know about the page they are run on
+class WizardPage:
+
+    def __init__(self, templateName, qtDirs):
+        self.templateName = templateName
+        # The expected name of the new project without index, e.g. "QtApplication"
+        self.expectedName = getExpectedName(templateName)
+        templates = templateindex.index()
+        known = templateName in templates
+        # Whether the wizard has a third page for the class and creates a header file for it
+        self.hasClassPage = known and templates.hasClassPage(templateName)
+        self.hasHeader = known and templates.hasHeader(templateName)
+        # The expected greeting text on top of the wizard's pages
+        self.expectedText = "Welcome to the %s Wizard" % templateName
+        # The name of the project as entered in the "New Project" dialog
+        self.projectName = None
+        # The configured Qt versions, dicts containing "path" and "name"
+        self.qtDirs = qtDirs
+
+
+# Passed to checkers instead of Squish's "test" module. Keeps the results, so a checker which
+# passed can be skipped later, and forwards them to "test" if the checker is "live". Results of
+# checkers run for other test cases are only kept.
+class CheckRecorder:
+
+    def __init__(self, live):
+        self.live = live
+        self.results = []
+
+    @staticmethod
+    def _storable(value):
+        return value if value is None or builtins.type(value) in (bool, int, float, str) \
+            else str(value)
+
+    def _record(self, function, passed, *args):
+        self.results.append([function, passed] + [self._storable(arg) for arg in args])
+        if self.live:
+            getattr(test, function)(*args)
+        return passed
+
+    def passed(self):
+        return all(result[1] for result in self.results)
+
+    def compare(self, actual, expected, message=""):
+        return self._record("compare", actual == expected, actual, expected, message)
+
+    def verify(self, condition, message=""):
+        return self._record("verify", bool(condition), bool(condition), message)
+
+    def xverify(self, condition, message=""):
+        # An expected failure which passes is reported as an error
+        self._record("xverify", not condition, bool(condition), message)
+        return bool(condition)
+
+    def fatal(self, message, detail=""):
+        return self._record("fatal", False, message, detail)
+
+    def warning(self, message, detail=""):
+        return self._record("warning", True, message, detail)
+
+
+def replayResults(results):
+    for result in results:
+        getattr(test, result[0])(*result[2:])
+
+
+# State machine visiting all "New Project" wizards of Qt VS Tools one after the other. It doesn't
+# run any tests itself, but runs the checkers registered for the pages of all the wizards. Each
+# checker is a function called with a CheckRecorder and a WizardPage. On each page, checkers run
+# in the order they were added. Checkers may change the page, e.g. the project's name, as long as
+# the wizard can still be finished. "group" names the set of checkers a test case is
+# responsible for, their results are collected per group and template.
+class WizardCrawler:
+
+    def __init__(self, qtDirs, withQt=True):
+        self.qtDirs = qtDirs
+        self.withQt = withQt
+        self.checkers = {page: [] for page in WIZARD_PAGES}
+        self.recorders = {}
+        self.complete = True
+
+    def addChecker(self, page, checker, group=None, live=True):
+        self.checkers[page].append((checker, group, live))
+
+    def groups(self):
+        return {group for checkers in self.checkers.values() for _, group, _ in checkers}
+
+    def groupPassed(self, group):
+        return self.complete and all(recorder.passed() for (recorderGroup, _), recorder
+                                     in self.recorders.items() if recorderGroup == group)
+
+    def groupResults(self, group):
+        return {templateName: recorder.results for (recorderGroup, templateName), recorder
+                in self.recorders.items() if recorderGroup == group}
+
+    def _runCheckers(self, page, wizardPage):
+        for checker, group, live in self.checkers[page]:
+            key = (group, wizardPage.templateName)
+            if key not in self.recorders:
+                self.recorders[key] = CheckRecorder(live)
+            checker(self.recorders[key], wizardPage)
+
+    # Each state runs the checkers of its page and moves on to the next state
+
+    def _newProjectDialog(self, wizardPage):
+        self._runCheckers(NEW_PROJECT_DIALOG, wizardPage)
+        wizardPage.projectName = waitForObjectExists(names.msvs_Project_name_Edit).text
+        devEnvContext = currentApplicationContext()
+        clickButton(waitForObject(names.microsoft_Visual_Studio_Create_Button))
+        if not waiting.waitFor(lambda: object.exists(names.qt_Wizard_Window), 10000):
+            # Sometimes, a "Creating project..." dialog appears and creates
+            # a second app context. Explicitly set the wanted context.
+            setApplicationContext(devEnvContext)
+        return WIZARD_PAGE1
+
+    def _wizardPage1(self, wizardPage):
+        self._runCheckers(WIZARD_PAGE1, wizardPage)
+        clickButton(waitForObject(names.qt_Wizard_Next_Button))
+        return WIZARD_PAGE2
+
+    def _wizardPage2(self, wizardPage):
+        self._runCheckers(WIZARD_PAGE2, wizardPage)
+        if self.withQt and wizardPage.hasClassPage:
+            clickButton(waitForObject(names.qt_Wizard_Next_Button))
+            return WIZARD_PAGE3
+        return None
+
+    def _wizardPage3(self, wizardPage):
+        self._runCheckers(WIZARD_PAGE3, wizardPage)
+        return None
+
+    def _crawlWizard(self, listItem, templateName):
+        states = {NEW_PROJECT_DIALOG: self._newProjectDialog,
+                  WIZARD_PAGE1: self._wizardPage1,
+                  WIZARD_PAGE2: self._wizardPage2,
+                  WIZARD_PAGE3: self._wizardPage3}
+        wizardPage = WizardPage(templateName, self.qtDirs)
+        mouseClick(waitForObject(listItem))
+        clickButton(waitForObject(names.microsoft_Visual_Studio_Next_Button))
+        with profiler.span(NEW_PROJECT_DIALOG, "page"):
+            state = states[NEW_PROJECT_DIALOG](wizardPage)
+        try:
+            while state:
+                with profiler.span(state, "page"):
+                    state = states[state](wizardPage)
+            if self.withQt:
+                test.verify(findObject(names.qt_Wizard_Finish_Button).enabled)
+            else:
+                test.verify(not findObject(names.qt_Wizard_Finish_Button).enabled)
+            test.verify(not findObject(names.qt_Wizard_Next_Button).enabled)
+        except:
+            eInfo = sys.exc_info()
+            test.fatal("Exception caught", "%s: %s" % (eInfo[0].__name__, eInfo[1]))
+            # Checkers of the remaining pages didn't run
+            self.complete = False
+        finally:
+            # Cannot finish because of SQUISH-15876
+            try:
+                clickButton(waitForObject(names.qt_Wizard_Cancel_Button, 2000))
+            except:
+                test.warning("Could not click wizard's 'Cancel' button. "
+                             "Falling back to using Escape key.")
+                nativeType("<Escape>")
+
+    def crawl(self):
+        with NewProjectDialog() as dialog:
+            dialog.filterForQtProjects()
+            for listItem, templateName in dialog.getListedTemplates():
+                with TestSection(templateName):
+                    self._crawlWizard(listItem, templateName)
+                dialog.goBack()
@@ -8,7 +8,7 @@
 from objectmaphelper import *
 import globalnames
 pART_Popup_Qt_Versions_MenuItem = {"text": "Qt Versions", "type": "MenuItem"}
-options_Dialog = {"text": "Options", "type": "Dialog"}
+options_Dialog = globalnames.options_Dialog
 options_OK_Button = {"container": options_Dialog, "text": "OK", "type": "Button"}
 options_WPFControl = {"class": "System.Windows.Documents.AdornerDecorator",
                       "container": options_Dialog, "type": "WPFControl"}
@@ -21,7 +21,7 @@ microsoft_Visual_Studio_Next_Button = {"container": globalnames.workflowHostView
                                        "text": "Next", "type": "Button"}
 microsoft_Visual_Studio_Create_Button = {"container": globalnames.workflowHostView,
                                          "text": "Create", "type": "Button"}
-qt_Wizard_Window = {"class": "QtVsTools.Wizards.Common.WizardWindow", "type": "Window"}
+qt_Wizard_Window = globalnames.qt_Wizard_Window
 qt_Wizard_Next_Button = {"container": qt_Wizard_Window, "text": "Next >", "type": "Button"}
 qt_Wizard_Cancel_Button = {"container": qt_Wizard_Window, "text": "Cancel", "type": "Button"}
 project_template_name_Label = {"container": globalnames.workflowHostView,
@@ -45,8 +45,7 @@ no_Qt_version_Label = {"container": qt_Wizard_Window, "id": "ErrorMsg", "type":
 qt_Wizard_Finish_Button = {"container": qt_Wizard_Window, "text": "Finish", "type": "Button"}
 lower_case_file_names_CheckBox = {"container": qt_Wizard_Window, "text": "Lower case file names",
                                   "type": "CheckBox"}
-file_Close_Solution_MenuItem = {"container": globalnames.file_MenuItem, "text": "Close Solution",
-                                "type": "MenuItem"}
+file_Close_Solution_MenuItem = globalnames.file_Close_Solution_MenuItem
 msvs_Create_a_new_project_Label = {"container":
                                    globalnames.workflowHostView,
                                    "text": "Create a _new project",
@@ -67,8 +66,7 @@ platforms_ComboBox = {"container": Microsoft_Visual_Studio_ToolBar,
 x64_ComboBoxItem = {"container": platforms_ComboBox, "id": "x64", "type": "ComboBoxItem"}
 projectModelSelection_ComboBoxItem = {"container": ProjectModel_ComboBox, "type": "ComboBoxItem"}
 build_BuildAll_MenuItem = {"container": build_MenuItem, "text": "Build All", "type": "MenuItem"}
-file_Close_Folder_MenuItem = {"container": globalnames.file_MenuItem, "text": "Close Folder",
-                              "type": "MenuItem"}
+file_Close_Folder_MenuItem = globalnames.file_Close_Folder_MenuItem
 selectStartupItemButton = {"tooltip": RegularExpression("^(Local Windows Debugger|Select Startup Item)$"),
                            "type": "Button"}
 selectStartupItemLabel = {"container": selectStartupItemButton, "type": "Label"}
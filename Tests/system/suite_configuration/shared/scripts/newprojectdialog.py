@@ -6,6 +6,8 @@
 # -*- coding: utf-8 -*-
 
 import globalnames
+import objectmaps
+import profiler
 import squish
 
 project_type_filter_ComboBox = {"container": globalnames.workflowHostView,
@@ -27,6 +29,7 @@ templateList_ScrollBar = {"container": microsoft_VS_TemplateList_ListView,
 class NewProjectDialog:
 
     @staticmethod
+    @profiler.profiled
     def open():
         squish.mouseClick(squish.waitForObject(globalnames.file_MenuItem))
         squish.mouseClick(squish.waitForObject(globalnames.pART_Popup_New_MenuItem))
@@ -38,6 +41,7 @@ class NewProjectDialog:
 
     def __exit__(self, _, __, ___):
         squish.clickButton(squish.waitForObject(microsoft_Visual_Studio_Close_Button))
+        objectmaps.containers().invalidate(globalnames.workflowHostView)
 
     def filterForQtProjects(self):
         squish.expand(squish.waitForObject(project_type_filter_ComboBox))
@@ -53,10 +57,12 @@ class NewProjectDialog:
 
     def getListedTemplates(self):
         self.clickScrollBarsLowerHalf()
-        listView = squish.waitForObject(microsoft_VS_TemplateList_ListView)
+        # The list view is looked up once for all items
+        listView = objectmaps.containers().container(microsoft_VS_TemplateList_ListView)
         for i in range(1, listView.itemCount - 1):  # itemCount is number of shown items + 2
             listItem = templateList_ListViewItem | {"occurrence": i}
-            templateName = squish.waitForObjectExists({"container": listItem, "type": "Label"}).text
+            label = {"container": listItem | {"container": listView}, "type": "Label"}
+            templateName = squish.waitForObjectExists(label).text
             yield listItem, templateName
 
     def goBack(self):
@@ -0,0 +1,234 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Checkers for the pages of the Qt VS Tools' wizards, grouped by the test case responsible for
+# them. When test cases share a devenv session (see shared/session.py), the first test case
+# crawling the wizards runs the checkers of all groups sharing its Qt configuration and stores
+# their results. Test cases finding their group's results stored and passed report those
+# instead of crawling the wizards again. Checkers run in the order of the groups, so the
+# "defaults" checks of the "New Project" dialog run before the "edit" group changes the names,
+# and the third page is checked against the project name the dialog was left with.
+
+source("../shared/scripts/config_utils.py")
+
+import os
+
+import names
+import session
+import vsinstances
+import waiting
+
+
+# tst_new_project_defaults
+
+def testNewProjectDialogDefaults(check, page):
+    projectName = waitForObjectExists(names.msvs_Project_name_Edit).text
+    solutionName = waitForObjectExists(names.solutionNameText_Edit).text
+    check.compare(waitForObjectExists(names.project_template_name_Label).text, page.templateName,
+                  'Does the "Configure your new project" dialog show the right template name?')
+    check.verify(projectName.startswith(page.expectedName),
+                 "Project name is based on template name?")
+    check.verify(solutionName.startswith(page.expectedName),
+                 "Solution name is based on template name?")
+    check.compare(projectName, solutionName, "Project name and solution name are the same?")
+    projectLocation = waitForObjectExists(names.comboBox_Edit).text
+    if getMsvsProductLine() != "2019":
+        check.compare(waitForObjectExists(names.outputPathTextBlock_Label).text,
+                      'Project will be created in "%s"'
+                      % os.path.join(projectLocation, solutionName, projectName, ""))
+
+
+def testWizardPage1Defaults(check, page):
+    check.compare(waitForObjectExists(names.qt_Wizard_Window, 40000).text,
+                  page.templateName + " Wizard", "Check wizard's title")
+    check.verify(waitForObject(names.qt_Wizard_Welcome_Label).text.startswith(page.expectedText),
+                 "Check beginning of wizard's text on first page")
+
+
+def testWizardPage2Defaults(check, page):
+    check.verify(waitForObject(names.qt_Wizard_Welcome_Label).text.startswith(page.expectedText),
+                 "Check beginning of wizard's text on second page")
+    check.compare(waitForObjectExists(names.ProjectModel_ComboBox).nativeObject.Text,
+                  "Qt Visual Studio Project (Qt/MSBuild)")
+    configTable = waitForObjectExists(names.qt_ConfigTable)
+    if check.compare(configTable.rowCount, 2) and check.compare(configTable.columnCount, 6):
+        tableCell = {"container":names.qt_ConfigTable, "type":"TableCell"}
+        check.compare(waitForObjectExists({"container":tableCell | {"row":0, "column":0},
+                                           "type":"Edit"}).text, "Debug")
+        check.compare(waitForObjectExists({"container":tableCell | {"row":1, "column":0},
+                                           "type":"Edit"}).text, "Release")
+        selectedQtVersion = waitForObjectExists(names.comboBox_Edit).text
+        check.verify(selectedQtVersion in [x["name"] for x in page.qtDirs],
+            "Is the selected Qt version '%s' in configured Qt versions?" % selectedQtVersion)
+
+
+def testWizardPage3Defaults(check, page):
+    check.verify(waitForObject(names.qt_Wizard_Welcome_Label).text.startswith(page.expectedText),
+                 "Check beginning of wizard's text on third page")
+    check.compare(waitForObjectExists(names.qt_Wizard_Class_Name_Edit).text, page.projectName)
+    if page.hasHeader:
+        check.compare(waitForObjectExists(names.qt_Wizard_Header_h_file_Edit).text,
+                      page.projectName + ".h")
+    check.compare(waitForObjectExists(names.qt_Wizard_Source_cpp_file_Edit).text,
+                  page.projectName + ".cpp")
+
+
+# tst_new_project_edit
+
+def setNames(check, page):
+    projectNameEdit = waitForObjectExists(names.msvs_Project_name_Edit)
+    type(projectNameEdit, "My%sProject" % page.expectedName)
+    solutionNameEdit = waitForObjectExists(names.solutionNameText_Edit)
+    type(solutionNameEdit, "My%sSolution" % page.expectedName)
+
+
+def testWizardPage3Edit(check, page):
+    myProjectName = "My%sProject" % page.expectedName
+    classNameEdit = waitForObjectExists(names.qt_Wizard_Class_Name_Edit)
+    headerEdit = None
+    if page.hasHeader:
+        headerEdit = waitForObjectExists(names.qt_Wizard_Header_h_file_Edit)
+    sourceEdit = waitForObjectExists(names.qt_Wizard_Source_cpp_file_Edit)
+    # Check that names are derived from project name
+    check.compare(classNameEdit.text, myProjectName)
+    if headerEdit:
+        check.compare(headerEdit.text, myProjectName + ".h")
+    check.compare(sourceEdit.text, myProjectName + ".cpp")
+    # Check that changing class name changes file names
+    type(classNameEdit, "HereIs")
+    changedClassName = "HereIs" + myProjectName
+    waiting.waitFor(lambda: classNameEdit.text == changedClassName, 2000)
+    check.compare(classNameEdit.text, changedClassName)
+    if headerEdit:
+        check.compare(headerEdit.text, changedClassName + ".h")
+    check.compare(sourceEdit.text, changedClassName + ".cpp")
+    # Check that file names can be made lower case
+    check.verify(not waitForObject(names.lower_case_file_names_CheckBox).checked)
+    mouseClick(waitForObject(names.lower_case_file_names_CheckBox))
+    if headerEdit:
+        check.compare(headerEdit.text, changedClassName.lower() + ".h")
+    check.compare(sourceEdit.text, changedClassName.lower() + ".cpp")
+    check.verify(waitForObject(names.lower_case_file_names_CheckBox).checked)
+    # Check that file names can be set back to camel case
+    mouseClick(waitForObject(names.lower_case_file_names_CheckBox))
+    if headerEdit:
+        check.compare(headerEdit.text, changedClassName + ".h")
+    check.compare(sourceEdit.text, changedClassName + ".cpp")
+    check.verify(not waitForObject(names.lower_case_file_names_CheckBox).checked)
+
+    # Check that the wizard can't proceed with empty values
+    def clearAndRestoreEdit(edit):
+        previousText = edit.text
+        type(edit, "<Ctrl+a>")
+        type(edit, "<Delete>")
+        waiting.waitFor(lambda: edit.text == '')
+        check.verify(not waitForObjectExists(names.qt_Wizard_Finish_Button).enabled)
+        type(edit, previousText)
+        waiting.waitFor(lambda: edit.text == previousText)
+        check.verify(waitForObjectExists(names.qt_Wizard_Finish_Button).enabled)
+
+    clearAndRestoreEdit(sourceEdit)
+    if headerEdit:
+        clearAndRestoreEdit(headerEdit)
+    clearAndRestoreEdit(classNameEdit)
+
+
+# tst_new_project_no_qt
+
+def testForMissingQt(check, page):
+    check.compare(waitForObjectExists(names.qt_ConfigTable).rowCount, 0)
+    check.compare(waitForObjectExists(names.no_Qt_version_Label).text,
+                  'No registered Qt version found. Click here to browse for a Qt version.')
+    check.verify(not waitForObjectExists(names.qt_Wizard_Next_Button).enabled,
+                 '"Next" button should be disabled when there are no Qt versions')
+    check.verify(not waitForObjectExists(names.qt_Wizard_Finish_Button).enabled,
+                 '"Finish" button should be disabled when there are no Qt versions')
+
+
+# Checkers run on the same page in this order, so checkers changing the page come last
+wizardCheckGroups = {
+    "defaults": {"withQt": True,
+                 "checkers": [(NEW_PROJECT_DIALOG, testNewProjectDialogDefaults),
+                              (WIZARD_PAGE1, testWizardPage1Defaults),
+                              (WIZARD_PAGE2, testWizardPage2Defaults),
+                              (WIZARD_PAGE3, testWizardPage3Defaults)]},
+    "edit": {"withQt": True,
+             "checkers": [(NEW_PROJECT_DIALOG, setNames),
+                          (WIZARD_PAGE3, testWizardPage3Edit)]},
+    "no_qt": {"withQt": False,
+              "checkers": [(WIZARD_PAGE2, testForMissingQt)]}
+}
+
+
+# Results of wizard checks by devenv process and Qt configuration. Only results from the
+# current devenv are kept, so a new session or an updated Qt VS Tools never reuses results.
+class WizardCheckStore:
+
+    FORMAT = 1
+
+    def __init__(self, fileName=None):
+        self.fileName = fileName or os.path.join(vsinstances.cacheDir(), "wizard_checks.json")
+
+    @staticmethod
+    def key(withQt, qtDirs):
+        context = currentApplicationContext()
+        qtKey = ";".join(sorted(qtDir["path"].lower() for qtDir in qtDirs)) if withQt else ""
+        return "%s@%s:%s|%s" % (context.pid, context.startTime, rootSuffix, qtKey)
+
+    def _read(self):
+        stored = vsinstances.loadCache(self.fileName, self.FORMAT)
+        return stored if isinstance(stored, dict) else {}
+
+    def passedGroups(self, key):
+        return self._read().get(key, {})
+
+    def save(self, key, groupResults):
+        stored = self._read()
+        stored = {key: dict(stored.get(key, {}), **groupResults)}
+        if not vsinstances.saveCache(self.fileName, self.FORMAT, stored):
+            test.warning("Could not store results of wizard checks.", self.fileName)
+
+
+# Runs the wizard checks of the given group. If the group's checks already passed in the current
+# devenv session, their results are reported without crawling the wizards again. Otherwise the
+# checks of all groups with the same Qt configuration which didn't pass yet run in one crawl
+# when in a devenv session.
+def crawlQtWizards(group):
+    withQt = wizardCheckGroups[group]["withQt"]
+    qtDirs = readQtDirs()
+    if not qtDirs:
+        test.fatal("No Qt versions known", "Did you set SQUISH_VSTOOLS_QTDIRS correctly?")
+        return
+    startApp()
+    store = WizardCheckStore()
+    key = store.key(withQt, qtDirs)
+    passed = store.passedGroups(key) if session.isAttached() else {}
+    if group in passed:
+        test.log("The wizard checks passed in an earlier test case using this devenv session.")
+        for templateName, results in passed[group].items():
+            with TestSection(templateName):
+                replayResults(results)
+        closeMainWindow()
+        return
+    if withQt and not configureQtVersions(qtDirs):
+        closeMainWindow()
+        return
+
+    crawler = WizardCrawler(qtDirs, withQt)
+    for name, checks in wizardCheckGroups.items():
+        shared = session.isAttached() and checks["withQt"] == withQt and name not in passed
+        if name == group or shared:
+            for page, checker in checks["checkers"]:
+                crawler.addChecker(page, checker, name, name == group)
+    crawler.crawl()
+    if session.isAttached():
+        store.save(key, {name: crawler.groupResults(name) for name in crawler.groups()
+                         if crawler.groupPassed(name)})
+
+    if withQt:
+        clearQtVersions()
+    closeMainWindow()
@@ -9,6 +9,7 @@ source("../../shared/utils.py")
 source("../shared/scripts/config_utils.py")
 
 import names
+import waiting
 
 
 def main():
@@ -49,9 +50,10 @@ def main():
                              "Is the Qt version's path shown in edit as entered?")
             for _ in qtDirs:
                 clickButton(waitForObject(names.remove_Button))
-        snooze(1)
+            waiting.waitFor(lambda: waitForObjectExists(names.dataGrid_Table).rowCount == 0,
+                            5000)
         clickButton(waitForObject(closeButton))
-        waitFor(lambda: not object.exists(names.options_Dialog))
+        waiting.waitFor(lambda: not object.exists(names.options_Dialog))
     # Check that Qt versions were removed
     openVsToolsMenu()
     mouseClick(waitForObject(names.pART_Popup_Qt_Versions_MenuItem))
@@ -75,7 +77,7 @@ def main():
         typeToEdit(names.name_Edit, "some name")
         testErrorMessage(True)
     clickButton(waitForObject(names.options_Cancel_Button))
-    waitFor(lambda: not object.exists(names.options_Dialog))
+    waiting.waitFor(lambda: not object.exists(names.options_Dialog))
     closeMainWindow()
 
 
@@ -12,6 +12,7 @@ import shutil
 import names
 from newprojectdialog import NewProjectDialog
 from testsection import TestSection
+import waiting
 
 workDir = os.getenv("SQUISH_VSTOOLS_WORKDIR")
 createdProjects = set()
@@ -21,7 +22,7 @@ def waitAndTestForStoppedDebugger(expectStopped=True):
     expectedState = "stopped" if expectStopped else "running"
     with TestSection("Verify %s state" % expectedState):
         continueButton = waitForObjectExists(names.continue_Button, 70000)
-        test.verify(waitFor(lambda: continueButton.enabled == expectStopped, 8000),
+        test.verify(waiting.waitFor(lambda: continueButton.enabled == expectStopped, 8000),
                     "Is the debugger %s as expected?" % expectedState)
         test.compare(waitForObjectExists(names.thread_ComboBox).enabled, expectStopped,
                     "Is the 'Thread' combo box enabled?")
@@ -71,7 +72,7 @@ def main():
     mouseClick(waitForObject(quickItem))
     clickButton(waitForObject(names.microsoft_Visual_Studio_Next_Button))
     type(waitForObject(names.comboBox_Edit), workDir)
-    waitFor(lambda: waitForObject(names.comboBox_Edit).text == workDir)
+    waiting.waitFor(lambda: waitForObject(names.comboBox_Edit).text == workDir)
     projectName = waitForObjectExists(names.msvs_Project_name_Edit).text
     createdProjects.add(projectName)
     clickButton(waitForObject(names.microsoft_Visual_Studio_Create_Button))
@@ -89,22 +90,22 @@ def main():
                 "Continue Button doesn't exist?")
     type(waitForObject(names.msvs_WpfTextView_WPFControl), "<F5>") # Start debugging
     if getMsvsProductLine() == "2019":
-        if waitFor(lambda: currentApplicationContext().name != "devenv", 16000):
+        if waiting.waitFor(lambda: currentApplicationContext().name != "devenv", 16000):
             fixAppContext()
         else:
             test.warning("Waiting for changed app context timed out")
     waitAndTestForStoppedDebugger()
     type(waitForObject(names.msvs_WpfTextView_WPFControl), "<F5>") # Continue
-    waitFor(qtQuickAppContextExists, 30000)
+    waiting.waitFor(qtQuickAppContextExists, 30000)
     fixAppContext()
     waitAndTestForStoppedDebugger(False)
     # When stopping the app using MSVS' menu, Squish considers this a crashed AUT
     # Instead, close the app's window
     fixAppContext(projectName)
     type(waitForObject(names.qtQuickApplication_Window), "<Alt+F4>")
-    waitFor(lambda: not qtQuickAppContextExists(), 5000)
+    waiting.waitFor(lambda: not qtQuickAppContextExists(), 5000)
     with TestSection("Verify finished state"):
-        test.verify(waitFor(lambda: not object.exists(names.continue_Button), 5000),
+        test.verify(waiting.waitFor(lambda: not object.exists(names.continue_Button), 5000),
                     "Continue Button doesn't exist anymore?")
         test.verify(not waitForObjectExists(names.thread_ComboBox).enabled,
                     "Is the 'Thread' combo box disabled?")
@@ -116,6 +117,6 @@ def main():
 
 def cleanup():
     if workDir:
-        waitFor(lambda: len(applicationContextList()) == 0, 5000)
+        waiting.waitFor(lambda: len(applicationContextList()) == 0, 5000)
         for project in createdProjects:
             shutil.rmtree(os.path.join(workDir, project))
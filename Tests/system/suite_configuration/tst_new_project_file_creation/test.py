@@ -9,76 +9,20 @@ source("../../shared/utils.py")
 source("../shared/scripts/config_utils.py")
 
 import os
-import re
 import shutil
 
 from newprojectdialog import NewProjectDialog
 from testsection import TestSection
+import filewatch
 import names
-
-
-def testCompareRegex(text, pattern, message):
-    regex = re.compile(pattern)
-    test.verify(regex.match(text), '%s ("%s"/"%s")' % (message, text, pattern))
+import profiler
+import templateindex
+import waiting
 
 
 def listExpectedWrittenFiles(workDir, projectName, templateName, cmakeBased):
-    projectDirectory = os.path.join(workDir, projectName, projectName)
-
-    def prependProjectDirectory(fileName):
-        return os.path.join(projectDirectory, fileName)
-
-    if cmakeBased:
-        projFiles = [os.path.join(workDir, projectName, "CMakeLists.txt"),
-                     os.path.join(workDir, projectName, "CMakePresets.json"),
-                     os.path.join(workDir, projectName, "CMakeUserPresets.json")]
-        projFiles.extend(map(prependProjectDirectory, ["CMakeLists.txt",
-                                                       "qt.cmake"]))
-    else:
-        projFiles = [os.path.join(workDir, projectName, projectName + ".sln")]
-        projFiles.extend(map(prependProjectDirectory, [projectName + ".vcxproj",
-                                                       projectName + ".vcxproj.filters",
-                                                       projectName + ".vcxproj.user"]))
-
-    if templateName == "Qt Designer Custom Widget":
-        return projFiles + list(map(prependProjectDirectory, [projectName + ".cpp",
-                                                              projectName + ".h",
-                                                              projectName + "Plugin.cpp",
-                                                              projectName + "Plugin.h",
-                                                              projectName.lower() + "plugin.json"]))
-    elif templateName == "Qt Console Application":
-        return projFiles + [prependProjectDirectory("main.cpp")]
-    elif templateName == "Qt ActiveQt Server":
-        return projFiles + list(map(prependProjectDirectory, [projectName + ".cpp",
-                                                              projectName + ".def",
-                                                              projectName + ".h",
-                                                              projectName + ".ico",
-                                                              projectName + ".rc",
-                                                              projectName + ".ui"]))
-    elif templateName == "Qt Quick Application":
-        if not cmakeBased:
-            projFiles.append(prependProjectDirectory("qml.qrc"))
-        return projFiles + list(map(prependProjectDirectory, ["main.cpp",
-                                                              "main.qml"]))
-    elif templateName == "Qt Empty Application":
-        return projFiles
-    elif templateName == "Qt Class Library":
-        return projFiles + list(map(prependProjectDirectory, [projectName + ".cpp",
-                                                              projectName + ".h",
-                                                              projectName.lower() + "_global.h"]))
-    elif templateName == "Qt Test Application":
-        return projFiles + list(map(prependProjectDirectory, [projectName + ".cpp"]))
-    elif templateName == "Qt Widgets Application":
-        if not cmakeBased:
-            projFiles.append(prependProjectDirectory(projectName + ".qrc"))
-        return projFiles + list(map(prependProjectDirectory, ["main.cpp",
-                                                              projectName + ".cpp",
-                                                              projectName + ".h",
-                                                              projectName + ".ui"]))
-    else:
-        test.fatal("Unexpected template '%s'" % templateName,
-                   "You might need to update function listExpectedWrittenFiles()")
-        return []
+    return [os.path.join(workDir, projectName, fileName) for fileName in
+            templateindex.index().expectedFiles(templateName, projectName, cmakeBased)]
 
 
 def getExpectedBuiltFile(projectsBuiltBefore, workDir, projectName, templateName, cmakeBased):
@@ -99,26 +43,15 @@ def getExpectedBuiltFile(projectsBuiltBefore, workDir, projectName, templateName
             pass
         collapse(waitForObject(names.platforms_ComboBox))
         buildPath = os.path.join(buildPath, "Debug")
-    if templateName in ["Qt Console Application",
-                        "Qt Quick Application",
-                        "Qt Test Application",
-                        "Qt Widgets Application"]:
-        return os.path.join(buildPath, projectName + ".exe")
-    elif templateName in ["Qt Class Library",
-                          "Qt Designer Custom Widget"]:
-        return os.path.join(buildPath, projectName + ".dll")
-    elif templateName == "Qt Empty Application":
-        return os.path.join(buildPath)
-    else:
-        test.fatal("Unexpected template '%s'" % templateName,
-                   "You might need to update function getExpectedBuiltFile()")
-        return ""
+    builtFile = templateindex.index().builtFile(templateName, projectName)
+    return os.path.join(buildPath, builtFile) if builtFile else buildPath
 
 
+@profiler.profiled
 def buildSolution(projectName, cmakeBased):
     if cmakeBased:
         labelObject = waitForObjectExists(names.selectStartupItemLabel)
-        if not waitFor(lambda: str(labelObject.text).startswith(projectName), 230000):
+        if not waiting.waitFor(lambda: str(labelObject.text).startswith(projectName), 230000):
             test.fail("Could not start building the project.",
                       "Did configuring fail?")  # See QTVSADDINBUG-1162
             return False
@@ -127,8 +60,8 @@ def buildSolution(projectName, cmakeBased):
                              else names.build_Build_Solution_MenuItem))
     # make sure building finished
     labelObject = waitForObjectExists(names.selectStartupItemLabel)
-    waitFor(lambda: not labelObject.enabled, 5000)
-    waitFor(lambda: labelObject.enabled, 100000)
+    waiting.waitFor(lambda: not labelObject.enabled, 5000)
+    waiting.waitFor(lambda: labelObject.enabled, 100000)
     return True
 
 
@@ -154,14 +87,7 @@ def main():
         dialog.filterForQtProjects()
         listedTemplates = list(dialog.getListedTemplates())
 
-    expectedFiles = {"Qt ActiveQt Server": "^ActiveQtServer\d*\.cpp$",
-                     "Qt Class Library": "^QtClassLibrary\d*\.cpp$",
-                     "Qt Console Application": "^main\.cpp$",
-                     "Qt Designer Custom Widget": "^QtDesigner.*\.cpp$",
-                     "Qt Empty Application": None,
-                     "Qt Quick Application": "^main\.qml$",
-                     "Qt Test Application": "^QtTest\d*\.cpp$",
-                     "Qt Widgets Application": "^QtWidgets.*\.cpp$"}
+    templates = templateindex.index()
 
     with NewProjectDialog() as dialog:
         projectsBuiltBefore = 0
@@ -174,11 +100,11 @@ def main():
             with TestSection("Build System: " + buildSystem):
                 for listItem, templateName in listedTemplates:
                     with TestSection(templateName):
-                        if not templateName in expectedFiles:
+                        if not templateName in templates:
                             test.warning("Template %s is not supported, skipping..."
                                          % templateName)
                             continue
-                        if (cmakeBased and templateName in ["Qt ActiveQt Server"]):
+                        if cmakeBased and not templates.supportsCMake(templateName):
                             test.log("Skipping '%s' because it does not support CMake."
                                      % templateName)
                             continue
@@ -186,13 +112,13 @@ def main():
                         mouseClick(waitForObject(listItem))
                         clickButton(waitForObject(names.microsoft_Visual_Studio_Next_Button))
                         type(waitForObject(names.comboBox_Edit), workDir)
-                        waitFor(lambda: waitForObject(names.comboBox_Edit).text == workDir)
+                        waiting.waitFor(lambda: waitForObject(names.comboBox_Edit).text == workDir)
                         projectName = waitForObjectExists(names.msvs_Project_name_Edit).text
                         createdProjects.add(projectName)
                         clickButton(waitForObject(names.microsoft_Visual_Studio_Create_Button))
                         fixAppContext()
                         clickButton(waitForObject(names.qt_Wizard_Next_Button))
-                        if (templateName in ["Qt ActiveQt Server"]):
+                        if not templates.supportsCMake(templateName):
                             test.verify(not findObject(names.ProjectModel_ComboBox).enabled,
                                         "'%s' should not allow changing its build system"
                                         % templateName)
@@ -202,20 +128,17 @@ def main():
                             expand(waitForObject(names.ProjectModel_ComboBox))
                             mouseClick(waitForObject(names.projectModelSelection_ComboBoxItem
                                                      | {"text": buildSystem}))
-                        if templateName in ["Qt ActiveQt Server",
-                                            "Qt Class Library",
-                                            "Qt Designer Custom Widget",
-                                            "Qt Test Application",
-                                            "Qt Widgets Application"]:
+                        if templates.hasClassPage(templateName):
                             clickButton(waitForObject(names.qt_Wizard_Next_Button))
                         clickButton(waitForObject(names.qt_Wizard_Finish_Button))
                         fixAppContext()
-                        if expectedFiles[templateName]:
+                        openedFile = templates.openedFile(templateName, projectName)
+                        if openedFile:
                             try:
-                                waitFor(lambda: object.exists(names.qt_Microsoft_Visual_Studio_cpp_TabItem), 1000)
-                                testCompareRegex(waitForObjectExists(names.qt_cpp_Label).text,
-                                                 expectedFiles[templateName],
-                                                 "Was a file with an expected name opened?")
+                                tabItem = names.qt_Microsoft_Visual_Studio_cpp_TabItem
+                                waiting.waitFor(lambda: object.exists(tabItem), 1000)
+                                test.compare(waitForObjectExists(names.qt_cpp_Label).text,
+                                             openedFile, "Was a file with an expected name opened?")
                             except:
                                 message = "There was no expected file opened for %s" % templateName
                                 test.fail(message)
@@ -224,8 +147,10 @@ def main():
                                            "No file should be opened for %s" % templateName)
                         written = listExpectedWrittenFiles(workDir, projectName,
                                                            templateName, cmakeBased)
-                        test.verify(waitFor(lambda: all(map(os.path.exists, written)), 12000),
-                                    "Were all expected files created?")
+                        missing = filewatch.waitForPaths(written, 12000,
+                                                         "Files of new project")
+                        if not test.verify(not missing, "Were all expected files created?"):
+                            test.log("Missing files", "\n".join(missing))
                         if (templateName != "Qt ActiveQt Server"
                             and buildSolution(projectName, cmakeBased)):
                             builtFile = getExpectedBuiltFile(projectsBuiltBefore, workDir,
@@ -234,8 +159,8 @@ def main():
                             tstFunction = (test.xverify if buildSystem.startswith("Qt Visual")
                                            and templateName == "Qt Designer Custom Widget"
                                            else test.verify)
-                            tstFunction(waitFor(lambda: os.path.exists(builtFile), 15000),
-                                        "Was %s built as expected?" % builtFile)
+                            missing = filewatch.waitForPaths([builtFile], 15000, "Build output")
+                            tstFunction(not missing, "Was %s built as expected?" % builtFile)
                             projectsBuiltBefore += 1
                         mouseClick(waitForObject(globalnames.file_MenuItem))
                         mouseClick(waitForObject(names.file_Close_Folder_MenuItem if cmakeBased
@@ -248,6 +173,6 @@ def main():
 
 def cleanup():
     if workDir:
-        waitFor(lambda: len(applicationContextList()) == 0, 5000)
+        waiting.waitFor(lambda: len(applicationContextList()) == 0, 5000)
         for project in createdProjects:
             shutil.rmtree(os.path.join(workDir, project))
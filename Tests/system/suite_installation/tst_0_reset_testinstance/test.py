@@ -10,6 +10,8 @@ source("../../shared/utils.py")
 import builtins
 import subprocess
 
+import waiting
+
 # This script does not actually test anything. It only resets the experimental environment the
 # tests are running in so you can start from scratch. After running the script, the environment
 # will not contain any user settings. Only nagsreens from first start will already be handled.
@@ -23,7 +25,7 @@ def main():
     installationPath = getAppProperty("installationPath")
     closeMainWindow()
     # Wait for MSVS to shut down
-    waitFor(lambda: not currentApplicationContext().isRunning)
+    waiting.waitFor(lambda: not currentApplicationContext().isRunning)
     snooze(2)
     # Reset the experimental environment
     subprocess.check_output('"%s/VSSDK/VisualStudioIntegration/Tools/Bin/'
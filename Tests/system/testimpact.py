@@ -0,0 +1,500 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Selects the test cases of the Squish suites affected by a change. The impact map is built by
+# statically analyzing each test case: starting from the top level code and init(), main() and
+# cleanup() of its test.py, it follows the scripts it sources, the modules it imports and the
+# functions, classes and object names (names.X, globalnames.X) it uses. Each test case is mapped
+# to the keys it reaches:
+#
+#   path                  - the top level code of a script or module, e.g. "shared/utils.py"
+#   path::name            - a function, class or object name defined in it
+#   template:<name>       - a project template named in a string, e.g. "Qt Quick Application"
+#   template:*            - all templates, when a test case iterates over the listed templates
+#   template-files:*      - the files of all templates, when it also builds the projects
+#
+# A change to a script is mapped to the names whose definitions changed, so e.g. changing one
+# object in names.py selects only the test cases using that object or an object contained in it.
+# Changes to the manifests of Templates/<dir> select the test cases using that template, changes
+# to its other files only those building it. Other product code is mapped by SOURCE_AREAS, and
+# files it doesn't know select all test cases.
+#
+#   python testimpact.py select [--base REV] [--write] [--json] [PATH ...]
+#   python testimpact.py map [--json]
+#
+# "select" compares the working tree to the merge base with REV (default: HEAD), or takes the
+# changed PATHs relative to the repository root. It prints a TEST_CASES line per suite, which
+# --write puts into the suites' suite.conf for a pre-merge run.
+
+import argparse
+import ast
+import collections
+import json
+import os
+import subprocess
+import sys
+import warnings
+
+import shardrunner
+
+SYSTEM_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.normpath(os.path.join(SYSTEM_DIR, os.pardir, os.pardir))
+GLOBAL_SCRIPTS_DIR = os.path.join(SYSTEM_DIR, "shared")
+sys.path.insert(0, GLOBAL_SCRIPTS_DIR)
+
+import templateindex  # noqa: E402
+
+SUITES = ["suite_configuration", "suite_installation"]
+# Suites whose test cases depend on each other and must all run if one of them is selected
+DEPENDENT_SUITES = {"suite_installation"}
+# Functions Squish calls in a test.py
+ENTRY_POINTS = ["init", "main", "cleanup"]
+ALL_TEMPLATES = "template:*"
+ALL_TEMPLATE_FILES = "template-files:*"
+# Objects used to build projects. Test cases iterating over the templates and using one of them
+# depend on the templates' files, others only on what the wizards read from the manifests.
+BUILD_OBJECTS = ["build_Build_Solution_MenuItem", "build_BuildAll_MenuItem"]
+
+ALL = "all"
+NOTHING = "nothing"
+TEMPLATES = "templates"
+# What the system tests exercise of the files outside Tests/system/suite_* and the scripts used
+# by them, by path prefix relative to the repository root. The first matching prefix counts.
+SOURCE_AREAS = [
+    ("Templates/", TEMPLATES),
+    ("QtVsTools.Wizards/", TEMPLATES),
+    ("Tests/system/offline/", NOTHING),
+    ("Tests/system/tests/", NOTHING),
+    ("Tests/system/README.md", NOTHING),
+    ("Tests/system/shardrunner.py", NOTHING),
+    ("Tests/system/testimpact.py", NOTHING),
+    ("Tests/tools/", NOTHING),
+    ("Tests/", ALL),
+    ("doc/", NOTHING),
+    ("Changelog", NOTHING),
+    ("README.md", NOTHING),
+    ("GUIDELINES.", NOTHING),
+    ("", ALL),
+]
+
+
+def relativePath(path):
+    return os.path.relpath(path, REPO_DIR).replace(os.sep, "/")
+
+
+def testKey(suite, testCase):
+    return "%s/%s" % (suite, testCase)
+
+
+class Script:
+    # The top level definitions of a Python file, and the code run when it is loaded
+
+    def __init__(self, path, source):
+        self.path = path
+        self.definitions = {}
+        self.topLevel = []
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # e.g. invalid escape sequences in object names
+            tree = ast.parse(source, path)
+        for node in tree.body:
+            names = []
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names = [node.name]
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                names = [target.id for target in targets if isinstance(target, ast.Name)]
+            for name in names:
+                self.definitions.setdefault(name, []).append(node)
+            if not names:
+                self.topLevel.append(node)
+
+    # Dumps of the top level code and the definitions, to compare two versions of a file
+    def fingerprints(self):
+        prints = {None: [ast.dump(node) for node in self.topLevel]}
+        for name, nodes in self.definitions.items():
+            prints[name] = [ast.dump(node) for node in nodes]
+        return prints
+
+
+def readScript(path):
+    with open(path, encoding="utf-8-sig") as f:
+        return Script(path, f.read())
+
+
+def _containsCall(node, attribute):
+    return any(isinstance(child, ast.Call) and isinstance(child.func, ast.Attribute)
+               and child.func.attr == attribute for child in ast.walk(node))
+
+
+def iteratesTemplates(node):
+    # Loops over dialog.getListedTemplates() or a variable assigned from it
+    listed = {target.id for child in ast.walk(node) if isinstance(child, ast.Assign)
+              and _containsCall(child.value, "getListedTemplates")
+              for target in child.targets if isinstance(target, ast.Name)}
+    for child in ast.walk(node):
+        if isinstance(child, (ast.For, ast.comprehension)):
+            if _containsCall(child.iter, "getListedTemplates") or any(
+                    isinstance(name, ast.Name) and name.id in listed
+                    for name in ast.walk(child.iter)):
+                return True
+    return False
+
+
+class TestCaseAnalysis:
+    # Follows what a test.py uses. test.py and the scripts it sources share one namespace, modules
+    # it imports have their own.
+
+    def __init__(self, analyzer, suiteDir, testCaseDir):
+        self.analyzer = analyzer
+        self.testCaseDir = testCaseDir
+        self.scriptDirs = [os.path.join(suiteDir, "shared", "scripts"), GLOBAL_SCRIPTS_DIR]
+        self.namespace = []
+        self.keys = set()
+        self.visited = set()
+        self.pending = collections.deque()
+        self.importCache = {}
+
+    def run(self):
+        testScript = os.path.join(self.testCaseDir, "test.py")
+        self._addToNamespace(testScript)
+        self._reach(testScript, None)
+        for name in ENTRY_POINTS:
+            self._reach(testScript, name)
+        while self.pending:
+            path, name = self.pending.popleft()
+            script = self.analyzer.script(path)
+            nodes = script.topLevel if name is None else script.definitions.get(name, [])
+            for node in nodes:
+                self._walk(script, node)
+        return self.keys
+
+    def _reach(self, path, name):
+        script = self.analyzer.script(path)
+        if script is None:
+            return
+        if name is not None:
+            if name not in script.definitions:
+                return
+            self._reach(path, None)
+        if (path, name) not in self.visited:
+            self.visited.add((path, name))
+            self.keys.add(self.analyzer.key(path, name))
+            self.pending.append((path, name))
+
+    def _sourcedPath(self, node):
+        # Squish resolves sourced files relative to the test case
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id == "source" and node.args
+                and isinstance(node.args[0], ast.Constant)):
+            return os.path.normpath(os.path.join(self.testCaseDir, node.args[0].value))
+        return None
+
+    # Adds a script and the scripts it sources to the namespace of test.py
+    def _addToNamespace(self, path):
+        script = self.analyzer.script(path)
+        if path in self.namespace or script is None:
+            return
+        self.namespace.append(path)
+        for node in script.topLevel:
+            for child in ast.walk(node):
+                sourced = self._sourcedPath(child)
+                if sourced:
+                    self._addToNamespace(sourced)
+
+    def _module(self, name):
+        for directory in self.scriptDirs:
+            path = os.path.join(directory, *name.split(".")) + ".py"
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _imports(self, script):
+        # Names bound by the imports of a file: module aliases and names imported from modules
+        if script.path in self.importCache:
+            return self.importCache[script.path]
+        modules, names = {}, {}
+        for node in ast.walk(ast.Module(body=script.topLevel, type_ignores=[])):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    path = self._module(alias.name)
+                    if path:
+                        modules[alias.asname or alias.name] = path
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                path = self._module(node.module)
+                if path:
+                    for alias in node.names:
+                        names[alias.asname or alias.name] = (path, alias.name)
+        self.importCache[script.path] = modules, names
+        return modules, names
+
+    def _resolve(self, script, name):
+        modules, names = self._imports(script)
+        if name in script.definitions:
+            return [(script.path, name)]
+        if name in names:
+            return [names[name]]
+        if name in modules:
+            return [(modules[name], None)]
+        if script.path in self.namespace:
+            for path in self.namespace:
+                other = self.analyzer.script(path)
+                if name in other.definitions:
+                    return [(path, name)]
+                otherModules, otherNames = self._imports(other)
+                if name in otherNames:
+                    return [otherNames[name]]
+                if name in otherModules:
+                    return [(otherModules[name], None)]
+        return []
+
+    def _walk(self, script, node):
+        modules, _ = self._imports(script)
+        if script.path in self.namespace:
+            for path in self.namespace:
+                modules = dict(self._imports(self.analyzer.script(path))[0], **modules)
+        if iteratesTemplates(node):
+            self.keys.add(ALL_TEMPLATES)
+        for child in ast.walk(node):
+            if isinstance(child, ast.Import):
+                for alias in child.names:
+                    path = self._module(alias.name)
+                    if path:
+                        self._reach(path, None)
+            elif isinstance(child, ast.ImportFrom) and child.module:
+                path = self._module(child.module)
+                if path:
+                    self._reach(path, None)
+                    for alias in child.names:
+                        self._reach(path, alias.name)
+            elif self._sourcedPath(child):
+                self._addToNamespace(self._sourcedPath(child))
+                self._reach(self._sourcedPath(child), None)
+            elif isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+                for path, name in self._resolve(script, child.id):
+                    self._reach(path, name)
+            elif (isinstance(child, ast.Attribute) and isinstance(child.value, ast.Name)
+                  and child.value.id in modules):
+                self._reach(modules[child.value.id], child.attr)
+            elif isinstance(child, ast.Constant) and isinstance(child.value, str) \
+                    and child.value in self.analyzer.templates:
+                self.keys.add("template:" + child.value)
+
+
+class Analyzer:
+
+    def __init__(self, systemDir=SYSTEM_DIR, templatesDir=templateindex.TEMPLATES_DIR):
+        self.systemDir = systemDir
+        self.templatesDir = templatesDir
+        self.scripts = {}
+        self.reached = None
+        # Template directories by the templates' names
+        self.templates = {name: template["directory"] for name, template
+                          in templateindex.buildIndex(templatesDir).items()}
+
+    def script(self, path):
+        if path not in self.scripts:
+            try:
+                self.scripts[path] = readScript(path)
+            except (OSError, SyntaxError, UnicodeDecodeError):
+                self.scripts[path] = None
+        return self.scripts[path]
+
+    def key(self, path, name=None):
+        return relativePath(path) + ("" if name is None else "::" + name)
+
+    def testCases(self):
+        testCases = []
+        for suite in SUITES:
+            suiteDir = os.path.join(self.systemDir, suite)
+            if os.path.exists(os.path.join(suiteDir, "suite.conf")):
+                testCases.extend((suite, testCase)
+                                 for _, testCase in shardrunner.listTestCases(suiteDir))
+        return testCases
+
+    # The keys reached by each test case
+    def analyze(self):
+        if self.reached is not None:
+            return self.reached
+        reached = {}
+        for suite, testCase in self.testCases():
+            suiteDir = os.path.join(self.systemDir, suite)
+            analysis = TestCaseAnalysis(self, suiteDir, os.path.join(suiteDir, testCase))
+            keys = analysis.run()
+            if ALL_TEMPLATES in keys and any(key.rpartition("::")[2] in BUILD_OBJECTS
+                                             for key in keys):
+                keys.add(ALL_TEMPLATE_FILES)
+            reached[testKey(suite, testCase)] = keys
+        self.reached = reached
+        return reached
+
+
+# The test cases reaching each key
+def impactMap(reached):
+    impact = {}
+    for testCase, keys in reached.items():
+        for key in keys:
+            impact.setdefault(key, []).append(testCase)
+    return {key: sorted(testCases) for key, testCases in sorted(impact.items())}
+
+
+def sourceArea(path):
+    for prefix, area in SOURCE_AREAS:
+        if path.startswith(prefix):
+            return area
+    return ALL
+
+
+# Files of a template read by the wizards and by templateindex.py
+def isManifest(fileName):
+    return (fileName.endswith((".vstemplate", ".vstemplate_TT", ".qrc"))
+            or fileName == "CMakeLists.txt")
+
+
+# Keys affected by changing "path", a file relative to the repository root. "oldSource" returns
+# the file's content before the change, None if it didn't exist. Returns ALL if the change may
+# affect any test case.
+def changedKeys(analyzer, path, oldSource):
+    absolutePath = os.path.join(REPO_DIR, *path.split("/"))
+    systemPath = relativePath(analyzer.systemDir) + "/"
+    parts = path[len(systemPath):].split("/") if path.startswith(systemPath) else []
+    if path.endswith(".py") and (parts[:1] == ["shared"] or parts[1:2] == ["shared"]
+                                 or absolutePath in analyzer.scripts):
+        new = analyzer.scripts.get(absolutePath)
+        if new is None:
+            # Not used by any test case, or removed, or it cannot be parsed
+            return {analyzer.key(absolutePath)}
+        try:
+            old = Script(absolutePath, oldSource) if oldSource is not None else None
+        except SyntaxError:
+            old = None
+        if old is None:
+            return {analyzer.key(absolutePath)}
+        oldPrints, newPrints = old.fingerprints(), new.fingerprints()
+        return {analyzer.key(absolutePath, name) for name in set(oldPrints) | set(newPrints)
+                if oldPrints.get(name) != newPrints.get(name)}
+    if parts[:1] and parts[0] in SUITES:
+        if len(parts) > 2 and parts[1].startswith("tst_"):
+            return {"testcase:%s/%s" % (parts[0], parts[1])}
+        if parts[1:2] != ["shared"]:
+            return {"suite:" + parts[0]}
+    area = sourceArea(path)
+    if area == TEMPLATES:
+        templatesPath = relativePath(analyzer.templatesDir) + "/"
+        directory, _, fileName = path[len(templatesPath):].partition("/")
+        names = [name for name, templateDir in analyzer.templates.items()
+                 if path.startswith(templatesPath) and templateDir == directory]
+        keys = {"template:" + name for name in (names or analyzer.templates)}
+        if names and "/" not in fileName and not isManifest(fileName):
+            return keys | {ALL_TEMPLATE_FILES}
+        return keys | {ALL_TEMPLATES, ALL_TEMPLATE_FILES}
+    return set() if area == NOTHING else ALL
+
+
+# Returns the selected test cases by suite, in the order of their suite.conf
+def select(analyzer, changes):
+    reached = analyzer.analyze()
+    impact = impactMap(reached)
+    selected = set()
+    for path, oldSource in changes:
+        keys = changedKeys(analyzer, path, oldSource)
+        if keys == ALL:
+            selected.update(reached)
+            break
+        for key in keys:
+            if key.startswith("testcase:"):
+                selected.add(key[len("testcase:"):])
+            elif key.startswith("suite:"):
+                selected.update(testCase for testCase in reached
+                                if testCase.startswith(key[len("suite:"):] + "/"))
+            selected.update(impact.get(key, []))
+    result = {}
+    for suite, testCase in analyzer.testCases():
+        if suite in DEPENDENT_SUITES and any(key.startswith(suite + "/") for key in selected):
+            selected.add(testKey(suite, testCase))
+        if testKey(suite, testCase) in selected:
+            result.setdefault(suite, []).append(testCase)
+    return result
+
+
+def _git(*arguments):
+    return subprocess.run(["git"] + list(arguments), cwd=REPO_DIR, capture_output=True,
+                          text=True, check=True).stdout
+
+
+# Changed files of the working tree and their content at the merge base with "base"
+def gitChanges(base):
+    mergeBase = _git("merge-base", base, "HEAD").strip()
+    changes = []
+    for path in _git("diff", "--name-only", "--no-renames", mergeBase).splitlines():
+        try:
+            oldSource = _git("show", "%s:%s" % (mergeBase, path))
+        except subprocess.CalledProcessError:
+            oldSource = None
+        changes.append((path, oldSource))
+    return changes
+
+
+def writeSuiteConf(suiteDir, testCases):
+    confFile = os.path.join(suiteDir, "suite.conf")
+    with open(confFile, encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(confFile, "w", encoding="utf-8") as f:
+        for line in lines:
+            if line.startswith("TEST_CASES="):
+                line = "TEST_CASES=%s\n" % " ".join(testCases)
+            f.write(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Select the system tests affected by a change.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    selectParser = commands.add_parser("select", help="print the affected test cases")
+    selectParser.add_argument("paths", nargs="*", metavar="PATH",
+                              help="changed file relative to the repository root")
+    selectParser.add_argument("--base", default="HEAD",
+                              help="revision to compare the working tree to (default: HEAD)")
+    selectParser.add_argument("--write", action="store_true",
+                              help="write the selection to TEST_CASES in the suites' suite.conf")
+    selectParser.add_argument("--json", action="store_true", help="print the selection as JSON")
+    mapParser = commands.add_parser("map", help="print the test cases reaching each key")
+    mapParser.add_argument("--json", action="store_true", help="print the map as JSON")
+    args = parser.parse_args(argv)
+
+    analyzer = Analyzer()
+    if args.command == "map":
+        impact = impactMap(analyzer.analyze())
+        if args.json:
+            print(json.dumps(impact, indent=2))
+        else:
+            for key, testCases in impact.items():
+                print("%s: %s" % (key, " ".join(testCases)))
+        return 0
+
+    if args.paths:
+        changes = []
+        for path in args.paths:
+            try:
+                oldSource = _git("show", "HEAD:" + path.replace("\\", "/"))
+            except (OSError, subprocess.CalledProcessError):
+                oldSource = None
+            changes.append((path.replace("\\", "/"), oldSource))
+    else:
+        changes = gitChanges(args.base)
+    selection = select(analyzer, changes)
+    if args.json:
+        print(json.dumps(selection, indent=2))
+    for suite in SUITES:
+        testCases = selection.get(suite, [])
+        if not args.json:
+            print("%s: TEST_CASES=%s" % (suite, " ".join(testCases)))
+        if args.write:
+            writeSuiteConf(os.path.join(SYSTEM_DIR, suite), testCases)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
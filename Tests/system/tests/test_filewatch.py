@@ -0,0 +1,160 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "shared"))
+
+import filewatch
+import waiting
+
+
+def createLater(delay, paths):
+    def create():
+        time.sleep(delay)
+        for path in paths:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w"):
+                pass
+    thread = threading.Thread(target=create)
+    thread.start()
+    return thread
+
+
+class WatcherTests:
+    # Run for each kind of watcher by the subclasses below
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.project = os.path.join(self.root, "QtWidgetsApplication1")
+        self.paths = [os.path.join(self.project, "QtWidgetsApplication1.sln"),
+                      os.path.join(self.project, "QtWidgetsApplication1", "main.cpp"),
+                      os.path.join(self.project, "QtWidgetsApplication1", "x64", "Debug",
+                                   "QtWidgetsApplication1.exe")]
+        self.created = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def factory(self, root, paths):
+        watcher = self.watcherClass(root, paths)
+        self.created.append(watcher)
+        return watcher
+
+    def test_pathsCreatedInNewDirectories(self):
+        thread = createLater(0.2, self.paths)
+        started = time.monotonic()
+        missing = filewatch.waitForPaths(self.paths, 10000, watcherFactory=self.factory)
+        thread.join()
+        self.assertEqual(missing, [])
+        self.assertLess(time.monotonic() - started, filewatch.RECHECK_INTERVAL)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(waiting.records[-1]["success"], True)
+
+    def test_timeoutReportsMissingPaths(self):
+        createLater(0, self.paths[:1]).join()
+        missing = filewatch.waitForPaths(self.paths, 300, "Files of new project",
+                                         watcherFactory=self.factory)
+        self.assertEqual(missing, self.paths[1:])
+        self.assertEqual(waiting.records[-1]["description"], "Files of new project")
+        self.assertEqual(waiting.records[-1]["success"], False)
+        self.assertGreaterEqual(waiting.records[-1]["duration"], 300)
+
+    def test_existingPathsNeedNoWatcher(self):
+        createLater(0, self.paths).join()
+        self.assertEqual(filewatch.waitForPaths(self.paths, 0, watcherFactory=self.factory), [])
+        self.assertEqual(self.created, [])
+
+    def test_watchRoot(self):
+        self.assertEqual(filewatch.watchRoot(self.paths), self.root)
+        createLater(0, self.paths[:1]).join()
+        self.assertEqual(filewatch.watchRoot(self.paths), self.project)
+
+
+class PausingWatcher:
+    # Returns right away like the offline runner's watcher, as if time passed
+
+    def __init__(self):
+        self.pauses = []
+
+    def wait(self, timeout):
+        self.pauses.append(timeout)
+        return False
+
+    def close(self):
+        pass
+
+
+class BusyWatcher:
+    # Wakes up early on changes of other files in the tree, creating the path after some of them
+
+    def __init__(self, path, wakeUps):
+        self.path = path
+        self.wakeUps = wakeUps
+
+    def wait(self, timeout):
+        time.sleep(0.001)
+        self.wakeUps -= 1
+        if self.wakeUps == 0:
+            createLater(0, [self.path]).join()
+        return True
+
+    def close(self):
+        pass
+
+
+class TestSimulatedTime(unittest.TestCase):
+
+    def test_pausesCountAsWaitingTime(self):
+        watcher = PausingWatcher()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "project", "main.cpp")
+            savedFactory = filewatch.watcherFactory
+            filewatch.watcherFactory = lambda root, paths: watcher
+            try:
+                self.assertEqual(filewatch.waitForPaths([path], 2500), [path])
+            finally:
+                filewatch.watcherFactory = savedFactory
+        self.assertEqual(watcher.pauses, [1.0, 1.0, 0.5])
+        self.assertEqual(waiting.records[-1]["duration"], 2500)
+
+    def test_earlyWakeUpsDontCountAsPauses(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "project", "main.cpp")
+            watcher = BusyWatcher(path, 20)
+            started = time.monotonic()
+            self.assertEqual(filewatch.waitForPaths([path], 15000,
+                                                    watcherFactory=lambda root, paths: watcher),
+                             [])
+        self.assertEqual(watcher.wakeUps, 0)
+        self.assertLessEqual(waiting.records[-1]["duration"],
+                             (time.monotonic() - started) * 1000)
+
+
+class TestSnapshotWatcher(WatcherTests, unittest.TestCase):
+    watcherClass = filewatch.SnapshotWatcher
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is only available on Linux")
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+    watcherClass = filewatch.InotifyWatcher
+
+
+@unittest.skipUnless(sys.platform == "win32", "Change notifications are only available on Windows")
+class TestChangeNotificationWatcher(WatcherTests, unittest.TestCase):
+    watcherClass = filewatch.ChangeNotificationWatcher
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import importlib
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "shared"))
+
+import flakiness
+import waiting
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fakeSquishModule(clock, outcomes):
+    # waitForObject() times out or finds the object as given by the outcomes of its calls
+    module = types.ModuleType("squish")
+
+    def waitForObject(objectOrName, timeout=20000):
+        found = outcomes.pop(0)
+        clock.now += 0.5 if found else timeout / 1000.0
+        if not found:
+            raise LookupError("Object not found: %s" % objectOrName)
+        return "object"
+    module.waitForObject = waitForObject
+    return module
+
+
+class TestFlakiness(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.savedDatabase = os.environ.pop("SQUISH_VSTOOLS_FLAKINESS_DB", None)
+        importlib.reload(flakiness)
+        self.databaseFile = os.path.join(self.directory.name, "flakiness.db")
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        flakiness.close()
+        os.environ.pop("SQUISH_VSTOOLS_FLAKINESS_DB", None)
+        if self.savedDatabase is not None:
+            os.environ["SQUISH_VSTOOLS_FLAKINESS_DB"] = self.savedDatabase
+        importlib.reload(flakiness)
+        self.directory.cleanup()
+
+    def history(self, testCase, step, outcomes, kind="waitForObject"):
+        database = flakiness.Database(self.databaseFile, testCase)
+        for success in outcomes:
+            database.record(step, kind, 100 if success else 20000, success)
+        database.close()
+
+    def test_disabled(self):
+        squish = fakeSquishModule(self.clock, [True])
+        waitForObject = squish.waitForObject
+        flakiness.install(squish)
+        self.assertIs(squish.waitForObject, waitForObject)
+        self.assertFalse(os.path.exists(self.databaseFile))
+
+    def test_retries(self):
+        testCase = os.path.basename(os.path.dirname(os.getcwd())) + "/" + os.path.basename(
+            os.getcwd())
+        self.history(testCase, ":Flaky_Button", [True] * 9 + [False])
+        self.history(testCase, ":Broken_Button", [False] * 10)
+        self.history(testCase, ":Stable_Button", [True] * 10)
+        self.history("suite/tst_other", ":Stable_Button", [False, True])
+        flakiness.enable(self.databaseFile, self.clock)
+        self.assertEqual(flakiness.database().scores(),
+                         {":Flaky_Button": 0.1, ":Broken_Button": 0.0, ":Stable_Button": 0.0})
+
+        outcomes = [False, True, False, False, False, False]
+        squish = fakeSquishModule(self.clock, outcomes)
+        namespace = {"waitForObject": squish.waitForObject}
+        flakiness.install(squish, namespace)
+        flakiness.install(squish, namespace)
+        self.assertIs(namespace["waitForObject"], squish.waitForObject)
+        # A flaky wait is retried until it succeeds, at most MAX_RETRIES times
+        self.assertEqual(squish.waitForObject(":Flaky_Button", 1000), "object")
+        with self.assertRaisesRegex(LookupError, ":Flaky_Button"):
+            namespace["waitForObject"](":Flaky_Button", 1000)
+        # Other timeouts fail right away
+        with self.assertRaisesRegex(LookupError, ":Broken_Button"):
+            squish.waitForObject(":Broken_Button", 1000)
+        self.assertEqual(outcomes, [])
+
+        report = {entry["step"]: entry for entry in flakiness.database().report()}
+        self.assertEqual([(entry["attempts"], entry["timeouts"], entry["recovered"],
+                           entry["wasted"]) for entry in (report[":Flaky_Button"],
+                                                          report[":Broken_Button"])],
+                         [(15, 5, 1, 24.0), (11, 11, 0, 201.0)])
+        self.assertEqual(report[":Flaky_Button"]["score"], 5 / 15)
+        self.assertEqual(flakiness.objectStep({"type": "Button", "text": "OK"}),
+                         '{"text": "OK", "type": "Button"}')
+
+    def test_waitUntil(self):
+        flakiness.enable(self.databaseFile, self.clock)
+        self.assertFalse(waiting.waitFor(lambda: False, 0, "Never"))
+        self.assertTrue(waiting.waitFor(lambda: True, 0, "Always"))
+        flakiness.close()
+        self.history(flakiness.currentTestCase(), "Sometimes", [True, False], "waitFor")
+        conditions = iter([False, True])
+        self.assertTrue(waiting.waitUntil(lambda: next(conditions), 0, "Sometimes"))
+        report = {entry["step"]: entry for entry in flakiness.database().report()}
+        self.assertEqual([(report[step]["attempts"], report[step]["timeouts"],
+                           report[step]["kind"]) for step in ("Never", "Always", "Sometimes")],
+                         [(1, 1, "waitFor"), (1, 0, "waitFor"), (4, 2, "waitFor")])
+
+    def test_report(self):
+        self.history("suite/tst_a", ":A", [True, False, False])
+        self.history("suite/tst_b", ":B", [False])
+        output = os.path.join(self.directory.name, "report.json")
+        with open(output, "w") as f:
+            savedStdout = sys.stdout
+            sys.stdout = f
+            try:
+                self.assertEqual(flakiness.main(["report", self.databaseFile, "--json",
+                                                 "--top", "1"]), 0)
+            finally:
+                sys.stdout = savedStdout
+        with open(output) as f:
+            entries = json.load(f)
+        self.assertEqual([(entry["testCase"], entry["wasted"], entry["score"])
+                          for entry in entries], [("suite/tst_a", 40.0, 2 / 3)])
+        database = flakiness.Database(self.databaseFile, "")
+        self.assertIn("suite/tst_b: :B", flakiness.formatReport(database.report()))
+        database.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "shared"))
+
+import objectmaps
+
+GLOBAL_NAMES = """
+from objectmaphelper import *
+main_Window = {"id": "MainWindow", "text": Wildcard("*Visual Studio"), "type": "Window"}
+menuBar = {"container": main_Window, "type": "MenuBar"}
+file_MenuItem = {"container": menuBar, "text": "File", "type": "MenuItem"}
+dialog_Window = {"text": "Options", "type": "Dialog"}
+"""
+
+NAMES = """
+from objectmaphelper import *
+import globalnames
+dialog_Window = globalnames.dialog_Window
+list_View = {"container": dialog_Window, "name": "List", "type": "ListView"}
+list_Item = {"container": list_View, "text": RegularExpression("^Qt"), "type": "ListViewItem"}
+second_Item = list_Item | {"occurrence": 2}
+ok_Button = {"container": dialog_Window, "text": "OK", "type": "Button"}
+same_Button = {"container": globalnames.dialog_Window, "text": "Ok", "type": "Button"}
+file_MenuItem = {"container": globalnames.menuBar, "text": "Datei", "type": "MenuItem"}
+lost_Label = {"container": closed_Window, "type": "Label"}
+ok_Button = {"container": dialog_Window, "text": "Ok", "type": "Button"}
+"""
+
+TEST = """
+source("../../shared/utils.py")
+import names
+
+
+def main():
+    clickButton(waitForObject(names.ok_Button))
+    mouseClick(waitForObject(names.second_Item))
+    mouseClick(waitForObject(globalnames.file_MenuItem))
+"""
+
+
+class FakeSquish:
+    # Finds any object, counting the lookups of real names
+
+    def __init__(self):
+        self.finds = 0
+
+    def find(self, realName):
+        self.finds += 1
+        return ("object", objectmaps._key(realName))
+
+
+class TestObjectMaps(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.systemDir = self.directory.name
+        for path, content in [("shared/globalnames.py", GLOBAL_NAMES),
+                              ("suite_a/shared/scripts/names.py", NAMES),
+                              ("suite_a/tst_a/test.py", TEST)]:
+            path = os.path.join(self.systemDir, *path.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(textwrap.dedent(content))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_index(self):
+        index = objectmaps.buildIndex(self.systemDir)
+        objects = index["objects"]
+        self.assertEqual(objects["globalnames.file_MenuItem"]["chain"],
+                         ["globalnames.menuBar", "globalnames.main_Window"])
+        self.assertEqual(objects["globalnames.main_Window"]["properties"]["text"],
+                         {"wildcard": "*Visual Studio"})
+        secondItem = objects["suite_a/names.second_Item"]
+        self.assertEqual((secondItem["properties"], secondItem["container"], secondItem["depth"]),
+                         ({"text": {"regex": "^Qt"}, "type": "ListViewItem", "occurrence": 2},
+                          "suite_a/names.list_View", 2))
+        # Aliases are resolved to the objects they refer to
+        self.assertEqual(objects["suite_a/names.dialog_Window"]["aliasOf"],
+                         "globalnames.dialog_Window")
+        self.assertEqual(objects["suite_a/names.list_View"]["chain"],
+                         ["globalnames.dialog_Window"])
+        self.assertEqual(objects["suite_a/names.ok_Button"]["properties"]["text"], "Ok")
+        self.assertEqual([(problem["kind"], problem["name"]) for problem in index["problems"]],
+                         [("duplicate", "suite_a/names.ok_Button"),
+                          ("missing", "suite_a/names.closed_Window"),
+                          ("redefined", "suite_a/names.ok_Button"),
+                          ("shadowed", "suite_a/names.file_MenuItem"),
+                          ("unused", "suite_a/names.file_MenuItem"),
+                          ("unused", "suite_a/names.lost_Label"),
+                          ("unused", "suite_a/names.same_Button")])
+        self.assertEqual(index["problems"][0]["names"],
+                         ("suite_a/names.ok_Button", "suite_a/names.same_Button"))
+
+    def test_cache(self):
+        cacheFile = os.path.join(self.systemDir, "cache", "object_maps.json")
+        index = objectmaps.ObjectMapIndex(self.systemDir, cacheFile)
+        self.assertTrue(index.built)
+        cached = objectmaps.ObjectMapIndex(self.systemDir, cacheFile)
+        self.assertFalse(cached.built)
+        self.assertEqual(cached.chain("suite_a/names.second_Item"),
+                         ["suite_a/names.list_View", "globalnames.dialog_Window"])
+        self.assertEqual(cached.objects, index.objects)
+        self.assertEqual(len(cached.problemsOfKind("unused")), 3)
+        with open(os.path.join(self.systemDir, "suite_a", "tst_a", "test.py"), "a") as f:
+            f.write("    test.log(names.lost_Label)\n")
+        self.assertTrue(objectmaps.ObjectMapIndex(self.systemDir, cacheFile).built)
+
+    def test_systemTestMaps(self):
+        index = objectmaps.buildIndex()
+        self.assertEqual(index["objects"]["suite_configuration/names.qt_Wizard_Next_Button"]
+                         ["chain"], ["globalnames.qt_Wizard_Window"])
+        self.assertEqual([problem for problem in index["problems"]
+                          if problem["kind"] != "unused"], [])
+
+    def test_containerCache(self):
+        squish = FakeSquish()
+        cache = objectmaps.ContainerCache(squish.find)
+        dialog = {"text": "Options", "type": "Dialog"}
+        listView = {"container": dialog, "name": "List", "type": "ListView"}
+        for occurrence in (1, 2, 3):
+            item = {"container": listView, "type": "ListViewItem", "occurrence": occurrence}
+            realName = cache.realName(item)
+        self.assertEqual(realName["container"], ("object", objectmaps._key(
+            {"container": ("object", objectmaps._key(dialog)), "name": "List",
+             "type": "ListView"})))
+        self.assertEqual(squish.finds, 2)
+        self.assertIs(cache.realName(dialog), dialog)
+
+        # Objects found in a section are forgotten when it ends
+        cache.startSection()
+        cache.realName({"container": {"text": "Other", "type": "Dialog"}, "type": "Button"})
+        cache.endSection()
+        self.assertEqual(len(cache.found), 2)
+
+        # and when their window is closed
+        cache.invalidate(dialog)
+        self.assertEqual(cache.found, {})
+        cache.realName(item)
+        self.assertEqual(squish.finds, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
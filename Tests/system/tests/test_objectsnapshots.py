@@ -0,0 +1,205 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import importlib
+import os
+import sys
+import tempfile
+import textwrap
+import types
+import unittest
+
+SYSTEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SYSTEM_DIR, "shared"))
+sys.path.insert(1, os.path.join(SYSTEM_DIR, "offline"))
+
+import objectmaps
+import objectsnapshots
+import simulator
+import squish
+
+GLOBAL_NAMES = """
+from objectmaphelper import *
+dialog_Window = {"text": "Options", "type": "Dialog"}
+"""
+
+NAMES = """
+from objectmaphelper import *
+import globalnames
+list_View = {"container": globalnames.dialog_Window, "name": "List", "type": "ListView"}
+list_Item = {"container": list_View, "text": RegularExpression("^Qt"), "type": "ListViewItem"}
+second_Item = list_Item | {"occurrence": 2}
+name_Label = {"container": globalnames.dialog_Window, "text": "Name:", "type": "Label"}
+name_Edit = {"container": globalnames.dialog_Window, "leftObject": name_Label, "type": "Edit"}
+ok_Button = {"container": globalnames.dialog_Window, "text": "OK", "type": "Button"}
+close_Button = {"container": globalnames.dialog_Window, "text": "Close", "type": "Button"}
+"""
+
+TEST = """
+def main():
+    clickButton(waitForObject(names.ok_Button))
+"""
+
+
+def optionsDialog():
+    dialog = simulator.SimObject("Dialog", text="Options")
+    pane = simulator.SimObject("Pane", dialog)
+    listView = simulator.SimObject("ListView", pane, name="List")
+    for text in ("Qt A", "Qt B", "Qt C"):
+        simulator.SimObject("ListViewItem", listView, text=text)
+    label = simulator.SimObject("Label", pane, text="Name:")
+    simulator.Edit(pane, text="Project").leftObject = label
+    simulator.SimObject("Button", dialog, text="OK")
+    return dialog
+
+
+class TestObjectSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.systemDir = os.path.join(self.directory.name, "system")
+        self.writeMaps(NAMES)
+        self.savedSnapshots = os.environ.pop("SQUISH_VSTOOLS_SNAPSHOTS", None)
+        importlib.reload(objectsnapshots)
+
+    def tearDown(self):
+        os.environ.pop("SQUISH_VSTOOLS_SNAPSHOTS", None)
+        if self.savedSnapshots is not None:
+            os.environ["SQUISH_VSTOOLS_SNAPSHOTS"] = self.savedSnapshots
+        importlib.reload(objectsnapshots)
+        objectmaps._index = None
+        self.directory.cleanup()
+
+    def writeMaps(self, names):
+        for path, content in [("shared/globalnames.py", GLOBAL_NAMES),
+                              ("suite_a/shared/scripts/names.py", names),
+                              ("suite_a/tst_a/test.py", TEST)]:
+            path = os.path.join(self.systemDir, *path.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(textwrap.dedent(content))
+        return objectmaps.buildIndex(self.systemDir)["objects"]
+
+    def test_recordAndCheck(self):
+        objects = self.writeMaps(NAMES)
+        snapshot = objectsnapshots.record(optionsDialog(), objects, "17.10.1", "suite_a/tst_a",
+                                          squish)
+        # The pane isn't used by the maps, its children are recorded as children of the dialog
+        self.assertEqual([(parent, objectType) for parent, objectType, _, _ in snapshot.objects],
+                         [(None, "Dialog"), (0, "ListView"), (1, "ListViewItem"),
+                          (1, "ListViewItem"), (1, "ListViewItem"), (0, "Label"), (0, "Edit"),
+                          (0, "Button")])
+        self.assertEqual(snapshot.objects[6][2:], [{"text": "Project"}, 5])
+        self.assertEqual(snapshot.expected, {"globalnames.dialog_Window": 0,
+                                             "suite_a/names.list_View": 1,
+                                             "suite_a/names.list_Item": 2,
+                                             "suite_a/names.second_Item": 3,
+                                             "suite_a/names.name_Label": 5,
+                                             "suite_a/names.name_Edit": 6,
+                                             "suite_a/names.ok_Button": 7})
+
+        path = os.path.join(self.directory.name, "snapshots", "17.10.1", "a.json.gz")
+        snapshot.save(path)
+        snapshots = objectsnapshots.loadSnapshots(os.path.dirname(os.path.dirname(path)))
+        self.assertEqual(list(snapshots), ["17.10.1"])
+        self.assertEqual(snapshots["17.10.1"][0].objects, snapshot.objects)
+        self.assertEqual(objectsnapshots.checkSnapshots(snapshots, objects), [])
+
+        # Changed maps break names in the snapshots of the version
+        objects = self.writeMaps(NAMES.replace('"OK"', '"Ok"')
+                                      .replace('"occurrence": 2', '"occurrence": 3')
+                                      .replace('"Name:"', 'Wildcard("Name*")'))
+        problems = objectsnapshots.checkSnapshots(snapshots, objects)
+        self.assertEqual([(problem["kind"], problem["name"], problem["version"])
+                          for problem in problems],
+                         [("missing", "suite_a/names.ok_Button", "17.10.1"),
+                          ("moved", "suite_a/names.second_Item", "17.10.1")])
+        self.assertEqual(problems[1]["message"], "suite_a/names.second_Item matches "
+                                                 "ListViewItem 'Qt C' instead of "
+                                                 "ListViewItem 'Qt B'")
+
+    def test_versions(self):
+        objects = self.writeMaps(NAMES)
+        older = optionsDialog()
+        newer = optionsDialog()
+        newer.children[-1].properties["text"] = "Okay"
+        snapshots = {version: [objectsnapshots.record(dialog, objects, version, "suite_a/tst_a",
+                                                      squish)]
+                     for version, dialog in [("17.10.1", older), ("17.12.0", newer)]}
+        # The newer version never matched ok_Button, so only comparing the versions finds it
+        self.assertNotIn("suite_a/names.ok_Button", snapshots["17.12.0"][0].expected)
+        problems = objectsnapshots.checkSnapshots(snapshots, objects)
+        self.assertEqual([(problem["kind"], problem["name"], problem["version"])
+                          for problem in problems],
+                         [("version", "suite_a/names.ok_Button", "17.12.0")])
+        self.assertEqual(problems[0]["message"], "suite_a/names.ok_Button matches Button 'OK' "
+                                                 "in 17.10.1, but no object in 17.12.0")
+
+        # Snapshots of other test cases aren't compared
+        snapshots["17.12.0"][0].testCase = "suite_a/tst_b"
+        self.assertEqual(objectsnapshots.checkSnapshots(snapshots, objects), [])
+
+    def test_leftObjectByBounds(self):
+        # Squish for Windows has no explicit links, the leftObject is found by the objects' bounds
+        Rectangle = types.SimpleNamespace
+        bounds = {"Dialog": Rectangle(x=0, y=0, width=400, height=300),
+                  "Label": Rectangle(x=10, y=10, width=50, height=20),
+                  "Button": Rectangle(x=10, y=100, width=50, height=20),
+                  "Edit": Rectangle(x=70, y=12, width=200, height=20)}
+        tree = {"Dialog": ["Label", "Button", "Edit"]}
+        api = types.SimpleNamespace(properties=lambda obj: {"type": obj},
+                                    children=lambda obj: tree.get(obj, []),
+                                    globalBounds=lambda obj: bounds[obj])
+        objects = {"a." + objectType: {"properties": {"type": objectType}, "container": None,
+                                       "aliasOf": None} for objectType in bounds}
+        snapshot = objectsnapshots.record("Dialog", objects,
+                                          squishModule=types.SimpleNamespace(object=api))
+        self.assertEqual([node[3] for node in snapshot.objects], [None, None, None, 1])
+
+    def test_install(self):
+        objectmaps._index = objectmaps.ObjectMapIndex(
+            self.systemDir, os.path.join(self.directory.name, "cache", "object_maps.json"))
+        directory = os.path.join(self.directory.name, "snapshots")
+        simulation = simulator.Simulation()
+        simulation.current = simulation.addContext("devenv")
+        simulation.current.addWindow(optionsDialog())
+        squish.setSimulation(simulation)
+        self.addCleanup(squish.setSimulation, None)
+        module = types.ModuleType("squish")
+        for name in ("waitForObject", "waitForObjectExists", "object"):
+            setattr(module, name, getattr(squish, name))
+        namespace = {"waitForObject": module.waitForObject}
+
+        objectsnapshots.install(module, namespace)
+        self.assertIs(namespace["waitForObject"], squish.waitForObject)
+        objectsnapshots.enable(directory)
+        objectsnapshots.install(module, namespace, lambda: "17.12.0")
+        button = {"container": {"text": "Options", "type": "Dialog"}, "text": "OK",
+                  "type": "Button"}
+        self.assertEqual(namespace["waitForObject"](button).describe(), "Button 'OK'")
+        module.waitForObjectExists({"container": button["container"], "type": "ListViewItem",
+                                    "text": "Qt B"})
+        # Objects found inside of other objects aren't recorded
+        dialog = module.waitForObject(button["container"])
+        module.waitForObjectExists({"container": dialog, "type": "Label"})
+        snapshots = objectsnapshots.loadSnapshots(directory)
+        self.assertEqual([len(snapshot.expected) for snapshot in snapshots["17.12.0"]], [7])
+        self.assertEqual(os.listdir(os.path.join(directory, "17.12.0")),
+                         ["%s_1.json.gz" % objectsnapshots.flakiness.currentTestCase()
+                          .replace("/", "_")])
+
+    def test_storedSnapshots(self):
+        snapshots = objectsnapshots.loadSnapshots()
+        if not snapshots:
+            self.skipTest("No snapshots in %s" % objectsnapshots.SNAPSHOT_DIR)
+        problems = objectsnapshots.checkSnapshots(snapshots, objectmaps.buildIndex()["objects"])
+        self.assertEqual(["%s: %s" % (problem["version"], problem["message"])
+                          for problem in problems], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
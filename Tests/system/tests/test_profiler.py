@@ -0,0 +1,121 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "shared"))
+
+import profiler
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.savedProfile = os.environ.pop("SQUISH_VSTOOLS_PROFILE", None)
+        importlib.reload(profiler)
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        os.environ.pop("SQUISH_VSTOOLS_PROFILE", None)
+        if self.savedProfile is not None:
+            os.environ["SQUISH_VSTOOLS_PROFILE"] = self.savedProfile
+        importlib.reload(profiler)
+        self.directory.cleanup()
+
+    def test_disabled(self):
+        @profiler.profiled
+        def helper():
+            return 42
+
+        with profiler.span("section"):
+            self.assertEqual(helper(), 42)
+        self.assertFalse(profiler.isEnabled())
+        self.assertEqual(profiler.events(), [])
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_nestedSpans(self):
+        profiler.enable(self.directory.name, self.clock)
+
+        @profiler.profiled
+        def startApp():
+            self.clock.now += 10
+
+        with profiler.span("outer"):
+            startApp()
+            with profiler.span("inner", "page"):
+                self.clock.now += 2
+            self.clock.now += 1
+        events = {event["name"]: event for event in profiler.events()}
+        self.assertEqual(events["startApp"]["cat"], "helper")
+        self.assertEqual((events["startApp"]["ts"], events["startApp"]["dur"]), (0, 10000000))
+        self.assertEqual((events["inner"]["ts"], events["inner"]["dur"]), (10000000, 2000000))
+        self.assertEqual(events["outer"]["dur"], 13000000)
+        self.assertEqual(events["outer"]["args"]["self"], 1000000)
+
+    def test_spanEndsOnException(self):
+        profiler.enable(self.directory.name, self.clock)
+
+        @profiler.profiled
+        def failing():
+            self.clock.now += 1
+            raise RuntimeError("object not found")
+
+        with self.assertRaises(RuntimeError):
+            with profiler.span("section"):
+                failing()
+        self.assertEqual([event["name"] for event in profiler.events()], ["failing", "section"])
+
+    def test_traceWrittenWhenTopLevelSpanEnds(self):
+        profiler.enable(self.directory.name, self.clock)
+        with profiler.span("first"):
+            with profiler.span("nested"):
+                self.clock.now += 1
+            self.assertEqual(os.listdir(self.directory.name), [])
+        self.assertEqual(len(profiler.readTrace(profiler.traceFile())), 3)  # With metadata
+        with profiler.span("second"):
+            self.clock.now += 1
+        self.assertEqual(os.listdir(self.directory.name), [os.path.basename(profiler.traceFile())])
+        names = [event["name"] for event in profiler.readTrace(profiler.traceFile())
+                 if event["ph"] == "X"]
+        self.assertEqual(names, ["nested", "first", "second"])
+
+    def test_summaryAndMerge(self):
+        profiler.enable(self.directory.name, self.clock)
+        for duration in (3, 5):
+            with profiler.span("wizard"):
+                with profiler.span("startApp"):
+                    self.clock.now += duration
+                self.clock.now += 1
+        first = profiler.traceFile()
+        second = os.path.join(self.directory.name, "other.json")
+        profiler.write(second)
+        summary = profiler.summarize(profiler.merge([first, second]))
+        self.assertEqual([(entry["name"], entry["count"], entry["total"], entry["self"],
+                           entry["max"]) for entry in summary],
+                         [("wizard", 4, 20.0, 4.0, 6.0), ("startApp", 4, 16.0, 16.0, 5.0)])
+        self.assertEqual({event["pid"] for event in profiler.merge([first, second])}, {1, 2})
+        self.assertIn("startApp", profiler.formatSummary(summary, 2))
+        self.assertNotIn("startApp", profiler.formatSummary(summary, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+SYSTEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SYSTEM_DIR, "shared"))
+
+import qtinstallations
+
+QT_TOOL = os.path.join(SYSTEM_DIR, "offline", "qttool.py")
+
+
+@unittest.skipIf(sys.platform == "win32", "The stand-in tools are scripts run by their shebang")
+class TestQtInstallations(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.directory.name, "qttool.log")
+        os.environ["SQUISH_VSTOOLS_QTTOOL_LOG"] = self.log
+        self.cacheFile = os.path.join(self.directory.name, "cache", "qt_installations.json")
+        self.qt6 = self.qtDir("6.7.2", ["qtpaths", "qmake"])
+        self.qt5 = self.qtDir("5.15.2", ["qtpaths", "qmake"])
+        self.empty = self.qtDir("6.5.3", [])
+
+    def tearDown(self):
+        del os.environ["SQUISH_VSTOOLS_QTTOOL_LOG"]
+        self.directory.cleanup()
+
+    def qtDir(self, version, tools):
+        qtDir = os.path.join(self.directory.name, "Qt", version, "msvc2019_64")
+        os.makedirs(os.path.join(qtDir, "bin"))
+        for tool in tools:
+            path = os.path.join(qtDir, "bin", tool)
+            with open(QT_TOOL, encoding="utf-8") as source, open(path, "w") as f:
+                f.write(source.read().replace("/usr/bin/env python3", sys.executable, 1))
+            os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return qtDir
+
+    def runs(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log, encoding="utf-8") as f:
+            return [os.path.relpath(line.split()[0], self.directory.name) + " " + line.split()[1]
+                    for line in f]
+
+    def test_probe(self):
+        registry = qtinstallations.Registry(self.cacheFile)
+        results = registry.probe([self.qt6, self.qt5, self.empty])
+        self.assertEqual(list(results), [self.qt6, self.qt5, self.empty])
+        self.assertEqual(results[self.qt6]["tool"], os.path.join(self.qt6, "bin", "qtpaths"))
+        properties = results[self.qt6]["properties"]
+        self.assertEqual((properties["QT_VERSION"], properties["QT_INSTALL_BINS"]),
+                         ("6.7.2", self.qt6 + "/bin"))
+        self.assertEqual(properties["QT_SYSROOT"], "")
+        # qtpaths of Qt 5 cannot answer queries
+        self.assertEqual(results[self.qt5]["tool"], os.path.join(self.qt5, "bin", "qmake"))
+        self.assertEqual(results[self.qt5]["properties"]["QT_VERSION"], "5.15.2")
+        self.assertEqual(results[self.empty], 'Cannot find qtpaths or qmake in "%s"' % self.empty)
+        self.assertEqual(sorted(self.runs()), [
+            os.path.join("Qt", "5.15.2", "msvc2019_64", "bin", "qmake") + " -query",
+            os.path.join("Qt", "5.15.2", "msvc2019_64", "bin", "qtpaths") + " -v",
+            os.path.join("Qt", "6.7.2", "msvc2019_64", "bin", "qtpaths") + " --query",
+            os.path.join("Qt", "6.7.2", "msvc2019_64", "bin", "qtpaths") + " -v"])
+
+        self.assertEqual(registry.property(os.path.join(self.qt5, "bin", "qmake"), "QT_VERSION"),
+                         "5.15.2")
+        with self.assertRaisesRegex(LookupError, "Cannot find qtpaths or qmake"):
+            registry.properties(os.path.join(self.directory.name, "missing"))
+        broken = self.qtDir("6.6.0", [])
+        with open(os.path.join(broken, "bin", "qmake.bat"), "w"):
+            pass
+        self.assertEqual(qtinstallations.Registry(self.cacheFile).probe([broken])[broken],
+                         'Cannot query qtpaths or qmake in "%s"' % broken)
+
+    def test_cache(self):
+        qtDirs = [self.qt6, self.qt5]
+        expected = qtinstallations.Registry(self.cacheFile).probe(qtDirs)
+        runs = len(self.runs())
+        registry = qtinstallations.Registry(self.cacheFile)
+        self.assertEqual(registry.probe(qtDirs), expected)
+        self.assertEqual((len(self.runs()), registry.queries), (runs, 0))
+
+        started = time.perf_counter()
+        for _ in range(1000):
+            registry.property(self.qt6, "QT_VERSION")
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(len(self.runs()), runs)
+
+        # Updating Qt invalidates the entry of the tool
+        tool = os.path.join(self.qt6, "bin", "qtpaths")
+        modified = os.stat(tool).st_mtime + 10
+        os.utime(tool, (modified, modified))
+        self.assertEqual(registry.probe(qtDirs), expected)
+        self.assertEqual((len(self.runs()), registry.queries), (runs + 2, 1))
+
+    def test_server(self):
+        registry = qtinstallations.Registry(self.cacheFile)
+        with qtinstallations.Server(registry, 0) as server:
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                port = server.server_address[1]
+                results = qtinstallations.queryServer(port, [self.qt6, self.empty])
+                self.assertEqual(results[self.qt6]["properties"]["QT_VERSION"], "6.7.2")
+                os.environ["SQUISH_VSTOOLS_QT_CACHE_PORT"] = str(port)
+                try:
+                    self.assertEqual(qtinstallations.problems([self.qt6, self.qt5, self.empty]),
+                                     ['Cannot find qtpaths or qmake in "%s"' % self.empty])
+                finally:
+                    del os.environ["SQUISH_VSTOOLS_QT_CACHE_PORT"]
+                self.assertEqual(registry.queries, 3)
+            finally:
+                server.shutdown()
+                thread.join()
+        with self.assertRaises(OSError):
+            qtinstallations.queryServer(port, [self.qt6], timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
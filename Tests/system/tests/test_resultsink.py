@@ -0,0 +1,157 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import glob
+import importlib
+import os
+import sys
+import tempfile
+import types
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "shared"))
+
+import resultsink
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fakeTestModule():
+    # The parts of Squish's test module which report results
+    module = types.ModuleType("test")
+    module.reported = []
+    module.contexts = []
+    module.fixateResultContext = lambda ancestorFrameIndex=1: module.contexts.append(
+        ancestorFrameIndex)
+    module.restoreResultContext = lambda: module.contexts.pop()
+    # Results are reported at the caller of the wrapper
+    module.compare = lambda actual, expected, message="": (actual == expected
+                                                           and module.contexts == [1])
+    module.verify = lambda condition, message="": bool(condition)
+    module.fail = lambda message, detail="": module.reported.append(("FAIL", message))
+    module.fatal = lambda message, detail="": module.reported.append(("FATAL", message))
+    module.log = lambda message, detail="": module.reported.append(("LOG", message))
+    module.startSection = lambda title, description="": None
+    module.endSection = lambda: None
+    return module
+
+
+class TestResultSink(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.savedResults = os.environ.pop("SQUISH_VSTOOLS_RESULTS", None)
+        importlib.reload(resultsink)
+        self.clock = FakeClock()
+        self.test = fakeTestModule()
+
+    def tearDown(self):
+        resultsink.finish()
+        os.environ.pop("SQUISH_VSTOOLS_RESULTS", None)
+        if self.savedResults is not None:
+            os.environ["SQUISH_VSTOOLS_RESULTS"] = self.savedResults
+        importlib.reload(resultsink)
+        self.directory.cleanup()
+
+    def results(self, pattern="*.jsonl"):
+        fileNames = glob.glob(os.path.join(self.directory.name, pattern))
+        self.assertEqual(len(fileNames), 1)
+        return resultsink.readResults(fileNames[0])
+
+    def test_disabled(self):
+        compare = self.test.compare
+        resultsink.install(self.test)
+        self.assertIs(self.test.compare, compare)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_streaming(self):
+        resultsink.enable(self.directory.name, self.clock)
+        resultsink.install(self.test, "suite_configuration/tst_example")
+        resultsink.install(self.test, "suite_configuration/tst_example")
+        self.clock.now = 0.5
+        self.assertTrue(self.test.compare(1, 1, "Equal?"))
+        self.assertEqual(self.test.contexts, [])
+        self.test.startSection("Wizard")
+        self.test.startSection("Page")
+        self.clock.now = 1.5
+        self.assertFalse(self.test.verify(False))
+        self.test.log("Not a result")
+        # Results are buffered until a section ends
+        self.assertEqual([record["type"] for record in self.results()], ["start"])
+        self.test.endSection()
+        records = self.results()
+        self.assertEqual([(record["type"], record.get("kind"), record.get("message"),
+                           record["section"], record["duration"]) for record in records[1:]],
+                         [("result", "PASS", "Equal?", [], 0.5),
+                          ("result", "FAIL", "Verification", ["Wizard", "Page"], 1.0),
+                          ("section", None, None, ["Wizard", "Page"], 1.0)])
+        self.assertEqual(records[1]["detail"], "'1' and '1'")
+
+        # Errors are written right away
+        self.test.fatal("Crashed", "devenv is gone")
+        self.assertEqual(self.results()[-1]["message"], "Crashed")
+        self.assertEqual(self.test.reported, [("LOG", "Not a result"), ("FATAL", "Crashed")])
+
+        resultsink.finish()
+        self.assertEqual(self.results()[-1]["counts"], {"PASS": 1, "FAIL": 1, "FATAL": 1})
+        testSuite = ElementTree.parse(glob.glob(os.path.join(self.directory.name,
+                                                             "*.xml"))[0]).find("testsuite")
+        self.assertEqual((testSuite.get("name"), testSuite.get("tests"),
+                          testSuite.get("failures"), testSuite.get("errors")),
+                         ("suite_configuration/tst_example", "3", "1", "1"))
+        self.assertEqual([testCase.get("name") for testCase in testSuite],
+                         ["Equal?", "Wizard / Page / Verification", "Wizard / Crashed"])
+        self.assertEqual(testSuite[2].find("error").text, "devenv is gone")
+
+    def test_batches(self):
+        resultsink.enable(self.directory.name, self.clock)
+        resultsink.install(self.test, "suite/tst_batches")
+        resultsink._sink.batchSize = 3
+        for _ in range(5):
+            self.test.compare(1, 1)
+        self.assertEqual(len(self.results()), 4)
+        self.clock.now += resultsink.BATCH_SECONDS
+        self.test.compare(1, 2)
+        self.assertEqual(len(self.results()), 7)
+
+    def test_crashedRun(self):
+        resultsink.enable(self.directory.name, self.clock)
+        resultsink.install(self.test, "suite/tst_crash")
+        self.test.fail("Failed", "detail")
+        resultsink._sink.flush()
+        with open(glob.glob(os.path.join(self.directory.name, "*.jsonl"))[0], "a") as f:
+            f.write('{"type": "result", "kin')
+        output = os.path.join(self.directory.name, "report.xml")
+        self.assertEqual(resultsink.main(["junit", output]
+                                         + glob.glob(os.path.join(self.directory.name,
+                                                                  "*.jsonl"))), 0)
+        testSuite = ElementTree.parse(output).find("testsuite")
+        self.assertEqual((testSuite.get("tests"), testSuite.get("failures"),
+                          testSuite.get("errors")), ("2", "1", "1"))
+        self.assertEqual(testSuite[-1].find("error").get("type"), "INCOMPLETE")
+
+        # The next test case wraps the original functions again
+        resultsink.install(self.test, "suite/tst_next")
+        self.assertEqual(len(glob.glob(os.path.join(self.directory.name, "*tst_crash*.xml"))),
+                         1)
+        self.test.fail("Next")
+        resultsink.finish()
+        self.assertEqual([record.get("message") for record in self.results("*tst_next*.jsonl")],
+                         [None, "Next", None])
+
+
+if __name__ == "__main__":
+    unittest.main()
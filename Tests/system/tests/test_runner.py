@@ -0,0 +1,96 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+SYSTEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SYSTEM_DIR, "offline"))
+
+import runner
+import squish
+
+SUITE_DIR = os.path.join(SYSTEM_DIR, "suite_configuration")
+
+
+class TestRunner(unittest.TestCase):
+
+    def setUp(self):
+        savedEnviron = dict(os.environ)
+        savedModules = dict(sys.modules)
+        self.addCleanup(self.restore, savedEnviron, savedModules)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        for name in list(os.environ):
+            if name.startswith("SQUISH_VSTOOLS_"):
+                del os.environ[name]
+        runner.prepareEnvironment({}, self.directory.name)
+
+    @staticmethod
+    def restore(environ, modules):
+        os.environ.clear()
+        os.environ.update(environ)
+        # The runner imports the scripts of the suite, which must not replace the modules of
+        # other tests
+        for name, module in list(sys.modules.items()):
+            if name not in modules and os.path.abspath(getattr(module, "__file__", None)
+                                                       or "").startswith(SYSTEM_DIR):
+                del sys.modules[name]
+        sys.modules.update(modules)
+        squish.setSimulation(None)
+
+    def runTestCases(self, *testCases):
+        simulation = runner.createSimulation({})
+        try:
+            return [runner.runTestCase(SUITE_DIR, os.path.join(SUITE_DIR, testCase), simulation)
+                    for testCase in testCases]
+        finally:
+            simulation.terminateAll()
+
+    def test_runTestCase(self):
+        report, = self.runTestCases("tst_add_remove_qt_versions")
+        self.assertEqual((report["name"], report["suite"], report["failures"]),
+                         ("tst_add_remove_qt_versions", "suite_configuration", []))
+        self.assertEqual(list(report["counts"]), ["PASS"])
+        self.assertGreater(report["simulatedDuration"], 0)
+        out = io.StringIO()
+        runner.printReport(report, out=out)
+        self.assertEqual(out.getvalue().splitlines(),
+                         ["suite_configuration/tst_add_remove_qt_versions: PASS %d (%.3f s, "
+                          "%.1f s simulated)" % (report["counts"]["PASS"], report["duration"],
+                                                 report["simulatedDuration"])])
+
+        # Failures are printed with their details
+        report["results"].append(runner.test.Result("FAIL", "Qt version missing",
+                                                     "Expected: 6.7.2\nActual: None",
+                                                     ("Options",), "test.py:42"))
+        report["failures"] = report["results"][-1:]
+        out = io.StringIO()
+        runner.printReport(report, out=out)
+        self.assertEqual(out.getvalue().splitlines()[1:],
+                         ["    FAIL    Qt version missing [Options]",
+                          "            Expected: 6.7.2",
+                          "            Actual: None",
+                          "            at test.py:42"])
+
+    def test_sharedWizardCrawl(self):
+        os.environ["SQUISH_VSTOOLS_SESSION"] = "devenvSession"
+        defaults, edit = self.runTestCases("tst_new_project_defaults", "tst_new_project_edit")
+        self.assertEqual((defaults["failures"], edit["failures"]), ([], []))
+        # The checks of tst_new_project_edit ran in the crawl of tst_new_project_defaults
+        self.assertIn("The wizard checks passed in an earlier test case using this devenv "
+                      "session.", [result.message for result in edit["results"]
+                                   if result.kind == "LOG"])
+        self.assertGreater(edit["counts"]["PASS"], 0)
+        self.assertLess(edit["simulatedDuration"], defaults["simulatedDuration"] / 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+SYSTEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SYSTEM_DIR, "offline"))
+sys.path.insert(1, os.path.join(SYSTEM_DIR, "shared"))
+
+import runner
+import session
+import simulator
+import squish
+import test
+
+DEVENV = ["C:\\VS\\Common7\\IDE\\devenv.exe", "/LCID", "1033", "/RootSuffix", "Exp",
+          "/Command", "QtVSTools.ClearSettings"]
+
+
+class FailingLauncher:
+
+    def launch(self, name, arguments):
+        pass
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in list(os.environ):
+            if name.startswith("SQUISH_VSTOOLS_"):
+                del os.environ[name]
+        runner.prepareEnvironment({}, self.directory.name)
+        os.environ["SQUISH_VSTOOLS_SESSION"] = "devenvSession"
+        self.simulation = runner.createSimulation({})
+        self.addCleanup(self.simulation.terminateAll)
+        squish.setSimulation(self.simulation)
+        self.addCleanup(squish.setSimulation, None)
+        for name, value in [("launcher", simulator.AttachableLauncher(self.simulation)),
+                            ("resetHandlers", {}), ("_attachedContext", None)]:
+            patcher = mock.patch.object(session, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        test.reset()
+        self.addCleanup(test.reset)
+
+    def endTestCase(self):
+        # What Squish does when a test case ends
+        self.simulation.shutdown()
+
+    def logs(self):
+        return [(result.message, result.detail) for result in test.results
+                if result.kind == "LOG"]
+
+    def test_attach(self):
+        self.assertFalse(session.attach())
+        self.assertFalse(session.isAttached())
+        session.launch(DEVENV)
+        self.assertTrue(session.isAttached())
+        context = squish.currentApplicationContext()
+        self.assertEqual((context.name, context.model.rootSuffix), ("devenv", "Exp"))
+
+        # The next test case attaches to the instance still running
+        self.endTestCase()
+        self.assertFalse(session.isAttached())
+        self.assertTrue(context.isRunning)
+        self.assertTrue(session.attach())
+        self.assertTrue(session.isAttached())
+        self.assertIs(squish.currentApplicationContext(), context)
+
+        # An instance which can't be restored is replaced
+        session.launch(DEVENV)
+        self.assertFalse(context.isRunning)
+        self.assertNotEqual(squish.currentApplicationContext().pid, context.pid)
+
+    def test_launchFails(self):
+        session.launcher = FailingLauncher()
+        with self.assertRaisesRegex(RuntimeError, "Could not attach to 'devenvSession' on port "
+                                                  "4444."):
+            session.launch(DEVENV)
+        self.assertFalse(session.isAttached())
+
+    def test_restore(self):
+        session.launch(DEVENV)
+        devenv = squish.currentApplicationContext().model
+        devenv.projectCreated("Qt Console Application", "QtConsoleApplication1",
+                              "QtConsoleApplication1", "C:\\Users\\qt\\source\\repos")
+        devenv.openQtVersions()
+        self.assertTrue(squish.object.exists(session.globalnames.options_Dialog))
+        resets = []
+
+        def clearQtVersions():
+            resets.append(squish.object.exists(session.globalnames.options_Dialog))
+        session.addResetHandler(clearQtVersions)
+        session.addResetHandler(clearQtVersions)
+
+        self.endTestCase()
+        self.assertTrue(session.attach())
+        self.assertTrue(session.restore())
+        self.assertFalse(squish.object.exists(session.globalnames.options_Dialog))
+        self.assertIsNone(devenv.solution)
+        # Handlers run once, after the dialogs were closed
+        self.assertEqual(resets, [False])
+        self.assertEqual(self.logs(), [])
+
+    def test_restoreFails(self):
+        session.launch(DEVENV)
+        context = squish.currentApplicationContext()
+
+        def failingHandler():
+            raise ValueError("No Qt versions page")
+        session.addResetHandler(failingHandler)
+        self.assertFalse(session.restore())
+        self.assertEqual(self.logs(), [("Could not reset the devenv session.",
+                                        "ValueError: No Qt versions page")])
+
+        # A wizard which doesn't close on Escape
+        del session.resetHandlers["failingHandler"]
+        test.reset()
+        context.addWindow(simulator.SimObject(
+            "Window", **{"class": "QtVsTools.Wizards.Common.WizardWindow"}))
+        self.assertFalse(session.restore())
+        self.assertEqual(self.logs(), [("Could not close the open dialogs of the devenv "
+                                        "session.", "")])
+
+    def test_closeMainWindow(self):
+        namespace = squish.scriptGlobals()
+        utilsPath = os.path.join(SYSTEM_DIR, "shared", "utils.py")
+        with open(utilsPath, encoding="utf-8") as f:
+            exec(compile(f.read(), utilsPath, "exec"), namespace)
+        session.launch(DEVENV)
+        context = squish.currentApplicationContext()
+        context.model.projectCreated("Qt Console Application", "QtConsoleApplication1",
+                                     "QtConsoleApplication1", "C:\\Users\\qt\\source\\repos")
+        context.model.openQtVersions()
+
+        # The attached devenv is released instead of closed
+        namespace["closeMainWindow"]()
+        self.assertFalse(session.isAttached())
+        self.assertIsNone(squish.currentApplicationContext())
+        self.assertTrue(context.isRunning)
+        self.assertIsNone(context.model.solution)
+        self.assertEqual([window.text for window in context.windows if window.isShowing()],
+                         ["Microsoft Visual Studio"])
+        self.assertTrue(session.attach())
+
+        # A devenv which wasn't attached to exits
+        self.endTestCase()
+        context = squish.startApplication("devenv /RootSuffix Exp")
+        namespace["closeMainWindow"]()
+        self.assertFalse(context.isRunning)
+
+
+if __name__ == "__main__":
+    unittest.main()
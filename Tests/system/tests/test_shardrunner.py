@@ -0,0 +1,148 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shardrunner
+
+
+class SimulatedWorker:
+    # Pretends to run test cases, taking the given durations
+
+    def __init__(self, durations, failing=()):
+        self.durations = durations
+        self.failing = failing
+        self.runs = []
+        self.lock = threading.Lock()
+
+    def run(self, suiteDir, testCase, environment):
+        with self.lock:
+            self.runs.append((testCase, environment["SQUISH_VSTOOLS_ROOTSUFFIX"]))
+        if testCase == "tst_crash":
+            raise OSError("squishrunner not found")
+        return {"passed": testCase not in self.failing, "returncode": 0, "log": "",
+                "duration": self.durations[testCase]}
+
+
+class TestSchedule(unittest.TestCase):
+
+    def test_longestFirst(self):
+        durations = {"a": 10, "b": 7, "c": 6, "d": 5, "e": 4}
+        shards, expected = shardrunner.schedule(durations, 2)
+        self.assertEqual(shards, [["a", "d"], ["b", "c", "e"]])
+        self.assertEqual(expected, [15, 17])
+
+    def test_moreShardsThanTestCases(self):
+        shards, expected = shardrunner.schedule({"a": 1, "b": 2}, 3)
+        self.assertEqual(shards, [["b"], ["a"], []])
+        self.assertEqual(expected, [2, 1, 0])
+
+    def test_unshardedSuite(self):
+        keys = ["suite_installation/tst_1", "suite_configuration/a",
+                "suite_installation/tst_2", "suite_configuration/b"]
+        durations = dict(zip(keys, [4, 10, 1, 7]))
+        groups = shardrunner.unshardedGroups(keys)
+        self.assertEqual(groups, [["suite_installation/tst_1", "suite_installation/tst_2"]])
+        shards, expected = shardrunner.schedule(durations, 3, groups)
+        self.assertEqual(shards, [["suite_configuration/a"], ["suite_configuration/b"],
+                                  ["suite_installation/tst_1", "suite_installation/tst_2"]])
+        self.assertEqual(expected, [10, 7, 5])
+
+    def test_unknownDurationsUseAverage(self):
+        estimated = shardrunner.estimateDurations(["a", "b", "c"], {"a": 10, "b": 20, "x": 99})
+        self.assertEqual(estimated, {"a": 10, "b": 20, "c": 15})
+        self.assertEqual(shardrunner.estimateDurations(["a"], {}),
+                         {"a": shardrunner.DEFAULT_DURATION})
+
+
+class TestEnvironment(unittest.TestCase):
+
+    def test_shardEnvironment(self):
+        base = {"SQUISH_VSTOOLS_WORKDIR": os.path.join("C:", "work"),
+                "SQUISH_VSTOOLS_SESSION": "devenvSession"}
+        environment = shardrunner.shardEnvironment(1, base)
+        self.assertEqual(environment["SQUISH_VSTOOLS_ROOTSUFFIX"], "SquishTestInstance2")
+        self.assertEqual(environment["SQUISH_VSTOOLS_WORKDIR"],
+                         os.path.join("C:", "work", "shard2"))
+        self.assertEqual(environment["SQUISH_VSTOOLS_SESSION"], "devenvSession2")
+        self.assertEqual(environment["SQUISH_VSTOOLS_SESSION_PORT"], "4446")
+        self.assertNotIn("SQUISH_VSTOOLS_ROOTSUFFIX", base)
+
+
+class TestRunAndMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.durations = {"tst_a": 30.0, "tst_b": 20.0, "tst_c": 15.0, "tst_d": 10.0,
+                          "tst_crash": 0.0}
+        self.testCases = {"suite/%s" % name: ("suite", name) for name in self.durations}
+        self.order = list(self.testCases)
+
+    def runShards(self, worker, shardCount):
+        shards, expected = shardrunner.schedule(
+            {key: self.durations[key.split("/")[1]] for key in self.order}, shardCount)
+        environments = [shardrunner.shardEnvironment(index, {}) for index in range(shardCount)]
+        results = shardrunner.runShards(shards, self.testCases, worker, environments)
+        return shards, shardrunner.mergeResults(results, self.order, expected)
+
+    def test_eachTestCaseRunsOnceInItsShard(self):
+        worker = SimulatedWorker(self.durations)
+        shards, report = self.runShards(worker, 2)
+        self.assertEqual(sorted(testCase for testCase, _ in worker.runs), sorted(self.durations))
+        for index, keys in enumerate(shards):
+            for key in keys:
+                self.assertIn((key.split("/")[1], "SquishTestInstance%d" % (index + 1)),
+                              worker.runs)
+
+    def test_mergedReport(self):
+        worker = SimulatedWorker(self.durations, failing=("tst_c",))
+        _, report = self.runShards(worker, 2)
+        self.assertEqual([result["key"] for result in report["testCases"]], self.order)
+        self.assertEqual(report["passed"], 3)
+        self.assertEqual(report["failed"], 2)
+        self.assertIn("squishrunner not found",
+                      report["testCases"][self.order.index("suite/tst_crash")]["log"])
+        # The crashed test case takes real time
+        self.assertAlmostEqual(report["totalDuration"], 75.0, places=1)
+        self.assertAlmostEqual(report["wallTime"], 40.0, places=1)
+        self.assertEqual([round(shard["duration"]) for shard in report["shards"]], [40, 35])
+        self.assertEqual(report["missing"], [])
+
+    def test_missingResults(self):
+        results = [{"key": "suite/tst_a", "shard": 1, "passed": True, "duration": 1.0}]
+        report = shardrunner.mergeResults(results, self.order)
+        self.assertEqual(report["missing"], self.order[1:])
+
+    def test_historyUpdate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.json")
+            results = [{"key": "suite/tst_a", "duration": 12.34}]
+            shardrunner.saveHistory(path, {"suite/tst_b": 5.0}, results)
+            self.assertEqual(shardrunner.loadHistory(path),
+                             {"suite/tst_a": 12.3, "suite/tst_b": 5.0})
+
+
+class TestOfflineWorker(unittest.TestCase):
+
+    def test_offlineTestCase(self):
+        suiteDir = os.path.join(shardrunner.SYSTEM_DIR, "suite_configuration")
+        with tempfile.TemporaryDirectory() as directory:
+            environment = shardrunner.shardEnvironment(0, dict(os.environ,
+                                                               SQUISH_VSTOOLS_WORKDIR=directory))
+            os.makedirs(environment["SQUISH_VSTOOLS_WORKDIR"])
+            result = shardrunner.OfflineWorker().run(suiteDir, "tst_add_remove_qt_versions",
+                                                     environment)
+        self.assertTrue(result["passed"], result["log"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "shared"))
+
+import templateindex
+
+
+class TestTemplateIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheFile = os.path.join(self.directory.name, "cache", "template_index.json")
+        self.index = templateindex.TemplateIndex(cacheFile=self.cacheFile)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def expectedFiles(self, templateName, cmakeBased):
+        return sorted(self.index.expectedFiles(templateName, "QtWidgetsApplication1",
+                                               cmakeBased))
+
+    def test_projectTemplates(self):
+        self.assertEqual(sorted(self.index.templates),
+                         ["Qt ActiveQt Server", "Qt Class Library", "Qt Console Application",
+                          "Qt Designer Custom Widget", "Qt Empty Application",
+                          "Qt Quick Application", "Qt Test Application",
+                          "Qt Widgets Application"])
+        self.assertEqual(self.index.defaultName("Qt Empty Application"), "QtApplication")
+        self.assertEqual(self.index.defaultName("Qt Test Application"), "QtTest")
+        self.assertTrue(self.index.hasClassPage("Qt Test Application"))
+        self.assertFalse(self.index.hasHeader("Qt Test Application"))
+        self.assertFalse(self.index.hasClassPage("Qt Quick Application"))
+        self.assertFalse(self.index.supportsCMake("Qt ActiveQt Server"))
+
+    def test_expectedFiles(self):
+        project = os.path.join("QtWidgetsApplication1", "QtWidgetsApplication1")
+        self.assertEqual(self.expectedFiles("Qt Widgets Application", False),
+                         sorted(["QtWidgetsApplication1.sln"]
+                                + [project + extension
+                                   for extension in [".vcxproj", ".vcxproj.filters",
+                                                     ".vcxproj.user", ".cpp", ".h", ".ui",
+                                                     ".qrc"]]
+                                + [os.path.join("QtWidgetsApplication1", "main.cpp")]))
+        self.assertEqual(self.expectedFiles("Qt Widgets Application", True),
+                         sorted(["CMakeLists.txt", "CMakePresets.json", "CMakeUserPresets.json"]
+                                + [project + extension for extension in [".cpp", ".h", ".ui"]]
+                                + [os.path.join("QtWidgetsApplication1", fileName)
+                                   for fileName in ["main.cpp", "CMakeLists.txt", "qt.cmake"]]))
+        designerFiles = self.expectedFiles("Qt Designer Custom Widget", False)
+        self.assertIn(project + "Plugin.h", designerFiles)
+        self.assertIn(os.path.join("QtWidgetsApplication1", "qtwidgetsapplication1plugin.json"),
+                      designerFiles)
+        self.assertNotIn(os.path.join("QtWidgetsApplication1", "stdafx.h"), designerFiles)
+
+    def test_openedAndBuiltFiles(self):
+        self.assertEqual(self.index.openedFile("Qt Quick Application", "QtQuickApplication1"),
+                         "main.qml")
+        self.assertEqual(self.index.openedFile("Qt Designer Custom Widget", "Widget"),
+                         "WidgetPlugin.cpp")
+        self.assertIsNone(self.index.openedFile("Qt Empty Application", "QtApplication1"))
+        self.assertEqual(self.index.builtFile("Qt Console Application", "Console"),
+                         "Console.exe")
+        self.assertEqual(self.index.builtFile("Qt Class Library", "Library"), "Library.dll")
+        self.assertEqual(self.index.builtFile("Qt Designer Custom Widget", "Widget"),
+                         "Widget.dll")
+        self.assertIsNone(self.index.builtFile("Qt Empty Application", "QtApplication1"))
+
+    def test_cache(self):
+        self.assertTrue(self.index.built)
+        cached = templateindex.TemplateIndex(cacheFile=self.cacheFile)
+        self.assertFalse(cached.built)
+        self.assertEqual(cached.templates, self.index.templates)
+
+    def test_changedTemplatesInvalidateCache(self):
+        templatesDir = os.path.join(self.directory.name, "Templates")
+        shutil.copytree(os.path.join(templateindex.TEMPLATES_DIR, "empty"),
+                        os.path.join(templatesDir, "empty"))
+        index = templateindex.TemplateIndex(templatesDir, self.cacheFile)
+        self.assertEqual(list(index.templates), ["Qt Empty Application"])
+        manifest = os.path.join(templatesDir, "empty", "empty.vstemplate_TT")
+        with open(manifest, encoding="utf-8-sig") as f:
+            content = f.read()
+        with open(manifest, "w", encoding="utf-8") as f:
+            f.write(content.replace("<DefaultName>QtApplication<", "<DefaultName>QtEmpty<"))
+        index = templateindex.TemplateIndex(templatesDir, self.cacheFile)
+        self.assertTrue(index.built)
+        self.assertEqual(index.defaultName("Qt Empty Application"), "QtEmpty")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import testimpact
+
+NAMES = "Tests/system/suite_configuration/shared/scripts/names.py"
+CRAWLERS = ["tst_new_project_defaults", "tst_new_project_edit", "tst_new_project_no_qt"]
+
+
+def currentSource(path):
+    with open(os.path.join(testimpact.REPO_DIR, path), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestTestImpact(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = testimpact.Analyzer()
+        cls.reached = cls.analyzer.analyze()
+
+    def select(self, changes):
+        return testimpact.select(self.analyzer, changes)
+
+    def test_map(self):
+        debug = self.reached["suite_configuration/tst_debug"]
+        self.assertIn("template:Qt Quick Application", debug)
+        self.assertIn(NAMES + "::qt_Wizard_Finish_Button", debug)
+        # Objects contained in used objects are used as well
+        self.assertIn("Tests/system/shared/globalnames.py::qt_Wizard_Window", debug)
+        self.assertNotIn(testimpact.ALL_TEMPLATES, debug)
+        qtVersions = self.reached["suite_configuration/tst_add_remove_qt_versions"]
+        self.assertIn(NAMES + "::dataGrid_Table", qtVersions)
+        self.assertNotIn(NAMES + "::qt_Wizard_Finish_Button", qtVersions)
+        self.assertFalse([key for key in qtVersions if key.startswith("template")])
+        impact = testimpact.impactMap(self.reached)
+        self.assertEqual(impact[testimpact.ALL_TEMPLATES],
+                         sorted("suite_configuration/" + testCase for testCase
+                                in CRAWLERS + ["tst_new_project_file_creation"]))
+        self.assertEqual(impact[testimpact.ALL_TEMPLATE_FILES],
+                         ["suite_configuration/tst_new_project_file_creation"])
+
+    def test_changedObjects(self):
+        source = currentSource(NAMES)
+        changed = source.replace('"Stop Debugging (Shift+F5)"', '"Stop Debugging"')
+        self.assertEqual(testimpact.changedKeys(self.analyzer, NAMES, changed),
+                         {NAMES + "::stopDebugging_Button"})
+        self.assertEqual(self.select([(NAMES, changed)]),
+                         {"suite_configuration": ["tst_debug"]})
+        changed = source.replace('"text": "Next >"', '"text": "Next"')
+        self.assertEqual(self.select([(NAMES, changed)]),
+                         {"suite_configuration": ["tst_debug", "tst_new_project_defaults",
+                                                  "tst_new_project_edit",
+                                                  "tst_new_project_file_creation",
+                                                  "tst_new_project_no_qt"]})
+        # Comments and formatting don't change anything
+        self.assertEqual(self.select([(NAMES, source.replace("import globalnames\n",
+                                                             "import globalnames  # Shared\n"))]),
+                         {})
+
+    def test_changedFiles(self):
+        self.assertEqual(self.select([("Templates/quick/main.qml", "")]),
+                         {"suite_configuration": ["tst_debug",
+                                                  "tst_new_project_file_creation"]})
+        self.assertEqual(len(self.select([("Templates/quick/quick.vstemplate_TT", "")])
+                             ["suite_configuration"]), 5)
+        self.assertEqual(self.select([("doc/index.md", ""), ("Tests/tools/cache.py", ""),
+                                      ("Tests/system/shared/unused.py", None)]), {})
+        self.assertEqual(self.select([("Tests/system/suite_configuration/tst_debug/test.py",
+                                       "")]),
+                         {"suite_configuration": ["tst_debug"]})
+        # The test cases of suite_installation depend on each other
+        selection = self.select([("QtVsTools.Package/QtVsToolsPackage.cs", "")])
+        self.assertEqual((len(selection["suite_configuration"]),
+                          len(selection["suite_installation"])), (6, 5))
+        self.assertEqual(self.select([("Tests/system/suite_installation/tst_2_install_verify/"
+                                       "testdata/expected.txt", None)]),
+                         {"suite_installation": selection["suite_installation"]})
+
+    def test_writeSuiteConf(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shutil.copy(os.path.join(testimpact.SYSTEM_DIR, "suite_configuration", "suite.conf"),
+                        directory)
+            testimpact.writeSuiteConf(directory, ["tst_debug", "tst_new_project_no_qt"])
+            with open(os.path.join(directory, "suite.conf"), encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        self.assertIn("TEST_CASES=tst_debug tst_new_project_no_qt", lines)
+        self.assertIn("AUT=devenv", lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
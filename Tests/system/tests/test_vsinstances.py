@@ -0,0 +1,126 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "shared"))
+
+import vsinstances
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+class RecordedVswhere:
+    # Answers from recorded "vswhere -all -format json" output with the installations moved
+    # into a local directory, so their devenv.exe files can exist
+
+    def __init__(self, root):
+        with open(os.path.join(DATA_DIR, "vswhere_all.json"), encoding="utf-8") as f:
+            self.instances = json.load(f)
+        for instance in self.instances:
+            instance["installationPath"] = os.path.join(
+                root, instance["installationPath"].split("\\")[-2])
+            os.makedirs(os.path.dirname(vsinstances.devenvPath(instance["installationPath"])))
+            with open(vsinstances.devenvPath(instance["installationPath"]), "w"):
+                pass
+        self.calls = 0
+
+    def __call__(self, vswhere):
+        self.calls += 1
+        return json.loads(json.dumps(self.instances))
+
+
+class TestVsInstances(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = self.directory.name
+        self.vswhere = RecordedVswhere(os.path.join(root, "vs"))
+        self.vs2022 = os.path.join(root, "vs", "2022")
+        self.vs2019 = os.path.join(root, "vs", "2019")
+        self.cacheFile = os.path.join(root, "cache", "vswhere.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def resolver(self):
+        return vsinstances.Resolver("vswhere.exe", self.cacheFile, self.vswhere)
+
+    def test_properties(self):
+        resolver = self.resolver()
+        self.assertEqual(resolver.property(self.vs2022, "catalog_productLineVersion"), "2022")
+        self.assertEqual(resolver.property(self.vs2022, "catalog_productDisplayVersion"),
+                         "17.11.5")
+        self.assertEqual(resolver.property(self.vs2022, "instanceID"), "4f1e2d3c")
+        self.assertEqual(resolver.property(self.vs2022, "installationPath"), self.vs2022)
+        self.assertEqual(resolver.property(self.vs2022, "isPrerelease"), "0")
+        self.assertIsNone(resolver.property(self.vs2022, "catalog_noSuchProperty"))
+        self.assertEqual(resolver.property(self.vs2019.upper(), "catalog_productLineVersion"),
+                         "2019")
+        self.assertEqual(resolver.property(os.path.join(self.vs2019, "Common7"), "instanceId"),
+                         "9a8b7c6d")
+        self.assertEqual(self.vswhere.calls, 1)
+
+    def test_diskCache(self):
+        self.resolver().property(self.vs2022, "instanceId")
+        resolver = self.resolver()
+        self.assertEqual(resolver.property(self.vs2022, "instanceId"), "4f1e2d3c")
+        self.assertEqual(self.vswhere.calls, 1)
+        self.assertEqual(resolver.queries, 0)
+
+    def test_updatedDevenvInvalidatesCache(self):
+        self.resolver().property(self.vs2022, "instanceId")
+        devenv = vsinstances.devenvPath(self.vs2022)
+        mtime = os.stat(devenv).st_mtime
+        os.utime(devenv, (mtime + 10, mtime + 10))
+        self.vswhere.instances[0]["catalog"]["productDisplayVersion"] = "17.12.0"
+        resolver = self.resolver()
+        self.assertEqual(resolver.property(self.vs2022, "catalog_productDisplayVersion"),
+                         "17.12.0")
+        self.assertEqual(self.vswhere.calls, 2)
+
+    def test_unknownInstallation(self):
+        resolver = self.resolver()
+        resolver.property(self.vs2022, "instanceId")
+        self.assertRaises(LookupError, resolver.property,
+                          os.path.join(self.directory.name, "vs", "2017"), "instanceId")
+        self.assertEqual(self.vswhere.calls, 2)  # Queried again in case it was just installed
+
+    def test_missingDevenvIsNotCachedOnDisk(self):
+        os.remove(vsinstances.devenvPath(self.vs2019))
+        resolver = self.resolver()
+        self.assertEqual(resolver.property(self.vs2019, "instanceId"), "9a8b7c6d")
+        self.assertEqual(resolver.property(self.vs2019, "installationPath"), self.vs2019)
+        self.assertEqual(self.resolver().property(self.vs2019, "instanceId"), "9a8b7c6d")
+        self.assertEqual(self.vswhere.calls, 2)
+
+    def test_corruptCache(self):
+        os.makedirs(os.path.dirname(self.cacheFile))
+        with open(self.cacheFile, "w") as f:
+            f.write("{ no json")
+        self.assertEqual(self.resolver().property(self.vs2019, "instanceId"), "9a8b7c6d")
+        self.assertEqual(self.resolver().property(self.vs2019, "instanceId"), "9a8b7c6d")
+        self.assertEqual(self.vswhere.calls, 1)
+
+    def test_standInVswhere(self):
+        os.environ["SQUISH_VSTOOLS_VSWHERE_JSON"] = os.path.join(DATA_DIR, "vswhere_all.json")
+        try:
+            standIn = os.path.join(os.path.dirname(DATA_DIR), os.pardir, "offline", "vswhere.py")
+            instances = vsinstances.runVswhere(os.path.normpath(standIn))
+        finally:
+            del os.environ["SQUISH_VSTOOLS_VSWHERE_JSON"]
+        self.assertEqual([instance["instanceId"] for instance in instances],
+                         ["4f1e2d3c", "9a8b7c6d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "shared"))
+
+import waiting
+
+
+class FakeTime:
+    # Stands in for the time module in waiting.py. The clock only moves when told to, pauses are
+    # recorded instead of taken.
+
+    def __init__(self):
+        self.now = 0.0
+        self.pauses = []
+
+    def monotonic(self):
+        return self.now
+
+    def snooze(self, milliseconds):
+        self.pauses.append(milliseconds)
+
+
+class TestWaiting(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.time = FakeTime()
+        for name, value in [("time", types.SimpleNamespace(monotonic=self.time.monotonic)),
+                            ("snooze", self.time.snooze)]:
+            patcher = mock.patch.object(waiting, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in ("SQUISH_VSTOOLS_TIMEOUT_FACTOR", "SQUISH_VSTOOLS_WAIT_LOG",
+                     "SQUISH_VSTOOLS_FLAKINESS_DB"):
+            os.environ.pop(name, None)
+        del waiting.records[:]
+
+    def test_backoff(self):
+        results = iter([None, 0, "", "found"])
+        self.assertEqual(waiting.waitUntil(lambda: next(results), 10000, "Dialog"), "found")
+        self.assertEqual(self.time.pauses, [50, 75, 112.5])
+        record = waiting.records[-1]
+        self.assertEqual((record["description"], record["success"], record["attempts"],
+                          record["duration"], record["timeout"]),
+                         ("Dialog", True, 4, 237.5, 10000))
+        # The location is the caller's
+        self.assertEqual(record["location"].split(":")[0], "tests/test_waiting.py")
+
+        # The pauses stop growing at maxInterval
+        del self.time.pauses[:]
+        waiting.waitUntil(lambda: False, 5000, interval=400, maxInterval=800)
+        self.assertEqual(self.time.pauses, [400, 600, 800, 800, 800, 800, 800])
+
+    def test_timeout(self):
+        # The last pause is shortened to the remaining time
+        self.assertFalse(waiting.waitFor(lambda: False, 100))
+        self.assertEqual(self.time.pauses, [50, 50])
+        self.assertEqual((waiting.records[-1]["success"], waiting.records[-1]["duration"]),
+                         (False, 100))
+
+        # Wall-clock time counts if it is longer than the pauses
+        del self.time.pauses[:]
+
+        def slowCondition():
+            self.time.now += 1.0
+            return False
+        self.assertFalse(waiting.waitFor(slowCondition, 100))
+        self.assertEqual(self.time.pauses, [])
+        self.assertEqual(waiting.records[-1]["duration"], 1000)
+
+    def test_timeoutFactor(self):
+        self.assertEqual(waiting.scaledTimeout(2000), 2000)
+        self.assertIsNone(waiting.scaledTimeout(None))
+        for factor, expected in [("2.5", 5000), ("0", 200), ("-3", 200), ("slow", 2000)]:
+            os.environ["SQUISH_VSTOOLS_TIMEOUT_FACTOR"] = factor
+            self.assertEqual(waiting.scaledTimeout(2000), expected, factor)
+        os.environ["SQUISH_VSTOOLS_TIMEOUT_FACTOR"] = "2"
+        waiting.waitFor(lambda: False, 100)
+        self.assertEqual((waiting.records[-1]["timeout"], sum(self.time.pauses)), (200, 200))
+
+    def test_waitLog(self):
+        logFile = os.path.join(self.directory.name, "waits.jsonl")
+        os.environ["SQUISH_VSTOOLS_WAIT_LOG"] = logFile
+        waiting.recordWait("Dialog", "suite/tst_a:10", 1000, 300.04, True, 3)
+        waiting.recordWait(None, "suite/tst_a:20", 1000, 1000, False, 6)
+        waiting.recordWait("Dialog", "suite/tst_a:10", 1000, 500, True, 4)
+        with open(logFile, encoding="utf-8") as f:
+            waits = [json.loads(line) for line in f]
+        self.assertEqual(waits, waiting.records)
+        self.assertEqual((waits[0]["duration"], waits[1]["description"]),
+                         (300.0, "suite/tst_a:20"))
+        self.assertEqual([record["duration"] for record in waiting.slowestWaits(2)],
+                         [1000, 500])
+
+        self.assertEqual(waiting.summarize(waits),
+                         [{"location": "suite/tst_a:20", "description": "suite/tst_a:20",
+                           "count": 1, "total": 1000, "max": 1000, "timeouts": 1},
+                          {"location": "suite/tst_a:10", "description": "Dialog",
+                           "count": 2, "total": 800.0, "max": 500, "timeouts": 0}])
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as output:
+            self.assertEqual(waiting.main([logFile, "--top", "1"]), 0)
+        self.assertEqual(output.getvalue().splitlines()[1].split(),
+                         ["1.0", "1.0", "1", "1", "suite/tst_a:20"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Expands Tests/BigSolution/template into a solution of any size for reproducing scaling problems
+# of Qt/MSBuild, e.g. with moc, uic and rcc. Template projects whose name contains "NNN" are
+# generated once per index, the others are copied. Each generated project gets
+#   - "classes" plain classes (BigClassNNN),
+#   - "qobjects" Q_OBJECT classes (BigProjectQtClassNNN), each using one of the forms,
+#   - "forms" .ui files (BigProjectNNN.ui), each including one of the resource files,
+#   - "resources" .qrc files (BigProjectNNN.qrc).
+# Additional files of a kind get the suffix "_<k>", so one file of each kind gives the files of
+# Test_QtMsBuild.Build's BigSolution.Generate(). Unlike there, indices get more digits beyond 999
+# projects and project GUIDs are derived from the project names, so generating a solution again
+# gives the same files. Projects are written by a pool of threads.
+#
+#   python bigsolution.py OUTPUT_DIR --projects 1000 --qobjects 5 --forms 2
+
+import argparse
+import concurrent.futures
+import os
+import re
+import sys
+import time
+import uuid
+
+TEMPLATE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                             os.pardir, "BigSolution", "template"))
+PLACEHOLDER = "NNN"
+# Namespace of the generated project GUIDs
+GUID_NAMESPACE = uuid.UUID("6b9a4bd1-4c6e-4f0e-9a51-3c1b7d2e8f40")
+
+# Template files by kind, in the project directory of the template
+CLASS_FILES = ["BigClassNNN.h", "BigClassNNN.cpp"]
+QOBJECT_FILES = ["BigProjectQtClassNNN.h", "BigProjectQtClassNNN.cpp"]
+FORM_FILE = "BigProjectNNN.ui"
+RESOURCE_FILE = "BigProjectNNN.qrc"
+
+
+class Layout:
+
+    def __init__(self, projects=100, classes=1, qobjects=1, forms=1, resources=1):
+        self.projects = projects
+        self.classes = classes
+        self.qobjects = qobjects
+        self.forms = forms
+        self.resources = resources
+
+    def indexWidth(self):
+        return max(3, len(str(self.projects)))
+
+
+def projectGuid(projectName):
+    return "{%s}" % str(uuid.uuid5(GUID_NAMESPACE, projectName)).upper()
+
+
+def suffix(k):
+    return "" if k == 1 else "_%d" % k
+
+
+def readText(path):
+    # newline="" keeps the line endings, the BOM is kept as character
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def writeText(path, text):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return len(text)
+
+
+def replacePlaceholder(text, index):
+    return re.sub(PLACEHOLDER, index, text, flags=re.IGNORECASE)
+
+
+# Replaces each item of an MSBuild project or filters file naming one of the given template files
+# with one item per generated file
+def expandItems(text, generatedFiles):
+    def expand(match):
+        return "".join(match.group(0).replace('"%s"' % match.group(2), '"%s"' % fileName)
+                       for fileName in generatedFiles[match.group(2)])
+    names = "|".join(re.escape(fileName) for fileName in generatedFiles)
+    pattern = r'(?ms)^[ \t]*<(\w+) Include="(%s)"(?: />|>.*?</\1>)[ \t]*\r?\n' % names
+    return re.sub(pattern, expand, text)
+
+
+# A Q_OBJECT class without form
+def _withoutForm(text):
+    text = re.sub(r"(?m)^[ \t]*\r?\nprivate:\r?\n[ \t]*Ui::.*\n", "", text)
+    return re.sub(r"(?m)^.*(ui_\w+\.h|setupUi).*\n", "", text)
+
+
+class ProjectTemplate:
+    # A template project, e.g. BigProjectNNN
+
+    def __init__(self, directory, name, solutionText):
+        self.name = name
+        self.files = {fileName: readText(os.path.join(directory, fileName))
+                      for fileName in sorted(os.listdir(directory))}
+        projectText = self.files[name + ".vcxproj"]
+        self.guid = re.search(r"<ProjectGuid>({[^}]+})<", projectText).group(1)
+        newline = r"\r?\n"
+        self.solutionEntry = re.search(r'(?mi)^Project.*"%s"%sEndProject%s'
+                                       % (re.escape(self.guid), newline, newline),
+                                       solutionText).group(0)
+        self.solutionConfigs = re.findall(r"(?mi)^\s+%s.*%s" % (re.escape(self.guid), newline),
+                                          solutionText)
+
+    def isGenerated(self):
+        return PLACEHOLDER in self.name
+
+    # Names of the files generated from each template file of the kind given by the layout
+    def fileNames(self, index, layout):
+        counts = dict.fromkeys(CLASS_FILES, layout.classes)
+        counts.update(dict.fromkeys(QOBJECT_FILES, layout.qobjects))
+        counts.update({FORM_FILE: layout.forms, RESOURCE_FILE: layout.resources})
+        return {fileName: [fileName.replace(PLACEHOLDER, index + suffix(k))
+                           for k in range(1, count + 1)]
+                for fileName, count in counts.items()}
+
+    # Yields file name and content of the files of the index-th project
+    def expand(self, index, layout):
+        guid = projectGuid(self.name.replace(PLACEHOLDER, index))
+        formName = "BigProject%s" % index
+        for fileName, text in self.files.items():
+            if fileName in CLASS_FILES:
+                for k in range(1, layout.classes + 1):
+                    yield (fileName.replace(PLACEHOLDER, index + suffix(k)),
+                           replacePlaceholder(text.replace("BigClassNNN",
+                                                           "BigClass" + index + suffix(k)),
+                                              index))
+            elif fileName in QOBJECT_FILES:
+                for k in range(1, layout.qobjects + 1):
+                    className = "BigProjectQtClass" + index + suffix(k)
+                    source = text.replace("BigProjectQtClassNNN", className)
+                    if layout.forms:
+                        form = formName + suffix((k - 1) % layout.forms + 1)
+                        source = source.replace("BigProjectNNN", form)
+                    else:
+                        source = _withoutForm(source)
+                    yield (fileName.replace(PLACEHOLDER, index + suffix(k)),
+                           replacePlaceholder(source, index))
+            elif fileName == FORM_FILE:
+                for k in range(1, layout.forms + 1):
+                    form = text
+                    if layout.resources:
+                        resource = formName + suffix((k - 1) % layout.resources + 1)
+                        form = form.replace("BigProjectNNN.qrc", resource + ".qrc")
+                    else:
+                        form = re.sub(r'[ \t]*<include location="[^"]*"\s*/>\r?\n', "", form)
+                    yield (fileName.replace(PLACEHOLDER, index + suffix(k)),
+                           form.replace("BigProjectNNN", formName + suffix(k)))
+            elif fileName == RESOURCE_FILE:
+                for k in range(1, layout.resources + 1):
+                    yield (fileName.replace(PLACEHOLDER, index + suffix(k)),
+                           text.replace("BigProjectNNN", formName + suffix(k)))
+            else:
+                if fileName.endswith((".vcxproj", ".vcxproj.filters")):
+                    text = expandItems(text, self.fileNames(index, layout))
+                    text = re.sub(re.escape(self.guid), guid, text, flags=re.IGNORECASE)
+                yield (re.sub(PLACEHOLDER, index, fileName, flags=re.IGNORECASE),
+                       replacePlaceholder(text, index))
+
+    def solutionText(self, index):
+        guid = projectGuid(self.name.replace(PLACEHOLDER, index))
+        texts = [self.solutionEntry] + self.solutionConfigs
+        return [replacePlaceholder(re.sub(re.escape(self.guid), guid, text, flags=re.IGNORECASE),
+                                   index) for text in texts]
+
+
+def writeProject(outputDir, template, index, layout):
+    name = template.name.replace(PLACEHOLDER, index) if index else template.name
+    projectDir = os.path.join(outputDir, name)
+    os.makedirs(projectDir, exist_ok=True)
+    if index is None:
+        files = template.files.items()
+    else:
+        files = template.expand(index, layout)
+    written = [writeText(os.path.join(projectDir, fileName), text) for fileName, text in files]
+    return len(written), sum(written)
+
+
+# Generates the solution in outputDir and returns the number of files and characters written
+def generate(outputDir, layout, templateDir=TEMPLATE_DIR, workers=None):
+    solutionFile = next(fileName for fileName in sorted(os.listdir(templateDir))
+                        if fileName.endswith(".sln"))
+    solutionText = readText(os.path.join(templateDir, solutionFile))
+    templates = [ProjectTemplate(os.path.join(templateDir, name), name, solutionText)
+                 for name in sorted(os.listdir(templateDir))
+                 if os.path.isfile(os.path.join(templateDir, name, name + ".vcxproj"))]
+    indices = ["%0*d" % (layout.indexWidth(), i) for i in range(1, layout.projects + 1)]
+    os.makedirs(outputDir, exist_ok=True)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for template in templates:
+            if template.isGenerated():
+                futures.extend(executor.submit(writeProject, outputDir, template, index, layout)
+                               for index in indices)
+            else:
+                futures.append(executor.submit(writeProject, outputDir, template, None, layout))
+        # The solution is written while the projects are
+        for template in templates:
+            if template.isGenerated():
+                entries = [template.solutionText(index) for index in indices]
+                solutionText = solutionText.replace(
+                    template.solutionEntry, "".join(entry[0] for entry in entries))
+                solutionText = solutionText.replace(
+                    "".join(template.solutionConfigs),
+                    "".join(config for entry in entries for config in entry[1:]))
+        files, size = 1, writeText(os.path.join(outputDir, solutionFile), solutionText)
+        for future in futures:
+            projectFiles, projectSize = future.result()
+            files += projectFiles
+            size += projectSize
+    return files, size
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Generate a big solution from "
+                                                 "Tests/BigSolution/template.")
+    parser.add_argument("output", help="directory to create the solution in")
+    parser.add_argument("--projects", type=int, default=100, help="number of generated projects")
+    parser.add_argument("--classes", type=int, default=1, help="plain classes per project")
+    parser.add_argument("--qobjects", type=int, default=1, help="Q_OBJECT classes per project")
+    parser.add_argument("--forms", type=int, default=1, help=".ui files per project")
+    parser.add_argument("--resources", type=int, default=1, help=".qrc files per project")
+    parser.add_argument("--template", default=TEMPLATE_DIR, help="template directory")
+    parser.add_argument("--workers", type=int, help="number of threads writing files")
+    args = parser.parse_args(argv)
+    if os.path.exists(args.output) and os.listdir(args.output):
+        parser.error("%s is not empty" % args.output)
+    started = time.perf_counter()
+    layout = Layout(args.projects, args.classes, args.qobjects, args.forms, args.resources)
+    files, size = generate(args.output, layout, args.template, args.workers)
+    print("Generated %d projects, %d files (%.1f MB) in %.1f s"
+          % (args.projects, files, size / 1000000.0, time.perf_counter() - started))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,302 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Builds the dependency graph of the projects of a solution, from the ProjectDependencies of the
+# .sln file and the ProjectReference items of the projects, and plans a build of it: the critical
+# path, i.e. the longest chain of projects depending on each other, the speedup a build with a
+# number of cores can have at best, and an order of the projects which starts the critical path
+# first, e.g. for projects running moc, uic and rcc before compiling anything.
+#
+# The duration of a project is its mean duration in MSBuild logs (text logs of detailed or
+# diagnostic verbosity, or JSON lines exports, see msbuildlog.py), without the time it waited for
+# the projects it references, or the duration in a timing file, a JSON object of project names and
+# seconds. Projects without a duration take the median duration of the others.
+#
+#   python buildplan.py SOLUTION.sln [--log FILE]... [--timings FILE] [--cores N] [--json]
+
+import heapq
+import json
+import os
+import re
+import sys
+
+import msbuildlog
+import workrunner
+
+DEFAULT_DURATION = workrunner.DEFAULT_COST
+# Type of solution folders, which are listed like projects
+SOLUTION_FOLDER = "2150E333-8FDC-42A3-9474-1A3956D46DE8"
+
+SOLUTION_PROJECT = re.compile(r'^Project\("\{([^}]+)\}"\)\s*=\s*"([^"]*)",\s*"([^"]*)",'
+                              r'\s*"\{([^}]+)\}"')
+SOLUTION_DEPENDENCY = re.compile(r"^\s*\{([^}]+)\}\s*=\s*\{[^}]+\}")
+PROJECT_REFERENCE = re.compile(r'<ProjectReference\s+Include="([^"]+)"\s*(/>|>\s*'
+                               r'(?:<Project>\s*\{([^}]+)\}\s*</Project>)?)')
+
+
+class Project:
+
+    def __init__(self, name, path, guid, index):
+        self.name = name
+        self.key = name
+        self.path = path
+        self.guid = guid.upper()
+        self.index = index
+        self.dependencyGuids = []
+        self.cost = None
+        self.dependsOn = set()
+        self.dependents = []
+        self.criticalPath = 0.0
+
+
+# Returns the projects of a solution, with the GUIDs of their ProjectDependencies
+def readSolution(solutionPath):
+    projects = []
+    directory = os.path.dirname(solutionPath)
+    project = None
+    with open(solutionPath, encoding="utf-8-sig", errors="replace") as f:
+        for line in f:
+            match = SOLUTION_PROJECT.match(line)
+            if match:
+                project = None
+                if match.group(1).upper() != SOLUTION_FOLDER:
+                    path = os.path.normpath(os.path.join(directory,
+                                                         match.group(3).replace("\\", "/")))
+                    project = Project(match.group(2), path, match.group(4), len(projects))
+                    projects.append(project)
+                continue
+            if line.startswith("EndProject") or line.startswith("Global"):
+                project = None
+                continue
+            match = SOLUTION_DEPENDENCY.match(line)
+            if project and match:
+                project.dependencyGuids.append(match.group(1).upper())
+    return projects
+
+
+# Returns the paths and GUIDs of the projects referenced by a project
+def projectReferences(projectPath):
+    with open(projectPath, encoding="utf-8-sig", errors="replace") as f:
+        text = f.read()
+    directory = os.path.dirname(projectPath)
+    return [(os.path.normpath(os.path.join(directory, include.replace("\\", "/"))),
+             (guid or "").upper())
+            for include, _, guid in PROJECT_REFERENCE.findall(text)]
+
+
+class Graph:
+
+    def __init__(self, solutionPath):
+        self.projects = {}
+        self.problems = []
+        self.references = 0
+        byPath = {}
+        byGuid = {}
+        for project in readSolution(solutionPath):
+            if project.key in self.projects:
+                self.problems.append("%s is listed twice" % project.name)
+                continue
+            self.projects[project.key] = project
+            byPath[os.path.normcase(project.path)] = project.key
+            byGuid[project.guid] = project.key
+        for project in self.projects.values():
+            for guid in project.dependencyGuids:
+                if guid in byGuid:
+                    project.dependsOn.add(byGuid[guid])
+            try:
+                references = projectReferences(project.path)
+            except OSError as e:
+                self.problems.append("%s cannot be read: %s" % (project.name, e))
+                continue
+            for path, guid in references:
+                key = byPath.get(os.path.normcase(path)) or byGuid.get(guid)
+                if key is None:
+                    self.problems.append("%s references %s, which is not in the solution"
+                                         % (project.name, path))
+                elif key != project.key:
+                    project.dependsOn.add(key)
+        for project in self.projects.values():
+            self.references += len(project.dependsOn)
+            for key in project.dependsOn:
+                self.projects[key].dependents.append(project.key)
+
+
+def _projectName(path):
+    return os.path.splitext(re.split(r"[\\/]", path)[-1])[0]
+
+
+# Returns the seconds each project of a build log took, without the time it waited for other
+# projects, by project name. Untimed logs give the Project Performance Summary instead.
+def logDurations(fileName):
+    spans = {}
+    waited = {}
+    projectOfContext = {}
+    waitingSince = {}
+    summary = {}
+    for event in msbuildlog.parseLog(fileName):
+        kind, time, context = event[:3]
+        if kind == "summary" and event[3] == "Project":
+            name = _projectName(event[4])
+            summary[name] = summary.get(name, 0.0) + event[5]
+        elif time is None:
+            continue
+        elif kind in ("targetStarted", "targetFinished") and event[4]:
+            name = projectOfContext[context] = _projectName(event[4])
+            span = spans.setdefault(name, [time, time])
+            span[0], span[1] = min(span[0], time), max(span[1], time)
+        elif kind == "taskStarted" and event[3] in msbuildlog.YIELDING_TASKS:
+            waitingSince[context] = time
+        elif kind == "taskFinished" and context in waitingSince:
+            started = waitingSince.pop(context)
+            if context in projectOfContext:
+                name = projectOfContext[context]
+                waited[name] = waited.get(name, 0.0) + time - started
+    if not spans:
+        return summary
+    return {name: max(0.0, end - start - waited.get(name, 0.0))
+            for name, (start, end) in spans.items()}
+
+
+# Returns the mean duration of each project in the logs, and the durations of the timing file, by
+# lower case project name
+def loadDurations(logs=(), timings=None):
+    samples = {}
+    for fileName in logs:
+        for name, seconds in logDurations(fileName).items():
+            samples.setdefault(name.lower(), []).append(seconds)
+    durations = {name: sum(values) / len(values) for name, values in samples.items()}
+    if timings:
+        with open(timings, encoding="utf-8") as f:
+            durations.update((name.lower(), float(seconds))
+                             for name, seconds in json.load(f).items())
+    return durations
+
+
+def _median(values):
+    values = sorted(values)
+    if not values:
+        return DEFAULT_DURATION
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+class Planner:
+
+    def __init__(self, graph, durations):
+        self.graph = graph
+        projects = graph.projects
+        known = {key: durations[project.name.lower()] for key, project in projects.items()
+                 if project.name.lower() in durations}
+        self.estimated = len(projects) - len(known)
+        default = _median(known.values())
+        self.durations = {key: known.get(key, default) for key in projects}
+        workrunner.computeCriticalPaths(projects, self.durations)
+
+    # Returns the projects of the critical path, in build order
+    def criticalPath(self):
+        projects = self.graph.projects
+        path = []
+        candidates = [key for key, project in projects.items() if not project.dependsOn]
+        while candidates:
+            key = max(candidates, key=lambda key: (projects[key].criticalPath,
+                                                   -projects[key].index))
+            path.append(key)
+            candidates = projects[key].dependents
+        return path
+
+    # Simulates a build with a number of cores, which starts the project with the longest path of
+    # projects depending on it first, and returns the start and end of each project in order
+    def schedule(self, cores):
+        projects = self.graph.projects
+        waiting = {key: len(project.dependsOn) for key, project in projects.items()}
+        ready = [(-project.criticalPath, project.index, key)
+                 for key, project in projects.items() if not project.dependsOn]
+        heapq.heapify(ready)
+        running = []
+        now = 0.0
+        order = []
+        while ready or running:
+            while ready and len(running) < cores:
+                key = heapq.heappop(ready)[2]
+                end = now + self.durations[key]
+                order.append({"project": key, "start": now, "end": end})
+                heapq.heappush(running, (end, projects[key].index, key))
+            now, _, key = heapq.heappop(running)
+            for dependent in projects[key].dependents:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    project = projects[dependent]
+                    heapq.heappush(ready, (-project.criticalPath, project.index, dependent))
+        return order
+
+    def plan(self, cores):
+        total = sum(self.durations.values())
+        path = self.criticalPath()
+        pathTime = sum(self.durations[key] for key in path)
+        order = self.schedule(cores)
+        wall = max((entry["end"] for entry in order), default=0.0)
+        return {"projects": len(self.graph.projects),
+                "references": self.graph.references,
+                "estimated": self.estimated,
+                "total": total,
+                "criticalPath": path,
+                "criticalPathTime": pathTime,
+                "cores": cores,
+                # Neither the critical path nor the work of each core can take less
+                "speedup": total / max(pathTime, total / cores) if total else 1.0,
+                "scheduledWall": wall,
+                "scheduledSpeedup": total / wall if wall else 1.0,
+                "order": order,
+                "problems": self.graph.problems}
+
+
+def formatPlan(plan, top=20):
+    lines = ["%d projects, %d references, %d without a duration"
+             % (plan["projects"], plan["references"], plan["estimated"]),
+             "Critical path: %.2f s of %.2f s" % (plan["criticalPathTime"], plan["total"])]
+    lines.extend("  %s" % key for key in plan["criticalPath"])
+    lines.append("Speedup with %d cores: %.2f at best, %.2f in build order (%.2f s)"
+                 % (plan["cores"], plan["speedup"], plan["scheduledSpeedup"],
+                    plan["scheduledWall"]))
+    lines.append("Build order:")
+    lines.extend("  %9.2f %9.2f  %s" % (entry["start"], entry["end"], entry["project"])
+                 for entry in plan["order"][:top])
+    if len(plan["order"]) > top:
+        lines.append("  ... %d more" % (len(plan["order"]) - top))
+    lines.extend("warning: %s" % problem for problem in plan["problems"])
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Plan the build of the projects of a solution.")
+    parser.add_argument("solution", help=".sln file")
+    parser.add_argument("--log", action="append", default=[],
+                        help="MSBuild log of a previous build (can be repeated)")
+    parser.add_argument("--timings", help="JSON file with the seconds of each project")
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--top", type=int, default=20, help="number of projects to list")
+    parser.add_argument("--json", action="store_true", help="print the plan as JSON")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    try:
+        planner = Planner(Graph(args.solution), loadDurations(args.log, args.timings))
+    except (OSError, ValueError, workrunner.WorkError) as e:
+        print("error: %s" % e, file=sys.stderr)
+        return 2
+    plan = planner.plan(max(1, args.cores))
+    if args.json:
+        print(json.dumps(plan, indent=2))
+    else:
+        print(formatPlan(plan, args.top))
+        print("Planned in %.2f s" % (time.perf_counter() - started))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,55 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# JSON caches of the tools, stored in QTVSTOOLS_CACHE_DIR (default: a directory in the system's
+# temporary directory). A cache is used only if it has the format its tool expects, and is
+# replaced atomically so that tools running at the same time never read half a file.
+
+import json
+import os
+import tempfile
+
+
+def cacheDir():
+    directory = os.getenv("QTVSTOOLS_CACHE_DIR")
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), "qtvstools")
+    return directory
+
+
+def cacheFile(name):
+    return os.path.join(cacheDir(), name)
+
+
+# Returns the cached data, or None if there is no cache of the given format
+def load(fileName, cacheFormat):
+    try:
+        with open(fileName, encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("format") == cacheFormat:
+            return cache["data"]
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass
+    return None
+
+
+def save(fileName, cacheFormat, data):
+    directory = os.path.dirname(os.path.abspath(fileName))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"format": cacheFormat, "data": data}, f)
+        os.replace(temporary, fileName)
+    except OSError:
+        pass  # The data will be computed again next time
+
+
+# Key of a file's cache entries which changes when the file does
+def fileKey(path):
+    status = os.stat(path)
+    return [status.st_mtime_ns, status.st_size]
@@ -0,0 +1,59 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Stands in for a build when testing stressloop.py without Visual Studio. It prints some
+# MSBuild-like output, takes a while, allocates memory, writes a "binlog" and fails at random with
+# one of a few MSBuild-like errors. The outcome depends on the seed and STRESSLOOP_ITERATION only,
+# so a stress loop gives the same results each time.
+#
+#   python stressloop.py --iterations 50 --artifact fake.binlog -- python fakebuild.py
+#       --fail-rate 0.1
+
+import os
+import random
+import sys
+import time
+
+ERRORS = [
+    "C:\\work\\big\\BigProject%(project)03d\\BigProject%(project)03d.vcxproj(123,5): error MSB3491:"
+    " Could not write lines to file \"x64\\Debug\\qmake\\temp\\props.txt\". The process cannot"
+    " access the file because it is being used by another process.",
+    "C:\\work\\big\\BigProject%(project)03d\\x64\\Debug\\moc\\moc_BigProjectQtClass%(project)03d"
+    ".cpp(1,1): fatal error C1083: Cannot open compilation cache file: Permission denied"]
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Pretend to build a solution.")
+    parser.add_argument("--duration", type=float, default=0.1, help="mean duration in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5,
+                        help="maximum deviation from the mean duration, relative to it")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="probability of failing")
+    parser.add_argument("--memory", type=float, default=10.0, help="MB of memory to allocate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--binlog", default="fake.binlog", help="file to write")
+    args = parser.parse_args(argv)
+    iteration = int(os.environ.get("STRESSLOOP_ITERATION", "0"))
+    randomness = random.Random(args.seed * 1000003 + iteration)
+
+    print("Build started. Iteration %d." % iteration)
+    memory = bytearray(int(args.memory * 1000000))
+    memory[::4096] = b"x" * len(memory[::4096])  # Touch each page
+    time.sleep(max(0.0, args.duration * (1 + randomness.uniform(-args.jitter, args.jitter))))
+    failed = randomness.random() < args.fail_rate
+    with open(args.binlog, "wb") as f:
+        f.write(os.urandom(1024))
+    if failed:
+        print(randomness.choice(ERRORS) % {"project": randomness.randint(1, 100)})
+        print("Build FAILED.")
+        return 1
+    print("Build succeeded.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,117 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Stands in for moc, uic and rcc when testing toolcache.py without Qt. It takes their input, -o
+# and -v arguments, ignores the other options and writes an output derived from the content of
+# the input, or of the files listed by a .qrc file. Like moc, it warns about headers without
+# Q_OBJECT, follows the #include directives of the input through -I and lists the files it read
+# with --output-dep-file. The version is FAKETOOL_VERSION, and each run is logged to FAKETOOL_LOG.
+# The tool defaults to the name of the script, so a copy named moc.py is taken for moc:
+#
+#   python toolcache.py -- python moc.py -I include widget.h -o moc_widget.cpp
+
+import hashlib
+import os
+import re
+import sys
+import time
+
+import qrcindex
+
+
+TOOLS = ["moc", "uic", "rcc"]
+INCLUDE = re.compile(rb'^\s*#\s*include\s*["<]([^">]+)[">]', re.MULTILINE)
+
+
+# The files included by a file, directly or not, found next to the including file or in one of
+# the include directories
+def includedFiles(path, includeDirs, found=None):
+    found = [] if found is None else found
+    with open(path, "rb") as f:
+        content = f.read()
+    for name in INCLUDE.findall(content):
+        name = name.decode("utf-8")
+        for directory in [os.path.dirname(path)] + includeDirs:
+            candidate = os.path.abspath(os.path.join(directory, name))
+            if os.path.isfile(candidate):
+                if candidate not in found:
+                    found.append(candidate)
+                    includedFiles(candidate, includeDirs, found)
+                break
+    return found
+
+
+def _makeEscaped(path):
+    return path.replace("\\", "/").replace(" ", "\\ ")
+
+
+def main(argv):
+    import argparse
+    scriptName = os.path.splitext(os.path.basename(__file__))[0]
+    parser = argparse.ArgumentParser(description="Pretend to be moc, uic or rcc.")
+    parser.add_argument("input", nargs="?")
+    parser.add_argument("--tool", choices=TOOLS,
+                        default=scriptName if scriptName in TOOLS else "moc")
+    parser.add_argument("-o", "--output")
+    parser.add_argument("-I", dest="includeDirs", action="append", default=[])
+    parser.add_argument("--output-dep-file", action="store_true")
+    parser.add_argument("--dep-file-path")
+    parser.add_argument("-v", "--version", action="store_true")
+    parser.add_argument("--duration", type=float, default=0.0, help="seconds to take")
+    args, _ = parser.parse_known_args(argv)
+    if args.version:
+        print("%s %s" % (args.tool, os.getenv("FAKETOOL_VERSION", "6.99.0")))
+        return 0
+    if os.getenv("FAKETOOL_LOG"):
+        with open(os.getenv("FAKETOOL_LOG"), "a", encoding="utf-8") as f:
+            f.write("%s %s\n" % (args.tool, args.input))
+    time.sleep(args.duration)
+    try:
+        with open(args.input, "rb") as f:
+            content = f.read()
+        lines = ["// Generated by fake %s from '%s'"
+                 % (args.tool, os.path.relpath(args.input, os.path.dirname(
+                     os.path.abspath(args.output)) if args.output else ".").replace("\\", "/")),
+                 "// %s" % hashlib.sha256(content).hexdigest()]
+        dependencies = [os.path.abspath(args.input)]
+        if args.tool == "moc":
+            for include in includedFiles(args.input, args.includeDirs):
+                with open(include, "rb") as f:
+                    lines.append("// %s %s" % (os.path.basename(include),
+                                               hashlib.sha256(f.read()).hexdigest()))
+                dependencies.append(include)
+        if args.tool == "rcc":
+            resources, problems = qrcindex.parseQrc(os.path.abspath(args.input), content)
+            if problems:
+                raise OSError(problems[0])
+            for resource in resources:
+                with open(resource["file"], "rb") as f:
+                    lines.append("// %s %s" % (resource["resource"],
+                                               hashlib.sha256(f.read()).hexdigest()))
+    except OSError as e:
+        print("%s: Error: %s" % (args.tool, e), file=sys.stderr)
+        return 1
+    if args.tool == "moc" and b"Q_OBJECT" not in content:
+        print("%s:0: Note: No relevant classes found. No output generated." % args.input,
+              file=sys.stderr)
+    text = "\n".join(lines) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    if args.tool == "moc" and args.output_dep_file:
+        # Like moc, a make rule with the output as target
+        output = os.path.abspath(args.output or "moc")
+        with open(args.dep_file_path or output + ".d", "w", encoding="utf-8") as f:
+            f.write("%s: %s\n" % (_makeEscaped(output),
+                                  " \\\n  ".join(_makeEscaped(path) for path in dependencies)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
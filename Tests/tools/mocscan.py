@@ -0,0 +1,267 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Finds the headers and sources of projects which need moc, i.e. which use one of the macros in
+# MOC_MACROS outside of comments and string literals, and compares them with the QtMoc items of
+# the projects: files missing a QtMoc item are not processed by qtmoc.targets and fail to link,
+# QtMoc items of other files run moc for nothing.
+#
+# Files are memory-mapped, and most are only searched for the names of the macros; only files
+# containing one are tokenized. Verdicts are cached by content hash, and the hash of each file by
+# path, modification time and size, so scanning again only reads changed files. Files are scanned
+# by a pool of processes.
+#
+#   python mocscan.py DIRECTORY... [--json] [--workers N]
+
+import concurrent.futures
+import hashlib
+import mmap
+import os
+import re
+import sys
+import xml.etree.ElementTree as ElementTree
+
+import cache
+import projectformat
+
+CACHE_FORMAT = 1
+POOL_THRESHOLD = projectformat.POOL_THRESHOLD
+MOC_MACROS = ["Q_OBJECT", "Q_GADGET", "Q_GADGET_EXPORT", "Q_NAMESPACE", "Q_NAMESPACE_EXPORT"]
+# Items of the files which are scanned
+SCANNED_ITEMS = {"ClInclude", "ClCompile", "QtMoc"}
+
+_CANDIDATE = re.compile(rb"Q_(?:OBJECT|GADGET|NAMESPACE)")
+# Comments and literals are matched as a whole, so that macros are only found outside of them
+_TOKEN = re.compile(rb"//[^\n]*|/\*.*?\*/"
+                    rb"|R\"([^()\\\s]{0,16})\(.*?\)\1\""
+                    rb"|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'"
+                    rb"|\b(" + b"|".join(macro.encode() for macro in MOC_MACROS) + rb")\b",
+                    re.DOTALL)
+
+_knownHashes = frozenset()
+
+
+def findMacros(content):
+    if not _CANDIDATE.search(content):
+        return []
+    macros = {match.group(2).decode() for match in _TOKEN.finditer(content) if match.group(2)}
+    return sorted(macros)
+
+
+def _initWorker(knownHashes):
+    global _knownHashes
+    _knownHashes = knownHashes
+
+
+# Returns the cache key, content hash and macros of a file; the macros are None if the hash is
+# one of the known hashes
+def scanFile(path):
+    key = cache.fileKey(path)
+    with open(path, "rb") as f:
+        if key[1] == 0:
+            content = b""
+        else:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            digest = hashlib.sha256(content).hexdigest()
+            macros = findMacros(content) if digest not in _knownHashes else None
+        finally:
+            if key[1] != 0:
+                content.close()
+    return key, digest, macros
+
+
+def _scanFileSafely(path):
+    try:
+        return scanFile(path)
+    except FileNotFoundError:
+        return None, None, None
+    except (OSError, ValueError) as e:
+        return None, None, "cannot be read: %s" % e
+
+
+# Returns the Include and the item types of the files of a project, by path
+def projectItems(projectPath):
+    items = {}
+    directory = os.path.dirname(projectPath)
+    for element in ElementTree.parse(projectPath).getroot():
+        if element.tag.rsplit("}", 1)[-1] != "ItemGroup":
+            continue
+        for item in element:
+            itemType = item.tag.rsplit("}", 1)[-1]
+            include = item.get("Include") or ""
+            if itemType not in SCANNED_ITEMS or "$(" in include or "*" in include:
+                continue
+            for fileName in include.split(";"):
+                fileName = fileName.strip()
+                if fileName:
+                    path = os.path.normpath(os.path.join(directory, fileName.replace("\\", "/")))
+                    entry = items.setdefault(path, [fileName, []])
+                    if itemType not in entry[1]:
+                        entry[1].append(itemType)
+    return items
+
+
+class Scanner:
+
+    def __init__(self, cacheFile=None, workers=None):
+        self.cacheFile = cacheFile or cache.cacheFile("moc_candidates.json")
+        self.workers = workers
+        self.data = None
+        self.scanned = 0
+        self.hashed = 0
+        self.cached = 0
+
+    def _load(self):
+        if self.data is None:
+            self.data = cache.load(self.cacheFile, CACHE_FORMAT) or {
+                "projects": {}, "files": {}, "verdicts": {}}
+        return self.data
+
+    # Returns the items of each project, like projectItems(), or a problem if it cannot be read
+    def projectItems(self, projectPaths):
+        projects = self._load()["projects"]
+        results = {}
+        changed = False
+        for projectPath in projectPaths:
+            try:
+                key = cache.fileKey(projectPath)
+                entry = projects.get(projectPath)
+                if entry is None or entry[0] != key:
+                    entry = projects[projectPath] = [key, projectItems(projectPath)]
+                    changed = True
+                results[projectPath] = entry[1]
+            except (OSError, ElementTree.ParseError) as e:
+                results[projectPath] = "cannot be read: %s" % e
+        if changed:
+            for path in [path for path in projects if not os.path.exists(path)]:
+                del projects[path]
+            cache.save(self.cacheFile, CACHE_FORMAT, self.data)
+        return results
+
+    # Returns the macros used by each file, None if it does not exist, or a problem if it cannot
+    # be read
+    def scan(self, paths):
+        data = self._load()
+        files, verdicts = data["files"], data["verdicts"]
+        results = {}
+        missing = []
+        for path in paths:
+            entry = files.get(path)
+            try:
+                if entry is not None and entry[0] == cache.fileKey(path):
+                    results[path] = verdicts[entry[1]]
+                    continue
+            except (OSError, KeyError):
+                pass
+            missing.append(path)
+        self.cached = len(paths) - len(missing)
+        knownHashes = frozenset(verdicts)
+        if len(missing) < POOL_THRESHOLD or self.workers == 1:
+            _initWorker(knownHashes)
+            try:
+                scanned = list(map(_scanFileSafely, missing))
+            finally:
+                _initWorker(frozenset())
+        else:
+            workers = self.workers or os.cpu_count() or 1
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_initWorker, initargs=(knownHashes,))
+            with executor:
+                scanned = list(executor.map(_scanFileSafely, missing,
+                                            chunksize=max(1, len(missing) // (workers * 4))))
+        self.scanned = self.hashed = 0
+        for path, (key, digest, macros) in zip(missing, scanned):
+            if key is None:
+                results[path] = macros
+                files.pop(path, None)
+                continue
+            if macros is None:
+                self.hashed += 1
+            else:
+                self.scanned += 1
+                verdicts[digest] = macros
+            files[path] = [key, digest]
+            results[path] = verdicts[digest]
+        if missing:
+            for path in [path for path in files if not os.path.exists(path)]:
+                del files[path]
+            used = {digest for _, digest in files.values()}
+            for digest in [digest for digest in verdicts if digest not in used]:
+                del verdicts[digest]
+            cache.save(self.cacheFile, CACHE_FORMAT, data)
+        return {path: results[path] for path in paths}
+
+
+# Compares the QtMoc items of projects with the files needing moc
+def compare(projectPaths, scanner):
+    projects = scanner.projectItems(projectPaths)
+    paths = sorted({path for items in projects.values() if isinstance(items, dict)
+                    for path in items})
+    verdicts = scanner.scan(paths)
+    results = {}
+    for projectPath, items in projects.items():
+        result = {"add": [], "remove": [], "problems": []}
+        if isinstance(items, str):
+            result["problems"].append(items)
+            items = {}
+        for path, (name, itemTypes) in items.items():
+            verdict = verdicts[path]
+            if verdict is None:
+                if "QtMoc" in itemTypes:
+                    result["problems"].append("%s is missing" % name)
+            elif isinstance(verdict, str):
+                result["problems"].append("%s %s" % (name, verdict))
+            elif verdict and "QtMoc" not in itemTypes:
+                result["add"].append([name, verdict])
+            elif not verdict and "QtMoc" in itemTypes:
+                result["remove"].append(name)
+        results[projectPath] = result
+    return results
+
+
+def formatResults(results):
+    lines = []
+    for projectPath, result in results.items():
+        if not (result["add"] or result["remove"] or result["problems"]):
+            continue
+        lines.append(projectPath)
+        lines.extend("  + QtMoc %s (%s)" % (name, ", ".join(macros))
+                     for name, macros in result["add"])
+        lines.extend("  - QtMoc %s" % name for name in result["remove"])
+        lines.extend("  ! %s" % problem for problem in result["problems"])
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    import json
+    import time
+    parser = argparse.ArgumentParser(description="Compare the QtMoc items of projects with the "
+                                                 "files using Q_OBJECT and similar macros.")
+    parser.add_argument("paths", nargs="+", help="directories to search, or project files")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--workers", type=int, help="number of processes scanning files")
+    parser.add_argument("--cache", help="cache file")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    scanner = Scanner(args.cache, args.workers)
+    results = compare(projectformat.findProjects(args.paths), scanner)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        if any(result["add"] or result["remove"] or result["problems"]
+               for result in results.values()):
+            print(formatResults(results))
+        print("%d projects, %d files scanned, %d unchanged, %d from cache, %.1f s"
+              % (len(results), scanner.scanned, scanner.hashed, scanner.cached,
+                 time.perf_counter() - started))
+    return 1 if any(result["add"] or result["remove"] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,485 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Measures where Qt/MSBuild spends build time, from MSBuild logs:
+#   - text logs of detailed or diagnostic verbosity, ideally with timestamps
+#     (msbuild /m /flp:v=diag;ShowTimestamp;PerformanceSummary), also gzipped,
+#   - build events exported as JSON lines, one object per event with the properties of MSBuild's
+#     BuildEventArgs (e.g. "type": "TargetStarted", "timestamp", "targetName", "projectFile",
+#     "buildEventContext": {"nodeId", "projectContextId"}).
+# Logs are read line by line, so memory depends on the number of work items, not on the size of
+# the log.
+#
+# For the Qt targets (QtMoc, QtUic, QtRcc, QtWork, QtTranslation*), the report gives the calls,
+# the wall time during which any instance ran and the sum of the times of all instances ("busy"
+# time, i.e. the time they occupied nodes). For QtRunWork's work items (moc, uic, rcc, ...), it
+# gives the durations of the tool processes, which QtRunWork only logs in debug mode. The tools
+# are single-threaded, so their summed process time is what they cost in CPU time. Parallelism
+# is the average number of nodes running tasks, compared to /m, and the average number of tool
+# processes running during QtRunWork, compared to QtMaxProcs. Without timestamps, times come
+# from MSBuild's performance summary.
+#
+#   python msbuildlog.py analyze msbuild.log [--top 20] [--json]
+#   python msbuildlog.py diff before.log after.log
+
+import datetime
+import gzip
+import json
+import os
+import re
+import sys
+
+QT_TARGETS = ["QtMoc", "QtUic", "QtRcc", "QtRepc", "QtWork", "QtTranslationUpdate",
+              "QtTranslationRelease"]
+# Tools run by QtRunWork and the targets running them in-process
+WORK_TYPES = ["moc", "uic", "rcc", "repc"]
+TARGET_TOOLS = {"QtTranslationUpdate": "lupdate", "QtTranslationRelease": "lrelease"}
+# Tasks which wait for other projects instead of keeping their node busy
+YIELDING_TASKS = {"MSBuild", "CallTarget"}
+
+TIMESTAMP = re.compile(r"^(\d{1,2}):(\d{2}):(\d{2})[.,](\d{3})\s+")
+CONTEXT = re.compile(r"^\s*(?:(\d+):)?(\d+)>")
+TARGET_STARTED = re.compile(r'^Target "([^"]+)" in (?:file "[^"]*" from )?project "([^"]+)"')
+TARGET_FINISHED = re.compile(r'^Done building target "([^"]+)" in project "([^"]+)"')
+TASK_STARTED = re.compile(r'^Task "([^"]+)"')
+TASK_FINISHED = re.compile(r'^Done executing task "([^"]+)"')
+PROJECT_ON_NODE = re.compile(r'^Project "[^"]+" on node (\d+)')
+PROJECT_BUILDING = re.compile(r'is building "[^"]+" \((\d+)(?::\d+)?\) on node (\d+)')
+COMMAND_LINE = re.compile(r"^(?:Command line arguments|CommandLine)\s*=\s*(.*)")
+MAX_CPU_COUNT = re.compile(r'(?:^|[\s"])[-/]m(?:axcpucount)?(?::(\d+))?(?=[\s"]|$)',
+                           re.IGNORECASE)
+SUMMARY_HEADER = re.compile(r"^(Project|Target|Task) Performance Summary:")
+SUMMARY_ENTRY = re.compile(r"^\s*(\d+) ms\s+(.+?)\s+(\d+) calls")
+WORK_STARTED = re.compile(r"^(%s) (.+)$" % "|".join(WORK_TYPES))
+WORK_EXITED = re.compile(r"^## QtRunWork exit (\w+)\{(.+)\} \[\d+\] = (-?\d+) "
+                         r"\((\d+(?:[.,]\d+)?) msecs\)")
+
+
+def _openLog(fileName):
+    if fileName.endswith(".gz"):
+        return gzip.open(fileName, "rt", encoding="utf-8-sig", errors="replace")
+    return open(fileName, encoding="utf-8-sig", errors="replace")
+
+
+# Yields the events of a text log as tuples (kind, time in seconds or None, context, values...)
+def parseTextLog(lines):
+    section = None
+    lastTime = None
+    dayOffset = 0
+    for line in lines:
+        line = line.rstrip("\r\n")
+        time = None
+        match = TIMESTAMP.match(line)
+        if match:
+            hours, minutes, seconds, milliseconds = (int(group) for group in match.groups())
+            time = hours * 3600 + minutes * 60 + seconds + milliseconds / 1000.0 + dayOffset
+            if lastTime is not None and time < lastTime - 12 * 3600:
+                dayOffset += 24 * 3600  # Past midnight
+                time += 24 * 3600
+            lastTime = time
+            line = line[match.end():]
+        context = None
+        match = CONTEXT.match(line)
+        if match:
+            context = int(match.group(2))
+            if match.group(1):
+                yield ("node", time, context, int(match.group(1)))
+            line = line[match.end():]
+        text = line.strip()
+        if not text:
+            continue
+
+        match = SUMMARY_HEADER.match(text)
+        if match:
+            section = match.group(1)
+            continue
+        if section:
+            match = SUMMARY_ENTRY.match(line)
+            if match:
+                yield ("summary", time, context, section, match.group(2),
+                       int(match.group(1)) / 1000.0, int(match.group(3)))
+                continue
+            section = None
+
+        match = TARGET_STARTED.match(text)
+        if match:
+            yield ("targetStarted", time, context, match.group(1), match.group(2))
+            continue
+        match = TARGET_FINISHED.match(text)
+        if match:
+            yield ("targetFinished", time, context, match.group(1), match.group(2))
+            continue
+        match = TASK_STARTED.match(text)
+        if match:
+            yield ("taskStarted", time, context, match.group(1))
+            continue
+        match = TASK_FINISHED.match(text)
+        if match:
+            yield ("taskFinished", time, context, match.group(1))
+            continue
+        match = PROJECT_ON_NODE.match(text)
+        if match:
+            yield ("node", time, context, int(match.group(1)))
+            continue
+        match = PROJECT_BUILDING.search(text)
+        if match:
+            yield ("node", time, int(match.group(1)), int(match.group(2)))
+            continue
+        match = COMMAND_LINE.match(text)
+        if match:
+            yield ("commandLine", time, context, match.group(1))
+            continue
+        yield ("message", time, context, text)
+
+
+def _timestamp(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+# Yields the events of a JSON lines export like parseTextLog()
+def parseJsonEvents(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        event = {key.lower(): value for key, value in json.loads(line).items()}
+        context = {key.lower(): value
+                   for key, value in (event.get("buildeventcontext") or {}).items()}
+        contextId = context.get("projectcontextid", event.get("projectcontextid"))
+        node = context.get("nodeid", event.get("nodeid"))
+        time = _timestamp(event.get("timestamp"))
+        kind = (event.get("type") or "").replace("EventArgs", "")
+        if node is not None and node >= 0 and contextId is not None:
+            yield ("node", time, contextId, node)
+        if kind == "TargetStarted":
+            yield ("targetStarted", time, contextId, event.get("targetname"),
+                   event.get("projectfile"))
+        elif kind == "TargetFinished":
+            yield ("targetFinished", time, contextId, event.get("targetname"),
+                   event.get("projectfile"))
+        elif kind == "TaskStarted":
+            yield ("taskStarted", time, contextId, event.get("taskname"))
+        elif kind == "TaskFinished":
+            yield ("taskFinished", time, contextId, event.get("taskname"))
+        elif kind == "BuildStarted" and event.get("commandline"):
+            yield ("commandLine", time, contextId, event.get("commandline"))
+        elif event.get("message"):
+            for text in event["message"].splitlines():
+                yield ("message", time, contextId, text.strip())
+
+
+def parseLog(fileName):
+    with _openLog(fileName) as f:
+        first = f.readline()
+        parse = parseJsonEvents if first.lstrip().startswith("{") else parseTextLog
+
+        def lines():
+            yield first
+            yield from f
+        yield from parse(lines())
+
+
+class Activity:
+    # Wall time during which at least one instance of something ran, and the summed time of all
+    # instances
+
+    def __init__(self):
+        self.calls = 0
+        self.running = 0
+        self.since = None
+        self.wall = 0.0
+        self.busy = 0.0
+
+    def advance(self, elapsed):
+        if self.running:
+            self.wall += elapsed
+            self.busy += elapsed * self.running
+
+    def start(self):
+        self.calls += 1
+        self.running += 1
+
+    def finish(self):
+        self.running = max(0, self.running - 1)
+
+    def toJson(self):
+        return {"calls": self.calls, "wall": self.wall, "busy": self.busy}
+
+
+class Analysis:
+
+    def __init__(self):
+        self.firstTime = None
+        self.lastTime = None
+        self.maxCpuCount = None
+        self.nodeOfContext = {}
+        self.nodes = set()
+        # Tasks running per node, without those waiting for other projects
+        self.nodeTasks = {}
+        self.busyNodes = 0
+        self.peakNodes = 0
+        self.nodeTime = 0.0
+        self.targets = {name: Activity() for name in QT_TARGETS}
+        self.runWork = Activity()
+        self.runWorkContexts = set()
+        self.workItems = {}
+        self.summary = {"Target": {}, "Task": {}}
+
+    def _node(self, context):
+        return self.nodeOfContext.get(context, context)
+
+    def _advance(self, time):
+        if time is None:
+            return
+        if self.firstTime is None:
+            self.firstTime = time
+        if self.lastTime is not None and time > self.lastTime:
+            elapsed = time - self.lastTime
+            self.nodeTime += elapsed * self.busyNodes
+            self.runWork.advance(elapsed)
+            for activity in self.targets.values():
+                activity.advance(elapsed)
+        if self.lastTime is None or time > self.lastTime:
+            self.lastTime = time
+
+    def _setTasks(self, node, delta):
+        before = self.nodeTasks.get(node, 0)
+        after = max(0, before + delta)
+        self.nodeTasks[node] = after
+        self.busyNodes += (after > 0) - (before > 0)
+        self.peakNodes = max(self.peakNodes, self.busyNodes)
+
+    def add(self, event):
+        kind, time, context = event[:3]
+        self._advance(time)
+        if kind == "node":
+            self.nodeOfContext[context] = event[3]
+            self.nodes.add(event[3])
+        elif kind == "targetStarted" and event[3] in self.targets:
+            self.targets[event[3]].start()
+        elif kind == "targetFinished" and event[3] in self.targets:
+            self.targets[event[3]].finish()
+        elif kind in ("taskStarted", "taskFinished"):
+            delta = 1 if kind == "taskStarted" else -1
+            if event[3] not in YIELDING_TASKS:
+                self._setTasks(self._node(context), delta)
+            if event[3] == "QtRunWork":
+                if delta > 0:
+                    self.runWork.start()
+                    self.runWorkContexts.add(context)
+                else:
+                    self.runWork.finish()
+                    self.runWorkContexts.discard(context)
+        elif kind == "commandLine":
+            match = MAX_CPU_COUNT.search(event[3])
+            if match:
+                self.maxCpuCount = int(match.group(1)) if match.group(1) else 0
+        elif kind == "summary" and event[3] in self.summary:
+            self.summary[event[3]][event[4]] = (event[5], event[6])
+        elif kind == "message":
+            self._message(time, context, event[3])
+
+    def _message(self, time, context, text):
+        match = WORK_EXITED.match(text)
+        if match:
+            item = self._workItem(match.group(1), match.group(2))
+            item["exitCode"] = int(match.group(3))
+            item["duration"] = float(match.group(4).replace(",", ".")) / 1000.0
+            return
+        if context in self.runWorkContexts or context is None:
+            match = WORK_STARTED.match(text)
+            if match:
+                self._workItem(match.group(1), match.group(2))["started"] = time
+
+    def _workItem(self, workType, fileName):
+        key = "%s{%s}" % (workType, fileName)
+        item = self.workItems.get(key)
+        if item is None:
+            item = self.workItems[key] = {"type": workType, "file": fileName, "started": None,
+                                          "duration": None, "exitCode": None}
+        return item
+
+    def report(self):
+        timed = self.firstTime is not None and self.lastTime is not None
+        wall = self.lastTime - self.firstTime if timed else None
+        targets = {}
+        for name, activity in self.targets.items():
+            entry = activity.toJson()
+            if not timed:
+                entry["wall"] = None
+                entry["busy"], calls = self.summary["Target"].get(name, (0.0, 0))
+                entry["calls"] = entry["calls"] or calls
+            if entry["calls"]:
+                targets[name] = entry
+        tools = {}
+        for item in self.workItems.values():
+            tool = tools.setdefault(item["type"], {"items": 0, "timed": 0, "time": 0.0,
+                                                   "failed": 0})
+            tool["items"] += 1
+            if item["duration"] is not None:
+                tool["timed"] += 1
+                tool["time"] += item["duration"]
+            if item["exitCode"]:
+                tool["failed"] += 1
+        for target, tool in TARGET_TOOLS.items():
+            if target in targets:
+                tools[tool] = {"items": targets[target]["calls"], "timed": targets[target]["calls"],
+                               "time": targets[target]["busy"], "failed": 0}
+        toolTime = sum(item["duration"] for item in self.workItems.values()
+                       if item["duration"] is not None)
+        nodes = len(self.nodes) or None
+        return {"wall": wall,
+                "maxCpuCount": self.maxCpuCount,
+                "nodes": nodes,
+                "parallelism": self.nodeTime / wall if wall else None,
+                "peakNodes": self.peakNodes if timed else None,
+                "targets": targets,
+                "tools": tools,
+                "toolParallelism": (toolTime / self.runWork.wall
+                                    if timed and self.runWork.wall and toolTime else None),
+                "workItems": self.workItems}
+
+
+def analyze(fileName):
+    analysis = Analysis()
+    for event in parseLog(fileName):
+        analysis.add(event)
+    return analysis.report()
+
+
+def _slowest(report, top):
+    items = [(key, item) for key, item in report["workItems"].items()
+             if item["duration"] is not None]
+    return sorted(items, key=lambda entry: -entry[1]["duration"])[:top]
+
+
+def _seconds(value):
+    return "-" if value is None else "%.2f s" % value
+
+
+def formatReport(report, top=20):
+    lines = []
+    maxCpuCount = report["maxCpuCount"]
+    requested = ("-" if maxCpuCount is None
+                 else "all processors" if maxCpuCount == 0 else str(maxCpuCount))
+    lines.append("Build: %s, nodes: %s, /m: %s" % (_seconds(report["wall"]),
+                                                  report["nodes"] or "-", requested))
+    if report["parallelism"] is not None:
+        lines.append("Parallelism: %.2f nodes busy on average, %d at most"
+                     % (report["parallelism"], report["peakNodes"]))
+    lines.append("%-24s %6s %10s %10s" % ("Target", "Calls", "Wall", "Busy"))
+    for name, entry in report["targets"].items():
+        lines.append("%-24s %6d %10s %10s" % (name, entry["calls"], _seconds(entry["wall"]),
+                                              _seconds(entry["busy"])))
+    if report["tools"]:
+        lines.append("%-24s %6s %10s" % ("Tool", "Runs", "Time"))
+        for name, tool in sorted(report["tools"].items()):
+            time = _seconds(tool["time"]) if tool["timed"] else "-"
+            lines.append("%-24s %6d %10s%s" % (name, tool["items"], time,
+                                               "  (%d failed)" % tool["failed"]
+                                               if tool["failed"] else ""))
+    if report["toolParallelism"] is not None:
+        lines.append("Tool processes running during QtRunWork: %.2f on average"
+                     % report["toolParallelism"])
+    slowest = _slowest(report, top)
+    if slowest:
+        lines.append("Slowest work items:")
+        lines.extend("%10s  %s" % (_seconds(item["duration"]), key) for key, item in slowest)
+    elif report["workItems"]:
+        lines.append("Work items have no durations; QtRunWork only logs them in debug mode.")
+    return "\n".join(lines)
+
+
+def _delta(before, after):
+    if before is None or after is None:
+        return None
+    return after - before
+
+
+# Differences between two reports, "after" minus "before"
+def diff(before, after):
+    targets = {}
+    for name in dict.fromkeys(list(before["targets"]) + list(after["targets"])):
+        old = before["targets"].get(name, {"calls": 0, "wall": 0.0, "busy": 0.0})
+        new = after["targets"].get(name, {"calls": 0, "wall": 0.0, "busy": 0.0})
+        targets[name] = {key: _delta(old[key], new[key]) for key in ("calls", "wall", "busy")}
+    tools = {}
+    for name in sorted(set(before["tools"]) | set(after["tools"])):
+        old = before["tools"].get(name, {"items": 0, "time": 0.0})
+        new = after["tools"].get(name, {"items": 0, "time": 0.0})
+        tools[name] = {"items": new["items"] - old["items"], "time": new["time"] - old["time"]}
+    workItems = {}
+    for key in set(before["workItems"]) | set(after["workItems"]):
+        old = before["workItems"].get(key, {}).get("duration")
+        new = after["workItems"].get(key, {}).get("duration")
+        if old is not None or new is not None:
+            workItems[key] = {"before": old, "after": new, "delta": (new or 0.0) - (old or 0.0)}
+    return {"wall": _delta(before["wall"], after["wall"]),
+            "parallelism": _delta(before["parallelism"], after["parallelism"]),
+            "toolParallelism": _delta(before["toolParallelism"], after["toolParallelism"]),
+            "targets": targets,
+            "tools": tools,
+            "workItems": workItems}
+
+
+def formatDiff(difference, top=20):
+    def signed(value, unit=" s"):
+        return "-" if value is None else "%+.2f%s" % (value, unit)
+    lines = ["Build: %s, parallelism: %s, tool parallelism: %s"
+             % (signed(difference["wall"]), signed(difference["parallelism"], ""),
+                signed(difference["toolParallelism"], ""))]
+    lines.append("%-24s %6s %10s %10s" % ("Target", "Calls", "Wall", "Busy"))
+    for name, entry in difference["targets"].items():
+        lines.append("%-24s %+6d %10s %10s" % (name, entry["calls"], signed(entry["wall"]),
+                                               signed(entry["busy"])))
+    if difference["tools"]:
+        lines.append("%-24s %6s %10s" % ("Tool", "Runs", "Time"))
+        for name, tool in difference["tools"].items():
+            lines.append("%-24s %+6d %10s" % (name, tool["items"], signed(tool["time"])))
+    changed = sorted(difference["workItems"].items(),
+                     key=lambda entry: (-abs(entry[1]["delta"]), entry[0]))
+    if changed:
+        lines.append("Work items changed most:")
+        lines.extend("%10s  %s" % (signed(item["delta"]), key) for key, item in changed[:top])
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Measure the Qt targets and tools in MSBuild "
+                                                 "logs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    analyzeParser = subparsers.add_parser("analyze", help="report on one build")
+    analyzeParser.add_argument("log", help="text log, or events as JSON lines")
+    diffParser = subparsers.add_parser("diff", help="compare two builds")
+    diffParser.add_argument("before")
+    diffParser.add_argument("after")
+    for subparser in (analyzeParser, diffParser):
+        subparser.add_argument("--top", type=int, default=20, help="number of work items listed")
+        subparser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    for fileName in [args.log] if args.command == "analyze" else [args.before, args.after]:
+        if not os.path.isfile(fileName):
+            parser.error("%s not found" % fileName)
+    if args.command == "analyze":
+        report = analyze(args.log)
+        print(json.dumps(report, indent=2) if args.json else formatReport(report, args.top))
+    else:
+        difference = diff(analyze(args.before), analyze(args.after))
+        print(json.dumps(difference, indent=2) if args.json
+              else formatDiff(difference, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,268 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Inventory of the Qt project format versions of many .vcxproj files, see
+# Tests/ProjectFormats/ProjectFormats.md. Like MsBuildProjectFormat.GetVersion(), the version is
+# read from the Keyword of the Globals property group: "QtVS_v3NN" is v3.N, "Qt4VS..." is v1 or
+# v2. v2 projects differ from the qmake output of v1 by referencing $(QTDIR) or storing the Qt
+# version in ProjectExtensions. Projects are parsed incrementally and only until the first item
+# definitions or items, which follow the Globals, the Qt/MSBuild imports and the QtSettings
+# (QtInstall, QtModules) in all v3 formats. Only v1/v2 projects are read further, until they show
+# a sign of v2.
+#
+# Directories are scanned by a pool of processes. Results are cached by path, modification time
+# and size, so scanning again only parses changed projects.
+#
+#   python projectformat.py DIRECTORY... [--json] [--workers N]
+
+import concurrent.futures
+import os
+import re
+import sys
+import xml.etree.ElementTree as ElementTree
+
+import cache
+
+CACHE_FORMAT = 1
+LATEST = 304
+CHUNK_SIZE = 16384
+# Directories not searched for projects
+SKIPPED_DIRECTORIES = {".git", ".vs", "node_modules"}
+# Scanning fewer projects than this in a pool of processes takes longer than doing it directly
+POOL_THRESHOLD = 64
+
+KEYWORD_V3 = re.compile(r"^QtVS_v(\d{3})$")
+KEYWORD_V2 = "Qt4VS"
+QT_VERSION_PROPERTY = re.compile(r"^Qt\d*Version(_x0020_.*)?$", re.IGNORECASE)
+
+
+def formatName(version):
+    if version is None:
+        return None
+    if version < 300:
+        return "v%d" % (version // 100)
+    return "v%d.%d" % (version // 100, version % 100)
+
+
+def _localName(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+class _ProjectReader:
+    # Collects what is needed from the events of an incremental parser and tells when to stop
+
+    def __init__(self):
+        self.keyword = None
+        self.imports = []
+        self.qtInstall = []
+        self.qtModules = []
+        self.qtDir = False
+        self.path = []
+        self.done = False
+
+    def start(self, element):
+        name = _localName(element.tag)
+        self.path.append((name, element.get("Label")))
+        if len(self.path) == 2 and (name == "ItemDefinitionGroup" or (
+                name == "ItemGroup" and element.get("Label") != "ProjectConfigurations")):
+            # Items follow everything v3 formats have to say
+            if not (self.keyword or "").startswith(KEYWORD_V2):
+                self.done = True
+        elif name == "Import":
+            project = element.get("Project", "")
+            fileName = re.split(r"[\\/]", project)[-1]
+            if "$(qtmsbuild)" in project.lower() and fileName not in self.imports:
+                self.imports.append(fileName)
+        elif name == "UserProperties":
+            if any(QT_VERSION_PROPERTY.match(attribute) for attribute in element.attrib):
+                self.qtDir = True
+
+    def end(self, element):
+        name, _ = self.path.pop()
+        text = (element.text or "").strip()
+        parent = self.path[-1] if self.path else (None, None)
+        if name == "Keyword" and parent == ("PropertyGroup", "Globals") and self.keyword is None:
+            self.keyword = text
+        elif name == "QtInstall" and text and text not in self.qtInstall:
+            self.qtInstall.append(text)
+        elif name == "QtModules":
+            self.qtModules.extend(module for module in text.split(";")
+                                  if module and module not in self.qtModules)
+        elif "$(QTDIR)" in text.upper():
+            self.qtDir = True
+        if self.qtDir and (self.keyword or "").startswith(KEYWORD_V2):
+            self.done = True
+        if len(self.path) == 1:
+            element.clear()
+
+
+def _classify(reader):
+    version = None
+    problems = []
+    keyword = reader.keyword or ""
+    match = KEYWORD_V3.match(keyword)
+    if match:
+        version = int(match.group(1))
+        if not 300 <= version <= LATEST:
+            problems.append("unknown format version %s" % keyword)
+            version = None
+    elif keyword.startswith(KEYWORD_V2):
+        version = 200 if reader.qtDir else 100
+    elif keyword.startswith("QtVS"):
+        problems.append("unknown format version %s" % keyword)
+    elif reader.imports:
+        problems.append("imports Qt/MSBuild without a Qt keyword")
+    if version is not None and version >= 300:
+        if not any(name.lower() == "qt.props" for name in reader.imports):
+            problems.append("qt.props is not imported")
+        if not reader.qtInstall:
+            problems.append("QtInstall is not set")
+    isQt = version is not None or bool(problems)
+    return {"keyword": reader.keyword,
+            "version": version,
+            "format": formatName(version) if version is not None else
+            ("unknown" if isQt else None),
+            "needsConversion": version is not None and version < LATEST,
+            "imports": reader.imports,
+            "qtInstall": reader.qtInstall,
+            "qtModules": reader.qtModules,
+            "problems": problems}
+
+
+# Classifies a project file, reading it only as far as needed
+def scanProject(path):
+    reader = _ProjectReader()
+    parser = ElementTree.XMLPullParser(events=("start", "end"))
+    bytesRead = 0
+    try:
+        with open(path, "rb") as f:
+            while not reader.done:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                bytesRead += len(chunk)
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    if event == "start":
+                        reader.start(element)
+                    else:
+                        reader.end(element)
+                    if reader.done:
+                        break
+    except (OSError, ElementTree.ParseError) as e:
+        result = _classify(reader)
+        result["problems"].append("cannot be read: %s" % e)
+        result["bytesRead"] = bytesRead
+        return result
+    result = _classify(reader)
+    result["bytesRead"] = bytesRead
+    return result
+
+
+def findProjects(directories):
+    projects = []
+    for directory in directories:
+        if os.path.isfile(directory):
+            projects.append(os.path.abspath(directory))
+            continue
+        for root, subdirectories, files in os.walk(directory):
+            subdirectories[:] = sorted(subdirectory for subdirectory in subdirectories
+                                       if subdirectory not in SKIPPED_DIRECTORIES)
+            projects.extend(os.path.abspath(os.path.join(root, fileName))
+                            for fileName in sorted(files) if fileName.endswith(".vcxproj"))
+    return list(dict.fromkeys(projects))
+
+
+class Scanner:
+
+    def __init__(self, cacheFile=None, workers=None):
+        self.cacheFile = cacheFile or cache.cacheFile("project_formats.json")
+        self.workers = workers
+        self.scanned = 0
+        self.cached = 0
+
+    # Returns the results by project path
+    def scan(self, paths):
+        entries = cache.load(self.cacheFile, CACHE_FORMAT) or {}
+        results = {}
+        keys = {}
+        missing = []
+        for path in paths:
+            try:
+                keys[path] = cache.fileKey(path)
+            except OSError:
+                results[path] = dict(_classify(_ProjectReader()), bytesRead=0,
+                                     problems=["cannot be read"])
+                continue
+            entry = entries.get(path)
+            if entry is not None and entry["key"] == keys[path]:
+                results[path] = entry["result"]
+            else:
+                missing.append(path)
+        self.cached = len(paths) - len(missing)
+        self.scanned = len(missing)
+        if len(missing) < POOL_THRESHOLD or self.workers == 1:
+            scanned = map(scanProject, missing)
+        else:
+            workers = self.workers or os.cpu_count() or 1
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            with executor:
+                scanned = list(executor.map(scanProject, missing,
+                                            chunksize=max(1, len(missing) // (workers * 4))))
+        for path, result in zip(missing, scanned):
+            results[path] = result
+            entries[path] = {"key": keys[path], "result": result}
+        if missing:
+            for path in [path for path in entries if not os.path.exists(path)]:
+                del entries[path]
+            cache.save(self.cacheFile, CACHE_FORMAT, entries)
+        return {path: results[path] for path in paths}
+
+
+def formatResults(results):
+    counts = {}
+    for result in results.values():
+        name = result["format"] or "not Qt"
+        counts[name] = counts.get(name, 0) + 1
+    lines = ["%-10s %6d" % (name, count) for name, count in sorted(counts.items())]
+    conversions = [path for path, result in results.items() if result["needsConversion"]]
+    if conversions:
+        lines.append("Need conversion to v%s:" % formatName(LATEST)[1:])
+        lines.extend("  %-6s %s" % (results[path]["format"], path) for path in conversions)
+    problems = [(path, result) for path, result in results.items() if result["problems"]]
+    if problems:
+        lines.append("Problems:")
+        lines.extend("  %s: %s" % (path, "; ".join(result["problems"]))
+                     for path, result in problems)
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    import json
+    import time
+    parser = argparse.ArgumentParser(description="List the Qt project format versions of "
+                                                 ".vcxproj files.")
+    parser.add_argument("paths", nargs="+", help="directories to search, or project files")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--workers", type=int, help="number of processes parsing projects")
+    parser.add_argument("--cache", help="cache file")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    scanner = Scanner(args.cache, args.workers)
+    results = scanner.scan(findProjects(args.paths))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(formatResults(results))
+        print("%d projects, %d parsed, %d from cache, %.1f s"
+              % (len(results), scanner.scanned, scanner.cached, time.perf_counter() - started))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,791 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Batch conversion of Qt projects to the latest project format, v3.4, without Visual Studio.
+# The steps are those of MsBuildProjectConverter.ConvertProject():
+#   * custom build steps of moc, uic, rcc, repc and lrelease become Qt/MSBuild items, and the
+#     items of the files they generated are removed (ConvertCustomBuildToQtMsBuild);
+#   * multi-processor compilation is enabled (EnableMultiProcessorCompilation);
+#   * the v3 layout of Tests/ProjectFormats/304 is set up: keyword, $(QtMsBuild) fallback,
+#     qt_defaults.props, QtSettings, QtMsBuildNotFound, Qt.props in the property sheets and
+#     qt.targets (ConvertToV3);
+#   * v1 and v2 projects get QtInstall and QtModules, which replace the Qt macros, include paths
+#     and libraries of the modules they use, and lose their Qt user properties (UpgradeFromV2).
+#
+# Unlike MsBuildProjectReaderWriter, which loads and saves whole XML documents, the project files
+# are edited as text: elements are located by their offsets and only the lines that change are
+# touched, so the encoding, line endings, indentation, attribute quoting and comments of the rest
+# of the file stay as they were. Elements that move, like QtSettings groups of v3.0-v3.3 projects,
+# keep their original text.
+#
+# Without an MSBuild evaluator, command lines of custom build steps are not translated into
+# Qt/MSBuild properties: the new items use the defaults, which take include paths and macros from
+# the C++ settings like the items of new projects do.
+#
+#   python projectupgrade.py DIRECTORY... [--dry-run] [--diff] [--qt-install NAME] [--workers N]
+
+import concurrent.futures
+import difflib
+import functools
+import os
+import re
+import sys
+import xml.etree.ElementTree as ElementTree
+from xml.sax.saxutils import escape, quoteattr, unescape
+
+import projectformat
+
+LATEST_KEYWORD = "QtVS_v%d" % projectformat.LATEST
+QT_DEFAULT_PROPS = r"$(QtMsBuild)\qt_defaults.props"
+QT_PROPS = r"$(QtMsBuild)\Qt.props"
+QT_TARGETS = r"$(QtMsBuild)\qt.targets"
+CPP_PROPS = r"$(VCTargetsPath)\Microsoft.Cpp.props"
+CPP_TARGETS = r"$(VCTargetsPath)\Microsoft.Cpp.targets"
+DEFAULT_QT_INSTALL = "$(DefaultQtVersion)"
+
+MODULE_FILES = {
+    5: os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "QtVsTools.Package",
+                    "qtmodules.xml"),
+    6: os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "QtVsTools.Package",
+                    "qt6modules.xml")
+}
+# Item types of the Qt/MSBuild tools run by custom build steps
+TOOL_ITEM_TYPES = {"moc": "QtMoc", "rcc": "QtRcc", "repc": "QtRepc", "uic": "QtUic",
+                   "lrelease": "QtTranslation"}
+# Project user properties of the v2 format
+V2_USER_PROPERTIES = {"lupdateOptions", "lupdateOnBuild", "lreleaseOptions", "MocDir",
+                      "MocOptions", "RccDir", "UicDir"}
+
+# The elements of Tests/ProjectFormats/304/QtProjectV304.vcxproj, indented by two spaces per level
+QT_MSBUILD_FALLBACK = """\
+<QtMsBuild Condition="'$(QtMsBuild)'=='' OR !Exists('$(QtMsBuild)\\qt.targets')"
+  >$(MSBuildProjectDirectory)\\QtMsBuild</QtMsBuild>"""
+QT_DEFAULT_PROPS_GROUP = """\
+<ImportGroup Condition="Exists('$(QtMsBuild)\\qt_defaults.props')">
+  <Import Project="$(QtMsBuild)\\qt_defaults.props" />
+</ImportGroup>"""
+QT_MSBUILD_NOT_FOUND = """\
+<Target Name="QtMsBuildNotFound"
+  BeforeTargets="CustomBuild;ClCompile"
+  Condition="!Exists('$(QtMsBuild)\\qt.targets') or !Exists('$(QtMsBuild)\\qt.props')">
+  <Message Importance="High"
+    Text="QtMsBuild: could not locate qt.targets, qt.props; project may not build correctly." />
+</Target>"""
+QT_PROPS_IMPORT = '<Import Project="$(QtMsBuild)\\Qt.props" />'
+QT_TARGETS_GROUP = """\
+<ImportGroup Condition="Exists('$(QtMsBuild)\\qt.targets')">
+  <Import Project="$(QtMsBuild)\\qt.targets" />
+</ImportGroup>"""
+
+_TOKEN = re.compile(r"<!--.*?-->|<\?.*?\?>|<!\[CDATA\[.*?\]\]>|<!DOCTYPE[^>]*>"
+                    r"|<(/?)([\w.:-]+)((?:\s+[\w.:-]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*(/?)>",
+                    re.DOTALL)
+_ATTRIBUTE = re.compile(r"([\w.:-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+_ENTITIES = {"&quot;": "\"", "&apos;": "'"}
+_CONFIG_CONDITION = re.compile(r"^'\$\(Configuration\)\|\$\(Platform\)'\s*==\s*"
+                               r"'([^'|]*)\|([^']*)'$")
+
+
+class ConversionError(Exception):
+    pass
+
+
+class _Element:
+
+    def __init__(self, name, attributes, start, parent):
+        self.name = name
+        self.attributes = attributes
+        self.start = start
+        self.parent = parent
+        self.children = []
+        self.openEnd = None  # end of the start tag
+        self.closeStart = None  # start of the end tag, or end of an empty element
+        self.end = None
+        self.source = None
+
+    def get(self, attribute, default=None):
+        return self.attributes.get(attribute, default)
+
+    def elements(self, *names):
+        return [child for child in self.children if not names or child.name in names]
+
+    def text(self):
+        return unescape(self.source[self.openEnd:self.closeStart], _ENTITIES).strip()
+
+    def isLabeled(self, label):
+        return (self.get("Label") or "").lower() == label.lower()
+
+
+# Returns the root element of an XML document, with the offsets of all elements
+def parseElements(text):
+    root = None
+    stack = []
+    position = text.find("<")
+    while position >= 0:
+        match = _TOKEN.match(text, position)
+        if not match:
+            raise ConversionError("malformed XML at offset %d" % position)
+        closing, name, attributes, empty = match.groups()
+        if name and closing:
+            if not stack or stack[-1].name != name:
+                raise ConversionError("unexpected </%s> at offset %d" % (name, position))
+            element = stack.pop()
+            element.closeStart = position
+            element.end = match.end()
+        elif name:
+            element = _Element(name, {match.group(1): unescape(
+                match.group(2) if match.group(2) is not None else match.group(3), _ENTITIES)
+                for match in _ATTRIBUTE.finditer(attributes)}, position,
+                stack[-1] if stack else None)
+            element.source = text
+            element.openEnd = match.end()
+            if stack:
+                stack[-1].children.append(element)
+            elif root is None:
+                root = element
+            else:
+                raise ConversionError("more than one root element")
+            if empty:
+                element.closeStart = element.end = match.end()
+            else:
+                stack.append(element)
+        position = text.find("<", match.end())
+    if stack or root is None:
+        raise ConversionError("unexpected end of document")
+    return root
+
+
+class _Editor:
+    # Collects changes of a document's text, applied all at once by result()
+
+    def __init__(self, text):
+        self.text = text
+        self.newline = "\r\n" if "\r\n" in text else "\n"
+        self.edits = []
+        root = parseElements(text)
+        self.root = root
+        first = root.children[0] if root.children else None
+        self.unit = self.indentation(first) if first else "  "
+
+    def lineStart(self, position):
+        return self.text.rfind("\n", 0, position) + 1
+
+    def lineEnd(self, position):
+        end = self.text.find("\n", position)
+        return len(self.text) if end < 0 else end + 1
+
+    def indentation(self, element):
+        prefix = self.text[self.lineStart(element.start):element.start]
+        return prefix if not prefix.strip() else ""
+
+    # Span of an element, with its lines if nothing else is on them
+    def span(self, element):
+        start, end = element.start, element.end
+        if not self.text[self.lineStart(start):start].strip():
+            start = self.lineStart(start)
+            if not self.text[end:self.lineEnd(end)].strip():
+                end = self.lineEnd(end)
+        return start, end
+
+    def replace(self, start, end, text):
+        self.edits.append((start, end, text))
+
+    # Indents the snippets of the tool, which use two spaces per level, like the document
+    def styled(self, snippet):
+        lines = []
+        for line in snippet.split("\n"):
+            stripped = line.lstrip(" ")
+            lines.append(self.unit * ((len(line) - len(stripped)) // 2) + stripped)
+        return "\n".join(lines)
+
+    def lines(self, text, indentation):
+        return "".join(indentation + line + self.newline for line in text.split("\n"))
+
+    def remove(self, element):
+        self.replace(*self.span(element), "")
+
+    def removeAll(self, elements):
+        # Removes parents left without children instead of their children
+        byParent = {}
+        for element in elements:
+            byParent.setdefault(id(element.parent), (element.parent, []))[1].append(element)
+        for parent, removed in byParent.values():
+            if len(removed) == len(parent.children) and parent.parent is not None \
+                    and parent.parent.parent is None:
+                self.remove(parent)
+            else:
+                for element in removed:
+                    self.remove(element)
+
+    def insertAfter(self, element, snippet):
+        position = self.span(element)[1]
+        text = self.lines(snippet, self.indentation(element))
+        if position == element.end:
+            text = self.newline + text.rstrip("\r\n")
+        self.replace(position, position, text)
+
+    def append(self, parent, snippet):
+        indentation = self.indentation(parent)
+        children = self.lines(snippet, indentation + self.unit)
+        if parent.closeStart == parent.end:
+            startTag = self.text[parent.start:parent.end]
+            startTag = re.sub(r"\s*/>$", ">", startTag)
+            self.replace(parent.start, parent.end, startTag + self.newline + children
+                         + indentation + "</%s>" % parent.name)
+        elif not self.text[self.lineStart(parent.closeStart):parent.closeStart].strip():
+            position = self.lineStart(parent.closeStart)
+            self.replace(position, position, children)
+        else:
+            self.replace(parent.closeStart, parent.closeStart,
+                         self.newline + children + indentation)
+
+    def setText(self, element, value):
+        self.replace(element.openEnd, element.closeStart, escape(value))
+
+    def rename(self, element, name):
+        self.replace(element.start + 1, element.start + 1 + len(element.name), name)
+        if element.closeStart != element.end:
+            self.replace(element.closeStart + 2, element.closeStart + 2 + len(element.name), name)
+
+    # Removes an element and returns its text, including the changes made inside of it
+    def extract(self, element):
+        start, end = self.span(element)
+        # Insertions at its boundaries are next to it, not inside
+        inside = [edit for edit in self.edits if start <= edit[0] and edit[1] <= end
+                  and (start, end) != edit[:2] and not (edit[0] == edit[1] in (start, end))]
+        self.edits = [edit for edit in self.edits if edit not in inside]
+        text = _applyEdits(self.text[start:end], [(editStart - start, editEnd - start, new)
+                                                  for editStart, editEnd, new in inside])
+        self.replace(start, end, "")
+        # Indented again by lines() where it is inserted
+        indentation = self.indentation(element)
+        return "\n".join(line[len(indentation):] if line.startswith(indentation) else line
+                         for line in text.replace("\r\n", "\n").rstrip("\n").split("\n"))
+
+    def result(self):
+        return _applyEdits(self.text, self.edits)
+
+
+def _applyEdits(text, edits):
+    parts = []
+    position = 0
+    for index, (start, end, new) in sorted(enumerate(edits),
+                                           key=lambda edit: (edit[1][0], edit[1][1], edit[0])):
+        if start < position:
+            raise ConversionError("overlapping changes at offset %d" % start)
+        parts.append(text[position:start])
+        parts.append(new)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def _configuration(condition):
+    match = _CONFIG_CONDITION.match((condition or "").strip())
+    return (match.group(1), match.group(2)) if match else (None, None)
+
+
+def _normalizedCondition(condition):
+    return re.sub(r"\s+", "", condition or "").lower()
+
+
+def _unquote(value):
+    value = value.strip()
+    return value[1:-1] if len(value) > 1 and value[0] == value[-1] == "\"" else value
+
+
+def _fileName(path):
+    return re.split(r"[\\/]", _unquote(path))[-1]
+
+
+@functools.lru_cache(maxsize=None)
+def qtModules():
+    modules = []
+    for major, fileName in sorted(MODULE_FILES.items()):
+        for element in ElementTree.parse(fileName).getroot().iter("Module"):
+            prefix = element.findtext("LibraryPrefix") or ""
+            if prefix.startswith("Qt"):
+                name = "Qt%d%s" % (major, prefix[2:])
+            else:
+                name = prefix
+            libraries = [name + ".lib", name + "d.lib"]
+            libraries.extend(_fileName(library.text or "") for library in element
+                             if library.tag in ("AdditionalLibraries", "AdditionalLibrariesDebug"))
+            modules.append({"names": (element.findtext("proVarQT") or "").split(),
+                            "prefix": prefix,
+                            "defines": [define.text for define in element.iter("Defines")],
+                            "libraries": {library.lower() for library in libraries}})
+    return modules
+
+
+class _ProjectUpgrade:
+    # Changes of one project and its .filters and .user files
+
+    def __init__(self, path, text, version, qtInstall):
+        self.path = path
+        self.version = version
+        self.qtInstall = qtInstall
+        self.editor = _Editor(text)
+        self.project = self.editor.root
+        self.convertedItems = {}
+        self.generatedFiles = set()
+
+    def topLevel(self, name, label=None):
+        return [element for element in self.project.elements(name)
+                if label is None or element.isLabeled(label)]
+
+    def itemDefinitions(self, *names):
+        return [tool for group in self.topLevel("ItemDefinitionGroup")
+                for tool in group.elements(*names)]
+
+    def imports(self, project):
+        return [element for element in self.descendants(self.project)
+                if element.name == "Import" and (element.get("Project") or "").lower()
+                == project.lower()]
+
+    def descendants(self, element):
+        for child in element.children:
+            yield child
+            yield from self.descendants(child)
+
+    def removeImports(self, project, keep=()):
+        for element in self.imports(project):
+            parent = element.parent
+            if parent.name == "ImportGroup" and len(parent.children) == 1 \
+                    and parent not in keep:
+                self.editor.remove(parent)
+            else:
+                self.editor.remove(element)
+
+    def importElement(self, project):
+        for element in self.imports(project):
+            return element.parent if element.parent.name == "ImportGroup" else element
+        raise ConversionError("missing \"%s\" import" % _fileName(project))
+
+    def configurations(self):
+        configurations = [item.get("Include") for group in self.topLevel("ItemGroup")
+                          for item in group.elements("ProjectConfiguration")]
+        if not configurations:
+            raise ConversionError("missing \"ProjectConfiguration\" items")
+        return configurations
+
+    def conditionFormat(self):
+        # Same spacing as the conditions of the configurations' property groups
+        for group in self.topLevel("PropertyGroup", "Configuration"):
+            if " == " in (group.get("Condition") or ""):
+                return "'$(Configuration)|$(Platform)' == '%s'"
+        return "'$(Configuration)|$(Platform)'=='%s'"
+
+    def upgrade(self):
+        if self.version < 300:
+            self.convertCustomBuilds()
+            self.enableMultiProcessorCompilation()
+        self.formatVersion()
+        self.qtMsBuildFallback()
+        modules = self.upgradeModules() if self.version < 300 else None
+        qtSettings = self.qtSettings(modules)
+        self.qtPropertySheet()
+        self.uncategorizedProperties()
+        self.insertQtDefaults(qtSettings)
+        self.qtTargets()
+        if self.version < 300:
+            self.removeUserProperties()
+            self.convertOutputFiles()
+        return self.editor.result()
+
+    def convertCustomBuilds(self):
+        for group in self.topLevel("ItemGroup"):
+            for item in group.elements("CustomBuild"):
+                tools = {TOOL_ITEM_TYPES.get(_toolName(command.text()))
+                         for command in item.elements("Command")}
+                if len(tools) != 1 or None in tools:
+                    continue
+                itemType = tools.pop()
+                include = item.get("Include")
+                for outputs in item.elements("Outputs"):
+                    configuration, _ = _configuration(outputs.get("Condition"))
+                    self.generatedFiles.update(_generatedFiles(outputs.text(), include,
+                                                               configuration))
+                kept = [self.editor.text[slice(*self.editor.span(child))].strip()
+                        for child in item.elements("ExcludedFromBuild")]
+                if kept:
+                    snippet = "<%s Include=%s>\n%s\n</%s>" % (
+                        itemType, quoteattr(include), "\n".join("  " + line for line in kept),
+                        itemType)
+                else:
+                    snippet = "<%s Include=%s />" % (itemType, quoteattr(include))
+                start, end = self.editor.span(item)
+                self.editor.replace(start, end, self.editor.lines(
+                    self.editor.styled(snippet), self.editor.indentation(item)))
+                self.convertedItems[include.lower()] = itemType
+        self.editor.removeAll([item for group in self.topLevel("ItemGroup")
+                               for item in group.children
+                               if _normalizedPath(item.get("Include") or "")
+                               in self.generatedFiles])
+
+    def enableMultiProcessorCompilation(self):
+        for compiler in self.itemDefinitions("ClCompile"):
+            if not compiler.elements("MultiProcessorCompilation"):
+                self.editor.append(compiler,
+                                   "<MultiProcessorCompilation>true</MultiProcessorCompilation>")
+
+    def globals(self):
+        for group in self.topLevel("PropertyGroup", "Globals"):
+            return group
+        raise ConversionError("missing \"Globals\" property group")
+
+    def formatVersion(self):
+        keywords = [keyword for keyword in self.globals().elements("Keyword")
+                    if keyword.text().startswith(("QtVS_v", projectformat.KEYWORD_V2))]
+        if keywords:
+            self.editor.setText(keywords[0], LATEST_KEYWORD)
+        else:
+            self.editor.append(self.globals(), "<Keyword>%s</Keyword>" % LATEST_KEYWORD)
+
+    def properties(self, name):
+        return [property for group in self.topLevel("PropertyGroup")
+                for property in group.elements(name)]
+
+    def qtMsBuildFallback(self):
+        expected = _normalizedCondition(parseElements(QT_MSBUILD_FALLBACK).get("Condition"))
+        properties = self.properties("QtMsBuild")
+        if len(properties) == 1 and properties[0].parent is self.globals() \
+                and _normalizedCondition(properties[0].get("Condition")) == expected:
+            return
+        self.editor.removeAll(properties)
+        self.editor.append(self.globals(), self.editor.styled(QT_MSBUILD_FALLBACK))
+
+    def upgradeModules(self):
+        compilers = self.itemDefinitions("ClCompile")
+        linkers = self.itemDefinitions("Link")
+        resourceCompilers = self.itemDefinitions("ResourceCompile")
+
+        def values(tools, name):
+            return [value for tool in tools for property in tool.elements(name)
+                    for value in property.text().split(";")]
+
+        defines = set(values(compilers, "PreprocessorDefinitions")
+                      + values(resourceCompilers, "PreprocessorDefinitions"))
+        libraries = {_fileName(library).lower()
+                     for library in values(linkers, "AdditionalDependencies")}
+        includes = values(compilers, "AdditionalIncludeDirectories")
+        names = set()
+        moduleDefines = set()
+        moduleLibraries = set()
+        for module in qtModules():
+            if not (module["libraries"] & libraries or defines.intersection(module["defines"])):
+                continue
+            names.update(module["names"])
+            moduleDefines.update(module["defines"])
+            moduleLibraries.update(module["libraries"])
+            private = re.compile(r"^\$\(QTDIR\)[\\/]include[\\/]%s[\\/]\d+\.\d+\.\d+"
+                                 % re.escape(module["prefix"]), re.IGNORECASE)
+            if any(private.match(_unquote(include)) for include in includes):
+                names.update("%s-private" % name for name in module["names"])
+
+        def filterValues(tools, name, isQtValue):
+            for tool in tools:
+                for property in tool.elements(name):
+                    old = property.text().split(";")
+                    new = [value for value in old if not isQtValue(value)]
+                    if new != old:
+                        self.editor.setText(property, ";".join(new))
+
+        filterValues(compilers + resourceCompilers, "PreprocessorDefinitions",
+                     lambda value: value in moduleDefines)
+        filterValues(compilers, "AdditionalIncludeDirectories",
+                     lambda value: _unquote(value).upper().startswith("$(QTDIR)"))
+        filterValues(linkers, "AdditionalDependencies",
+                     lambda value: _fileName(value).lower() in moduleLibraries)
+        filterValues(linkers, "AdditionalLibraryDirectories",
+                     lambda value: _unquote(value).upper().startswith("$(QTDIR)"))
+        return sorted(names)
+
+    def userProperties(self):
+        return [properties for extensions in self.project.elements("ProjectExtensions")
+                for studio in extensions.elements("VisualStudio")
+                for properties in studio.elements("UserProperties")]
+
+    def qtSettings(self, modules):
+        groups = self.topLevel("PropertyGroup", "QtSettings")
+        texts = []
+        if groups:
+            # Relocate misplaced QtInstall properties (e.g. in v3.0 projects)
+            qtInstalls = [property for property in self.properties("QtInstall")
+                          if property.parent not in groups]
+            for group in groups:
+                condition = _normalizedCondition(group.get("Condition"))
+                matching = [property for property in qtInstalls
+                            if property.parent.get("Condition") is None
+                            or _normalizedCondition(property.parent.get("Condition")) == condition]
+                if matching:
+                    line = self.editor.text[slice(*self.editor.span(matching[-1]))].strip()
+                    self.editor.append(group, line)
+            self.editor.removeAll(qtInstalls)
+            return [self.editor.extract(group) for group in groups]
+        conditionFormat = self.conditionFormat()
+        userProperties = self.userProperties()
+        for configuration in self.configurations():
+            properties = []
+            if self.version < 300:
+                qtInstall = self.qtInstall
+                platform = configuration.split("|")[-1]
+                for element in userProperties:
+                    qtInstall = element.get("Qt5Version_x0020_%s" % platform) or qtInstall
+                properties.append("<QtInstall>%s</QtInstall>" % escape(qtInstall))
+                properties.append("<QtModules>%s</QtModules>" % escape(";".join(modules)))
+            texts.append(self.editor.styled("<PropertyGroup Condition=%s Label=\"QtSettings\">"
+                                            "%s\n</PropertyGroup>" % (
+                                                quoteattr(conditionFormat % configuration),
+                                                "".join("\n  " + property
+                                                        for property in properties))))
+        return texts
+
+    def qtPropertySheet(self):
+        sheets = self.topLevel("ImportGroup", "PropertySheets")
+        if not sheets:
+            raise ConversionError("missing \"PropertySheets\" import groups")
+        self.removeImports(QT_PROPS, keep=sheets)
+        for group in sheets:
+            self.editor.append(group, QT_PROPS_IMPORT)
+
+    def uncategorizedProperties(self):
+        userMacros = self.topLevel("PropertyGroup", "UserMacros")
+        if not userMacros:
+            raise ConversionError("missing \"UserMacros\" property group")
+        position = self.project.children.index(userMacros[-1])
+        removed = {edit[:2] for edit in self.editor.edits if edit[2] == ""}
+        moved = [group for group in self.project.children[:position]
+                 if group.name == "PropertyGroup" and group.get("Label") is None
+                 and self.editor.span(group) not in removed]
+        texts = [self.editor.extract(group) for group in moved]
+        if texts:
+            self.editor.insertAfter(userMacros[-1], "\n".join(texts))
+
+    def insertQtDefaults(self, qtSettings):
+        anchor = self.importElement(CPP_PROPS)
+        defaults = [element.parent for element in self.imports(QT_DEFAULT_PROPS)
+                    if element.parent.name == "ImportGroup" and len(element.parent.children) == 1
+                    and element.parent.get("Condition")]
+        if len(defaults) == 1 and len(self.imports(QT_DEFAULT_PROPS)) == 1:
+            texts = [self.editor.extract(defaults[0])]
+        else:
+            self.removeImports(QT_DEFAULT_PROPS)
+            texts = [self.editor.styled(QT_DEFAULT_PROPS_GROUP)]
+        texts.extend(qtSettings)
+        targets = [target for target in self.project.elements("Target")
+                   if (target.get("Name") or "").lower() == "qtmsbuildnotfound"]
+        texts.append(self.editor.extract(targets[0]) if len(targets) == 1
+                     else self.editor.styled(QT_MSBUILD_NOT_FOUND))
+        for target in targets[1:]:
+            self.editor.remove(target)
+        self.editor.insertAfter(anchor, "\n".join(texts))
+
+    def qtTargets(self):
+        anchor = self.importElement(CPP_TARGETS)
+        self.removeImports(QT_TARGETS)
+        self.editor.insertAfter(anchor, self.editor.styled(QT_TARGETS_GROUP))
+
+    def removeUserProperties(self):
+        for element in self.userProperties():
+            startTag = self.editor.text[element.start:element.openEnd]
+            attributes = [match.group(0) for match in _ATTRIBUTE.finditer(startTag)
+                          if not (match.group(1).startswith("Qt5Version_x0020_")
+                                  or match.group(1) in V2_USER_PROPERTIES)]
+            if len(attributes) == len(element.attributes):
+                continue
+            empty = element.closeStart == element.end
+            self.editor.replace(element.start, element.openEnd, "<%s%s%s>" % (
+                element.name, "".join(" " + attribute for attribute in attributes),
+                " /" if empty else ""))
+
+    def convertOutputFiles(self):
+        # OutputFile --> <tool>Dir + <tool>FileName, and no more properties of the v2 items
+        oldQtProperties = {"QTDIR", "InputFile", "OutputFile"}
+        oldCppProperties = {"IncludePath", "Define", "Undefine"}
+        groups = self.topLevel("ItemDefinitionGroup") + self.topLevel("ItemGroup")
+        for item in [item for group in groups
+                     for item in group.elements("QtMoc", "QtRcc", "QtUic", "QtRepc")]:
+            old = oldQtProperties | (oldCppProperties if item.name in ("QtMoc", "QtRepc")
+                                     else set())
+            for outputFile in item.elements("OutputFile"):
+                value = outputFile.text().replace("/", "\\")
+                directory, _, fileName = value.rpartition("\\")
+                self.editor.append(item, "<%sDir>%s</%sDir>\n<%sFileName>%s</%sFileName>" % (
+                    item.name, escape(directory or "$(ProjectDir)"), item.name,
+                    item.name, escape(fileName), item.name))
+            for property in item.children:
+                if property.name in old:
+                    self.editor.remove(property)
+
+
+def _toolName(command):
+    match = re.match(r"\s*(\"[^\"]*\"|\S+)", command)
+    if not match:
+        return None
+    name = _fileName(match.group(1)).lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+
+def _normalizedPath(path):
+    path = _unquote(path).replace("/", "\\")
+    while path.startswith(".\\"):
+        path = path[2:]
+    return path.lower()
+
+
+def _generatedFiles(outputs, include, configuration):
+    fileName = _fileName(include)
+    replacements = {"%(filename)": fileName.rsplit(".", 1)[0], "%(identity)": include,
+                    "%(extension)": "." + fileName.rsplit(".", 1)[-1]}
+    if configuration:
+        replacements.update({"$(configurationname)": configuration,
+                             "$(configuration)": configuration})
+    files = set()
+    for output in outputs.split(";"):
+        for macro, value in replacements.items():
+            output = re.sub(re.escape(macro), lambda match: value, output, flags=re.IGNORECASE)
+        if output and "%(" not in output and "$(" not in output:
+            files.add(_normalizedPath(output))
+    return files
+
+
+def _upgradeFilters(text, convertedItems, generatedFiles):
+    editor = _Editor(text)
+    groups = editor.root.elements("ItemGroup")
+    for item in [item for group in groups for item in group.elements("CustomBuild")]:
+        itemType = convertedItems.get((item.get("Include") or "").lower())
+        if itemType:
+            editor.rename(item, itemType)
+    editor.removeAll([item for group in groups for item in group.children
+                      if _normalizedPath(item.get("Include") or "") in generatedFiles])
+    return editor.result()
+
+
+def _upgradeUser(text):
+    editor = _Editor(text)
+    removed = []
+    for group in editor.root.elements("PropertyGroup"):
+        for property in group.children:
+            if property.name in ("QTDIR", "QmlDebug", "QmlDebugSettings") \
+                    or (property.name == "LocalDebuggerCommandArguments"
+                        and property.text() == "$(QmlDebug)") \
+                    or (property.name == "LocalDebuggerEnvironment"
+                        and property.text() == "PATH=$(QTDIR)\\bin%3b$(PATH)"):
+                removed.append(property)
+    for property in removed:
+        editor.remove(property)
+    return editor.result()
+
+
+def readText(path):
+    with open(path, "rb") as f:
+        content = f.read()
+    bom = content.startswith(b"\xef\xbb\xbf")
+    return content[3 if bom else 0:].decode("utf-8"), bom
+
+
+def writeText(path, text, bom):
+    with open(path, "wb") as f:
+        f.write((b"\xef\xbb\xbf" if bom else b"") + text.encode("utf-8"))
+
+
+# Converts a project, unless dryRun; returns what was or would be changed
+def upgradeProject(path, dryRun=False, qtInstall=DEFAULT_QT_INSTALL, diff=False):
+    scan = projectformat.scanProject(path)
+    result = {"path": path, "format": scan["format"], "files": {}, "problems": scan["problems"]}
+    if diff:
+        result["diff"] = ""
+    if not scan["needsConversion"] or scan["problems"]:
+        return result
+    try:
+        text, bom = readText(path)
+        upgrade = _ProjectUpgrade(path, text, scan["version"], qtInstall)
+        changes = {path: (text, upgrade.upgrade(), bom)}
+        for otherPath, function in ((path + ".filters", functools.partial(
+                _upgradeFilters, convertedItems=upgrade.convertedItems,
+                generatedFiles=upgrade.generatedFiles)), (path + ".user", _upgradeUser)):
+            if scan["version"] < 300 and os.path.isfile(otherPath):
+                otherText, otherBom = readText(otherPath)
+                changes[otherPath] = (otherText, function(otherText), otherBom)
+    except (OSError, UnicodeDecodeError, ConversionError) as e:
+        result["problems"] = result["problems"] + ["not converted: %s" % e]
+        return result
+    for changedPath, (old, new, bom) in changes.items():
+        if old == new:
+            continue
+        lines = list(difflib.unified_diff(old.splitlines(True), new.splitlines(True),
+                                          changedPath, changedPath))
+        result["files"][changedPath] = [
+            sum(1 for line in lines if line.startswith("+") and not line.startswith("+++")),
+            sum(1 for line in lines if line.startswith("-") and not line.startswith("---"))]
+        if diff:
+            result["diff"] += "".join(line if line.endswith("\n") else line + "\n"
+                                      for line in lines)
+    if not dryRun:
+        for changedPath, (old, new, bom) in changes.items():
+            if old != new:
+                writeText(changedPath, new, bom)
+    return result
+
+
+def upgradeProjects(paths, dryRun=False, qtInstall=DEFAULT_QT_INSTALL, diff=False,
+                    workers=None):
+    upgrade = functools.partial(upgradeProject, dryRun=dryRun, qtInstall=qtInstall, diff=diff)
+    if len(paths) < projectformat.POOL_THRESHOLD or workers == 1:
+        return list(map(upgrade, paths))
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(upgrade, paths,
+                                 chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def formatResults(results, dryRun=False):
+    lines = []
+    converted = [result for result in results if result["files"]]
+    for result in converted:
+        lines.append("%-6s %s" % (result["format"], result["path"]))
+        lines.extend("         %s: +%d -%d lines" % (os.path.basename(path), added, removed)
+                     for path, (added, removed) in result["files"].items())
+    problems = [result for result in results if result["problems"]]
+    if problems:
+        lines.append("Problems:")
+        lines.extend("  %s: %s" % (result["path"], "; ".join(result["problems"]))
+                     for result in problems)
+    lines.append("%d projects, %d %s, %d with problems" % (
+        len(results), len(converted), "to convert" if dryRun else "converted", len(problems)))
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Convert Qt projects to the project format "
+                                                 "v%s." % projectformat.formatName(
+                                                     projectformat.LATEST)[1:])
+    parser.add_argument("paths", nargs="+", help="directories to search, or project files")
+    parser.add_argument("--dry-run", action="store_true", help="only report the changes")
+    parser.add_argument("--diff", action="store_true", help="print the changes as a diff")
+    parser.add_argument("--qt-install", default=DEFAULT_QT_INSTALL,
+                        help="QtInstall of v1 projects, and of v2 projects without a Qt version "
+                             "(default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="number of processes converting projects")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+    results = upgradeProjects(projectformat.findProjects(args.paths), args.dry_run,
+                              args.qt_install, args.diff, args.workers)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        if args.diff:
+            sys.stdout.write("".join(result["diff"] for result in results))
+        print(formatResults(results, args.dry_run))
+    return 1 if any(result["problems"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,258 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Index of the files that .qrc files compile into resources, i.e. the rcc inputs which the ListQrc
+# task of QtMSBuild/QtMsBuild/rcc/qtrcc.targets finds by reading each .qrc on every build. Like
+# ListQrc, the inputs are the <file> elements of RCC/qresource, resolved relative to the .qrc
+# file. Each input also gets its resource path, from the prefix of its qresource and its alias.
+#
+# The index is kept in a cache. A .qrc file is parsed again only if its content changed: files
+# with the same modification time and size are not even read, and files touched without changes
+# are recognized by the hash of their content. Whether rcc must run again is then decided from
+# the index and the modification times of the inputs and outputs, like MSBuild does with the
+# Inputs and Outputs of the QtRccSetModified target.
+#
+#   python qrcindex.py DIRECTORY... [--asset FILE]... [--output PATTERN] [--json]
+#
+# The output of rcc is found relative to the project of the .qrc file, the closest directory
+# above it with a .vcxproj file.
+
+import hashlib
+import os
+import posixpath
+import sys
+import xml.etree.ElementTree as ElementTree
+
+import cache
+import projectformat
+
+CACHE_FORMAT = 1
+# Output of rcc in projects of the Qt VS Tools, with the default settings of qtrcc.props, i.e.
+# $(QtIntDir)rcc\qrc_%(Filename).cpp. QtIntDir defaults to $(IntDir)qt\ and IntDir to
+# $(Platform)\$(Configuration)\.
+DEFAULT_OUTPUT = os.path.join("{projectDir}", "{platform}", "{configuration}", "qt", "rcc",
+                              "qrc_{name}.cpp")
+# Output of rcc in projects without the Qt VS Tools' project settings, i.e. of old formats
+LEGACY_OUTPUT = os.path.join("{projectDir}", "GeneratedFiles", "{configuration}",
+                             "qrc_{name}.cpp")
+
+
+def _hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _inputPath(qrcPath, fileName):
+    fileName = fileName.replace("\\", "/")
+    if not os.path.isabs(fileName):
+        fileName = os.path.join(os.path.dirname(qrcPath), fileName)
+    return os.path.normpath(fileName)
+
+
+# Path of a file in the resources, e.g. ":/qt/qml/app/main.qml"
+def _resourcePath(prefix, name):
+    return ":" + posixpath.normpath(posixpath.join("/", prefix or "/", name.replace("\\", "/")))
+
+
+# Returns the inputs of a .qrc file, given its content, and the problems found
+def parseQrc(qrcPath, content):
+    try:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError as e:
+        return [], ["cannot be parsed: %s" % e]
+    if root.tag != "RCC":
+        return [], ["not a resource collection: <%s>" % root.tag]
+    resources = []
+    for qresource in root.iter("qresource"):
+        for element in qresource.iter("file"):
+            fileName = (element.text or "").strip()
+            if not fileName:
+                continue
+            resource = {"file": _inputPath(qrcPath, fileName),
+                        "resource": _resourcePath(qresource.get("prefix"),
+                                                  element.get("alias") or fileName)}
+            if qresource.get("lang"):
+                resource["lang"] = qresource.get("lang")
+            resources.append(resource)
+    return resources, []
+
+
+def findQrcFiles(directories):
+    qrcFiles = []
+    for directory in directories:
+        if os.path.isfile(directory):
+            qrcFiles.append(os.path.abspath(directory))
+            continue
+        for root, subdirectories, files in os.walk(directory):
+            subdirectories[:] = sorted(subdirectory for subdirectory in subdirectories
+                                       if subdirectory not in projectformat.SKIPPED_DIRECTORIES)
+            qrcFiles.extend(os.path.abspath(os.path.join(root, fileName))
+                            for fileName in sorted(files) if fileName.endswith(".qrc"))
+    return list(dict.fromkeys(qrcFiles))
+
+
+# Returns the closest directory containing the .qrc file with a project file, or the directory of
+# the .qrc file if there is none
+def projectDirectory(qrcPath):
+    directory = os.path.dirname(qrcPath)
+    while True:
+        try:
+            if any(fileName.endswith(".vcxproj") for fileName in os.listdir(directory)):
+                return directory
+        except OSError:
+            pass
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return os.path.dirname(qrcPath)
+        directory = parent
+
+
+def outputFile(qrcPath, pattern=DEFAULT_OUTPUT, configuration="Debug", platform="x64"):
+    return pattern.format(projectDir=projectDirectory(qrcPath), dir=os.path.dirname(qrcPath),
+                          configuration=configuration, platform=platform,
+                          name=os.path.splitext(os.path.basename(qrcPath))[0])
+
+
+def _modified(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class QrcIndex:
+
+    def __init__(self, cacheFile=None):
+        self.cacheFile = cacheFile or cache.cacheFile("qrc_index.json")
+        self.entries = cache.load(self.cacheFile, CACHE_FORMAT) or {}
+        self.parsed = 0
+        self.hashed = 0
+        self.cached = 0
+        self._assets = None
+
+    # Brings the entries of the given .qrc files up to date and saves the index if needed
+    def update(self, paths):
+        self.parsed = self.hashed = self.cached = 0
+        changed = False
+        for path in paths:
+            entry = self.entries.get(path)
+            try:
+                key = cache.fileKey(path)
+                if entry is not None and entry["key"] == key:
+                    self.cached += 1
+                    continue
+                with open(path, "rb") as f:
+                    content = f.read()
+            except OSError as e:
+                if entry is None or entry["key"] is not None:
+                    self.entries[path] = {"key": None, "hash": None, "resources": [],
+                                          "problems": ["cannot be read: %s" % e]}
+                    changed = True
+                continue
+            digest = _hash(content)
+            if entry is not None and entry["hash"] == digest:
+                # Touched, but not changed
+                entry["key"] = key
+                self.hashed += 1
+            else:
+                resources, problems = parseQrc(path, content)
+                self.entries[path] = {"key": key, "hash": digest, "resources": resources,
+                                      "problems": problems}
+                self.parsed += 1
+            changed = True
+        if changed:
+            for path in [path for path in self.entries if not os.path.exists(path)]:
+                del self.entries[path]
+            cache.save(self.cacheFile, CACHE_FORMAT, self.entries)
+            self._assets = None
+
+    def resources(self, qrcPath):
+        entry = self.entries.get(qrcPath)
+        return entry["resources"] if entry is not None else []
+
+    def inputs(self, qrcPath):
+        return list(dict.fromkeys(resource["file"] for resource in self.resources(qrcPath)))
+
+    # Returns the .qrc files which compile the given file into their resources
+    def qrcFiles(self, asset):
+        if self._assets is None:
+            self._assets = {}
+            for qrcPath in sorted(self.entries):
+                for resource in self.entries[qrcPath]["resources"]:
+                    qrcFiles = self._assets.setdefault(os.path.normcase(resource["file"]), [])
+                    if qrcPath not in qrcFiles:
+                        qrcFiles.append(qrcPath)
+        return self._assets.get(os.path.normcase(os.path.abspath(asset)), [])
+
+    # Returns why rcc must run again, by .qrc file, given the output file of each .qrc file
+    def outOfDate(self, outputs):
+        reasons = {}
+        for qrcPath, output in outputs.items():
+            outputModified = _modified(output)
+            if outputModified is None:
+                reasons[qrcPath] = "%s is missing" % output
+                continue
+            for path in [qrcPath] + self.inputs(qrcPath):
+                modified = _modified(path)
+                if modified is None:
+                    reasons[qrcPath] = "%s is missing" % path
+                    break
+                if modified > outputModified:
+                    reasons[qrcPath] = "%s is newer than %s" % (path, output)
+                    break
+        return reasons
+
+
+def main(argv):
+    import argparse
+    import json
+    import time
+    parser = argparse.ArgumentParser(description="Index the inputs of .qrc files.")
+    parser.add_argument("paths", nargs="+", help="directories to search, or .qrc files")
+    parser.add_argument("--asset", action="append", default=[],
+                        help="list the .qrc files using this file")
+    parser.add_argument("--output", nargs="?", const=DEFAULT_OUTPUT,
+                        help="list the .qrc files newer than their output, by default %s, "
+                             "in projects of old formats %s"
+                             % (DEFAULT_OUTPUT.replace("%", "%%"),
+                                LEGACY_OUTPUT.replace("%", "%%")))
+    parser.add_argument("--configuration", default="Debug",
+                        help="{configuration} of the output (default: Debug)")
+    parser.add_argument("--platform", default="x64",
+                        help="{platform} of the output (default: x64)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--cache", help="cache file")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    index = QrcIndex(args.cache)
+    paths = findQrcFiles(args.paths)
+    index.update(paths)
+    if args.asset:
+        results = {asset: index.qrcFiles(asset) for asset in args.asset}
+        lines = ["%s: %s" % (asset, ", ".join(qrcFiles) or "not used")
+                 for asset, qrcFiles in results.items()]
+    elif args.output:
+        results = index.outOfDate({path: outputFile(path, args.output, args.configuration,
+                                                    args.platform)
+                                   for path in paths})
+        lines = ["%s: %s" % item for item in results.items()]
+    else:
+        results = {path: index.entries[path] for path in paths}
+        lines = ["%6d %s" % (len(index.inputs(path)), path) for path in paths]
+        lines.extend("%s: %s" % (path, "; ".join(results[path]["problems"]))
+                     for path in paths if results[path]["problems"])
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        lines.append("%d .qrc files, %d parsed, %d unchanged, %d from cache, %.1f s"
+                     % (len(paths), index.parsed, index.hashed, index.cached,
+                        time.perf_counter() - started))
+        print("\n".join(lines))
+    return 1 if args.output and results else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,382 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Runs a build command over and over for chasing intermittent build failures, e.g. of parallel
+# builds with Qt/MSBuild under load. Several iterations can run at once, each slot in its own
+# copy of the source tree. For every iteration the duration, the exit code, the peak memory of
+# the build process and the signature of the first error are recorded. The summary reports
+# percentiles of the durations and clusters failures by signature, by slot and into streaks of
+# consecutive failures. Output and artifacts (e.g. msbuild.binlog) are kept only for failing and
+# the slowest iterations, within a size budget.
+#
+#   python stressloop.py --iterations 100 --parallel 4 --tree C:\work\big --results C:\work\stress
+#       --artifact msbuild.binlog -- msbuild /m /bl /v:m /nologo
+#
+# The build command gets STRESSLOOP_ITERATION and STRESSLOOP_SLOT in its environment.
+# fakebuild.py stands in for a build when testing.
+
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+DEFAULT_LOG_BUDGET = 500 * 1000 * 1000
+
+# The first line matching one of these describes a failure
+ERROR_PATTERNS = [re.compile(r"\berror\s+[A-Z]+\d+\s*:.*", re.IGNORECASE),
+                  re.compile(r"\b(fatal\s+)?error\s*:.*", re.IGNORECASE)]
+
+
+# Summary of an error line that is the same for the same failure in other iterations or copies
+def errorSignature(line):
+    line = line.strip()
+    line = re.sub(r"(?:[A-Za-z]:)?[\\/][^\s:\"'()\[\]]+", "<path>", line)
+    line = re.sub(r"\[[^\]]*\.(vcxproj|csproj|proj)\]", "[<project>]", line)
+    line = re.sub(r"\b0x[0-9a-fA-F]+\b|\b\d+\b", "<n>", line)
+    return line[:200]
+
+
+def findError(logFile):
+    try:
+        with open(logFile, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                for pattern in ERROR_PATTERNS:
+                    match = pattern.search(line)
+                    if match:
+                        return match.group(0)
+    except OSError:
+        pass
+    return None
+
+
+# Nearest-rank percentile of sorted values
+def percentile(values, p):
+    if not values:
+        return None
+    return values[max(0, math.ceil(p / 100.0 * len(values)) - 1)]
+
+
+def _exitCode(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _peakWorkingSet(process):
+    # Windows: peak working set of the build process, in bytes
+    from ctypes import wintypes
+    import ctypes
+
+    class Counters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+    counters = Counters()
+    counters.cb = ctypes.sizeof(counters)
+    psapi = ctypes.WinDLL("psapi")
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(Counters),
+                                           wintypes.DWORD]
+    if not psapi.GetProcessMemoryInfo(int(process._handle), ctypes.byref(counters),
+                                      counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+# Waits for the process and returns its exit code and peak memory in bytes (None if unknown).
+# On POSIX, the peak is the largest of the process and its descendants it waited for.
+def waitWithUsage(process):
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = _exitCode(status)
+        # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+        scale = 1 if sys.platform == "darwin" else 1024
+        return process.returncode, usage.ru_maxrss * scale
+    process.wait()
+    try:
+        peak = _peakWorkingSet(process)
+    except (OSError, AttributeError):
+        peak = None
+    return process.returncode, peak
+
+
+class Iteration:
+
+    def __init__(self, number, slot):
+        self.number = number
+        self.slot = slot
+        self.duration = None
+        self.exitCode = None
+        self.timedOut = False
+        self.peakMemory = None
+        self.error = None
+        self.signature = None
+        self.logFile = None
+        self.artifact = None
+        self.kept = False
+
+    def failed(self):
+        return self.timedOut or self.exitCode != 0
+
+    def logSize(self):
+        return sum(os.path.getsize(path) for path in (self.logFile, self.artifact)
+                   if path and os.path.exists(path))
+
+    def toJson(self):
+        return {"iteration": self.number, "slot": self.slot, "duration": self.duration,
+                "exitCode": self.exitCode, "timedOut": self.timedOut,
+                "peakMemory": self.peakMemory, "error": self.error,
+                "signature": self.signature,
+                "log": self.logFile, "artifact": self.artifact}
+
+
+# Iterations whose logs are kept: failures (first those of a new signature), then the slowest
+# successful ones, as long as they fit into the budget (bytes). Logs deleted before stay deleted.
+def selectKept(iterations, keepSlowest, budget):
+    iterations = [iteration for iteration in iterations if iteration.logFile]
+    failures = [iteration for iteration in iterations if iteration.failed()]
+    firstOfSignature = {}
+    for iteration in failures:
+        firstOfSignature.setdefault(iteration.signature, iteration)
+    candidates = list(firstOfSignature.values())
+    candidates += [iteration for iteration in failures if iteration not in candidates]
+    successes = sorted((iteration for iteration in iterations if not iteration.failed()),
+                       key=lambda iteration: iteration.duration, reverse=True)
+    candidates += successes[:keepSlowest]
+    kept = set()
+    used = 0
+    for iteration in candidates:
+        size = iteration.logSize()
+        if used + size <= budget:
+            kept.add(iteration.number)
+            used += size
+    return kept
+
+
+class StressLoop:
+
+    def __init__(self, command, iterations, resultsDir, tree=None, parallel=1, artifact=None,
+                 keepSlowest=3, logBudget=DEFAULT_LOG_BUDGET, timeout=None, shell=False,
+                 output=sys.stdout):
+        self.command = command
+        self.iterationCount = iterations
+        self.resultsDir = os.path.abspath(resultsDir)
+        self.tree = os.path.abspath(tree) if tree else None
+        self.parallel = max(1, parallel)
+        self.artifact = artifact
+        self.keepSlowest = keepSlowest
+        self.logBudget = logBudget
+        self.timeout = timeout
+        self.shell = shell
+        self.output = output
+        self.iterations = []
+        self.lock = threading.Lock()
+        self.nextNumber = 1
+
+    def logDir(self):
+        return os.path.join(self.resultsDir, "logs")
+
+    # Directory the build runs in. Parallel slots get their own copies of the tree.
+    def workDir(self, slot):
+        if self.parallel == 1:
+            return self.tree or os.getcwd()
+        directory = os.path.join(self.resultsDir, "work", "slot%d" % slot)
+        if not os.path.isdir(directory):
+            if self.tree:
+                shutil.copytree(self.tree, directory)
+            else:
+                os.makedirs(directory)
+        return directory
+
+    def runIteration(self, number, slot, workDir):
+        iteration = Iteration(number, slot)
+        iteration.logFile = os.path.join(self.logDir(), "iteration_%05d.log" % number)
+        environment = dict(os.environ, STRESSLOOP_ITERATION=str(number),
+                           STRESSLOOP_SLOT=str(slot))
+        artifact = os.path.join(workDir, self.artifact) if self.artifact else None
+        if artifact and os.path.exists(artifact):
+            os.remove(artifact)
+        started = time.perf_counter()
+        with open(iteration.logFile, "wb") as log:
+            process = subprocess.Popen(self.command, cwd=workDir, env=environment,
+                                       stdout=log, stderr=subprocess.STDOUT, shell=self.shell)
+            timer = None
+            if self.timeout:
+                def kill():
+                    iteration.timedOut = True
+                    process.kill()
+                timer = threading.Timer(self.timeout, kill)
+                timer.start()
+            try:
+                iteration.exitCode, iteration.peakMemory = waitWithUsage(process)
+            finally:
+                if timer is not None:
+                    timer.cancel()
+        iteration.duration = time.perf_counter() - started
+        if iteration.failed():
+            iteration.error = findError(iteration.logFile)
+            if iteration.timedOut:
+                iteration.signature = "timeout"
+            elif iteration.error:
+                iteration.signature = errorSignature(iteration.error)
+            else:
+                iteration.signature = "exit code %d" % iteration.exitCode
+        if artifact and os.path.exists(artifact):
+            iteration.artifact = os.path.join(
+                self.logDir(), "iteration_%05d_%s" % (number, os.path.basename(artifact)))
+            shutil.copyfile(artifact, iteration.artifact)
+        return iteration
+
+    # Deletes the logs which are not kept, so they never take much more than the budget
+    def prune(self):
+        kept = selectKept(self.iterations, self.keepSlowest, self.logBudget)
+        for iteration in self.iterations:
+            iteration.kept = iteration.number in kept
+            if not iteration.kept:
+                for path in (iteration.logFile, iteration.artifact):
+                    if path and os.path.exists(path):
+                        os.remove(path)
+                iteration.logFile = iteration.artifact = None
+
+    def _worker(self, slot):
+        workDir = self.workDir(slot)
+        while True:
+            with self.lock:
+                number = self.nextNumber
+                if number > self.iterationCount:
+                    return
+                self.nextNumber += 1
+            iteration = self.runIteration(number, slot, workDir)
+            with self.lock:
+                self.iterations.append(iteration)
+                self.prune()
+                failures = sum(1 for done in self.iterations if done.failed())
+                self.output.write("# %d/%d: %s in %.1f s (failed: %d, %.2f%%)\n"
+                                  % (len(self.iterations), self.iterationCount,
+                                     "FAIL" if iteration.failed() else "ok", iteration.duration,
+                                     failures, 100.0 * failures / len(self.iterations)))
+                self.output.flush()
+
+    def run(self):
+        os.makedirs(self.logDir(), exist_ok=True)
+        threads = [threading.Thread(target=self._worker, args=(slot,))
+                   for slot in range(1, self.parallel + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.iterations.sort(key=lambda iteration: iteration.number)
+        summary = self.summary()
+        with open(os.path.join(self.resultsDir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump({"summary": summary,
+                       "iterations": [iteration.toJson() for iteration in self.iterations]},
+                      f, indent=2)
+        return summary
+
+    def summary(self):
+        iterations = sorted(self.iterations, key=lambda iteration: iteration.number)
+        durations = sorted(iteration.duration for iteration in iterations)
+        failures = [iteration for iteration in iterations if iteration.failed()]
+        signatures = {}
+        for iteration in failures:
+            signatures.setdefault(iteration.signature, []).append(iteration.number)
+        slots = {}
+        for iteration in iterations:
+            runs, failed = slots.get(iteration.slot, (0, 0))
+            slots[iteration.slot] = (runs + 1, failed + iteration.failed())
+        longestStreak = streak = 0
+        for iteration in iterations:
+            streak = streak + 1 if iteration.failed() else 0
+            longestStreak = max(longestStreak, streak)
+        memory = [iteration.peakMemory for iteration in iterations
+                  if iteration.peakMemory is not None]
+        return {"iterations": len(iterations),
+                "failures": len(failures),
+                "failureRate": len(failures) / len(iterations) if iterations else 0.0,
+                "duration": {"p50": percentile(durations, 50), "p95": percentile(durations, 95),
+                             "p99": percentile(durations, 99),
+                             "max": durations[-1] if durations else None},
+                "peakMemory": max(memory) if memory else None,
+                "signatures": sorted(({"signature": signature, "count": len(numbers),
+                                       "iterations": numbers}
+                                      for signature, numbers in signatures.items()),
+                                     key=lambda cluster: -cluster["count"]),
+                "slots": {str(slot): {"iterations": runs, "failures": failed}
+                          for slot, (runs, failed) in sorted(slots.items())},
+                "longestFailureStreak": longestStreak,
+                "keptLogs": [iteration.number for iteration in iterations if iteration.kept]}
+
+
+def formatSummary(summary):
+    def seconds(value):
+        return "-" if value is None else "%.2f s" % value
+    lines = ["Iterations: %d, failed: %d (%.2f%%)" % (summary["iterations"], summary["failures"],
+                                                     100.0 * summary["failureRate"]),
+             "Duration: p50 %s, p95 %s, p99 %s, max %s"
+             % tuple(seconds(summary["duration"][key]) for key in ("p50", "p95", "p99", "max"))]
+    if summary["peakMemory"] is not None:
+        lines.append("Peak memory: %.1f MB" % (summary["peakMemory"] / 1000000.0))
+    if summary["failures"]:
+        lines.append("Longest streak of failures: %d" % summary["longestFailureStreak"])
+        lines.append("Failures by signature:")
+        for cluster in summary["signatures"]:
+            lines.append("  %4d  %s  (iterations %s)"
+                         % (cluster["count"], cluster["signature"],
+                            ", ".join(str(number) for number in cluster["iterations"][:10])
+                            + (", ..." if cluster["count"] > 10 else "")))
+        if len(summary["slots"]) > 1:
+            lines.append("Failures by slot: " + ", ".join(
+                "%s: %d/%d" % (slot, counts["failures"], counts["iterations"])
+                for slot, counts in summary["slots"].items()))
+    lines.append("Kept logs of iterations: %s"
+                 % (", ".join(str(number) for number in summary["keptLogs"]) or "-"))
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Run a build command repeatedly and report "
+                                                 "durations and failures.")
+    parser.add_argument("--iterations", type=int, default=10, help="number of builds")
+    parser.add_argument("--parallel", type=int, default=1,
+                        help="number of builds running at once, each in a copy of the tree")
+    parser.add_argument("--tree", help="directory to build in (default: current directory)")
+    parser.add_argument("--results", default="stressloop_results",
+                        help="directory for the summary, logs and copies of the tree")
+    parser.add_argument("--artifact", help="file created by the build to keep with its log, "
+                                           "relative to the tree, e.g. msbuild.binlog")
+    parser.add_argument("--keep-slowest", type=int, default=3,
+                        help="number of successful builds to keep the logs of")
+    parser.add_argument("--log-budget", type=float, default=DEFAULT_LOG_BUDGET / 1000000.0,
+                        help="maximum size of the kept logs in MB")
+    parser.add_argument("--timeout", type=float, help="seconds after which a build is killed")
+    parser.add_argument("--shell", action="store_true", help="run the command in a shell")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="build command, after --")
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("no build command given")
+    if args.shell:
+        command = subprocess.list2cmdline(command) if os.name == "nt" else " ".join(command)
+    loop = StressLoop(command, args.iterations, args.results, args.tree, args.parallel,
+                      args.artifact, args.keep_slowest, int(args.log_budget * 1000000),
+                      args.timeout, args.shell)
+    summary = loop.run()
+    print(formatSummary(summary))
+    return 1 if summary["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,131 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import filecmp
+import os
+import re
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bigsolution
+
+
+def readText(path):
+    with open(path, encoding="utf-8-sig") as f:
+        return f.read()
+
+
+class TestBigSolution(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def generate(self, name, layout, workers=None):
+        output = os.path.join(self.directory.name, name)
+        bigsolution.generate(output, layout, workers=workers)
+        return output
+
+    def test_defaultLayout(self):
+        output = self.generate("solution", bigsolution.Layout(projects=2))
+        self.assertEqual(sorted(os.listdir(output)),
+                         ["BigProject001", "BigProject002", "BigSolution.sln", "QtClassLibrary",
+                          "StaticLib"])
+        self.assertEqual(sorted(os.listdir(os.path.join(output, "BigProject002"))),
+                         ["BigClass002.cpp", "BigClass002.h", "BigProject002.qrc",
+                          "BigProject002.ui", "BigProject002.vcxproj",
+                          "BigProject002.vcxproj.filters", "BigProjectQtClass002.cpp",
+                          "BigProjectQtClass002.h", "bigproject002_global.h"])
+        header = readText(os.path.join(output, "BigProject002", "bigproject002_global.h"))
+        self.assertIn("BIGPROJECT002_EXPORT", header)
+        self.assertNotIn("NNN", header.upper())
+
+    def test_solutionEntries(self):
+        output = self.generate("solution", bigsolution.Layout(projects=12))
+        solution = readText(os.path.join(output, "BigSolution.sln"))
+        guids = re.findall(r'"BigProject\d+\\BigProject\d+\.vcxproj", "({[^}]+})"', solution)
+        self.assertEqual(len(guids), 12)
+        self.assertEqual(len(set(guids)), 12)
+        for guid in guids:
+            self.assertEqual(solution.count(guid + ".Debug|x64.Build.0"), 1)
+            self.assertEqual(solution.count(guid + ".Release|x64.ActiveCfg"), 1)
+        project = readText(os.path.join(output, "BigProject012", "BigProject012.vcxproj"))
+        self.assertIn("<ProjectGuid>%s</ProjectGuid>" % bigsolution.projectGuid("BigProject012"),
+                      project)
+        self.assertIn(bigsolution.projectGuid("BigProject012"), guids)
+
+    def test_wideIndices(self):
+        output = self.generate("solution", bigsolution.Layout(projects=1000))
+        self.assertTrue(os.path.isfile(os.path.join(output, "BigProject0001",
+                                                    "BigProject0001.vcxproj")))
+        self.assertTrue(os.path.isdir(os.path.join(output, "BigProject1000")))
+
+    def test_filesOfEachKind(self):
+        output = self.generate("solution", bigsolution.Layout(projects=1, classes=2, qobjects=3,
+                                                              forms=2, resources=1))
+        projectDir = os.path.join(output, "BigProject001")
+        project = readText(os.path.join(projectDir, "BigProject001.vcxproj"))
+        self.assertEqual(re.findall(r'<QtMoc Include="([^"]+)"', project),
+                         ["BigProjectQtClass001.h", "BigProjectQtClass001_2.h",
+                          "BigProjectQtClass001_3.h"])
+        self.assertEqual(re.findall(r'<QtUic Include="([^"]+)"', project),
+                         ["BigProject001.ui", "BigProject001_2.ui"])
+        self.assertEqual(len(re.findall(r"<ClCompile ", project)), 5)
+        filters = readText(os.path.join(projectDir, "BigProject001.vcxproj.filters"))
+        self.assertEqual(len(re.findall(r"<ClCompile ", filters)), 5)
+        # Q_OBJECT classes use the forms in turn, which use the resource files in turn
+        self.assertIn("Ui::BigProject001_2Ui ui;",
+                      readText(os.path.join(projectDir, "BigProjectQtClass001_2.h")))
+        self.assertIn("Ui::BigProject001Ui ui;",
+                      readText(os.path.join(projectDir, "BigProjectQtClass001_3.h")))
+        self.assertIn('<include location="BigProject001.qrc"/>',
+                      readText(os.path.join(projectDir, "BigProject001_2.ui")))
+
+    def test_withoutFormsAndResources(self):
+        output = self.generate("solution", bigsolution.Layout(projects=1, forms=0, resources=0))
+        projectDir = os.path.join(output, "BigProject001")
+        self.assertNotIn("QtUic", readText(os.path.join(projectDir, "BigProject001.vcxproj")))
+        self.assertNotIn("QtRcc", readText(os.path.join(projectDir,
+                                                        "BigProject001.vcxproj.filters")))
+        header = readText(os.path.join(projectDir, "BigProjectQtClass001.h"))
+        self.assertIn("Q_OBJECT", header)
+        self.assertNotIn("Ui::", header)
+        self.assertNotIn("setupUi", readText(os.path.join(projectDir, "BigProjectQtClass001.cpp")))
+
+    def test_deterministicOutput(self):
+        layout = bigsolution.Layout(projects=20, qobjects=2)
+        single = self.generate("single", layout, workers=1)
+        parallel = self.generate("parallel", layout, workers=4)
+        comparison = filecmp.dircmp(single, parallel)
+        self.assertEqual(comparison.left_only + comparison.right_only, [])
+        for directory in ["."] + comparison.common_dirs:
+            names = os.listdir(os.path.join(single, directory))
+            names = [os.path.join(directory, name) for name in names
+                     if os.path.isfile(os.path.join(single, directory, name))]
+            _, mismatch, errors = filecmp.cmpfiles(single, parallel, names, shallow=False)
+            self.assertEqual(mismatch + errors, [])
+
+    def test_keepsEncodingAndLineEndings(self):
+        output = self.generate("solution", bigsolution.Layout(projects=1))
+        for template, generated in [("BigSolution.sln", "BigSolution.sln"),
+                                    (os.path.join("BigProjectNNN", "BigProjectNNN.vcxproj"),
+                                     os.path.join("BigProject001", "BigProject001.vcxproj"))]:
+            with open(os.path.join(bigsolution.TEMPLATE_DIR, template), "rb") as f:
+                expected = f.read()
+            with open(os.path.join(output, generated), "rb") as f:
+                actual = f.read()
+            self.assertEqual(actual[:3] == b"\xef\xbb\xbf", expected[:3] == b"\xef\xbb\xbf")
+            self.assertEqual(b"\r\n" in actual, b"\r\n" in expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+
+import bigsolution
+import buildplan
+import workrunner
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+VCXPROJ = "{8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942}"
+
+
+def solutionEntry(name, guid, dependencies=()):
+    lines = ['Project("%s") = "%s", "%s\\%s.vcxproj", "{%s}"' % (VCXPROJ, name, name, name, guid)]
+    if dependencies:
+        lines.append("\tProjectSection(ProjectDependencies) = postProject")
+        lines.extend("\t\t{%s} = {%s}" % (guid, guid) for guid in dependencies)
+        lines.append("\tEndProjectSection")
+    lines.append("EndProject")
+    return lines
+
+
+class TestBuildPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, fileName, text):
+        path = os.path.join(self.directory.name, *fileName.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def writeProject(self, name, references=()):
+        self.write("%s/%s.vcxproj" % (name, name), "\n".join(
+            ['<Project DefaultTargets="Build">', "  <ItemGroup>"]
+            + ['    <ProjectReference Include="..\\%s\\%s.vcxproj" />' % (reference, reference)
+               for reference in references]
+            + ["  </ItemGroup>", "</Project>"]))
+
+    # Generated code of App depends on Core and Forms, Plugin on Core only, and Forms on Core
+    # through the solution
+    def writeSolution(self):
+        guids = {name: "0000000%d-0000-0000-0000-000000000000" % index
+                 for index, name in enumerate(["Core", "Forms", "App", "Plugin"])}
+        self.writeProject("Core")
+        self.writeProject("Forms")
+        self.writeProject("App", ["Core", "Forms"])
+        self.writeProject("Plugin", ["Core"])
+        lines = ["Microsoft Visual Studio Solution File, Format Version 12.00"]
+        lines.extend(solutionEntry("Core", guids["Core"]))
+        lines.extend(solutionEntry("Forms", guids["Forms"], [guids["Core"]]))
+        lines.extend(solutionEntry("App", guids["App"]))
+        lines.extend(solutionEntry("Plugin", guids["Plugin"]))
+        lines.extend(['Project("{%s}") = "Libraries", "Libraries", "{%s}"'
+                      % (buildplan.SOLUTION_FOLDER, "10000000-0000-0000-0000-000000000000"),
+                      "EndProject", "Global", "EndGlobal"])
+        return self.write("Solution.sln", "\r\n".join(lines))
+
+    def test_plan(self):
+        solution = self.writeSolution()
+        timings = self.write("timings.json", json.dumps({"core": 2.0, "Forms": 3.0, "App": 4.0,
+                                                         "Plugin": 8.0}))
+        graph = buildplan.Graph(solution)
+        self.assertEqual(sorted(graph.projects), ["App", "Core", "Forms", "Plugin"])
+        self.assertEqual(graph.projects["Forms"].dependsOn, {"Core"})
+        self.assertEqual(graph.projects["App"].dependsOn, {"Core", "Forms"})
+        self.assertEqual((graph.references, graph.problems), (4, []))
+
+        plan = buildplan.Planner(graph, buildplan.loadDurations(timings=timings)).plan(2)
+        self.assertEqual(plan["criticalPath"], ["Core", "Plugin"])
+        self.assertEqual((plan["criticalPathTime"], plan["total"]), (10.0, 17.0))
+        self.assertEqual(plan["speedup"], 1.7)
+        # Plugin starts before Forms, which is ready at the same time
+        self.assertEqual([(entry["project"], entry["start"]) for entry in plan["order"]],
+                         [("Core", 0.0), ("Plugin", 2.0), ("Forms", 2.0), ("App", 5.0)])
+        self.assertEqual((plan["scheduledWall"], plan["estimated"]), (10.0, 0))
+
+        # Projects without a duration take the median duration
+        plan = buildplan.Planner(graph, {"core": 2.0, "plugin": 8.0, "app": 4.0}).plan(1)
+        self.assertEqual((plan["estimated"], plan["total"], plan["speedup"]), (1, 18.0, 1.0))
+
+    def test_logDurations(self):
+        log = os.path.join(DATA_DIR, "msbuild_detailed.log")
+        durations = buildplan.logDurations(log)
+        self.assertEqual(sorted(durations), ["BigProject001", "BigProject002"])
+        self.assertAlmostEqual(durations["BigProject001"], 1.9)
+        self.assertAlmostEqual(durations["BigProject002"], 2.0)
+
+        timings = self.write("timings.json", json.dumps({"BigProject002": 5}))
+        self.assertEqual(buildplan.loadDurations([log, log], timings),
+                         {"bigproject001": durations["BigProject001"], "bigproject002": 5.0})
+
+    def test_problems(self):
+        solution = self.writeSolution()
+        self.writeProject("Core", ["App", "External"])
+        with self.assertRaisesRegex(workrunner.WorkError, r"circular dependency: App, Core, Forms"):
+            buildplan.Planner(buildplan.Graph(solution), {})
+        os.remove(os.path.join(self.directory.name, "Core", "Core.vcxproj"))
+        graph = buildplan.Graph(solution)
+        self.assertEqual(len(graph.problems), 1)
+        self.assertIn("Core cannot be read", graph.problems[0])
+        self.assertEqual(buildplan.main([solution, "--cores", "3", "--json"]), 0)
+
+    def planBigSolution(self):
+        output = os.path.join(self.directory.name, "big")
+        bigsolution.generate(output, bigsolution.Layout(projects=2000))
+        timings = self.write("timings.json", json.dumps({"QtClassLibrary": 30.0, "StaticLib": 1.0,
+                                                         "BigProject0001": 1.0}))
+        started = time.perf_counter()
+        graph = buildplan.Graph(os.path.join(output, "BigSolution.sln"))
+        plan = buildplan.Planner(graph, buildplan.loadDurations(timings=timings)).plan(16)
+        return graph, plan, time.perf_counter() - started
+
+    def test_bigSolution(self):
+        graph, plan, _ = self.planBigSolution()
+        self.assertEqual((plan["projects"], plan["references"], plan["problems"]),
+                         (2002, 4000, []))
+        self.assertEqual(plan["criticalPath"], ["QtClassLibrary", "BigProject0001"])
+        self.assertEqual([entry["project"] for entry in plan["order"][:2]],
+                         ["QtClassLibrary", "StaticLib"])
+        self.assertEqual((plan["total"], plan["criticalPathTime"]), (2031.0, 31.0))
+        self.assertAlmostEqual(plan["speedup"], 16.0)
+        # Each project is built once, after the projects it depends on, on one of the 16 cores
+        ends = {entry["project"]: entry["end"] for entry in plan["order"]}
+        self.assertEqual(sorted(ends), sorted(graph.projects))
+        for entry in plan["order"]:
+            self.assertTrue(all(ends[key] <= entry["start"]
+                                for key in graph.projects[entry["project"]].dependsOn))
+        self.assertLessEqual(max(sum(other["start"] <= entry["start"] < other["end"]
+                                     for other in plan["order"])
+                                 for entry in plan["order"][::50]), 16)
+
+    @unittest.skipUnless(os.getenv("QTVSTOOLS_BENCHMARK"), "set QTVSTOOLS_BENCHMARK to run")
+    def test_bigSolutionBenchmark(self):
+        _, _, seconds = self.planBigSolution()
+        print("\nPlanning 2000 projects: %.2f s" % seconds)
+        self.assertLess(seconds, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
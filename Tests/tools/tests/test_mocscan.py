@@ -0,0 +1,120 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+
+import bigsolution
+import mocscan
+import projectformat
+
+
+class TestMocScan(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheFile = os.path.join(self.directory.name, "cache", "moc_candidates.json")
+        self.solution = os.path.join(self.directory.name, "solution")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def readText(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def writeText(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_findMacros(self):
+        self.assertEqual(mocscan.findMacros(b"class A : public QObject { Q_OBJECT };"),
+                         ["Q_OBJECT"])
+        self.assertEqual(mocscan.findMacros(b"struct B {\n  Q_GADGET_EXPORT(LIB)\n};\n"
+                                            b"namespace N { Q_NAMESPACE }\n"),
+                         ["Q_GADGET_EXPORT", "Q_NAMESPACE"])
+        self.assertEqual(mocscan.findMacros(b"// Q_OBJECT\n/* Q_GADGET\n Q_OBJECT */\n"
+                                            b"const char *s = \"Q_OBJECT \\\" Q_GADGET\";\n"
+                                            b"auto r = R\"x(Q_OBJECT )\" Q_GADGET)x\";\n"
+                                            b"char c = '\"'; int Q_OBJECT_LIKE;\n"), [])
+        self.assertEqual(mocscan.findMacros(b"char c = '\"'; /* \" */ class C { Q_OBJECT };"),
+                         ["Q_OBJECT"])
+        self.assertEqual(mocscan.findMacros(b""), [])
+
+    def test_bigSolution(self):
+        bigsolution.generate(self.solution, bigsolution.Layout(projects=2, qobjects=2))
+        projects = projectformat.findProjects([self.solution])
+        scanner = mocscan.Scanner(self.cacheFile)
+        results = mocscan.compare(projects, scanner)
+        self.assertEqual(len(results), 4)
+        self.assertEqual([result for result in results.values()
+                          if result["add"] or result["remove"] or result["problems"]], [])
+        self.assertEqual(scanner.cached, 0)
+        self.assertGreater(scanner.scanned, 0)
+
+        project = os.path.join(self.solution, "BigProject001", "BigProject001.vcxproj")
+        text = self.readText(project)
+        self.writeText(project, text.replace('<QtMoc Include="BigProjectQtClass001_2.h" />',
+                                             '<ClInclude Include="BigProjectQtClass001_2.h" />')
+                       .replace('<ClInclude Include="BigClass001.h" />',
+                                '<QtMoc Include="BigClass001.h" />'
+                                '<QtMoc Include="Missing.h" />'))
+        source = os.path.join(self.solution, "BigProject001", "BigClass001.cpp")
+        self.writeText(source, self.readText(source) + "\nstruct Local { Q_GADGET };\n")
+        results = mocscan.compare(projects, scanner)
+        self.assertEqual(results[project], {
+            "add": [["BigClass001.cpp", ["Q_GADGET"]],
+                    ["BigProjectQtClass001_2.h", ["Q_OBJECT"]]],
+            "remove": ["BigClass001.h"],
+            "problems": ["Missing.h is missing"]})
+        self.assertEqual(scanner.scanned, 1)
+        self.assertEqual(mocscan.main([self.solution, "--cache", self.cacheFile]), 1)
+        self.assertIn("  + QtMoc BigProjectQtClass001_2.h (Q_OBJECT)",
+                      mocscan.formatResults(results))
+
+    def test_cache(self):
+        bigsolution.generate(self.solution, bigsolution.Layout(projects=2))
+        projects = projectformat.findProjects([self.solution])
+        results = mocscan.compare(projects, mocscan.Scanner(self.cacheFile))
+        scanner = mocscan.Scanner(self.cacheFile)
+        self.assertEqual(mocscan.compare(projects, scanner), results)
+        self.assertEqual((scanner.scanned, scanner.hashed), (0, 0))
+        files = scanner.cached
+
+        # Touched without changes: hashed, but not scanned
+        header = os.path.join(self.solution, "BigProject002", "BigProjectQtClass002.h")
+        modified = os.stat(header).st_mtime_ns + 10 ** 9
+        os.utime(header, ns=(modified, modified))
+        scanner = mocscan.Scanner(self.cacheFile)
+        self.assertEqual(mocscan.compare(projects, scanner), results)
+        self.assertEqual((scanner.scanned, scanner.hashed, scanner.cached), (0, 1, files - 1))
+
+    def test_processPool(self):
+        sources = os.path.join(self.directory.name, "sources")
+        os.makedirs(sources)
+        paths = []
+        for index in range(mocscan.POOL_THRESHOLD + 6):
+            path = os.path.join(sources, "class%d.h" % index)
+            macro = mocscan.MOC_MACROS[index % 3] if index % 2 else "// Q_OBJECT"
+            self.writeText(path, "class Class%d {\n    %s\n};\n" % (index, macro))
+            paths.append(path)
+        scanner = mocscan.Scanner(self.cacheFile, workers=2)
+        results = scanner.scan(paths + [os.path.join(sources, "missing.h")])
+        self.assertEqual(scanner.scanned, len(paths))
+        self.assertEqual(list(results), paths + [os.path.join(sources, "missing.h")])
+        for index, path in enumerate(paths):
+            self.assertEqual(results[path], [mocscan.MOC_MACROS[index % 3]] if index % 2 else [])
+        self.assertIsNone(results[os.path.join(sources, "missing.h")])
+
+
+if __name__ == "__main__":
+    unittest.main()
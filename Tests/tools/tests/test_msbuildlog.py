@@ -0,0 +1,122 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msbuildlog
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+PROJECT = "C:\\work\\big\\BigProject001\\"
+
+
+def dataFile(fileName):
+    return os.path.join(DATA_DIR, fileName)
+
+
+class TestMsBuildLog(unittest.TestCase):
+
+    def test_detailedLog(self):
+        report = msbuildlog.analyze(dataFile("msbuild_detailed.log"))
+        self.assertAlmostEqual(report["wall"], 3.0)
+        self.assertEqual(report["maxCpuCount"], 2)
+        self.assertEqual(report["nodes"], 2)
+        self.assertEqual(report["peakNodes"], 2)
+        # Tasks ran 1.2 s on node 1 and 1.3 s on node 2, the MSBuild task waits
+        self.assertAlmostEqual(report["parallelism"], 2.5 / 3.0)
+        self.assertEqual(list(report["targets"]), ["QtMoc", "QtWork"])
+        self.assertEqual(report["targets"]["QtMoc"]["calls"], 2)
+        self.assertAlmostEqual(report["targets"]["QtMoc"]["wall"], 0.5)
+        self.assertAlmostEqual(report["targets"]["QtMoc"]["busy"], 0.7)
+        self.assertAlmostEqual(report["targets"]["QtWork"]["wall"], 1.2)
+        self.assertEqual(report["tools"]["moc"], {"items": 2, "timed": 2, "time": 2.0,
+                                                  "failed": 1})
+        self.assertAlmostEqual(report["tools"]["uic"]["time"], 1.2)
+        self.assertAlmostEqual(report["toolParallelism"], 4.0 / 1.2)
+        item = report["workItems"]["rcc{%sBigProject001.qrc}" % PROJECT]
+        self.assertEqual(item["type"], "rcc")
+        self.assertAlmostEqual(item["started"], 36001.0)
+        self.assertAlmostEqual(item["duration"], 0.8)
+        self.assertEqual(item["exitCode"], 0)
+
+    def test_logWithoutTimestamps(self):
+        report = msbuildlog.analyze(dataFile("msbuild_untimed.log"))
+        self.assertIsNone(report["wall"])
+        self.assertIsNone(report["parallelism"])
+        self.assertIsNone(report["targets"]["QtMoc"]["wall"])
+        # From the performance summary
+        self.assertAlmostEqual(report["targets"]["QtMoc"]["busy"], 0.5)
+        self.assertAlmostEqual(report["targets"]["QtWork"]["busy"], 1.8)
+        self.assertAlmostEqual(report["tools"]["rcc"]["time"], 0.8)
+
+    def test_jsonEvents(self):
+        report = msbuildlog.analyze(dataFile("msbuild_events.jsonl"))
+        self.assertAlmostEqual(report["wall"], 3.5)
+        self.assertEqual(report["maxCpuCount"], 0)
+        self.assertEqual(report["nodes"], 1)
+        self.assertEqual(list(report["targets"]), ["QtUic", "QtWork", "QtTranslationRelease"])
+        self.assertAlmostEqual(report["targets"]["QtUic"]["busy"], 0.3)
+        self.assertAlmostEqual(report["tools"]["lrelease"]["time"], 0.5)
+        self.assertAlmostEqual(report["tools"]["uic"]["time"], 0.6)
+        self.assertAlmostEqual(report["toolParallelism"], 1.6)
+        text = msbuildlog.formatReport(report)
+        self.assertIn("all processors", text)
+        self.assertIn("moc{%sBigProjectQtClass001.h}" % PROJECT, text)
+
+    def test_gzippedLog(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fileName = os.path.join(directory, "msbuild.log.gz")
+            with open(dataFile("msbuild_detailed.log"), "rb") as source:
+                with gzip.open(fileName, "wb") as target:
+                    shutil.copyfileobj(source, target)
+            self.assertEqual(msbuildlog.analyze(fileName),
+                             msbuildlog.analyze(dataFile("msbuild_detailed.log")))
+
+    def test_diff(self):
+        before = msbuildlog.analyze(dataFile("msbuild_detailed.log"))
+        after = msbuildlog.analyze(dataFile("msbuild_events.jsonl"))
+        difference = msbuildlog.diff(before, after)
+        self.assertAlmostEqual(difference["wall"], 0.5)
+        self.assertEqual(difference["targets"]["QtMoc"]["calls"], -2)
+        self.assertEqual(difference["targets"]["QtUic"]["calls"], 1)
+        self.assertAlmostEqual(difference["tools"]["moc"]["time"], -1.0)
+        self.assertAlmostEqual(
+            difference["workItems"]["uic{%sBigProject001.ui}" % PROJECT]["delta"], 0.1)
+        self.assertEqual(msbuildlog.formatDiff(difference).splitlines()[-5].split()[-1],
+                         "moc{C:\\work\\big\\BigProject002\\BigProjectQtClass002.h}")
+
+    def test_constantMemory(self):
+        def lines(count):
+            yield "10:00:00.000    1>Project \"C:\\work\\big.sln\" on node 1 (default targets).\n"
+            for i in range(count):
+                seconds = i / 1000.0
+                stamp = "10:%02d:%06.3f    1>" % (seconds // 60, seconds % 60)
+                yield stamp + 'Target "QtMoc" in project "C:\\work\\p%d.vcxproj":\n' % i
+                yield stamp + "  Some output of a task that is not of interest %d\n" % i
+                yield stamp + 'Done building target "QtMoc" in project "p%d.vcxproj".\n' % i
+
+        def peak(count):
+            analysis = msbuildlog.Analysis()
+            tracemalloc.start()
+            for event in msbuildlog.parseTextLog(lines(count)):
+                analysis.add(event)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.assertEqual(analysis.report()["targets"]["QtMoc"]["calls"], count)
+            return peak
+        self.assertLess(peak(50000), 2 * peak(5000) + 100000)
+
+
+if __name__ == "__main__":
+    unittest.main()
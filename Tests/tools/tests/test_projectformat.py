@@ -0,0 +1,125 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+
+import projectformat
+
+FORMATS_DIR = os.path.join(os.path.dirname(TOOLS_DIR), "ProjectFormats")
+
+
+def sampleProject(version):
+    return os.path.join(FORMATS_DIR, str(version), "QtProjectV%d.vcxproj" % version)
+
+
+class TestProjectFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheFile = os.path.join(self.directory.name, "cache", "project_formats.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_sampleProjects(self):
+        expected = {100: "v1", 200: "v2", 300: "v3.0", 301: "v3.1", 302: "v3.2", 303: "v3.3",
+                    304: "v3.4"}
+        for version, name in expected.items():
+            result = projectformat.scanProject(sampleProject(version))
+            self.assertEqual(result["format"], name)
+            self.assertEqual(result["version"], version)
+            self.assertEqual(result["needsConversion"], version != 304)
+            self.assertEqual(result["problems"], [])
+            if version >= 300:
+                self.assertEqual(result["qtInstall"], ["$(DefaultQtVersion)"])
+                self.assertEqual(result["qtModules"], ["core", "gui", "widgets"])
+        self.assertEqual(projectformat.scanProject(sampleProject(304))["imports"],
+                         ["qt_defaults.props", "Qt.props"])
+
+    def test_readsOnlyAsFarAsNeeded(self):
+        with open(sampleProject(304), "rb") as f:
+            content = f.read()
+        # Everything after the first item definitions is never parsed
+        position = content.index(b"<ItemDefinitionGroup")
+        padding = b"<!--" + b" " * (4 * projectformat.CHUNK_SIZE) + b"-->\n"
+        path = os.path.join(self.directory.name, "Broken.vcxproj")
+        with open(path, "wb") as f:
+            f.write(content[:position] + b"<ItemDefinitionGroup>" + padding
+                    + b"<Broken></Project>")
+        result = projectformat.scanProject(path)
+        self.assertEqual(result["format"], "v3.4")
+        self.assertEqual(result["problems"], [])
+        self.assertLess(result["bytesRead"], len(content) + 2 * projectformat.CHUNK_SIZE)
+
+    def test_problems(self):
+        with open(sampleProject(303), encoding="utf-8-sig") as f:
+            content = f.read()
+        cases = {"QtVS_v305": "unknown format version QtVS_v305", "": "imports Qt/MSBuild"}
+        for keyword, problem in cases.items():
+            path = os.path.join(self.directory.name, "Project%s.vcxproj" % keyword)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content.replace("<Keyword>QtVS_v303</Keyword>",
+                                        "<Keyword>%s</Keyword>" % keyword))
+            result = projectformat.scanProject(path)
+            self.assertEqual(result["format"], "unknown")
+            self.assertFalse(result["needsConversion"])
+            self.assertTrue(result["problems"][0].startswith(problem))
+        path = os.path.join(self.directory.name, "NoQtInstall.vcxproj")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content.replace("<QtInstall>$(DefaultQtVersion)</QtInstall>", ""))
+        self.assertEqual(projectformat.scanProject(path)["problems"], ["QtInstall is not set"])
+        notQt = os.path.join(os.path.dirname(TOOLS_DIR), "BigSolution", "template", "StaticLib",
+                             "StaticLib.vcxproj")
+        self.assertIsNone(projectformat.scanProject(notQt)["format"])
+
+    def test_cache(self):
+        paths = projectformat.findProjects([FORMATS_DIR])
+        self.assertEqual(len(paths), 7)
+        scanner = projectformat.Scanner(self.cacheFile)
+        results = scanner.scan(paths)
+        self.assertEqual((scanner.scanned, scanner.cached), (7, 0))
+        scanner = projectformat.Scanner(self.cacheFile)
+        self.assertEqual(scanner.scan(paths), results)
+        self.assertEqual((scanner.scanned, scanner.cached), (0, 7))
+
+        copy = os.path.join(self.directory.name, "QtProjectV303.vcxproj")
+        shutil.copyfile(sampleProject(303), copy)
+        scanner.scan([copy])
+        with open(copy, "a", encoding="utf-8") as f:
+            f.write("\n")
+        results = scanner.scan([copy])
+        self.assertEqual((scanner.scanned, scanner.cached), (1, 0))
+        self.assertEqual(results[copy]["format"], "v3.3")
+
+    def test_processPool(self):
+        projects = os.path.join(self.directory.name, "projects")
+        for index in range(projectformat.POOL_THRESHOLD + 6):
+            version = [100, 200, 300, 301, 302, 303, 304][index % 7]
+            directory = os.path.join(projects, "project%d" % index)
+            os.makedirs(directory)
+            shutil.copyfile(sampleProject(version), os.path.join(directory, "project.vcxproj"))
+        paths = projectformat.findProjects([projects])
+        scanner = projectformat.Scanner(self.cacheFile, workers=2)
+        results = scanner.scan(paths)
+        self.assertEqual(scanner.scanned, len(paths))
+        self.assertEqual(list(results), paths)
+        for path, result in results.items():
+            self.assertEqual(result, projectformat.scanProject(path))
+        summary = projectformat.formatResults(results)
+        self.assertIn("v3.4           10", summary)
+        self.assertIn("Need conversion to v3.4:", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+
+import projectformat
+import projectupgrade
+
+FORMATS_DIR = os.path.join(os.path.dirname(TOOLS_DIR), "ProjectFormats")
+NS = "{http://schemas.microsoft.com/developer/msbuild/2003}"
+OLD_VERSIONS = [100, 200, 300, 301, 302, 303]
+
+
+def sampleProject(version, directory=FORMATS_DIR):
+    return os.path.join(directory, str(version), "QtProjectV%d.vcxproj" % version)
+
+
+# What the Qt/MSBuild integration relies on in a v3.4 project
+def qtLayout(path):
+    project = ElementTree.parse(path).getroot()
+    children = list(project)
+
+    def describe(element):
+        tag = element.tag[len(NS):]
+        imports = [child.get("Project") for child in element.iter(NS + "Import")]
+        return tag, element.get("Label"), imports[0] if tag == "ImportGroup" and imports else None
+
+    def position(project):
+        return next(index for index, element in enumerate(children)
+                    if project in [child.get("Project") for child in element.iter(NS + "Import")])
+
+    cppProps = position(projectupgrade.CPP_PROPS)
+    extensionSettings = next(index for index, element in enumerate(children)
+                             if element.get("Label") == "ExtensionSettings")
+    globals_ = project.find(NS + "PropertyGroup[@Label='Globals']")
+    sheets = project.findall(NS + "ImportGroup[@Label='PropertySheets']")
+    return {
+        "keyword": globals_.findtext(NS + "Keyword"),
+        "qtMsBuild": globals_.find(NS + "QtMsBuild").get("Condition"),
+        "afterCppProps": [describe(element)
+                          for element in children[cppProps + 1:extensionSettings]
+                          if element.get("Label") != "QtSettings"],
+        "qtSettings": {(element.findtext(NS + "QtInstall"), element.findtext(NS + "QtModules"))
+                       for element in project.findall(NS + "PropertyGroup[@Label='QtSettings']")},
+        "propertySheets": {group.findall(NS + "Import")[-1].get("Project") for group in sheets},
+        "afterCppTargets": describe(children[position(projectupgrade.CPP_TARGETS) + 1]),
+        "qtMsBuildImports": len([element for element in project.iter(NS + "Import")
+                                 if "$(QtMsBuild)" in element.get("Project")]) - len(sheets)
+    }
+
+
+class TestProjectUpgrade(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.formats = os.path.join(self.directory.name, "ProjectFormats")
+        shutil.copytree(FORMATS_DIR, self.formats)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def readBytes(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_layoutOfSample(self):
+        expected = qtLayout(sampleProject(304))
+        expected["qtSettings"] = {("msvc2019_64", "core;gui;widgets")}
+        results = projectupgrade.upgradeProjects([sampleProject(version, self.formats)
+                                                  for version in OLD_VERSIONS])
+        for version, result in zip(OLD_VERSIONS, results):
+            path = sampleProject(version, self.formats)
+            self.assertEqual(result["problems"], [], path)
+            self.assertTrue(result["files"])
+            scan = projectformat.scanProject(path)
+            self.assertEqual(scan["format"], "v3.4")
+            self.assertEqual(scan["problems"], [])
+            layout = qtLayout(path)
+            if version != 200:
+                # Only the v2 sample names its Qt version
+                layout["qtSettings"] = {(qtInstall.replace("$(DefaultQtVersion)", "msvc2019_64"),
+                                         modules) for qtInstall, modules in layout["qtSettings"]}
+            self.assertEqual(layout, expected, path)
+        # Nothing left to do
+        results = projectupgrade.upgradeProjects([sampleProject(version, self.formats)
+                                                  for version in OLD_VERSIONS])
+        self.assertEqual([result["files"] for result in results], [{}] * len(OLD_VERSIONS))
+
+    def test_minimalDiff(self):
+        path = sampleProject(303, self.formats)
+        projectupgrade.upgradeProject(path)
+        with open(path, encoding="utf-8-sig") as f:
+            converted = f.read()
+        with open(sampleProject(304), encoding="utf-8-sig") as f:
+            sample = f.read()
+        converted = converted.replace("QtProjectV303", "QtProjectV304").replace(
+            'ToolsVersion="16.0"', 'ToolsVersion="17.0"').replace(
+            "{812E4050-B861-4918-A0DC-53053B848372}", "{923588D5-2AA5-4B0F-8110-56BEEBB531D5}")
+        self.assertEqual(converted, sample)
+
+    def test_formattingIsKept(self):
+        # Line endings and byte order marks
+        path = sampleProject(303, self.formats)
+        with open(path, "rb") as f:
+            content = f.read()
+        with open(path, "wb") as f:
+            f.write(content.replace(b"\n", b"\r\n"))
+        projectupgrade.upgradeProject(path)
+        content = self.readBytes(path)
+        self.assertTrue(content.startswith(b"\xef\xbb\xbf"))
+        self.assertEqual(content.count(b"\n"), content.count(b"\r\n"))
+        self.assertIn(b"  <ImportGroup Condition=\"Exists('$(QtMsBuild)\\qt.targets')\">\r\n"
+                      b"    <Import Project=\"$(QtMsBuild)\\qt.targets\" />\r\n", content)
+
+        # Escaped attributes and lines not concerned by the conversion
+        path = sampleProject(100, self.formats)
+        before = self.readBytes(path).decode("utf-8").splitlines()
+        projectupgrade.upgradeProject(path)
+        after = self.readBytes(path).decode("utf-8").splitlines()
+        self.assertFalse(self.readBytes(path).startswith(b"\xef\xbb\xbf"))
+        # Settings before the item definitions, and the custom build steps of moc_predefs.h
+        definitions = next(index for index, line in enumerate(before)
+                           if "<ItemDefinitionGroup" in line)
+        kept = [line for index, line in enumerate(before) if "&apos;" in line
+                and (index < definitions or "moc_predefs.h;%(Outputs)" in line)]
+        self.assertTrue(kept)
+        self.assertEqual([line for line in after if line in kept], kept)
+
+    def test_v2Project(self):
+        path = sampleProject(200, self.formats)
+        result = projectupgrade.upgradeProject(path)
+        self.assertEqual(sorted(result["files"]), [path, path + ".filters"])
+        project = ElementTree.parse(path).getroot()
+        self.assertEqual(project.find(".//%sUserProperties" % NS).attrib, {})
+        for libraries in project.iter(NS + "AdditionalDependencies"):
+            self.assertEqual(libraries.text, "%(AdditionalDependencies)")
+        for defines in project.iter(NS + "PreprocessorDefinitions"):
+            self.assertNotIn("QT_CORE_LIB", defines.text)
+            self.assertIn("QT_DLL", defines.text)
+        for includes in project.iter(NS + "AdditionalIncludeDirectories"):
+            self.assertNotIn("$(QTDIR)", includes.text)
+        items = {(item.tag[len(NS):], item.get("Include"))
+                 for group in project.findall(NS + "ItemGroup") for item in group
+                 if group.get("Label") != "ProjectConfigurations"}
+        self.assertEqual(items, {("ClCompile", "main.cpp"), ("ClCompile", "QtProjectV200.cpp"),
+                                 ("QtMoc", "QtProjectV200.h"), ("QtUic", "QtProjectV200.ui"),
+                                 ("QtRcc", "QtProjectV200.qrc")})
+        filters = ElementTree.parse(path + ".filters").getroot()
+        self.assertFalse([item for item in filters.iter()
+                          if "GeneratedFiles\\" in (item.get("Include") or "")])
+        self.assertEqual(len(filters.findall(".//%sQtMoc" % NS)), 1)
+
+    def test_dryRun(self):
+        path = sampleProject(200, self.formats)
+        before = self.readBytes(path)
+        result = projectupgrade.upgradeProject(path, dryRun=True, diff=True)
+        self.assertEqual(self.readBytes(path), before)
+        added, removed = result["files"][path]
+        self.assertGreater(removed, added)
+        self.assertIn("+    <QtMoc Include=\"QtProjectV200.h\" />\n", result["diff"])
+        self.assertIn("-    <Keyword>Qt4VSv1.0</Keyword>\n", result["diff"])
+        summary = projectupgrade.formatResults([result], dryRun=True)
+        self.assertIn("1 projects, 1 to convert, 0 with problems", summary)
+
+    def test_problems(self):
+        path = sampleProject(303, self.formats)
+        with open(path, encoding="utf-8-sig") as f:
+            content = f.read()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content.replace('<Import Project="$(VCTargetsPath)\\Microsoft.Cpp.props" />',
+                                    ""))
+        before = self.readBytes(path)
+        result = projectupgrade.upgradeProject(path)
+        self.assertEqual(result["problems"],
+                         ["not converted: missing \"Microsoft.Cpp.props\" import"])
+        self.assertEqual(self.readBytes(path), before)
+        self.assertEqual(projectupgrade.main([path]), 1)
+
+    def test_processPool(self):
+        projects = os.path.join(self.directory.name, "projects")
+        for index in range(projectformat.POOL_THRESHOLD + 6):
+            version = OLD_VERSIONS[index % len(OLD_VERSIONS)]
+            shutil.copytree(os.path.join(FORMATS_DIR, str(version)),
+                            os.path.join(projects, "project%d" % index))
+        paths = projectformat.findProjects([projects])
+        results = projectupgrade.upgradeProjects(paths, workers=2)
+        self.assertEqual([result["path"] for result in results], paths)
+        self.assertFalse([result for result in results if result["problems"]])
+        scanner = projectformat.Scanner(os.path.join(self.directory.name, "formats.json"))
+        self.assertEqual({result["format"] for result in scanner.scan(paths).values()}, {"v3.4"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+
+import qrcindex
+
+QRC = """\
+<RCC>
+    <qresource prefix="/app">
+        <file>main.qml</file>
+        <file alias="icon.png">images\\256\\icon.png</file>
+        <file>qml/pages/Page.qml</file>
+    </qresource>
+    <qresource prefix="/app" lang="de">
+        <file alias="main.qml">i18n/main_de.qml</file>
+    </qresource>
+</RCC>
+"""
+
+
+class TestQrcIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheFile = os.path.join(self.directory.name, "cache", "qrc_index.json")
+        self.project = os.path.join(self.directory.name, "project")
+        self.qrc = os.path.join(self.project, "app.qrc")
+        self.write(self.qrc, QRC)
+        for fileName in ["main.qml", "images/256/icon.png", "qml/pages/Page.qml",
+                         "i18n/main_de.qml"]:
+            self.write(os.path.join(self.project, fileName), "")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, path, content, modified=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        if modified is not None:
+            os.utime(path, ns=(modified, modified))
+
+    def path(self, fileName):
+        return os.path.join(self.project, *fileName.split("/"))
+
+    def test_resources(self):
+        index = qrcindex.QrcIndex(self.cacheFile)
+        index.update(qrcindex.findQrcFiles([self.directory.name]))
+        self.assertEqual(index.resources(self.qrc), [
+            {"file": self.path("main.qml"), "resource": ":/app/main.qml"},
+            {"file": self.path("images/256/icon.png"), "resource": ":/app/icon.png"},
+            {"file": self.path("qml/pages/Page.qml"), "resource": ":/app/qml/pages/Page.qml"},
+            {"file": self.path("i18n/main_de.qml"), "resource": ":/app/main.qml", "lang": "de"}])
+        self.assertEqual(index.entries[self.qrc]["problems"], [])
+
+        other = os.path.join(self.project, "other.qrc")
+        self.write(other, "<RCC><qresource><file>qml/pages/Page.qml</file></qresource></RCC>")
+        broken = os.path.join(self.project, "broken.qrc")
+        self.write(broken, "<RCC><qresource>")
+        index.update([self.qrc, other, broken])
+        self.assertEqual(index.resources(other), [{"file": self.path("qml/pages/Page.qml"),
+                                                   "resource": ":/qml/pages/Page.qml"}])
+        self.assertEqual(index.qrcFiles(self.path("qml/pages/Page.qml")), [self.qrc, other])
+        self.assertEqual(index.qrcFiles(self.path("main.qml")), [self.qrc])
+        self.assertEqual(index.qrcFiles(self.qrc), [])
+        self.assertEqual(index.resources(broken), [])
+        self.assertTrue(index.entries[broken]["problems"][0].startswith("cannot be parsed"))
+
+    def test_incrementalUpdate(self):
+        paths = [self.qrc]
+        index = qrcindex.QrcIndex(self.cacheFile)
+        index.update(paths)
+        self.assertEqual((index.parsed, index.hashed, index.cached), (1, 0, 0))
+        index = qrcindex.QrcIndex(self.cacheFile)
+        index.update(paths)
+        self.assertEqual((index.parsed, index.hashed, index.cached), (0, 0, 1))
+
+        # Touched without changes: read, but not parsed
+        modified = os.stat(self.qrc).st_mtime_ns + 10 ** 9
+        os.utime(self.qrc, ns=(modified, modified))
+        index = qrcindex.QrcIndex(self.cacheFile)
+        index.update(paths)
+        self.assertEqual((index.parsed, index.hashed, index.cached), (0, 1, 0))
+        index = qrcindex.QrcIndex(self.cacheFile)
+        index.update(paths)
+        self.assertEqual((index.parsed, index.hashed, index.cached), (0, 0, 1))
+
+        self.write(self.qrc, QRC.replace("main.qml</file>", "main.qml</file>\n<file>new.js</file>"))
+        index = qrcindex.QrcIndex(self.cacheFile)
+        index.update(paths)
+        self.assertEqual((index.parsed, index.hashed, index.cached), (1, 0, 0))
+        self.assertIn(self.path("new.js"), index.inputs(self.qrc))
+
+    def test_outputFile(self):
+        self.assertEqual(qrcindex.outputFile(self.qrc),
+                         os.path.join(self.project, "x64", "Debug", "qt", "rcc", "qrc_app.cpp"))
+        # The output is relative to the project, not to the .qrc file
+        self.write(os.path.join(self.project, "app.vcxproj"), "")
+        qrc = self.path("resources/icons.qrc")
+        self.assertEqual(qrcindex.outputFile(qrc, configuration="Release", platform="Win32"),
+                         os.path.join(self.project, "Win32", "Release", "qt", "rcc",
+                                      "qrc_icons.cpp"))
+        self.assertEqual(qrcindex.outputFile(qrc, qrcindex.LEGACY_OUTPUT),
+                         os.path.join(self.project, "GeneratedFiles", "Debug", "qrc_icons.cpp"))
+        self.assertEqual(qrcindex.outputFile(qrc, os.path.join("{dir}", "qrc_{name}.cpp")),
+                         self.path("resources/qrc_icons.cpp"))
+
+    def test_outOfDate(self):
+        output = qrcindex.outputFile(self.qrc)
+        self.assertEqual(output, os.path.join(self.project, "x64", "Debug", "qt", "rcc",
+                                              "qrc_app.cpp"))
+        index = qrcindex.QrcIndex(self.cacheFile)
+        index.update([self.qrc])
+        self.assertEqual(index.outOfDate({self.qrc: output}),
+                         {self.qrc: "%s is missing" % output})
+        built = os.stat(self.qrc).st_mtime_ns + 10 ** 9
+        self.write(output, "", modified=built)
+        for fileName in ["main.qml", "images/256/icon.png", "qml/pages/Page.qml",
+                         "i18n/main_de.qml"]:
+            os.utime(self.path(fileName), ns=(built - 1, built - 1))
+        self.assertEqual(index.outOfDate({self.qrc: output}), {})
+
+        icon = self.path("images/256/icon.png")
+        os.utime(icon, ns=(built + 1, built + 1))
+        self.assertEqual(index.outOfDate({self.qrc: output}),
+                         {self.qrc: "%s is newer than %s" % (icon, output)})
+        os.remove(icon)
+        self.assertEqual(index.outOfDate({self.qrc: output}),
+                         {self.qrc: "%s is missing" % icon})
+
+        self.assertEqual(qrcindex.main([self.project, "--cache", self.cacheFile, "--output"]), 1)
+        os.utime(self.qrc, ns=(built - 1, built - 1))
+        self.write(icon, "", modified=built - 1)
+        self.assertEqual(qrcindex.main([self.project, "--cache", self.cacheFile, "--output"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
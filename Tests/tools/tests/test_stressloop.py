@@ -0,0 +1,115 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+
+import stressloop
+
+FAKE_BUILD = os.path.join(TOOLS_DIR, "fakebuild.py")
+
+
+class TestStressLoop(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.results = os.path.join(self.directory.name, "results")
+        self.tree = os.path.join(self.directory.name, "tree")
+        os.makedirs(self.tree)
+        with open(os.path.join(self.tree, "BigSolution.sln"), "w") as f:
+            f.write("solution")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def stress(self, arguments, iterations=20, **options):
+        loop = stressloop.StressLoop([sys.executable, FAKE_BUILD, "--duration", "0.01"]
+                                     + arguments, iterations, self.results, self.tree,
+                                     output=io.StringIO(), **options)
+        return loop, loop.run()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(stressloop.percentile(values, 50), 50)
+        self.assertEqual(stressloop.percentile(values, 95), 95)
+        self.assertEqual(stressloop.percentile(values, 99), 99)
+        self.assertEqual(stressloop.percentile([3.0], 99), 3.0)
+        self.assertIsNone(stressloop.percentile([], 50))
+
+    def test_errorSignature(self):
+        first = ("C:\\work\\big\\BigProject012\\BigProject012.vcxproj(123,5): error MSB3491: "
+                 "Could not write lines to file \"C:\\work\\big\\x64\\props.txt\".")
+        second = ("D:\\copy\\BigProject099\\BigProject099.vcxproj(123,5): error MSB3491: "
+                  "Could not write lines to file \"D:\\copy\\x64\\props.txt\".")
+        self.assertEqual(stressloop.errorSignature(first), stressloop.errorSignature(second))
+        self.assertNotEqual(stressloop.errorSignature(first),
+                            stressloop.errorSignature("error C1083: Cannot open file"))
+
+    def test_successfulRuns(self):
+        loop, summary = self.stress([], iterations=5, keepSlowest=2)
+        self.assertEqual(summary["iterations"], 5)
+        self.assertEqual(summary["failures"], 0)
+        self.assertLessEqual(summary["duration"]["p50"], summary["duration"]["p99"])
+        self.assertGreater(summary["peakMemory"], 0)
+        slowest = sorted(loop.iterations, key=lambda iteration: -iteration.duration)[:2]
+        self.assertEqual(summary["keptLogs"], sorted(iteration.number for iteration in slowest))
+        self.assertEqual(len(os.listdir(loop.logDir())), 2)
+
+    def test_failuresAreClusteredAndKept(self):
+        loop, summary = self.stress(["--fail-rate", "0.3", "--seed", "7"], keepSlowest=0,
+                                    artifact="fake.binlog")
+        failed = [iteration.number for iteration in loop.iterations if iteration.failed()]
+        self.assertTrue(failed)
+        self.assertEqual(summary["failures"], len(failed))
+        self.assertEqual(summary["keptLogs"], failed)
+        self.assertEqual(sum(cluster["count"] for cluster in summary["signatures"]), len(failed))
+        for cluster in summary["signatures"]:
+            self.assertRegex(cluster["signature"], r"^(fatal )?error (MSB|C)\d+")
+        self.assertEqual(len(os.listdir(loop.logDir())), 2 * len(failed))
+        with open(os.path.join(self.results, "summary.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["summary"]["failures"], len(failed))
+        # The same seed gives the same failures
+        self.directory.cleanup()
+        os.makedirs(self.tree)
+        loop, again = self.stress(["--fail-rate", "0.3", "--seed", "7"], keepSlowest=0)
+        self.assertEqual(again["keptLogs"], failed)
+
+    def test_logBudget(self):
+        loop, summary = self.stress(["--fail-rate", "0.5", "--seed", "3"], keepSlowest=5,
+                                    logBudget=300)
+        self.assertTrue(summary["failures"])
+        size = sum(os.path.getsize(os.path.join(loop.logDir(), name))
+                   for name in os.listdir(loop.logDir()))
+        self.assertLessEqual(size, 300)
+        self.assertLess(len(summary["keptLogs"]), summary["failures"] + 5)
+
+    def test_parallelSlotsUseCopiesOfTheTree(self):
+        loop, summary = self.stress(["--binlog", "BigSolution.sln"], iterations=6, parallel=3)
+        self.assertEqual(summary["iterations"], 6)
+        self.assertEqual(sorted(summary["slots"]), ["1", "2", "3"])
+        # Builds wrote into the copies, not into the tree
+        with open(os.path.join(self.tree, "BigSolution.sln")) as f:
+            self.assertEqual(f.read(), "solution")
+        self.assertEqual(sorted(os.listdir(os.path.join(self.results, "work"))),
+                         ["slot1", "slot2", "slot3"])
+
+    def test_timeout(self):
+        loop, summary = self.stress(["--duration", "10"], iterations=1, timeout=0.5)
+        self.assertEqual(summary["failures"], 1)
+        self.assertEqual(summary["signatures"][0]["signature"], "timeout")
+        self.assertLess(summary["duration"]["max"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
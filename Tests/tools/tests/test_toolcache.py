@@ -0,0 +1,198 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+
+import toolcache
+
+
+class TestToolCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheDir = os.path.join(self.directory.name, "cache")
+        self.log = os.path.join(self.directory.name, "tool.log")
+        # Copies of the stand-in tool named like the tools, which can be changed like an update
+        # of Qt
+        self.tools = {}
+        os.makedirs(os.path.join(self.directory.name, "bin"))
+        for tool in ("moc", "uic", "rcc"):
+            self.tools[tool] = os.path.join(self.directory.name, "bin", tool + ".py")
+            shutil.copyfile(os.path.join(TOOLS_DIR, "faketool.py"), self.tools[tool])
+        self.project = os.path.join(self.directory.name, "project")
+        self.write("project/widget.h", "class Widget : public QWidget {\n    Q_OBJECT\n};\n")
+        self.write("project/plain.h", "class Plain {};\n")
+        self.write("project/resources/icon.png", "png")
+        self.write("project/app.qrc",
+                   "<RCC><qresource prefix=\"/\"><file>resources/icon.png</file></qresource></RCC>")
+        os.makedirs(os.path.join(self.project, "GeneratedFiles"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, fileName, text):
+        path = os.path.join(self.directory.name, *fileName.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def runs(self):
+        return self.read(self.log).splitlines() if os.path.exists(self.log) else []
+
+    # Runs the stand-in tool through the cache in a project directory
+    def runTool(self, *arguments, project=None, cacheDir=None, shared=None, version="6.99.0"):
+        environment = dict(os.environ, QTVSTOOLS_CACHE_DIR=self.directory.name,
+                           FAKETOOL_LOG=self.log, FAKETOOL_VERSION=version,
+                           PYTHONPATH=TOOLS_DIR)
+        environment.pop("QTVSTOOLS_SHARED_CACHE_DIR", None)
+        command = [sys.executable, os.path.join(TOOLS_DIR, "toolcache.py"),
+                   "--cache", cacheDir or self.cacheDir]
+        if shared:
+            command.extend(["--shared", shared])
+        tool = self.tools[arguments[list(arguments).index("--tool") + 1]]
+        command.extend(["--", sys.executable, tool] + list(arguments))
+        return subprocess.run(command, cwd=project or self.project, env=environment,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+
+    def test_hitsAndMisses(self):
+        moc = ["--tool", "moc", "-I.", "-DQT_CORE_LIB", "widget.h", "-o",
+               os.path.join("GeneratedFiles", "moc_widget.cpp")]
+        output = os.path.join(self.project, "GeneratedFiles", "moc_widget.cpp")
+        self.assertEqual(self.runTool(*moc).returncode, 0)
+        generated = self.read(output)
+        self.assertIn("from '../widget.h'", generated)
+        os.remove(output)
+        self.assertEqual(self.runTool(*moc).returncode, 0)
+        self.assertEqual(self.read(output), generated)
+        self.assertEqual(self.runs(), ["moc widget.h"])
+
+        # Tool output is replayed
+        plain = ["--tool", "moc", "plain.h", "-o", os.path.join("GeneratedFiles", "moc_plain.cpp")]
+        first, second = self.runTool(*plain), self.runTool(*plain)
+        self.assertIn("No relevant classes found", first.stderr)
+        self.assertEqual(second.stderr, first.stderr)
+        self.assertEqual(len(self.runs()), 2)
+
+        # Same inputs and options in another build directory
+        copy = os.path.join(self.directory.name, "copy")
+        shutil.copytree(self.project, copy)
+        os.remove(os.path.join(copy, "GeneratedFiles", "moc_widget.cpp"))
+        self.assertEqual(self.runTool(*moc, project=copy).returncode, 0)
+        self.assertEqual(self.read(os.path.join(copy, "GeneratedFiles", "moc_widget.cpp")),
+                         generated)
+        self.assertEqual(len(self.runs()), 2)
+
+        # Changed options, input and tool
+        self.runTool(*moc[:3] + moc[4:])
+        self.write("project/widget.h", "class Widget : public QWidget { Q_OBJECT };\n")
+        self.runTool(*moc)
+        self.assertEqual(len(self.runs()), 4)
+        self.runTool(*moc, version="7.0.0")
+        self.assertEqual(len(self.runs()), 4)  # The version of an unchanged tool is cached
+        with open(self.tools["moc"], "a", encoding="utf-8") as f:
+            f.write("\n")
+        self.runTool(*moc, version="7.0.0")
+        self.assertEqual(len(self.runs()), 5)
+
+    def test_includedHeaders(self):
+        self.write("project/widget.h", '#include "interface.h"\nclass Widget : public QObject, '
+                                       'public Interface {\n    Q_OBJECT\n};\n')
+        self.write("project/include/interface.h",
+                   'Q_DECLARE_INTERFACE(Interface, "org.qt-project.Interface/1.0")\n')
+        moc = ["--tool", "moc", "-Iinclude", "widget.h", "-o",
+               os.path.join("GeneratedFiles", "moc_widget.cpp")]
+        output = os.path.join(self.project, "GeneratedFiles", "moc_widget.cpp")
+        self.runTool(*moc)
+        self.runTool(*moc)
+        self.assertEqual(len(self.runs()), 1)
+        generated = self.read(output)
+
+        # Only the included header changes
+        self.write("project/include/interface.h",
+                   'Q_DECLARE_INTERFACE(Interface, "org.qt-project.Interface/2.0")\n')
+        self.runTool(*moc)
+        self.assertEqual(len(self.runs()), 2)
+        self.assertNotEqual(self.read(output), generated)
+        self.runTool(*moc)
+        self.assertEqual(len(self.runs()), 2)
+        # The dependency files of the cache are removed
+        self.assertEqual(os.listdir(os.path.dirname(output)), ["moc_widget.cpp"])
+
+        # An invocation writing its own dependency file isn't cached
+        self.runTool(*moc + ["--output-dep-file"])
+        self.assertEqual(len(self.runs()), 3)
+
+    def test_resources(self):
+        rcc = ["--tool", "rcc", "app.qrc", "-o", os.path.join("GeneratedFiles", "qrc_app.cpp")]
+        self.runTool(*rcc)
+        self.runTool(*rcc)
+        self.assertEqual(len(self.runs()), 1)
+        self.write("project/resources/icon.png", "changed")
+        self.runTool(*rcc)
+        self.assertEqual(len(self.runs()), 2)
+        self.assertIn(":/resources/icon.png", self.read(
+            os.path.join(self.project, "GeneratedFiles", "qrc_app.cpp")))
+
+        # Missing resources and dependency files
+        os.remove(os.path.join(self.project, "resources", "icon.png"))
+        self.assertEqual(self.runTool(*rcc).returncode, 1)
+        self.write("project/resources/icon.png", "png")
+        self.runTool(*rcc + ["--depfile", "qrc_app.d"])
+        self.runTool(*rcc + ["--depfile", "qrc_app.d"])
+        self.assertEqual(len(self.runs()), 5)
+
+        report = toolcache.ToolCache(self.cacheDir).report()["rcc"]
+        self.assertEqual((report["invocations"], report["hits"], report["misses"],
+                          report["notCached"]), (6, 1, 2, 3))
+        self.assertAlmostEqual(report["hitRate"], 1 / 3)
+        self.assertGreater(report["bytesSaved"], 0)
+
+    def test_sharedCache(self):
+        uic = ["--tool", "uic", "widget.h", "-o", os.path.join("GeneratedFiles", "ui_widget.h")]
+        shared = os.path.join(self.directory.name, "shared")
+        self.runTool(*uic, cacheDir=shared)
+        entries = sorted(os.listdir(shared))
+        self.runTool(*uic, shared=shared)
+        self.runTool(*uic, shared=shared)
+        self.assertEqual(len(self.runs()), 1)
+        self.assertEqual(sorted(os.listdir(shared)), entries)
+        report = toolcache.ToolCache(self.cacheDir).report()["uic"]
+        self.assertEqual((report["hits"], report["sharedHits"], report["misses"]), (1, 1, 0))
+
+    def test_leastRecentlyUsed(self):
+        # Room for two entries in each subdirectory
+        toolCache = toolcache.ToolCache(self.cacheDir, maxSize=16 * 300 / 1000000)
+        output = os.path.join(self.directory.name, "output.cpp")
+        self.write("output.cpp", "x" * 60)
+        keys = ["a%d" % index + "0" * 62 for index in range(3)]
+        for index, key in enumerate(keys[:2]):
+            toolCache.store(key, output, b"", b"")
+            path = toolCache.entryPath(self.cacheDir, key)
+            os.utime(path, ns=(index * 10 ** 9, index * 10 ** 9))
+        # keys[0] is used, so keys[1] is the least recently used one
+        self.assertEqual(toolCache.restore(keys[0], output)[0], "hit")
+        toolCache.store(keys[2], output, b"", b"")
+        self.assertEqual([os.path.exists(toolCache.entryPath(self.cacheDir, key)) for key in keys],
+                         [True, False, True])
+        self.assertEqual(toolCache.restore(keys[1], output), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+
+import workrunner
+
+FAKE_TOOL = os.path.join(TOOLS_DIR, "faketool.py")
+
+
+def command(code):
+    return [sys.executable, "-c", code]
+
+
+class TestWorkRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.project = os.path.join(self.directory.name, "project")
+        os.makedirs(self.project)
+        self.durationsFile = os.path.join(self.directory.name, "work_durations.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, fileName, text):
+        with open(os.path.join(self.project, fileName), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def runWork(self, data, workers=2, host=None):
+        runner = workrunner.WorkRunner(workrunner.loadWorkList(data), workers, host,
+                                       self.durationsFile, io.StringIO())
+        ok = runner.run()
+        return ok, runner.report(), runner.output.getvalue()
+
+    def toolItems(self):
+        self.write("widget.ui", "<ui/>")
+        self.write("widget.h", '#include "ui_widget.h"\nclass Widget { Q_OBJECT };\n')
+        generated = os.path.join("GeneratedFiles", "Debug")
+        return [
+            {"workType": "moc", "identity": "widget.h", "dependsOn": ["widget.ui"],
+             "command": [sys.executable, FAKE_TOOL, "--tool", "moc", "widget.h",
+                         "-o", os.path.join(generated, "moc_widget.cpp")],
+             "inputs": ["widget.h"], "outputs": [os.path.join(generated, "moc_widget.cpp")],
+             "workingDirectory": self.project},
+            {"workType": "uic", "identity": "widget.ui",
+             "command": [sys.executable, FAKE_TOOL, "--tool", "uic", "widget.ui",
+                         "-o", os.path.join(generated, "ui_widget.h")],
+             "inputs": ["widget.ui"], "outputs": [os.path.join(generated, "ui_widget.h")],
+             "workingDirectory": self.project, "message": "uic widget.ui"}]
+
+    def test_dependencies(self):
+        items = self.toolItems()
+        ok, report, output = self.runWork(items)
+        self.assertTrue(ok, output)
+        self.assertEqual(output.splitlines()[0], "uic widget.ui")
+        self.assertTrue(os.path.isfile(os.path.join(self.project, "GeneratedFiles", "Debug",
+                                                    "moc_widget.cpp")))
+        moc, uic = report["items"]
+        self.assertEqual((moc["key"], uic["key"]), ("moc{widget.h}", "uic{widget.ui}"))
+        self.assertGreaterEqual(moc["start"], uic["end"])
+        self.assertEqual(report["counts"], {"ran": 2, "skipped": 0, "failed": 0, "not run": 0})
+
+        # Outputs newer than inputs
+        ok, report, output = self.runWork(items)
+        self.assertEqual(report["counts"]["skipped"], 2)
+        self.assertEqual(output, "")
+
+        # moc runs after uic, although its own input did not change
+        uiFile = os.path.join(self.project, "widget.ui")
+        modified = os.stat(uiFile).st_mtime_ns + 10 ** 9
+        os.utime(uiFile, ns=(modified, modified))
+        ok, report, output = self.runWork(items)
+        self.assertEqual(report["counts"]["ran"], 2)
+
+    def test_criticalPathFirst(self):
+        items = [{"identity": "b", "command": command("pass"), "cost": 3},
+                 {"identity": "c", "command": command("pass"), "cost": 5, "dependsOn": ["a"]},
+                 {"identity": "a", "command": command("pass"), "cost": 1}]
+        ok, report, _ = self.runWork(items, workers=1)
+        self.assertTrue(ok)
+        order = [item["key"] for item in sorted(report["items"], key=lambda item: item["start"])]
+        self.assertEqual(order, ["{a}", "{c}", "{b}"])
+        self.assertEqual([item["criticalPath"] for item in report["items"]], [3, 5, 6])
+
+        # Durations measured in a run replace the costs
+        with open(self.durationsFile, encoding="utf-8") as f:
+            durations = json.load(f)["data"]
+        self.assertEqual(sorted(durations), ["{a}", "{b}", "{c}"])
+        items = workrunner.loadWorkList(items)
+        workrunner.computeCriticalPaths(items, {"{b}": 10.0})
+        self.assertEqual(items["{b}"].criticalPath, 10.0)
+
+    def test_failure(self):
+        items = [{"identity": "fails", "command": command("import sys; print('broken');"
+                                                          " sys.exit(3)"), "cost": 2},
+                 {"identity": "dependent", "command": command("pass"), "dependsOn": ["fails"]},
+                 {"identity": "other", "command": command("pass")}]
+        ok, report, output = self.runWork(items, workers=1)
+        self.assertFalse(ok)
+        self.assertIn("broken\nerror: {fails} failed with exit code 3", output)
+        self.assertEqual([(item["key"], item["result"]) for item in report["items"]],
+                         [("{fails}", "failed"), ("{dependent}", "not run"),
+                          ("{other}", "not run")])
+
+        worklist = os.path.join(self.directory.name, "worklist.json")
+        with open(worklist, "w", encoding="utf-8") as f:
+            json.dump(items, f)
+        reportFile = os.path.join(self.directory.name, "report.json")
+        self.assertEqual(workrunner.main([worklist, "--workers", "1", "--report", reportFile,
+                                          "--durations", self.durationsFile]), 1)
+        with open(reportFile, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["counts"]["failed"], 1)
+
+    def test_circularDependency(self):
+        items = [{"identity": "a", "command": "", "dependsOn": ["b"]},
+                 {"identity": "b", "command": "", "dependsOn": ["a"]},
+                 {"identity": "c", "command": ""}]
+        with self.assertRaisesRegex(workrunner.WorkError, r"circular dependency: \{a\}, \{b\}"):
+            self.runWork(items)
+
+    @unittest.skipUnless(shutil.which("sh"), "needs a POSIX shell")
+    def test_host(self):
+        items = [{"identity": "copy", "command": "cp input.txt out/dir/output.txt",
+                  "workingDirectory": self.project, "inputs": ["input.txt"],
+                  "outputs": ["out/dir/output.txt"]}]
+        self.write("input.txt", "text")
+        ok, report, output = self.runWork(items, host="sh -c")
+        self.assertTrue(ok, output)
+        with open(os.path.join(self.project, "out", "dir", "output.txt"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "text")
+
+        # The paths are on the host, so the item isn't skipped, although it is up to date here
+        ok, report, output = self.runWork(items, host="sh -c")
+        self.assertEqual(report["counts"]["ran"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,441 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Cache of the outputs of moc, uic and rcc, shared by build directories, branches and machines.
+# It runs in place of the tool of a work item, i.e. %(QtWork.ToolPath) %(QtWork.Options), and
+# restores the output, e.g. moc_*.cpp, ui_*.h or qrc_*.cpp, if the tool already produced it from
+# the same inputs. The key of an output is made of:
+#   * the version the tool prints with -v, cached by the modification time and size of the tool,
+#     and of the script if the tool is a Python script;
+#   * the options, in which paths are made relative to the output directory;
+#   * the content of the files named by the options, e.g. the input and moc_predefs.h, and of the
+#     files listed by .qrc files;
+#   * for moc, the content of the headers it read through #include, e.g. macros and the IIDs of
+#     Q_DECLARE_INTERFACE. The cache runs moc with --output-dep-file and keeps the list of files
+#     it read next to the entries; a lookup hashes the files of that list.
+# Invocations writing other files than their output, e.g. their own dependency files, are not
+# cached.
+#
+# Entries are files in 16 subdirectories, written to a temporary file and renamed, so that builds
+# running at the same time never see half an entry. Each subdirectory holds a 16th of the maximum
+# size; when an entry is stored, the least recently used entries of its subdirectory are removed
+# until it fits. A second, shared cache, e.g. on a network drive filled by CI builds, is only read:
+# its entries are copied into the local cache when used.
+#
+# Each invocation appends its outcome to stats.jsonl, from which --report computes the hit rate
+# and the bytes and time saved.
+#
+#   python toolcache.py [--cache DIRECTORY] [--shared DIRECTORY] [--max-size MB] -- TOOL ARGS...
+#   python toolcache.py --report [--cache DIRECTORY]
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import cache
+import qrcindex
+
+CACHE_FORMAT = 1
+DEFAULT_MAX_SIZE = 1024  # MB
+SUBDIRECTORIES = "0123456789abcdef"
+STATS_FILE = "stats.jsonl"
+# Options of moc, uic and rcc with which they write more than their output
+UNCACHEABLE_OPTIONS = {"--output-dep-file", "--dep-file-path", "--output-json", "--collect-json",
+                       "-d", "--depfile", "--pass", "--temp", "-t"}
+OUTPUT_OPTIONS = {"-o", "--output"}
+# Options with which tools reading more files than their options name list them in a file
+DEPENDENCY_OPTIONS = {"moc": ["--output-dep-file", "--dep-file-path"]}
+
+
+def defaultCacheDir():
+    return os.path.join(cache.cacheDir(), "tool_outputs")
+
+
+def _hashFile(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Returns the arguments of a command line with the content of @options files
+def _expandOptionsFiles(arguments):
+    expanded = []
+    for argument in arguments:
+        if argument.startswith("@") and os.path.isfile(argument[1:]):
+            with open(argument[1:], encoding="utf-8") as f:
+                expanded.extend(line.strip() for line in f if line.strip())
+        else:
+            expanded.append(argument)
+    return expanded
+
+
+# Splits a command into the tool, with the script if it is run by Python, and its arguments
+def splitCommand(command):
+    path = command[0] if command and os.path.isfile(command[0]) else (
+        shutil.which(command[0]) if command else None)
+    if not path:
+        return [], command
+    tool = [os.path.abspath(path)]
+    if (os.path.basename(path).lower().startswith("python") and len(command) > 1
+            and os.path.isfile(command[1])):
+        tool.append(os.path.abspath(command[1]))
+    return tool, command[len(tool):]
+
+
+# The name of a tool, e.g. "moc", from its executable or script
+def toolName(tool):
+    return os.path.splitext(os.path.basename(tool[-1]))[0].lower() if tool else None
+
+
+def toolVersion(tool, cacheFile=None):
+    cacheFile = cacheFile or cache.cacheFile("tool_versions.json")
+    versions = cache.load(cacheFile, CACHE_FORMAT) or {}
+    name = "\n".join(tool)
+    key = [cache.fileKey(path) for path in tool]
+    entry = versions.get(name)
+    if entry is None or entry["key"] != key:
+        completed = subprocess.run(tool + ["-v"], stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT)
+        entry = versions[name] = {"key": key,
+                                  "version": completed.stdout.decode("utf-8", "replace").strip()}
+        cache.save(cacheFile, CACHE_FORMAT, versions)
+    return entry["version"]
+
+
+# Returns the output file and the key of an invocation of a tool, or None and the reason why it
+# cannot be cached
+def invocationKey(command, versionCache=None):
+    tool, arguments = splitCommand(command)
+    if not tool:
+        return None, "tool not found"
+    arguments = _expandOptionsFiles(arguments)
+    output = None
+    for index, argument in enumerate(arguments):
+        option = argument.split("=", 1)[0]
+        if option in UNCACHEABLE_OPTIONS:
+            return None, "%s is not cached" % option
+        if argument in OUTPUT_OPTIONS and index + 1 < len(arguments):
+            output = os.path.abspath(arguments[index + 1])
+    if output is None:
+        return None, "no output file"
+    outputDir = os.path.dirname(output)
+
+    def normalized(path):
+        return os.path.relpath(os.path.abspath(path), outputDir).replace("\\", "/")
+
+    key = [CACHE_FORMAT, toolVersion(tool, versionCache), os.path.basename(output)]
+    previous = None
+    for argument in arguments:
+        if previous in OUTPUT_OPTIONS:
+            pass
+        elif os.path.isfile(argument):
+            key.append(["file", normalized(argument), _hashFile(argument)])
+            if argument.endswith(".qrc"):
+                with open(argument, "rb") as f:
+                    resources, problems = qrcindex.parseQrc(argument, f.read())
+                if problems:
+                    return None, "%s %s" % (argument, problems[0])
+                for resource in resources:
+                    if not os.path.isfile(resource["file"]):
+                        return None, "%s is missing" % resource["file"]
+                    key.append(["resource", normalized(resource["file"]),
+                                _hashFile(resource["file"])])
+        elif argument.startswith("-I") and os.path.isdir(argument[2:]):
+            key.append(["-I", normalized(argument[2:])])
+        elif os.path.isdir(argument):
+            key.append(["directory", normalized(argument)])
+        elif argument not in OUTPUT_OPTIONS:
+            key.append(argument)
+        previous = argument
+    return output, hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+
+# Returns the files listed by a dependency file, a make rule with the output as its target
+def readDependencyFile(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read().replace("\\\n", " ")
+    separator = re.search(r":\s", text)  # Not the colon of a drive
+    if separator is None:
+        raise ValueError("%s is no make rule" % path)
+    return [token.replace("\\ ", " ").replace("$$", "$")
+            for token in re.findall(r"(?:\\ |\S)+", text[separator.end():])]
+
+
+# The key of an output of a tool reading other files than its options name: the key of the
+# invocation and the content of the dependencies, paths relative to the output directory. None if
+# a dependency is missing.
+def dependencyKey(key, output, dependencies):
+    outputDir = os.path.dirname(output)
+    hashes = []
+    for dependency in dependencies:
+        path = os.path.join(outputDir, dependency)
+        if not os.path.isfile(path):
+            return None
+        hashes.append([dependency, _hashFile(path)])
+    return hashlib.sha256(json.dumps([key, hashes]).encode("utf-8")).hexdigest()
+
+
+class ToolCache:
+
+    def __init__(self, directory=None, shared=None, maxSize=DEFAULT_MAX_SIZE, versionCache=None):
+        self.directory = directory or defaultCacheDir()
+        self.shared = shared
+        self.maxSize = int(maxSize * 1000000)
+        self.versionCache = versionCache
+
+    def entryPath(self, directory, key):
+        return os.path.join(directory, key[0], key + ".entry")
+
+    # The dependencies of the last output of an invocation are kept next to the entries
+    def dependenciesPath(self, directory, key):
+        return os.path.join(directory, key[0], key + ".deps")
+
+    # Returns the key of the output of an invocation, from the dependencies it had the last time,
+    # or None if they aren't known
+    def outputKey(self, key, output):
+        for directory in filter(None, [self.directory, self.shared]):
+            dependencies = cache.load(self.dependenciesPath(directory, key), CACHE_FORMAT)
+            if dependencies is not None:
+                if directory == self.shared:
+                    cache.save(self.dependenciesPath(self.directory, key), CACHE_FORMAT,
+                               dependencies)
+                return dependencyKey(key, output, dependencies)
+        return None
+
+    # Keeps the dependencies listed by the tool and returns the key of the output, or None if the
+    # tool didn't list them
+    def storeDependencies(self, key, output, dependencyFile):
+        try:
+            paths = readDependencyFile(dependencyFile)
+        except (OSError, ValueError):
+            return None
+        outputDir = os.path.dirname(output)
+        dependencies = []
+        for path in paths:
+            try:
+                dependencies.append(os.path.relpath(os.path.abspath(path), outputDir)
+                                    .replace("\\", "/"))
+            except ValueError:
+                dependencies.append(os.path.abspath(path))  # On another drive
+        cache.save(self.dependenciesPath(self.directory, key), CACHE_FORMAT, dependencies)
+        return dependencyKey(key, output, dependencies)
+
+    # Writes the output of an entry to a file, and returns the standard output and error of the
+    # tool and the size of the output, or None if the entry cannot be read
+    def _restoreFrom(self, entryPath, output):
+        try:
+            with open(entryPath, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("format") != CACHE_FORMAT:
+                    return None
+                stdout = f.read(header["stdout"])
+                stderr = f.read(header["stderr"])
+                fd, temporary = tempfile.mkstemp(dir=os.path.dirname(output), suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as outputFile:
+                        shutil.copyfileobj(f, outputFile)
+                    if os.path.getsize(temporary) != header["size"]:
+                        raise ValueError("truncated entry")
+                    os.replace(temporary, output)
+                except BaseException:
+                    os.remove(temporary)
+                    raise
+        except (OSError, ValueError, KeyError):
+            return None
+        return stdout, stderr, header["size"]
+
+    # Restores an output, and tells where it came from: "hit", "shared hit", or None
+    def restore(self, key, output):
+        entryPath = self.entryPath(self.directory, key)
+        result = self._restoreFrom(entryPath, output)
+        if result is not None:
+            try:
+                os.utime(entryPath)  # Most recently used
+            except OSError:
+                pass
+            return "hit", result
+        if self.shared:
+            result = self._restoreFrom(self.entryPath(self.shared, key), output)
+            if result is not None:
+                self.store(key, output, result[0], result[1])
+                return "shared hit", result
+        return None, None
+
+    def store(self, key, output, stdout, stderr):
+        directory = os.path.join(self.directory, key[0])
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                header = {"format": CACHE_FORMAT, "stdout": len(stdout), "stderr": len(stderr),
+                          "size": os.path.getsize(output)}
+                f.write(json.dumps(header).encode("utf-8") + b"\n" + stdout + stderr)
+                with open(output, "rb") as outputFile:
+                    shutil.copyfileobj(outputFile, f)
+            os.replace(temporary, self.entryPath(self.directory, key))
+        except OSError:
+            return  # The output will be produced again next time
+        self.trim(key[0])
+
+    # Removes the least recently used entries of subdirectories until they fit in the maximum size
+    def trim(self, subdirectories=SUBDIRECTORIES):
+        limit = self.maxSize // len(SUBDIRECTORIES)
+        for subdirectory in subdirectories:
+            try:
+                entries = sorted((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+                                 for entry in os.scandir(os.path.join(self.directory,
+                                                                      subdirectory))
+                                 if entry.name.endswith(".entry"))
+            except OSError:
+                continue
+            size = sum(entry[1] for entry in entries)
+            for _, entrySize, path in entries:
+                if size <= limit:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue  # In use, or removed by another build
+                size -= entrySize
+
+    def record(self, event):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, STATS_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
+        except OSError:
+            pass
+
+    # Runs a tool, or restores its output from the cache, and returns its exit code
+    def run(self, command):
+        started = time.perf_counter()
+        try:
+            output, key = invocationKey(command, self.versionCache)
+        except OSError as e:
+            output, key = None, str(e)
+        tool, _ = splitCommand(command)
+        event = {"tool": toolName(tool)}
+        if output is None:
+            event.update(result="not cached", reason=key)
+            returnCode = subprocess.run(command).returncode
+        else:
+            dependencyOptions = DEPENDENCY_OPTIONS.get(event["tool"])
+            outputKey = self.outputKey(key, output) if dependencyOptions else key
+            result, restored = self.restore(outputKey, output) if outputKey else (None, None)
+            if result is not None:
+                stdout, stderr, size = restored
+                event.update(result=result, bytes=size)
+                returnCode = 0
+            else:
+                dependencyFile = None
+                if dependencyOptions:
+                    try:
+                        fd, dependencyFile = tempfile.mkstemp(dir=os.path.dirname(output),
+                                                              suffix=".d")
+                        os.close(fd)
+                    except OSError:
+                        outputKey = None  # The tool will fail to write its output, too
+                try:
+                    completed = subprocess.run(
+                        command + (dependencyOptions + [dependencyFile] if dependencyFile
+                                   else []), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                    stdout, stderr = completed.stdout, completed.stderr
+                    returnCode = completed.returncode
+                    event.update(result="miss")
+                    if returnCode == 0 and os.path.isfile(output):
+                        if dependencyFile:
+                            outputKey = self.storeDependencies(key, output, dependencyFile)
+                        if outputKey:
+                            self.store(outputKey, output, stdout, stderr)
+                finally:
+                    if dependencyFile:
+                        os.remove(dependencyFile)
+            sys.stdout.buffer.write(stdout)
+            sys.stdout.flush()
+            sys.stderr.buffer.write(stderr)
+            sys.stderr.flush()
+        event["seconds"] = time.perf_counter() - started
+        self.record(event)
+        return returnCode
+
+    def report(self):
+        events = []
+        try:
+            with open(os.path.join(self.directory, STATS_FILE), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        pass  # Written while reading
+        except OSError:
+            pass
+        report = {}
+        for tool in sorted({event["tool"] for event in events if event["tool"]}):
+            toolEvents = [event for event in events if event["tool"] == tool]
+            misses = [event["seconds"] for event in toolEvents if event["result"] == "miss"]
+            hits = [event for event in toolEvents if event["result"].endswith("hit")]
+            cacheable = len(misses) + len(hits)
+            averageMiss = sum(misses) / len(misses) if misses else 0.0
+            report[tool] = {
+                "invocations": len(toolEvents),
+                "hits": len([event for event in hits if event["result"] == "hit"]),
+                "sharedHits": len([event for event in hits if event["result"] == "shared hit"]),
+                "misses": len(misses),
+                "notCached": len(toolEvents) - cacheable,
+                "hitRate": len(hits) / cacheable if cacheable else 0.0,
+                "bytesSaved": sum(event["bytes"] for event in hits),
+                "secondsSaved": max(0.0, sum(averageMiss - event["seconds"] for event in hits))}
+        return report
+
+
+def formatReport(report):
+    lines = ["%-10s %8s %8s %8s %8s %10s %8s %12s %10s" % (
+        "Tool", "Runs", "Hits", "Shared", "Misses", "Not cached", "Hit rate", "Bytes saved",
+        "Time saved")]
+    for tool, counts in report.items():
+        lines.append("%-10s %8d %8d %8d %8d %10d %7.1f%% %12d %9.1fs" % (
+            tool, counts["invocations"], counts["hits"], counts["sharedHits"], counts["misses"],
+            counts["notCached"], 100 * counts["hitRate"], counts["bytesSaved"],
+            counts["secondsSaved"]))
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Run moc, uic or rcc, or restore their output "
+                                                 "from a cache.")
+    parser.add_argument("command", nargs="*", help="tool and arguments, after --")
+    parser.add_argument("--cache", help="cache directory (default: %s)"
+                                        % defaultCacheDir().replace("%", "%%"))
+    parser.add_argument("--shared", default=os.getenv("QTVSTOOLS_SHARED_CACHE_DIR"),
+                        help="read-only shared cache directory "
+                             "(default: QTVSTOOLS_SHARED_CACHE_DIR)")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE,
+                        help="maximum size of the cache in MB (default: %d)" % DEFAULT_MAX_SIZE)
+    parser.add_argument("--report", action="store_true", help="print the hit rate and savings")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    toolCache = ToolCache(args.cache, args.shared, args.max_size)
+    if args.report:
+        report = toolCache.report()
+        print(json.dumps(report, indent=2) if args.json else formatReport(report))
+        return 0
+    if not args.command:
+        parser.error("no tool given")
+    return toolCache.run(args.command)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,294 @@
+####################################################################################################
+# Copyright (C) 2024 The Qt Company Ltd.
+# SPDX-License-Identifier: LicenseRef-Qt-Commercial OR GPL-3.0-only WITH Qt-GPL-exception-1.0
+####################################################################################################
+
+# -*- coding: utf-8 -*-
+
+# Runs a list of Qt tool work items, like the QtRunWork task of QtMSBuild/QtMsBuild/qt_work.targets,
+# but outside of MSBuild and with as many processes as there are cores. The work list is a JSON
+# array of items with the metadata of QtWork items:
+#
+#   {"workType": "moc", "identity": "widget.h", "command": "moc.exe widget.h -o moc_widget.cpp",
+#    "inputs": ["widget.h"], "outputs": ["moc_widget.cpp"], "dependsOn": ["form.ui"],
+#    "dependsOnWork": ["uic"], "workingDirectory": "C:\\work\\project", "message": "moc widget.h"}
+#
+# As in QtRunWork, the key of an item is "workType{identity}", dependsOn names the identities of
+# the items an item depends on, and dependsOnWork other work types of the same identity. Commands
+# are command lines run by the shell, or lists of arguments. With --host, e.g. "wsl.exe -e sh -c"
+# or "ssh buildhost", command lines run on a Linux build host instead, like with the HostExec
+# tasks: in the working directory, after creating the directories of the outputs. As their
+# inputs and outputs are paths on the host, items run on a host are never skipped as up to date.
+#
+# Items ready to run are started in the order of the longest path of work they lead to, so that
+# the critical path starts first. The cost of an item is its duration in previous runs, or its
+# "cost", or 1 second. Items whose outputs are newer than their inputs are skipped, unless one of
+# their dependencies ran. As in QtRunWork, no item is started after one failed.
+#
+#   python workrunner.py WORKLIST.json [--workers N] [--host PREFIX] [--report FILE]
+
+import concurrent.futures
+import heapq
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+import cache
+
+CACHE_FORMAT = 1
+DEFAULT_COST = 1.0
+
+
+class WorkError(Exception):
+    pass
+
+
+def itemKey(workType, identity):
+    return "%s{%s}" % (workType, identity)
+
+
+class WorkItem:
+
+    def __init__(self, data, index):
+        self.workType = data.get("workType", "")
+        self.identity = data["identity"]
+        self.key = itemKey(self.workType, self.identity)
+        self.command = data["command"]
+        self.workingDirectory = data.get("workingDirectory")
+        self.inputs = [self.path(path) for path in data.get("inputs", [])]
+        self.outputs = [self.path(path) for path in data.get("outputs", [])]
+        self.dependsOnIdentities = data.get("dependsOn", [])
+        self.dependsOnWork = data.get("dependsOnWork", [])
+        self.message = data.get("message") or "%s %s" % (self.workType, self.identity)
+        self.cost = data.get("cost")
+        self.index = index
+        self.dependsOn = set()
+        self.dependents = []
+        self.criticalPath = 0.0
+
+    def path(self, path):
+        if self.workingDirectory and not os.path.isabs(path):
+            return os.path.join(self.workingDirectory, path)
+        return path
+
+    def isUpToDate(self):
+        if not self.inputs or not self.outputs:
+            return False
+        try:
+            newestInput = max(os.stat(path).st_mtime_ns for path in self.inputs)
+            oldestOutput = min(os.stat(path).st_mtime_ns for path in self.outputs)
+        except OSError:
+            return False
+        return oldestOutput >= newestInput
+
+
+# Returns the work items by key, with their dependencies
+def loadWorkList(data):
+    items = {}
+    for index, itemData in enumerate(data):
+        missing = [field for field in ["identity", "command"] if field not in itemData]
+        if missing:
+            raise WorkError("work item %d has no %s" % (index, missing[0]))
+        item = WorkItem(itemData, index)
+        items.setdefault(item.key, item)  # Like QtRunWork, only the first of duplicates is used
+    byIdentity = {}
+    for item in items.values():
+        byIdentity.setdefault(item.identity.lower(), []).append(item.key)
+    for item in items.values():
+        for identity in item.dependsOnIdentities:
+            item.dependsOn.update(byIdentity.get(identity.lower(), []))
+        item.dependsOn.update(key for key in (itemKey(workType, item.identity)
+                                              for workType in item.dependsOnWork)
+                              if key in items)
+        item.dependsOn.discard(item.key)
+        for dependency in item.dependsOn:
+            items[dependency].dependents.append(item.key)
+    return items
+
+
+# Sets the length of the longest path of work starting with each item
+def computeCriticalPaths(items, costs):
+    pending = {key: len(item.dependents) for key, item in items.items()}
+    stack = [key for key, count in pending.items() if count == 0]
+    done = 0
+    while stack:
+        item = items[stack.pop()]
+        cost = costs.get(item.key, item.cost if item.cost is not None else DEFAULT_COST)
+        item.criticalPath = cost + max((items[key].criticalPath for key in item.dependents),
+                                       default=0.0)
+        done += 1
+        for dependency in item.dependsOn:
+            pending[dependency] -= 1
+            if pending[dependency] == 0:
+                stack.append(dependency)
+    if done < len(items):
+        raise WorkError("circular dependency: %s" % ", ".join(
+            sorted(key for key, count in pending.items() if count > 0)))
+
+
+class WorkRunner:
+
+    def __init__(self, items, workers=None, host=None, durationsFile=None, output=None):
+        self.items = items
+        self.workers = workers or os.cpu_count() or 1
+        self.host = shlex.split(host) if isinstance(host, str) else host
+        self.durationsFile = durationsFile or cache.cacheFile("work_durations.json")
+        self.output = output or sys.stdout
+        self.results = {}
+
+    def commandOf(self, item):
+        command = item.command
+        if self.host:
+            if not isinstance(command, str):
+                command = " ".join(shlex.quote(argument) for argument in command)
+            directories = sorted({os.path.dirname(path) for path in item.outputs} - {""})
+            command = "; ".join(["mkdir -p %s" % shlex.quote(directory)
+                                 for directory in directories]
+                                + ["(%s)" % command])
+            if item.workingDirectory:
+                command = "cd %s; %s" % (shlex.quote(item.workingDirectory), command)
+            return self.host + [command], False
+        for directory in {os.path.dirname(path) for path in item.outputs} - {""}:
+            os.makedirs(directory, exist_ok=True)
+        return command, isinstance(command, str)
+
+    def _runItem(self, item):
+        started = time.perf_counter()
+        try:
+            command, shell = self.commandOf(item)
+            completed = subprocess.run(command, shell=shell, cwd=None if self.host else
+                                       item.workingDirectory, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT)
+            exitCode, text = completed.returncode, completed.stdout.decode("utf-8", "replace")
+        except OSError as e:
+            exitCode, text = None, "Error starting process: %s\n" % e
+        return exitCode, text, started, time.perf_counter()
+
+    def _log(self, text):
+        self.output.write(text)
+        self.output.flush()
+
+    # Runs the items and returns whether all succeeded
+    def run(self):
+        durations = cache.load(self.durationsFile, CACHE_FORMAT) or {}
+        computeCriticalPaths(self.items, durations)
+        self.started = time.perf_counter()
+        waiting = {key: len(item.dependsOn) for key, item in self.items.items()}
+        ranDependencies = set()
+        ready = []
+
+        def release(item, ran):
+            for key in item.dependents:
+                waiting[key] -= 1
+                if ran:
+                    ranDependencies.add(key)
+                if waiting[key] == 0:
+                    dependent = self.items[key]
+                    heapq.heappush(ready, (-dependent.criticalPath, dependent.index, key))
+
+        for key, count in waiting.items():
+            if count == 0:
+                item = self.items[key]
+                heapq.heappush(ready, (-item.criticalPath, item.index, key))
+        ok = True
+        running = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while ready or running:
+                while ok and ready and len(running) < self.workers:
+                    item = self.items[heapq.heappop(ready)[2]]
+                    # The inputs and outputs of commands run on a build host are paths on the
+                    # host, their modification times can't be compared here
+                    if (not self.host and item.key not in ranDependencies
+                            and item.isUpToDate()):
+                        now = time.perf_counter() - self.started
+                        self.results[item.key] = {"result": "skipped", "start": now, "end": now}
+                        release(item, False)
+                        continue
+                    self._log(item.message + "\n")
+                    running[executor.submit(self._runItem, item)] = item
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(running,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    exitCode, text, started, ended = future.result()
+                    if text:
+                        self._log(text if text.endswith("\n") else text + "\n")
+                    self.results[item.key] = {"result": "ran" if exitCode == 0 else "failed",
+                                              "exitCode": exitCode,
+                                              "start": started - self.started,
+                                              "end": ended - self.started}
+                    if exitCode == 0:
+                        durations[item.key] = ended - started
+                        release(item, True)
+                    else:
+                        self._log("error: %s failed with exit code %s\n" % (item.key, exitCode))
+                        ok = False
+        self.wall = time.perf_counter() - self.started
+        cache.save(self.durationsFile, CACHE_FORMAT, durations)
+        for key in self.items:
+            self.results.setdefault(key, {"result": "not run"})
+        return ok
+
+    def report(self):
+        items = []
+        for key, item in sorted(self.items.items(), key=lambda entry: entry[1].index):
+            result = dict(self.results[key], key=key, criticalPath=item.criticalPath)
+            if "end" in result:
+                result["seconds"] = result["end"] - result["start"]
+            items.append(result)
+        busy = sum(item.get("seconds", 0.0) for item in items)
+        return {"wall": self.wall,
+                "workers": self.workers,
+                "busy": busy,
+                "utilization": busy / (self.wall * self.workers) if self.wall else 0.0,
+                "counts": {result: len([item for item in items if item["result"] == result])
+                           for result in ["ran", "skipped", "failed", "not run"]},
+                "items": items}
+
+
+def formatReport(report):
+    lines = ["%-40s %-8s %9s %9s %9s" % ("Item", "Result", "Start", "Seconds", "Path")]
+    for item in sorted(report["items"], key=lambda item: item.get("start", float("inf"))):
+        lines.append("%-40s %-8s %9s %9s %9.2f" % (
+            item["key"], item["result"],
+            "%.2f" % item["start"] if "start" in item else "",
+            "%.2f" % item["seconds"] if "seconds" in item else "", item["criticalPath"]))
+    lines.append("%s; %.2f s with %d workers, %.0f%% busy" % (
+        ", ".join("%d %s" % (count, result) for result, count in report["counts"].items()),
+        report["wall"], report["workers"], 100 * report["utilization"]))
+    return "\n".join(lines)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Run Qt tool work items in parallel.")
+    parser.add_argument("worklist", help="JSON file with the work items")
+    parser.add_argument("--workers", type=int, help="number of processes (default: cores)")
+    parser.add_argument("--host", help="command running a command line on a build host, e.g. "
+                                       "\"wsl.exe -e sh -c\"")
+    parser.add_argument("--report", help="JSON file to write the timing of each item to")
+    parser.add_argument("--durations", help="cache file of the durations of previous runs")
+    args = parser.parse_args(argv)
+    try:
+        with open(args.worklist, encoding="utf-8") as f:
+            items = loadWorkList(json.load(f))
+        runner = WorkRunner(items, args.workers, args.host, args.durations)
+        ok = runner.run()
+    except (OSError, ValueError, WorkError) as e:
+        print("error: %s" % e, file=sys.stderr)
+        return 2
+    report = runner.report()
+    print(formatReport(report))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))